@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import os
@@ -209,9 +210,24 @@ class PersistentConfig(Generic[T]):
         self.config_value = self.value
 
 
+REDIS_CONFIG_KEY_PREFIX = "open-webui:config"
+REDIS_CONFIG_VERSION_KEY = "open-webui:config-version"
+REDIS_CONFIG_PUBSUB_CHANNEL = "open-webui:config-updates"
+
+
 class AppConfig:
+    """
+    In-process snapshot of the persistent config.
+
+    Reads are plain memory lookups. With Redis, every write is stored under
+    its own key, bumps a global version counter and is published to the other
+    instances, which apply it through `redis_config_listener`. A gap in the
+    versions (e.g. a dropped pub/sub connection) triggers a full resync.
+    """
+
     _state: dict[str, PersistentConfig]
     _redis: Optional[redis.Redis] = None
+    _version: int = 0
 
     def __init__(
         self, redis_url: Optional[str] = None, redis_sentinels: Optional[list] = []
@@ -231,31 +247,119 @@ class AppConfig:
             self._state[key].save()
 
             if self._redis:
-                redis_key = f"open-webui:config:{key}"
-                self._redis.set(redis_key, json.dumps(self._state[key].value))
+                redis_value = json.dumps(self._state[key].value)
+
+                pipe = self._redis.pipeline()
+                pipe.set(f"{REDIS_CONFIG_KEY_PREFIX}:{key}", redis_value)
+                pipe.incr(REDIS_CONFIG_VERSION_KEY)
+                _, version = pipe.execute()
+
+                # Only move forward if no update from another instance is
+                # still in flight, otherwise the listener resyncs
+                if version == self._version + 1:
+                    super().__setattr__("_version", version)
+
+                self._redis.publish(
+                    REDIS_CONFIG_PUBSUB_CHANNEL,
+                    json.dumps({"key": key, "value": redis_value, "version": version}),
+                )
 
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
-        if self._redis:
-            redis_key = f"open-webui:config:{key}"
-            redis_value = self._redis.get(redis_key)
+        return self._state[key].value
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get_redis_keys(self) -> list[str]:
+        return [f"{REDIS_CONFIG_KEY_PREFIX}:{key}" for key in self._state]
 
+    def _set_redis_value(self, key: str, redis_value: str):
+        if key not in self._state:
+            return
+
+        try:
+            decoded_value = json.loads(redis_value)
+        except json.JSONDecodeError:
+            log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+            return
+
+        # Update the in-memory value if different
+        if self._state[key].value != decoded_value:
+            self._state[key].value = decoded_value
+            log.info(f"Updated {key} from Redis: {decoded_value}")
+
+    def apply_update(self, key: str, redis_value: str, version: int) -> bool:
+        """
+        Apply an update published by an instance. Returns False if updates
+        were missed and the config needs a full resync.
+        """
+        if version <= self._version:
+            return True
+        if version != self._version + 1:
+            return False
+
+        self._set_redis_value(key, redis_value)
+        super().__setattr__("_version", version)
+        return True
+
+    def apply_snapshot(self, redis_values: dict[str, Optional[str]], version: int):
+        for key, redis_value in redis_values.items():
             if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
+                self._set_redis_value(key, redis_value)
+        super().__setattr__("_version", version)
 
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
 
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+async def sync_config_from_redis(config: AppConfig, redis):
+    keys = list(config._state.keys())
 
-        return self._state[key].value
+    # Read the values and the version they correspond to atomically
+    pipe = redis.pipeline(transaction=True)
+    pipe.get(REDIS_CONFIG_VERSION_KEY)
+    pipe.mget(config.get_redis_keys())
+    version, values = await pipe.execute()
+
+    config.apply_snapshot(dict(zip(keys, values)), int(version or 0))
+
+
+async def redis_config_listener(app):
+    config: AppConfig = app.state.config
+    redis = app.state.redis
+
+    while True:
+        try:
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(REDIS_CONFIG_PUBSUB_CHANNEL)
+
+            # Resync once subscribed, so no update is lost in between
+            await sync_config_from_redis(config, redis)
+
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+
+                try:
+                    update = json.loads(message["data"])
+                    key, value, version = (
+                        update["key"],
+                        update["value"],
+                        int(update["version"]),
+                    )
+                except Exception as e:
+                    log.error(f"Invalid config update from Redis: {e}")
+                    continue
+
+                if not config.apply_update(key, value, version):
+                    log.info(f"Missed config updates, resyncing at version {version}")
+                    await sync_config_from_redis(config, redis)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning(f"Config listener disconnected from Redis: {e}")
+            await asyncio.sleep(1)
 
 
 ####################################
@@ -753,6 +857,18 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# Bytes of remote files kept in the local cache (UPLOAD_DIR/cache), 0 to always
+# download. The bound applies per process: every worker tracks the files it
+# downloads, so with N workers sharing UPLOAD_DIR the cache can take up to
+# N * STORAGE_CACHE_MAX_SIZE until they restart and track the whole directory
+STORAGE_CACHE_MAX_SIZE = int(
+    os.environ.get("STORAGE_CACHE_MAX_SIZE", str(10 * 1024 * 1024 * 1024))
+)
+# Seconds a cached file is served before checking whether it changed remotely
+STORAGE_CACHE_VALIDATION_TTL = int(
+    os.environ.get("STORAGE_CACHE_VALIDATION_TTL", "300")
+)
+
 ####################################
 # File Upload DIR
 ####################################
@@ -1749,6 +1865,9 @@ Ensure that the tools are effectively utilized to achieve the highest-quality an
 
 VECTOR_DB = os.environ.get("VECTOR_DB", "chroma")
 
+# Worker threads shared by the vector DB clients without a native async client
+VECTOR_DB_POOL_SIZE = int(os.environ.get("VECTOR_DB_POOL_SIZE", "8"))
+
 # Chroma
 CHROMA_DATA_PATH = f"{DATA_DIR}/vector_db"
 
@@ -2156,6 +2275,14 @@ RAG_EMBEDDING_BATCH_SIZE = PersistentConfig(
     ),
 )
 
+# Embedding batches in flight at once when embedding with a remote engine
+RAG_EMBEDDING_CONCURRENT_REQUESTS = max(
+    int(os.environ.get("RAG_EMBEDDING_CONCURRENT_REQUESTS", "4") or 1), 1
+)
+
+# Retries of an embedding request failing with 429 or 5xx, with backoff
+RAG_EMBEDDING_MAX_RETRIES = int(os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "5") or 0)
+
 RAG_EMBEDDING_QUERY_PREFIX = os.environ.get("RAG_EMBEDDING_QUERY_PREFIX", None)
 
 RAG_EMBEDDING_CONTENT_PREFIX = os.environ.get("RAG_EMBEDDING_CONTENT_PREFIX", None)
@@ -2164,6 +2291,41 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+# Cache of the embeddings of queries (0 disables it)
+RAG_EMBEDDING_CACHE_SIZE = int(os.environ.get("RAG_EMBEDDING_CACHE_SIZE", "1024") or 0)
+
+RAG_EMBEDDING_CACHE_TTL = int(os.environ.get("RAG_EMBEDDING_CACHE_TTL", "3600") or 0)
+
+# Share the cached query embeddings between instances through Redis
+ENABLE_RAG_EMBEDDING_CACHE_REDIS = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_CACHE_REDIS", "False").lower() == "true"
+)
+
+# Reuse the stored vectors of identical chunks across collections on ingestion,
+# also when a file or web page is processed again. On by default: vectors are
+# keyed by the embedding engine, model and prefix, so they are only reused
+# where the backend would return the same vector, and the store is bounded by
+# the pruning below
+ENABLE_RAG_CHUNK_EMBEDDING_STORE = (
+    os.environ.get("ENABLE_RAG_CHUNK_EMBEDDING_STORE", "True").lower() == "true"
+)
+
+# Stored vectors outlive the files they were created for, so the ones unused for
+# RAG_CHUNK_EMBEDDING_STORE_TTL seconds and the least recently used beyond
+# RAG_CHUNK_EMBEDDING_STORE_MAX_SIZE vectors are pruned every
+# RAG_CHUNK_EMBEDDING_STORE_PRUNE_INTERVAL seconds (0 disables a limit)
+RAG_CHUNK_EMBEDDING_STORE_TTL = int(
+    os.environ.get("RAG_CHUNK_EMBEDDING_STORE_TTL", str(30 * 24 * 60 * 60)) or 0
+)
+
+RAG_CHUNK_EMBEDDING_STORE_MAX_SIZE = int(
+    os.environ.get("RAG_CHUNK_EMBEDDING_STORE_MAX_SIZE", "500000") or 0
+)
+
+RAG_CHUNK_EMBEDDING_STORE_PRUNE_INTERVAL = int(
+    os.environ.get("RAG_CHUNK_EMBEDDING_STORE_PRUNE_INTERVAL", "3600") or 0
+)
+
 RAG_RERANKING_ENGINE = PersistentConfig(
     "RAG_RERANKING_ENGINE",
     "rag.reranking_engine",
@@ -2188,6 +2350,9 @@ RAG_RERANKING_MODEL_TRUST_REMOTE_CODE = (
     os.environ.get("RAG_RERANKING_MODEL_TRUST_REMOTE_CODE", "True").lower() == "true"
 )
 
+# Worker threads reranking hybrid search results, apart from the vector DB pool
+RAG_RERANKING_POOL_SIZE = int(os.environ.get("RAG_RERANKING_POOL_SIZE", "4"))
+
 RAG_EXTERNAL_RERANKER_URL = PersistentConfig(
     "RAG_EXTERNAL_RERANKER_URL",
     "rag.external_reranker_url",
@@ -2386,6 +2551,14 @@ WEB_SEARCH_TRUST_ENV = PersistentConfig(
     os.getenv("WEB_SEARCH_TRUST_ENV", "False").lower() == "true",
 )
 
+# Bytes of extracted web page text kept for later searches (0 disables it)
+WEB_LOADER_CACHE_MAX_SIZE = int(
+    os.environ.get("WEB_LOADER_CACHE_MAX_SIZE", str(64 * 1024 * 1024)) or 0
+)
+
+# Seconds a fetched page is reused for, or less if its Cache-Control says so
+WEB_LOADER_CACHE_TTL = int(os.environ.get("WEB_LOADER_CACHE_TTL", "900") or 0)
+
 
 SEARXNG_QUERY_URL = PersistentConfig(
     "SEARXNG_QUERY_URL",
@@ -311,6 +311,15 @@ else:
     except Exception:
         DATABASE_POOL_RECYCLE = 3600
 
+# Use an async driver (aiosqlite, asyncpg) for queries made from async code.
+# The async engine has its own connection pool, sized by the same
+# DATABASE_POOL_* settings, so enabling it can double the connections each
+# worker opens: halve DATABASE_POOL_SIZE/DATABASE_POOL_MAX_OVERFLOW to keep
+# the same total. Without it, async code queries through worker threads.
+DATABASE_ENABLE_ASYNC = (
+    os.environ.get("DATABASE_ENABLE_ASYNC", "False").lower() == "true"
+)
+
 RESET_CONFIG_ON_START = (
     os.environ.get("RESET_CONFIG_ON_START", "False").lower() == "true"
 )
@@ -319,6 +328,162 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Upper bound (in seconds) a streamed message may stay unsaved with realtime save
+REALTIME_CHAT_SAVE_INTERVAL = os.environ.get("REALTIME_CHAT_SAVE_INTERVAL", "1")
+
+if REALTIME_CHAT_SAVE_INTERVAL == "":
+    REALTIME_CHAT_SAVE_INTERVAL = 1.0
+else:
+    try:
+        REALTIME_CHAT_SAVE_INTERVAL = float(REALTIME_CHAT_SAVE_INTERVAL)
+    except Exception:
+        REALTIME_CHAT_SAVE_INTERVAL = 1.0
+
+# Flush earlier once this many bytes of new content are pending
+REALTIME_CHAT_SAVE_MAX_BYTES = os.environ.get("REALTIME_CHAT_SAVE_MAX_BYTES", "16384")
+
+if REALTIME_CHAT_SAVE_MAX_BYTES == "":
+    REALTIME_CHAT_SAVE_MAX_BYTES = 16384
+else:
+    try:
+        REALTIME_CHAT_SAVE_MAX_BYTES = int(REALTIME_CHAT_SAVE_MAX_BYTES)
+    except Exception:
+        REALTIME_CHAT_SAVE_MAX_BYTES = 16384
+
+# How streamed message content is sent to the client: "full" sends the whole
+# content for every delta, "delta" coalesces deltas and sends only the changes
+CHAT_STREAM_EMIT_MODE = os.environ.get("CHAT_STREAM_EMIT_MODE", "full").lower()
+
+if CHAT_STREAM_EMIT_MODE not in ["full", "delta"]:
+    CHAT_STREAM_EMIT_MODE = "full"
+
+# Seconds streamed deltas are coalesced for in delta mode
+CHAT_STREAM_EMIT_INTERVAL = os.environ.get("CHAT_STREAM_EMIT_INTERVAL", "0.04")
+
+if CHAT_STREAM_EMIT_INTERVAL == "":
+    CHAT_STREAM_EMIT_INTERVAL = 0.04
+else:
+    try:
+        CHAT_STREAM_EMIT_INTERVAL = float(CHAT_STREAM_EMIT_INTERVAL)
+    except Exception:
+        CHAT_STREAM_EMIT_INTERVAL = 0.04
+
+# Seconds between full content resyncs in delta mode
+CHAT_STREAM_RESYNC_INTERVAL = os.environ.get("CHAT_STREAM_RESYNC_INTERVAL", "5")
+
+if CHAT_STREAM_RESYNC_INTERVAL == "":
+    CHAT_STREAM_RESYNC_INTERVAL = 5.0
+else:
+    try:
+        CHAT_STREAM_RESYNC_INTERVAL = float(CHAT_STREAM_RESYNC_INTERVAL)
+    except Exception:
+        CHAT_STREAM_RESYNC_INTERVAL = 5.0
+
+####################################
+# FILE INGESTION
+####################################
+
+# Process uploaded files in the background instead of within the upload request.
+# Opt-in, since uploads then return before the file's content is extracted:
+# clients wait for the "file-events" socket events or poll
+# /files/{id}/process/status
+ENABLE_BACKGROUND_FILE_PROCESSING = (
+    os.environ.get("ENABLE_BACKGROUND_FILE_PROCESSING", "False").lower() == "true"
+)
+
+# Run the ingestion worker in this process, disable it on instances that
+# should only enqueue jobs for other instances to process
+INGESTION_WORKER_ENABLED = (
+    os.environ.get("INGESTION_WORKER_ENABLED", "True").lower() == "true"
+)
+
+# Jobs processed at once by the worker
+INGESTION_MAX_JOBS = os.environ.get("INGESTION_MAX_JOBS", "16")
+
+if INGESTION_MAX_JOBS == "":
+    INGESTION_MAX_JOBS = 16
+else:
+    try:
+        INGESTION_MAX_JOBS = int(INGESTION_MAX_JOBS)
+    except Exception:
+        INGESTION_MAX_JOBS = 16
+
+# Jobs running each stage at once: content extraction (loaders, OCR), text
+# splitting, embedding and vector DB indexing
+INGESTION_EXTRACT_CONCURRENCY = os.environ.get("INGESTION_EXTRACT_CONCURRENCY", "2")
+
+if INGESTION_EXTRACT_CONCURRENCY == "":
+    INGESTION_EXTRACT_CONCURRENCY = 2
+else:
+    try:
+        INGESTION_EXTRACT_CONCURRENCY = int(INGESTION_EXTRACT_CONCURRENCY)
+    except Exception:
+        INGESTION_EXTRACT_CONCURRENCY = 2
+
+INGESTION_SPLIT_CONCURRENCY = os.environ.get("INGESTION_SPLIT_CONCURRENCY", "4")
+
+if INGESTION_SPLIT_CONCURRENCY == "":
+    INGESTION_SPLIT_CONCURRENCY = 4
+else:
+    try:
+        INGESTION_SPLIT_CONCURRENCY = int(INGESTION_SPLIT_CONCURRENCY)
+    except Exception:
+        INGESTION_SPLIT_CONCURRENCY = 4
+
+INGESTION_EMBED_CONCURRENCY = os.environ.get("INGESTION_EMBED_CONCURRENCY", "4")
+
+if INGESTION_EMBED_CONCURRENCY == "":
+    INGESTION_EMBED_CONCURRENCY = 4
+else:
+    try:
+        INGESTION_EMBED_CONCURRENCY = int(INGESTION_EMBED_CONCURRENCY)
+    except Exception:
+        INGESTION_EMBED_CONCURRENCY = 4
+
+INGESTION_INDEX_CONCURRENCY = os.environ.get("INGESTION_INDEX_CONCURRENCY", "4")
+
+if INGESTION_INDEX_CONCURRENCY == "":
+    INGESTION_INDEX_CONCURRENCY = 4
+else:
+    try:
+        INGESTION_INDEX_CONCURRENCY = int(INGESTION_INDEX_CONCURRENCY)
+    except Exception:
+        INGESTION_INDEX_CONCURRENCY = 4
+
+# Attempts before a job is marked as failed, retries back off exponentially
+INGESTION_JOB_MAX_ATTEMPTS = os.environ.get("INGESTION_JOB_MAX_ATTEMPTS", "3")
+
+if INGESTION_JOB_MAX_ATTEMPTS == "":
+    INGESTION_JOB_MAX_ATTEMPTS = 3
+else:
+    try:
+        INGESTION_JOB_MAX_ATTEMPTS = int(INGESTION_JOB_MAX_ATTEMPTS)
+    except Exception:
+        INGESTION_JOB_MAX_ATTEMPTS = 3
+
+# Seconds between polls for jobs enqueued by other instances
+INGESTION_POLL_INTERVAL = os.environ.get("INGESTION_POLL_INTERVAL", "1")
+
+if INGESTION_POLL_INTERVAL == "":
+    INGESTION_POLL_INTERVAL = 1.0
+else:
+    try:
+        INGESTION_POLL_INTERVAL = float(INGESTION_POLL_INTERVAL)
+    except Exception:
+        INGESTION_POLL_INTERVAL = 1.0
+
+# Seconds without progress or a heartbeat of its worker after which a running
+# job is considered abandoned by its worker and is retried
+INGESTION_JOB_TIMEOUT = os.environ.get("INGESTION_JOB_TIMEOUT", "1800")
+
+if INGESTION_JOB_TIMEOUT == "":
+    INGESTION_JOB_TIMEOUT = 1800
+else:
+    try:
+        INGESTION_JOB_TIMEOUT = int(INGESTION_JOB_TIMEOUT)
+    except Exception:
+        INGESTION_JOB_TIMEOUT = 1800
+
 ####################################
 # REDIS
 ####################################
@@ -359,6 +524,54 @@ BYPASS_MODEL_ACCESS_CONTROL = (
     os.environ.get("BYPASS_MODEL_ACCESS_CONTROL", "False").lower() == "true"
 )
 
+# Seconds a user's group memberships are cached for access checks. Group
+# changes clear the cache of the instance making them; other instances pick
+# them up after at most this long. 0 resolves them once per request.
+ACCESS_CONTROL_CACHE_TTL = os.environ.get("ACCESS_CONTROL_CACHE_TTL", "0")
+
+if ACCESS_CONTROL_CACHE_TTL == "":
+    ACCESS_CONTROL_CACHE_TTL = 0
+else:
+    try:
+        ACCESS_CONTROL_CACHE_TTL = int(ACCESS_CONTROL_CACHE_TTL)
+    except Exception:
+        ACCESS_CONTROL_CACHE_TTL = 0
+
+# Seconds authenticated users are cached for. Changes to a user clear the
+# entry on every instance (through Redis when configured). 0 disables it.
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "10")
+
+if USER_CACHE_TTL == "":
+    USER_CACHE_TTL = 10
+else:
+    try:
+        USER_CACHE_TTL = int(USER_CACHE_TTL)
+    except Exception:
+        USER_CACHE_TTL = 10
+
+USER_CACHE_SIZE = os.environ.get("USER_CACHE_SIZE", "10000")
+
+if USER_CACHE_SIZE == "":
+    USER_CACHE_SIZE = 10000
+else:
+    try:
+        USER_CACHE_SIZE = int(USER_CACHE_SIZE)
+    except Exception:
+        USER_CACHE_SIZE = 10000
+
+# Seconds between the bulk updates of users' last active timestamps
+USER_LAST_ACTIVE_FLUSH_INTERVAL = os.environ.get(
+    "USER_LAST_ACTIVE_FLUSH_INTERVAL", "30"
+)
+
+if USER_LAST_ACTIVE_FLUSH_INTERVAL == "":
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = 30
+else:
+    try:
+        USER_LAST_ACTIVE_FLUSH_INTERVAL = int(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+    except Exception:
+        USER_LAST_ACTIVE_FLUSH_INTERVAL = 30
+
 WEBUI_AUTH_SIGNOUT_REDIRECT_URL = os.environ.get(
     "WEBUI_AUTH_SIGNOUT_REDIRECT_URL", None
 )
@@ -408,6 +621,17 @@ WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Seconds the sessions of each user are cached by each worker, 0 disables
+WEBSOCKET_POOL_CACHE_TTL = os.environ.get("WEBSOCKET_POOL_CACHE_TTL", "1")
+
+if WEBSOCKET_POOL_CACHE_TTL == "":
+    WEBSOCKET_POOL_CACHE_TTL = 1
+else:
+    try:
+        WEBSOCKET_POOL_CACHE_TTL = float(WEBSOCKET_POOL_CACHE_TTL)
+    except Exception:
+        WEBSOCKET_POOL_CACHE_TTL = 1
+
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
 if AIOHTTP_CLIENT_TIMEOUT == "":
@@ -456,6 +680,63 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL", "True").lower() == "true"
 )
 
+# Connection pools shared by the requests to each model backend (base URL)
+AIOHTTP_CLIENT_POOL_SIZE = os.environ.get("AIOHTTP_CLIENT_POOL_SIZE", "100")
+
+if AIOHTTP_CLIENT_POOL_SIZE == "":
+    AIOHTTP_CLIENT_POOL_SIZE = 100
+else:
+    try:
+        AIOHTTP_CLIENT_POOL_SIZE = int(AIOHTTP_CLIENT_POOL_SIZE)
+    except Exception:
+        AIOHTTP_CLIENT_POOL_SIZE = 100
+
+AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT", "30"
+)
+
+if AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT == "":
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = 30
+else:
+    try:
+        AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT)
+    except Exception:
+        AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = 30
+
+AIOHTTP_CLIENT_DNS_CACHE_TTL = os.environ.get("AIOHTTP_CLIENT_DNS_CACHE_TTL", "300")
+
+if AIOHTTP_CLIENT_DNS_CACHE_TTL == "":
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = None
+else:
+    try:
+        AIOHTTP_CLIENT_DNS_CACHE_TTL = int(AIOHTTP_CLIENT_DNS_CACHE_TTL)
+    except Exception:
+        AIOHTTP_CLIENT_DNS_CACHE_TTL = 300
+
+# Base URLs kept with an open client session, the least recently used idle
+# sessions are closed beyond it
+AIOHTTP_CLIENT_MAX_SESSIONS = os.environ.get("AIOHTTP_CLIENT_MAX_SESSIONS", "64")
+
+if AIOHTTP_CLIENT_MAX_SESSIONS == "":
+    AIOHTTP_CLIENT_MAX_SESSIONS = 64
+else:
+    try:
+        AIOHTTP_CLIENT_MAX_SESSIONS = int(AIOHTTP_CLIENT_MAX_SESSIONS)
+    except Exception:
+        AIOHTTP_CLIENT_MAX_SESSIONS = 64
+
+# Seconds a backend's model list is served before it is refreshed in the
+# background
+MODEL_LIST_CACHE_TTL = os.environ.get("MODEL_LIST_CACHE_TTL", "10")
+
+if MODEL_LIST_CACHE_TTL == "":
+    MODEL_LIST_CACHE_TTL = 10
+else:
+    try:
+        MODEL_LIST_CACHE_TTL = int(MODEL_LIST_CACHE_TTL)
+    except Exception:
+        MODEL_LIST_CACHE_TTL = 10
+
 
 ####################################
 # SENTENCE TRANSFORMERS
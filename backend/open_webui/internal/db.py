@@ -1,7 +1,9 @@
+import asyncio
 import json
 import logging
 from contextlib import contextmanager
-from typing import Any, Optional
+from contextvars import ContextVar
+from typing import Any, Callable, Optional, TypeVar
 
 from open_webui.internal.wrappers import register_connection
 from open_webui.env import (
@@ -13,9 +15,11 @@ from open_webui.env import (
     DATABASE_POOL_RECYCLE,
     DATABASE_POOL_SIZE,
     DATABASE_POOL_TIMEOUT,
+    DATABASE_ENABLE_ASYNC,
 )
 from peewee_migrate import Router
-from sqlalchemy import Dialect, create_engine, MetaData, types
+from sqlalchemy import Dialect, create_engine, make_url, MetaData, types
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import QueuePool, NullPool
@@ -25,6 +29,8 @@ from typing_extensions import Self
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["DB"])
 
+T = TypeVar("T")
+
 
 class JSONField(types.TypeDecorator):
     impl = types.Text
@@ -97,15 +103,78 @@ else:
         )
 
 
+def get_async_database_url(url: str) -> Optional[str]:
+    """
+    The database URL using its async driver, or None if there is none for the
+    database's driver.
+    """
+    url = make_url(url)
+    backend, driver = url.get_backend_name(), url.get_driver_name()
+
+    if backend == "sqlite" and driver == "pysqlite":
+        return url.set(drivername="sqlite+aiosqlite").render_as_string(
+            hide_password=False
+        )
+    if backend == "postgresql" and driver in ("psycopg2", "psycopg2cffi"):
+        query = dict(url.query)
+        # asyncpg takes the libpq sslmode as ssl
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return url.set(drivername="postgresql+asyncpg", query=query).render_as_string(
+            hide_password=False
+        )
+    return None
+
+
+async_engine = None
+ASYNC_DATABASE_URL = (
+    get_async_database_url(SQLALCHEMY_DATABASE_URL) if DATABASE_ENABLE_ASYNC else None
+)
+if ASYNC_DATABASE_URL:
+    try:
+        if "sqlite" in ASYNC_DATABASE_URL:
+            async_engine = create_async_engine(ASYNC_DATABASE_URL)
+        elif DATABASE_POOL_SIZE > 0:
+            async_engine = create_async_engine(
+                ASYNC_DATABASE_URL,
+                pool_size=DATABASE_POOL_SIZE,
+                max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+                pool_timeout=DATABASE_POOL_TIMEOUT,
+                pool_recycle=DATABASE_POOL_RECYCLE,
+                pool_pre_ping=True,
+            )
+        else:
+            async_engine = create_async_engine(
+                ASYNC_DATABASE_URL, pool_pre_ping=True, poolclass=NullPool
+            )
+    except ImportError as e:
+        log.warning(
+            f"Async database driver not available, falling back to threads: {e}"
+        )
+
+
 SessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine, expire_on_commit=False
 )
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
 metadata_obj = MetaData(schema=DATABASE_SCHEMA)
 Base = declarative_base(metadata=metadata_obj)
 Session = scoped_session(SessionLocal)
 
+# Session of the enclosing `run_db` call
+_current_session = ContextVar("current_session", default=None)
+
 
 def get_session():
+    db = _current_session.get()
+    if db is not None:
+        yield db
+        return
+
     db = SessionLocal()
     try:
         yield db
@@ -114,3 +183,27 @@ def get_session():
 
 
 get_db = contextmanager(get_session)
+
+
+async def run_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run the synchronous data-access function `fn` without blocking the event
+    loop, e.g. `await run_db(Users.get_user_by_id, id)`.
+
+    With an async driver, `fn` runs through `AsyncSession.run_sync`: the
+    sessions it opens with `get_db()` share one session whose queries are
+    awaited on the async engine, so the loop keeps serving other requests
+    while the database works. Otherwise `fn` runs in a worker thread.
+    """
+    if AsyncSessionLocal is None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    def run(db):
+        token = _current_session.set(db)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_session.reset(token)
+
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(run)
@@ -57,7 +57,9 @@ from open_webui.utils.logger import start_logger
 from open_webui.socket.main import (
     app as socket_app,
     periodic_usage_pool_cleanup,
+    POOL as SOCKET_POOL,
 )
+from open_webui.socket.utils import RedisSocketPool
 from open_webui.routers import (
     audio,
     images,
@@ -87,15 +89,34 @@ from open_webui.routers import (
 
 from open_webui.routers.retrieval import (
     get_embedding_function,
+    get_async_embedding_function,
     get_ef,
     get_rf,
 )
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.vector.main import VECTOR_DB_POOL
+from open_webui.retrieval.utils import (
+    EMBEDDING_POOL,
+    RERANKING_POOL,
+    periodic_chunk_embedding_prune,
+)
+from open_webui.retrieval.embedding_cache import (
+    QUERY_EMBEDDING_CACHE,
+    get_query_embedding_cache_metrics,
+)
+from open_webui.retrieval.web.cache import get_web_page_cache_metrics
 
-from open_webui.internal.db import Session, engine
+from open_webui.storage.provider import get_storage_cache_metrics
+from open_webui.internal.db import Session, engine, async_engine, run_db
 
 from open_webui.models.functions import Functions
 from open_webui.models.models import Models
-from open_webui.models.users import UserModel, Users
+from open_webui.models.users import (
+    UserModel,
+    Users,
+    periodic_last_active_flush,
+    redis_user_cache_listener,
+)
 from open_webui.models.chats import Chats
 
 from open_webui.config import (
@@ -201,6 +222,7 @@ from open_webui.config import (
     RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
     RAG_EMBEDDING_ENGINE,
     RAG_EMBEDDING_BATCH_SIZE,
+    RAG_CHUNK_EMBEDDING_STORE_PRUNE_INTERVAL,
     RAG_TOP_K,
     RAG_TOP_K_RERANKER,
     RAG_RELEVANCE_THRESHOLD,
@@ -381,6 +403,8 @@ from open_webui.config import (
     AUTOCOMPLETE_GENERATION_PROMPT_TEMPLATE,
     AUTOCOMPLETE_GENERATION_INPUT_MAX_LENGTH,
     AppConfig,
+    redis_config_listener,
+    sync_config_from_redis,
     reset_config,
 )
 from open_webui.env import (
@@ -410,12 +434,16 @@ from open_webui.env import (
     ENABLE_OTEL,
     EXTERNAL_PWA_MANIFEST_URL,
     AIOHTTP_CLIENT_SESSION_SSL,
+    ENABLE_BACKGROUND_FILE_PROCESSING,
+    INGESTION_WORKER_ENABLED,
 )
 
 
 from open_webui.utils.models import (
+    MODEL_REGISTRY,
     get_all_models,
     get_all_base_models,
+    get_models_snapshot,
     check_model_access,
 )
 from open_webui.utils.chat import (
@@ -424,8 +452,15 @@ from open_webui.utils.chat import (
     chat_action as chat_action_handler,
 )
 from open_webui.utils.embeddings import generate_embeddings
+from open_webui.utils.ingestion import IngestionWorker
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
-from open_webui.utils.access_control import has_access
+from open_webui.utils.emit_buffer import get_message_emit_metrics
+from open_webui.utils.message_buffer import (
+    flush_message_save_buffers,
+    get_message_save_metrics,
+)
+from open_webui.utils.session_pool import CLIENT_SESSION_POOL
+from open_webui.utils.access_control import has_access, get_user_group_ids
 
 from open_webui.utils.auth import (
     get_license_data,
@@ -518,17 +553,67 @@ async def lifespan(app: FastAPI):
             redis_task_command_listener(app)
         )
 
+        # Load the shared config before serving, then keep it current
+        await sync_config_from_redis(app.state.config, app.state.redis)
+        app.state.redis_config_listener = asyncio.create_task(
+            redis_config_listener(app)
+        )
+        app.state.redis_user_cache_listener = asyncio.create_task(
+            redis_user_cache_listener(app)
+        )
+
     if THREAD_POOL_SIZE and THREAD_POOL_SIZE > 0:
         limiter = anyio.to_thread.current_default_thread_limiter()
         limiter.total_tokens = THREAD_POOL_SIZE
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    if isinstance(SOCKET_POOL, RedisSocketPool):
+        app.state.socket_pool_listener = asyncio.create_task(SOCKET_POOL.listen())
+    app.state.last_active_flush = asyncio.create_task(periodic_last_active_flush())
+
+    if RAG_CHUNK_EMBEDDING_STORE_PRUNE_INTERVAL > 0:
+        app.state.chunk_embedding_prune = asyncio.create_task(
+            periodic_chunk_embedding_prune()
+        )
+
+    if ENABLE_BACKGROUND_FILE_PROCESSING and INGESTION_WORKER_ENABLED:
+        app.state.ingestion_worker = IngestionWorker(app)
+        await app.state.ingestion_worker.start()
 
     yield
 
+    if hasattr(app.state, "ingestion_worker"):
+        await app.state.ingestion_worker.stop()
+
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    if hasattr(app.state, "redis_config_listener"):
+        app.state.redis_config_listener.cancel()
+
+    if hasattr(app.state, "redis_user_cache_listener"):
+        app.state.redis_user_cache_listener.cancel()
+
+    if hasattr(app.state, "socket_pool_listener"):
+        app.state.socket_pool_listener.cancel()
+
+    app.state.last_active_flush.cancel()
+    await run_db(Users.flush_last_active)
+
+    if hasattr(app.state, "chunk_embedding_prune"):
+        app.state.chunk_embedding_prune.cancel()
+
+    await flush_message_save_buffers()
+    await CLIENT_SESSION_POOL.close()
+
+    await VECTOR_DB_CLIENT.aclose()
+    VECTOR_DB_POOL.shutdown(wait=False)
+    RERANKING_POOL.shutdown(wait=False)
+    EMBEDDING_POOL.shutdown(wait=False)
+
+    if async_engine is not None:
+        await async_engine.dispose()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -826,6 +911,7 @@ app.state.config.FIRECRAWL_API_KEY = FIRECRAWL_API_KEY
 app.state.config.TAVILY_EXTRACT_DEPTH = TAVILY_EXTRACT_DEPTH
 
 app.state.EMBEDDING_FUNCTION = None
+app.state.ASYNC_EMBEDDING_FUNCTION = None
 app.state.ef = None
 app.state.rf = None
 
@@ -879,6 +965,37 @@ app.state.EMBEDDING_FUNCTION = get_embedding_function(
         if app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
         else None
     ),
+    cache=QUERY_EMBEDDING_CACHE,
+)
+app.state.ASYNC_EMBEDDING_FUNCTION = get_async_embedding_function(
+    app.state.config.RAG_EMBEDDING_ENGINE,
+    app.state.config.RAG_EMBEDDING_MODEL,
+    app.state.ef,
+    (
+        app.state.config.RAG_OPENAI_API_BASE_URL
+        if app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+        else (
+            app.state.config.RAG_OLLAMA_BASE_URL
+            if app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+            else app.state.config.RAG_AZURE_OPENAI_BASE_URL
+        )
+    ),
+    (
+        app.state.config.RAG_OPENAI_API_KEY
+        if app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+        else (
+            app.state.config.RAG_OLLAMA_API_KEY
+            if app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+            else app.state.config.RAG_AZURE_OPENAI_API_KEY
+        )
+    ),
+    app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+    azure_api_version=(
+        app.state.config.RAG_AZURE_OPENAI_API_VERSION
+        if app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
+        else None
+    ),
+    cache=QUERY_EMBEDDING_CACHE,
 )
 
 ########################################
@@ -1171,6 +1288,16 @@ if audit_level != AuditLevel.NONE:
 @app.get("/api/models")
 async def get_models(request: Request, user=Depends(get_verified_user)):
     def get_filtered_models(models, user):
+        # Resolve the user's groups and the models' access control once, instead
+        # of two queries per model
+        model_infos = {
+            model_info.id: model_info
+            for model_info in Models.get_models_by_ids(
+                [model["id"] for model in models if not model.get("arena")]
+            )
+        }
+        user_group_ids = get_user_group_ids(user.id)
+
         filtered_models = []
         for model in models:
             if model.get("arena"):
@@ -1180,14 +1307,18 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
                     access_control=model.get("info", {})
                     .get("meta", {})
                     .get("access_control", {}),
+                    user_group_ids=user_group_ids,
                 ):
                     filtered_models.append(model)
                 continue
 
-            model_info = Models.get_model_by_id(model["id"])
+            model_info = model_infos.get(model["id"])
             if model_info:
                 if user.id == model_info.user_id or has_access(
-                    user.id, type="read", access_control=model_info.access_control
+                    user.id,
+                    type="read",
+                    access_control=model_info.access_control,
+                    user_group_ids=user_group_ids,
                 ):
                     filtered_models.append(model)
 
@@ -1227,7 +1358,7 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
 
     # Filter out models that the user does not have access to
     if user.role == "user" and not BYPASS_MODEL_ACCESS_CONTROL:
-        models = get_filtered_models(models, user)
+        models = await run_db(get_filtered_models, models, user)
 
     log.debug(
         f"/api/models returned filtered models accessible to the user: {json.dumps([model['id'] for model in models])}"
@@ -1278,8 +1409,7 @@ async def chat_completion(
     form_data: dict,
     user=Depends(get_verified_user),
 ):
-    if not request.app.state.MODELS:
-        await get_all_models(request, user=user)
+    models_by_id = (await get_models_snapshot(request, user=user)).by_id
 
     model_item = form_data.pop("model_item", {})
     tasks = form_data.pop("background_tasks", None)
@@ -1288,11 +1418,11 @@ async def chat_completion(
     try:
         if not model_item.get("direct", False):
             model_id = form_data.get("model", None)
-            if model_id not in request.app.state.MODELS:
+            model = models_by_id.get(model_id)
+            if model is None:
                 raise Exception("Model not found")
 
-            model = request.app.state.MODELS[model_id]
-            model_info = Models.get_model_by_id(model_id)
+            model_info = await Models.aget_model_by_id(model_id)
 
             # Check if user has access to the model
             if not BYPASS_MODEL_ACCESS_CONTROL and user.role == "user":
@@ -1343,7 +1473,7 @@ async def chat_completion(
         log.debug(f"Error processing chat payload: {e}")
         if metadata.get("chat_id") and metadata.get("message_id"):
             # Update the chat message with the error
-            Chats.upsert_message_to_chat_by_id_and_message_id(
+            await Chats.aupsert_message_to_chat_by_id_and_message_id(
                 metadata["chat_id"],
                 metadata["message_id"],
                 {
@@ -1432,7 +1562,7 @@ async def list_tasks_endpoint(request: Request, user=Depends(get_verified_user))
 async def list_tasks_by_chat_id_endpoint(
     request: Request, chat_id: str, user=Depends(get_verified_user)
 ):
-    chat = Chats.get_chat_by_id(chat_id)
+    chat = await Chats.aget_chat_by_id(chat_id)
     if chat is None or chat.user_id != user.id:
         return {"task_ids": []}
 
@@ -1463,9 +1593,9 @@ async def get_app_config(request: Request):
                 detail="Invalid token",
             )
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = await Users.aget_cached_user_by_id(data["id"])
 
-    user_count = Users.get_num_users()
+    user_count = await run_db(Users.get_num_users)
     onboarding = False
 
     if user is None:
@@ -1583,6 +1713,20 @@ async def update_webhook_url(form_data: UrlForm, user=Depends(get_admin_user)):
     return {"url": app.state.config.WEBHOOK_URL}
 
 
+@app.get("/api/metrics")
+async def get_app_metrics(user=Depends(get_admin_user)):
+    return {
+        "chat_save": get_message_save_metrics(),
+        "chat_emit": get_message_emit_metrics(),
+        "config": {"version": app.state.config.version},
+        "client_sessions": CLIENT_SESSION_POOL.get_metrics(),
+        "query_embedding_cache": get_query_embedding_cache_metrics(),
+        "model_registry": MODEL_REGISTRY.get_metrics(),
+        "storage_cache": get_storage_cache_metrics(),
+        "web_page_cache": get_web_page_cache_metrics(),
+    }
+
+
 @app.get("/api/version")
 async def get_app_version():
     return {
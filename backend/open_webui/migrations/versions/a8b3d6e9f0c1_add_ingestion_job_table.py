@@ -0,0 +1,47 @@
+"""Add ingestion_job table
+
+Revision ID: a8b3d6e9f0c1
+Revises: f7a2c5d6e8b9
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "a8b3d6e9f0c1"
+down_revision = "f7a2c5d6e8b9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ingestion_job",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.Column("collection_name", sa.String(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("stage", sa.String(), nullable=True),
+        sa.Column("progress", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("worker_id", sa.String(), nullable=True),
+        sa.Column("run_at", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.BigInteger(), nullable=False),
+    )
+    op.create_index(
+        "idx_ingestion_job_status_run_at", "ingestion_job", ["status", "run_at"]
+    )
+    op.create_index(
+        "idx_ingestion_job_file_id", "ingestion_job", ["file_id", "created_at"]
+    )
+
+
+def downgrade():
+    op.drop_index("idx_ingestion_job_file_id", table_name="ingestion_job")
+    op.drop_index("idx_ingestion_job_status_run_at", table_name="ingestion_job")
+    op.drop_table("ingestion_job")
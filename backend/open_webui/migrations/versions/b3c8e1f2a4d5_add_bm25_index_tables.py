@@ -0,0 +1,62 @@
+"""Add BM25 index tables
+
+Revision ID: b3c8e1f2a4d5
+Revises: 020_add_user_department_fields
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b3c8e1f2a4d5"
+down_revision = "020_add_user_department_fields"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "bm25_collection",
+        sa.Column("collection_name", sa.String(), nullable=False, primary_key=True),
+        sa.Column("doc_count", sa.BigInteger(), nullable=True),
+        sa.Column("total_length", sa.BigInteger(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+
+    op.create_table(
+        "bm25_document",
+        sa.Column("collection_name", sa.String(), nullable=False),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("hash", sa.Text(), nullable=True),
+        sa.Column("length", sa.Integer(), nullable=True),
+        sa.Column("text", sa.Text(), nullable=True),
+        sa.Column("meta", sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint("collection_name", "id", name="pk_bm25_document"),
+    )
+    op.create_index(
+        "idx_bm25_document_hash", "bm25_document", ["collection_name", "hash"]
+    )
+
+    op.create_table(
+        "bm25_posting",
+        sa.Column("collection_name", sa.String(), nullable=False),
+        sa.Column("term", sa.String(), nullable=False),
+        sa.Column("document_id", sa.String(), nullable=False),
+        sa.Column("tf", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint(
+            "collection_name", "term", "document_id", name="pk_bm25_posting"
+        ),
+    )
+    op.create_index(
+        "idx_bm25_posting_document", "bm25_posting", ["collection_name", "document_id"]
+    )
+
+
+def downgrade():
+    op.drop_index("idx_bm25_posting_document", table_name="bm25_posting")
+    op.drop_table("bm25_posting")
+    op.drop_index("idx_bm25_document_hash", table_name="bm25_document")
+    op.drop_table("bm25_document")
+    op.drop_table("bm25_collection")
@@ -0,0 +1,30 @@
+"""Add chunk_embedding last_used_at
+
+Revision ID: b9c4e7f1a2d3
+Revises: a8b3d6e9f0c1
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b9c4e7f1a2d3"
+down_revision = "a8b3d6e9f0c1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "chunk_embedding", sa.Column("last_used_at", sa.BigInteger(), nullable=True)
+    )
+    op.execute("UPDATE chunk_embedding SET last_used_at = created_at")
+    op.create_index(
+        "idx_chunk_embedding_last_used_at", "chunk_embedding", ["last_used_at"]
+    )
+
+
+def downgrade():
+    op.drop_index("idx_chunk_embedding_last_used_at", table_name="chunk_embedding")
+    op.drop_column("chunk_embedding", "last_used_at")
@@ -0,0 +1,25 @@
+"""Add bm25_collection building_at
+
+Revision ID: c1d5f8a3b7e2
+Revises: b9c4e7f1a2d3
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c1d5f8a3b7e2"
+down_revision = "b9c4e7f1a2d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "bm25_collection", sa.Column("building_at", sa.BigInteger(), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column("bm25_collection", "building_at")
@@ -0,0 +1,33 @@
+"""Add chat_message table
+
+Revision ID: c4d9f2a3b5e6
+Revises: b3c8e1f2a4d5
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c4d9f2a3b5e6"
+down_revision = "b3c8e1f2a4d5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.String(), nullable=False),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("message", sa.JSON(), nullable=True),
+        sa.Column("status_history", sa.JSON(), nullable=True),
+        sa.Column("current_at", sa.BigInteger(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id", name="pk_chat_message"),
+    )
+
+
+def downgrade():
+    op.drop_table("chat_message")
@@ -0,0 +1,32 @@
+"""Add table_version table
+
+Revision ID: d3e8b1c6f9a4
+Revises: c1d5f8a3b7e2
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d3e8b1c6f9a4"
+down_revision = "c1d5f8a3b7e2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_version = op.create_table(
+        "table_version",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(
+        table_version,
+        [{"name": "model", "version": 0}, {"name": "function", "version": 0}],
+    )
+
+
+def downgrade():
+    op.drop_table("table_version")
@@ -0,0 +1,31 @@
+"""Add chunk_embedding table
+
+Revision ID: d5e0a3b4c6f7
+Revises: c4d9f2a3b5e6
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d5e0a3b4c6f7"
+down_revision = "c4d9f2a3b5e6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "chunk_embedding",
+        sa.Column("embedding_key", sa.String(), nullable=False),
+        sa.Column("hash", sa.String(), nullable=False),
+        sa.Column("dimensions", sa.Integer(), nullable=True),
+        sa.Column("vector", sa.LargeBinary(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("embedding_key", "hash", name="pk_chunk_embedding"),
+    )
+
+
+def downgrade():
+    op.drop_table("chunk_embedding")
@@ -0,0 +1,125 @@
+"""Add chat_search table and full-text index
+
+Revision ID: e6f1b4c5d7a8
+Revises: d5e0a3b4c6f7
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "e6f1b4c5d7a8"
+down_revision = "d5e0a3b4c6f7"
+branch_labels = None
+depends_on = None
+
+log = logging.getLogger(__name__)
+
+# Keep in sync with CHAT_SEARCH_CONTENT_LENGTH in models/chats.py
+CONTENT_LENGTH = 200000
+
+
+def upgrade():
+    op.create_table(
+        "chat_search",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("chat_id", sa.String(), nullable=False, unique=True),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("title", sa.Text(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_chat_search_user_id", "chat_search", ["user_id"])
+
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == "sqlite":
+        try:
+            op.execute(
+                """
+                CREATE VIRTUAL TABLE chat_fts USING fts5(
+                    user_id, title, content,
+                    content='chat_search', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+                """
+            )
+        except Exception as e:
+            # Without FTS5 chats are searched by scanning them
+            log.warning(f"FTS5 is not available, chat search is not indexed: {e}")
+        else:
+            op.execute(
+                """
+                CREATE TRIGGER chat_search_ai AFTER INSERT ON chat_search BEGIN
+                    INSERT INTO chat_fts(rowid, user_id, title, content)
+                    VALUES (new.id, new.user_id, new.title, new.content);
+                END
+                """
+            )
+            op.execute(
+                """
+                CREATE TRIGGER chat_search_ad AFTER DELETE ON chat_search BEGIN
+                    INSERT INTO chat_fts(chat_fts, rowid, user_id, title, content)
+                    VALUES ('delete', old.id, old.user_id, old.title, old.content);
+                END
+                """
+            )
+            op.execute(
+                """
+                CREATE TRIGGER chat_search_au AFTER UPDATE ON chat_search BEGIN
+                    INSERT INTO chat_fts(chat_fts, rowid, user_id, title, content)
+                    VALUES ('delete', old.id, old.user_id, old.title, old.content);
+                    INSERT INTO chat_fts(rowid, user_id, title, content)
+                    VALUES (new.id, new.user_id, new.title, new.content);
+                END
+                """
+            )
+
+        op.execute(
+            f"""
+            INSERT INTO chat_search (chat_id, user_id, title, content)
+            SELECT chat.id, chat.user_id, chat.title,
+                CASE WHEN json_valid(chat.chat) THEN substr((
+                    SELECT group_concat(json_extract(message.value, '$.content'), ' ')
+                    FROM json_each(chat.chat, '$.messages') AS message
+                    WHERE json_type(message.value, '$.content') = 'text'
+                ), 1, {CONTENT_LENGTH}) END
+            FROM chat
+            WHERE chat.user_id NOT LIKE 'shared-%'
+            """
+        )
+    elif dialect_name == "postgresql":
+        op.execute(
+            """
+            ALTER TABLE chat_search ADD COLUMN tsv tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+                || setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+            ) STORED
+            """
+        )
+        op.execute("CREATE INDEX ix_chat_search_tsv ON chat_search USING GIN (tsv)")
+
+        op.execute(
+            f"""
+            INSERT INTO chat_search (chat_id, user_id, title, content)
+            SELECT chat.id, chat.user_id, chat.title, left((
+                SELECT string_agg(message ->> 'content', ' ')
+                FROM json_array_elements(
+                    CASE WHEN json_typeof(chat.chat -> 'messages') = 'array'
+                    THEN chat.chat -> 'messages' ELSE '[]'::json END
+                ) AS message
+                WHERE json_typeof(message -> 'content') = 'string'
+            ), {CONTENT_LENGTH})
+            FROM chat
+            WHERE chat.user_id NOT LIKE 'shared-%'
+            """
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS chat_fts")
+
+    op.drop_index("ix_chat_search_user_id", table_name="chat_search")
+    op.drop_table("chat_search")
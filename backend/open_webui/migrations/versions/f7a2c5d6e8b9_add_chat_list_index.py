@@ -0,0 +1,25 @@
+"""Add chat list index
+
+Revision ID: f7a2c5d6e8b9
+Revises: e6f1b4c5d7a8
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "f7a2c5d6e8b9"
+down_revision = "e6f1b4c5d7a8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "idx_chat_user_id_updated_at", "chat", ["user_id", "updated_at", "id"]
+    )
+
+
+def downgrade():
+    op.drop_index("idx_chat_user_id_updated_at", table_name="chat")
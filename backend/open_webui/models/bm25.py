@@ -0,0 +1,564 @@
+import heapq
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import Any, Callable, Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    Integer,
+    JSON,
+    PrimaryKeyConstraint,
+    String,
+    Text,
+    func,
+)
+from sqlalchemy.exc import IntegrityError
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+# Okapi BM25 parameters, the k1 and b defaults of rank_bm25. Scores differ from
+# the in-memory BM25Retriever.from_texts they replace, so hybrid rankings change:
+# terms are lowercased \w+ tokens instead of whitespace separated words, and
+# idf is Lucene's log(1 + (N - df + 0.5) / (df + 0.5)), which stays positive,
+# instead of rank_bm25's floor for terms in more than half of the documents.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Rows per bulk insert when (re)building an index
+BM25_INSERT_BATCH_SIZE = 5000
+
+# Seconds after which an unfinished index build is considered abandoned, and
+# seconds a query waits for the build of another worker
+BM25_BUILD_TIMEOUT = 600
+BM25_BUILD_WAIT = 30
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+####################
+# BM25 Index DB Schema
+####################
+
+
+class BM25Collection(Base):
+    __tablename__ = "bm25_collection"
+
+    collection_name = Column(String, primary_key=True)
+    doc_count = Column(BigInteger, default=0)
+    total_length = Column(BigInteger, default=0)
+    # Set while the index is built from the full collection
+    building_at = Column(BigInteger, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
+class BM25Document(Base):
+    __tablename__ = "bm25_document"
+
+    collection_name = Column(String, nullable=False)
+    id = Column(String, nullable=False)
+    hash = Column(Text, nullable=True)
+    length = Column(Integer, default=0)
+
+    text = Column(Text)
+    meta = Column(JSON, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("collection_name", "id", name="pk_bm25_document"),
+        Index("idx_bm25_document_hash", "collection_name", "hash"),
+    )
+
+
+class BM25Posting(Base):
+    __tablename__ = "bm25_posting"
+
+    collection_name = Column(String, nullable=False)
+    term = Column(String, nullable=False)
+    document_id = Column(String, nullable=False)
+    tf = Column(Integer, default=1)
+
+    __table_args__ = (
+        PrimaryKeyConstraint(
+            "collection_name", "term", "document_id", name="pk_bm25_posting"
+        ),
+        Index("idx_bm25_posting_document", "collection_name", "document_id"),
+    )
+
+
+class BM25CollectionModel(BaseModel):
+    collection_name: str
+    doc_count: int
+    total_length: int
+    building_at: Optional[int] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BM25SearchResult(BaseModel):
+    id: str
+    score: float
+    text: str
+    metadata: Optional[dict] = None
+
+
+####################
+# Table
+####################
+
+
+class BM25IndexTable:
+    """
+    Persistent inverted index used for the lexical half of hybrid search.
+
+    Postings are stored per (collection, term, document) together with the
+    per-document length and per-collection totals, so a query only touches the
+    postings of its own terms instead of scoring the whole collection.
+
+    Writers lock the collection's row before changing its documents, so they
+    wait for an index build in progress and see the documents it added.
+    """
+
+    def get_collection(self, collection_name: str) -> Optional[BM25CollectionModel]:
+        with get_db() as db:
+            collection = db.get(BM25Collection, collection_name)
+            return (
+                BM25CollectionModel.model_validate(collection) if collection else None
+            )
+
+    def has_index(self, collection_name: str) -> bool:
+        collection = self.get_collection(collection_name)
+        return collection is not None and collection.building_at is None
+
+    def _lock_collection(self, db, collection_name: str) -> bool:
+        # Writing the row takes its lock (the database's on SQLite) up to the
+        # commit, later reads of the transaction see what a build committed
+        return bool(
+            db.query(BM25Collection)
+            .filter_by(collection_name=collection_name)
+            .update({"updated_at": int(time.time())}, synchronize_session=False)
+        )
+
+    def _insert_documents(self, db, collection_name: str, items: list[Any]) -> tuple:
+        documents = []
+        postings = []
+        total_length = 0
+
+        # Documents already indexed, e.g. by a build that read them from the
+        # vector DB before they were added here
+        ids = list({item["id"] for item in items})
+        existing = set()
+        for i in range(0, len(ids), BM25_INSERT_BATCH_SIZE):
+            existing.update(
+                id
+                for (id,) in db.query(BM25Document.id).filter(
+                    BM25Document.collection_name == collection_name,
+                    BM25Document.id.in_(ids[i : i + BM25_INSERT_BATCH_SIZE]),
+                )
+            )
+
+        for item in items:
+            if item["id"] in existing:
+                continue
+            existing.add(item["id"])
+
+            text = item.get("text") or ""
+            metadata = item.get("metadata") or {}
+            terms = Counter(tokenize(text))
+            length = sum(terms.values())
+            total_length += length
+
+            documents.append(
+                {
+                    "collection_name": collection_name,
+                    "id": item["id"],
+                    "hash": metadata.get("hash"),
+                    "length": length,
+                    "text": text,
+                    "meta": metadata,
+                }
+            )
+            postings.extend(
+                {
+                    "collection_name": collection_name,
+                    "term": term,
+                    "document_id": item["id"],
+                    "tf": tf,
+                }
+                for term, tf in terms.items()
+            )
+
+        for i in range(0, len(documents), BM25_INSERT_BATCH_SIZE):
+            db.bulk_insert_mappings(
+                BM25Document, documents[i : i + BM25_INSERT_BATCH_SIZE]
+            )
+        for i in range(0, len(postings), BM25_INSERT_BATCH_SIZE):
+            db.bulk_insert_mappings(
+                BM25Posting, postings[i : i + BM25_INSERT_BATCH_SIZE]
+            )
+
+        return len(documents), total_length
+
+    def add_documents(
+        self, collection_name: str, items: list[Any], create: bool = True
+    ) -> bool:
+        """
+        Index `items` ({"id", "text", "metadata"} dicts, as passed to the vector
+        DB) into the collection. When `create` is False and the collection has
+        no index yet, nothing is written: the index is then built from the full
+        collection on first use instead of only holding the new documents.
+        """
+        with get_db() as db:
+            try:
+                if not self._lock_collection(db, collection_name):
+                    if not create:
+                        return False
+
+                    collection = BM25Collection(
+                        collection_name=collection_name,
+                        doc_count=0,
+                        total_length=0,
+                        created_at=int(time.time()),
+                        updated_at=int(time.time()),
+                    )
+                    db.add(collection)
+                    db.flush()
+
+                doc_count, total_length = self._insert_documents(
+                    db, collection_name, items
+                )
+                db.query(BM25Collection).filter_by(
+                    collection_name=collection_name
+                ).update(
+                    {
+                        "doc_count": BM25Collection.doc_count + doc_count,
+                        "total_length": BM25Collection.total_length + total_length,
+                        "updated_at": int(time.time()),
+                    }
+                )
+                db.commit()
+                return True
+            except Exception as e:
+                db.rollback()
+                log.exception(f"Error indexing documents in {collection_name}: {e}")
+                return False
+
+    def build_index(self, collection_name: str, items: list[Any]) -> bool:
+        """
+        Replace the index of the collection with `items` in one transaction.
+        If another build of the collection inserts its row first, that build's
+        index is kept.
+        """
+        with get_db() as db:
+            try:
+                db.query(BM25Posting).filter_by(
+                    collection_name=collection_name
+                ).delete()
+                db.query(BM25Document).filter_by(
+                    collection_name=collection_name
+                ).delete()
+                db.query(BM25Collection).filter_by(
+                    collection_name=collection_name
+                ).delete()
+
+                collection = BM25Collection(
+                    collection_name=collection_name,
+                    doc_count=0,
+                    total_length=0,
+                    created_at=int(time.time()),
+                    updated_at=int(time.time()),
+                )
+                db.add(collection)
+                try:
+                    db.flush()
+                except IntegrityError:
+                    db.rollback()
+                    log.debug(f"BM25 index {collection_name} was built concurrently")
+                    return True
+
+                collection.doc_count, collection.total_length = self._insert_documents(
+                    db, collection_name, items
+                )
+                db.commit()
+                return True
+            except Exception as e:
+                db.rollback()
+                log.exception(f"Error building BM25 index {collection_name}: {e}")
+                return False
+
+    def _claim_build(self, collection_name: str) -> bool:
+        now = int(time.time())
+        with get_db() as db:
+            try:
+                collection = db.get(BM25Collection, collection_name)
+                if collection is None:
+                    db.add(
+                        BM25Collection(
+                            collection_name=collection_name,
+                            doc_count=0,
+                            total_length=0,
+                            building_at=now,
+                            created_at=now,
+                            updated_at=now,
+                        )
+                    )
+                    db.commit()
+                    return True
+
+                if (
+                    collection.building_at is None
+                    or collection.building_at > now - BM25_BUILD_TIMEOUT
+                ):
+                    return False
+
+                # Take over the build of a worker that stopped
+                count = (
+                    db.query(BM25Collection)
+                    .filter_by(
+                        collection_name=collection_name,
+                        building_at=collection.building_at,
+                    )
+                    .update({"building_at": now}, synchronize_session=False)
+                )
+                db.commit()
+                return bool(count)
+            except IntegrityError:
+                db.rollback()
+                return False
+
+    def ensure_index(
+        self, collection_name: str, get_items: Callable[[], Optional[list[Any]]]
+    ) -> bool:
+        """
+        Build the index of the collection from `get_items()`, all documents of
+        the collection in the vector DB, unless it exists. Returns whether the
+        collection has an index, waiting for a build in another worker.
+
+        The collection's row marks the build from before the documents are
+        read: documents added or deleted meanwhile are applied to the row by
+        their writers, which wait while the build's transaction holds it.
+        """
+        if self.has_index(collection_name):
+            return True
+
+        if not self._claim_build(collection_name):
+            deadline = time.monotonic() + BM25_BUILD_WAIT
+            while time.monotonic() < deadline:
+                collection = self.get_collection(collection_name)
+                if collection is None or collection.building_at is None:
+                    break
+                time.sleep(0.1)
+            return self.get_collection(collection_name) is not None
+
+        with get_db() as db:
+            try:
+                # Deleted while the build was claimed
+                if not self._lock_collection(db, collection_name):
+                    db.rollback()
+                    return False
+
+                items = get_items()
+                if not items:
+                    db.rollback()
+                    self.delete_index(collection_name)
+                    return False
+
+                doc_count, total_length = self._insert_documents(
+                    db, collection_name, items
+                )
+                db.query(BM25Collection).filter_by(
+                    collection_name=collection_name
+                ).update(
+                    {
+                        "doc_count": BM25Collection.doc_count + doc_count,
+                        "total_length": BM25Collection.total_length + total_length,
+                        "building_at": None,
+                    }
+                )
+                db.commit()
+                return True
+            except Exception as e:
+                db.rollback()
+                log.exception(f"Error building BM25 index {collection_name}: {e}")
+
+        # Built again on the next query, from all documents of the collection
+        self.delete_index(collection_name)
+        return False
+
+    def delete_documents(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        hash: Optional[str] = None,
+    ) -> bool:
+        with get_db() as db:
+            try:
+                if not self._lock_collection(db, collection_name):
+                    return True
+
+                query = db.query(BM25Document.id, BM25Document.length).filter_by(
+                    collection_name=collection_name
+                )
+                if ids is not None:
+                    query = query.filter(BM25Document.id.in_(ids))
+                if hash is not None:
+                    query = query.filter(BM25Document.hash == hash)
+
+                rows = query.all()
+                if not rows:
+                    return True
+
+                document_ids = [row.id for row in rows]
+                total_length = sum(row.length or 0 for row in rows)
+
+                for i in range(0, len(document_ids), BM25_INSERT_BATCH_SIZE):
+                    batch = document_ids[i : i + BM25_INSERT_BATCH_SIZE]
+                    db.query(BM25Posting).filter(
+                        BM25Posting.collection_name == collection_name,
+                        BM25Posting.document_id.in_(batch),
+                    ).delete(synchronize_session=False)
+                    db.query(BM25Document).filter(
+                        BM25Document.collection_name == collection_name,
+                        BM25Document.id.in_(batch),
+                    ).delete(synchronize_session=False)
+
+                db.query(BM25Collection).filter_by(
+                    collection_name=collection_name
+                ).update(
+                    {
+                        "doc_count": BM25Collection.doc_count - len(document_ids),
+                        "total_length": BM25Collection.total_length - total_length,
+                        "updated_at": int(time.time()),
+                    }
+                )
+                db.commit()
+                return True
+            except Exception as e:
+                db.rollback()
+                log.exception(f"Error deleting documents from {collection_name}: {e}")
+                return False
+
+    def delete_index(self, collection_name: str) -> bool:
+        with get_db() as db:
+            try:
+                db.query(BM25Posting).filter_by(
+                    collection_name=collection_name
+                ).delete()
+                db.query(BM25Document).filter_by(
+                    collection_name=collection_name
+                ).delete()
+                db.query(BM25Collection).filter_by(
+                    collection_name=collection_name
+                ).delete()
+                db.commit()
+                return True
+            except Exception as e:
+                db.rollback()
+                log.exception(f"Error deleting BM25 index {collection_name}: {e}")
+                return False
+
+    def delete_all_indexes(self) -> bool:
+        with get_db() as db:
+            try:
+                db.query(BM25Posting).delete()
+                db.query(BM25Document).delete()
+                db.query(BM25Collection).delete()
+                db.commit()
+                return True
+            except Exception as e:
+                db.rollback()
+                log.exception(f"Error deleting BM25 indexes: {e}")
+                return False
+
+    def search(
+        self, collection_name: str, query: str, k: int
+    ) -> list[BM25SearchResult]:
+        query_terms = Counter(tokenize(query))
+        if not query_terms or k <= 0:
+            return []
+
+        with get_db() as db:
+            collection = db.get(BM25Collection, collection_name)
+            if collection is None or not collection.doc_count:
+                return []
+
+            doc_count = collection.doc_count
+            avg_length = (collection.total_length or 0) / doc_count or 1.0
+
+            # Only the postings of the query terms are read, joined with the
+            # length of the documents they point to.
+            postings = (
+                db.query(
+                    BM25Posting.term,
+                    BM25Posting.document_id,
+                    BM25Posting.tf,
+                    BM25Document.length,
+                )
+                .join(
+                    BM25Document,
+                    (BM25Document.collection_name == BM25Posting.collection_name)
+                    & (BM25Document.id == BM25Posting.document_id),
+                )
+                .filter(
+                    BM25Posting.collection_name == collection_name,
+                    BM25Posting.term.in_(list(query_terms.keys())),
+                )
+                .all()
+            )
+
+            document_frequencies = Counter(posting.term for posting in postings)
+            idf = {
+                term: math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                for term, df in document_frequencies.items()
+            }
+
+            scores: dict[str, float] = {}
+            for term, document_id, tf, length in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * (length or 0) / avg_length)
+                scores[document_id] = scores.get(document_id, 0.0) + (
+                    query_terms[term] * idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+                )
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            if not top:
+                return []
+
+            documents = {
+                document.id: document
+                for document in db.query(BM25Document)
+                .filter(
+                    BM25Document.collection_name == collection_name,
+                    BM25Document.id.in_([document_id for document_id, _ in top]),
+                )
+                .all()
+            }
+
+            return [
+                BM25SearchResult(
+                    id=document_id,
+                    score=score,
+                    text=documents[document_id].text or "",
+                    metadata=documents[document_id].meta,
+                )
+                for document_id, score in top
+                if document_id in documents
+            ]
+
+
+BM25Indexes = BM25IndexTable()
@@ -2,15 +2,28 @@ import logging
 import json
 import time
 import uuid
-from typing import Optional
+from typing import Optional, Union
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, get_db, run_db
 from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Float,
+    Integer,
+    String,
+    Text,
+    JSON,
+    Index,
+    PrimaryKeyConstraint,
+)
 from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql import exists
 
 ####################
@@ -39,6 +52,10 @@ class Chat(Base):
     meta = Column(JSON, server_default="{}")
     folder_id = Column(Text, nullable=True)
 
+    __table_args__ = (
+        Index("idx_chat_user_id_updated_at", "user_id", "updated_at", "id"),
+    )
+
 
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -59,6 +76,128 @@ class ChatModel(BaseModel):
     folder_id: Optional[str] = None
 
 
+class ChatMessage(Base):
+    """
+    Per-message overlay over `Chat.chat["history"]["messages"]`.
+
+    Message and status updates are written here instead of rewriting the whole
+    chat document, and are folded back into the chat JSON the next time the
+    full chat is saved (see `ChatTable.update_chat_by_id`).
+    """
+
+    __tablename__ = "chat_message"
+
+    chat_id = Column(String, nullable=False)
+    id = Column(String, nullable=False)
+
+    # Fields merged over the message stored in the chat history
+    message = Column(JSON, nullable=True)
+    # Statuses appended to the message's statusHistory since the last save
+    status_history = Column(JSON, nullable=True)
+    # Nanosecond timestamp of the last upsert, the latest one is `currentId`
+    current_at = Column(BigInteger, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+    __table_args__ = (PrimaryKeyConstraint("chat_id", "id", name="pk_chat_message"),)
+
+
+class ChatSearch(Base):
+    """
+    Searchable text of a chat, kept in sync on chat insert, update and delete.
+
+    The full-text index over it is created by the migration: an external
+    content FTS5 table (`chat_fts`) on SQLite and a generated `tsv` tsvector
+    column with a GIN index on PostgreSQL.
+    """
+
+    __tablename__ = "chat_search"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(String, nullable=False, unique=True)
+    user_id = Column(String, nullable=False, index=True)
+
+    title = Column(Text)
+    # Message contents, see get_chat_search_content
+    content = Column(Text)
+
+
+# Characters of message content indexed per chat, which keeps the documents
+# within the PostgreSQL tsvector size limit
+CHAT_SEARCH_CONTENT_LENGTH = 200_000
+
+
+def get_chat_search_content(chat: dict) -> str:
+    messages = chat.get("messages")
+    if not isinstance(messages, list):
+        return ""
+
+    return " ".join(
+        message["content"]
+        for message in messages
+        if isinstance(message, dict) and isinstance(message.get("content"), str)
+    )[:CHAT_SEARCH_CONTENT_LENGTH]
+
+
+def get_fts5_search_query(user_id: str, words: list[str]) -> str:
+    """FTS5 query matching chats of the user with all words as prefixes."""
+
+    def quote(value: str) -> str:
+        return '"' + value.replace('"', '""') + '"'
+
+    return (
+        f"user_id : {quote(user_id)} AND "
+        f"{{title content}} : ({' '.join(quote(word) + '*' for word in words)})"
+    )
+
+
+def get_tsquery_search_query(words: list[str]) -> str:
+    """tsquery matching all words as prefixes."""
+    return " & ".join(
+        "'" + word.replace("\\", "\\\\").replace("'", "''") + "':*" for word in words
+    )
+
+
+def merge_chat_messages(chat: dict, chat_messages: list) -> dict:
+    """Apply `ChatMessage` overlay rows to a chat document, without mutating it."""
+    if not chat_messages:
+        return chat
+
+    history = {**chat.get("history", {})}
+    messages = {**history.get("messages", {})}
+
+    current = None
+    for chat_message in chat_messages:
+        patch = chat_message.message or {}
+        if chat_message.id in messages:
+            message = {**messages[chat_message.id], **patch}
+        elif patch:
+            message = {**patch}
+        else:
+            # Status updates for messages that do not exist are dropped
+            continue
+
+        if chat_message.status_history:
+            message["statusHistory"] = [
+                *message.get("statusHistory", []),
+                *chat_message.status_history,
+            ]
+
+        messages[chat_message.id] = message
+
+        if chat_message.current_at and (
+            current is None or chat_message.current_at > current[0]
+        ):
+            current = (chat_message.current_at, chat_message.id)
+
+    history["messages"] = messages
+    if current:
+        history["currentId"] = current[1]
+
+    return {**chat, "history": history}
+
+
 ####################
 # Forms
 ####################
@@ -104,7 +243,187 @@ class ChatTitleIdResponse(BaseModel):
     created_at: int
 
 
+class ChatListResponse(ChatTitleIdResponse):
+    pinned: Optional[bool] = False
+    folder_id: Optional[str] = None
+    meta: dict = {}
+
+
+# Columns loaded for chat lists, everything but the `chat` JSON itself
+CHAT_LIST_COLUMNS = (
+    Chat.id,
+    Chat.title,
+    Chat.updated_at,
+    Chat.created_at,
+    Chat.pinned,
+    Chat.folder_id,
+    Chat.meta,
+)
+
+
+def get_chat_list_cursor(chat: ChatTitleIdResponse) -> str:
+    """Cursor of the chats listed after `chat`, see `parse_chat_list_cursor`."""
+    return f"{chat.updated_at}:{chat.id}"
+
+
+def parse_chat_list_cursor(cursor: str) -> tuple[int, str]:
+    """
+    Parses an `<updated_at>:<id>` cursor, the position of the last chat of the
+    previous page. Raises ValueError if the cursor is malformed.
+    """
+    updated_at, _, id = cursor.partition(":")
+    if not id:
+        raise ValueError("Invalid chat list cursor")
+    return int(updated_at), id
+
+
 class ChatTable:
+    def __init__(self):
+        # Whether the full-text index exists, checked on the first search
+        self._search_index: Optional[bool] = None
+
+    def _update_search_index(self, db, chat_id: str, user_id: str, chat: dict):
+        title = chat.get("title", "New Chat")
+        content = get_chat_search_content(chat)
+
+        entry = db.query(ChatSearch).filter_by(chat_id=chat_id).first()
+        if entry is None:
+            db.add(
+                ChatSearch(
+                    chat_id=chat_id, user_id=user_id, title=title, content=content
+                )
+            )
+        elif entry.title != title or entry.content != content:
+            entry.title = title
+            entry.content = content
+
+    def _has_search_index(self, db) -> bool:
+        if self._search_index is None:
+            dialect_name = db.bind.dialect.name
+            if dialect_name == "sqlite":
+                query = "SELECT 1 FROM sqlite_master WHERE name = 'chat_fts'"
+            elif dialect_name == "postgresql":
+                query = (
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'chat_search' AND column_name = 'tsv'"
+                )
+            else:
+                query = None
+
+            self._search_index = bool(
+                query and db.execute(text(query)).first() is not None
+            )
+            if not self._search_index:
+                log.warning("Chat search index not found, searching without it")
+        return self._search_index
+
+    def _get_search_subquery(self, db, user_id: str, words: list[str]):
+        """(chat_id, rank) of the user's chats matching all words, best first."""
+        if db.bind.dialect.name == "sqlite":
+            statement = text(
+                """
+                SELECT chat_search.chat_id AS chat_id,
+                       bm25(chat_fts, 0.0, 10.0, 1.0) AS rank
+                FROM chat_fts
+                JOIN chat_search ON chat_search.id = chat_fts.rowid
+                WHERE chat_fts MATCH :search_query
+                  AND chat_search.user_id = :user_id
+                """
+            ).bindparams(
+                search_query=get_fts5_search_query(user_id, words), user_id=user_id
+            )
+        else:
+            statement = text(
+                """
+                SELECT chat_search.chat_id AS chat_id,
+                       -ts_rank(chat_search.tsv, search_query) AS rank
+                FROM chat_search, to_tsquery('simple', :search_query) AS search_query
+                WHERE chat_search.user_id = :user_id
+                  AND chat_search.tsv @@ search_query
+                """
+            ).bindparams(search_query=get_tsquery_search_query(words), user_id=user_id)
+
+        return statement.columns(chat_id=String, rank=Float).subquery("search")
+
+    def _get_chat_message_for_update(
+        self, db, id: str, message_id: str, now: int
+    ) -> ChatMessage:
+        """
+        Get the message overlay row, inserting it if missing, and lock it for
+        the rest of the transaction where the database supports it.
+        """
+        dialect_name = db.bind.dialect.name
+        if dialect_name in ("sqlite", "postgresql"):
+            insert = (sqlite if dialect_name == "sqlite" else postgresql).insert
+            db.execute(
+                insert(ChatMessage)
+                .values(chat_id=id, id=message_id, message={}, created_at=now)
+                .on_conflict_do_nothing()
+            )
+
+        chat_message = db.get(ChatMessage, (id, message_id), with_for_update=True)
+        if chat_message is None:
+            chat_message = ChatMessage(
+                chat_id=id, id=message_id, message={}, created_at=now
+            )
+            db.add(chat_message)
+        return chat_message
+
+    def _to_chat_models(self, db, chats: list[Chat]) -> list[ChatModel]:
+        chat_models = [ChatModel.model_validate(chat) for chat in chats]
+        if not chat_models:
+            return chat_models
+
+        chat_messages = {}
+        for chat_message in (
+            db.query(ChatMessage)
+            .filter(ChatMessage.chat_id.in_([chat.id for chat in chat_models]))
+            .all()
+        ):
+            chat_messages.setdefault(chat_message.chat_id, []).append(chat_message)
+
+        for chat in chat_models:
+            if chat.id in chat_messages:
+                chat.chat = merge_chat_messages(chat.chat, chat_messages[chat.id])
+        return chat_models
+
+    def _to_chat_model(self, db, chat: Chat) -> ChatModel:
+        return self._to_chat_models(db, [chat])[0]
+
+    def _to_chat_list(self, query, skip, limit, cursor) -> list[ChatListResponse]:
+        """
+        Loads a page of a chat list query ordered by `updated_at` then `id`,
+        newest first. With a `(updated_at, id)` cursor the page starts after
+        that chat, which unlike `skip` does not scan the chats before it.
+        """
+        query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+
+        if cursor is not None:
+            updated_at, id = cursor
+            query = query.filter(
+                or_(
+                    Chat.updated_at < updated_at,
+                    and_(Chat.updated_at == updated_at, Chat.id < id),
+                )
+            )
+        elif skip:
+            query = query.offset(skip)
+        if limit:
+            query = query.limit(limit)
+
+        return [
+            ChatListResponse(
+                id=chat.id,
+                title=chat.title,
+                updated_at=chat.updated_at,
+                created_at=chat.created_at,
+                pinned=chat.pinned,
+                folder_id=chat.folder_id,
+                meta=chat.meta or {},
+            )
+            for chat in query.with_entities(*CHAT_LIST_COLUMNS)
+        ]
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -125,6 +444,7 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            self._update_search_index(db, id, user_id, form_data.chat)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
@@ -154,6 +474,7 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            self._update_search_index(db, id, user_id, form_data.chat)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
@@ -165,6 +486,10 @@ class ChatTable:
                 chat_item.chat = chat
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
+                self._update_search_index(db, id, chat_item.user_id, chat)
+
+                # The full document supersedes any pending message updates
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.commit()
                 db.refresh(chat_item)
 
@@ -182,6 +507,11 @@ class ChatTable:
 
         return self.update_chat_by_id(id, chat)
 
+    async def aupdate_chat_title_by_id(
+        self, id: str, title: str
+    ) -> Optional[ChatModel]:
+        return await run_db(self.update_chat_title_by_id, id, title)
+
     def update_chat_tags_by_id(
         self, id: str, tags: list[str], user
     ) -> Optional[ChatModel]:
@@ -202,6 +532,11 @@ class ChatTable:
             self.add_chat_tag_by_id_and_user_id_and_tag_name(id, user.id, tag_name)
         return self.get_chat_by_id(id)
 
+    async def aupdate_chat_tags_by_id(
+        self, id: str, tags: list[str], user
+    ) -> Optional[ChatModel]:
+        return await run_db(self.update_chat_tags_by_id, id, tags, user)
+
     def get_chat_title_by_id(self, id: str) -> Optional[str]:
         chat = self.get_chat_by_id(id)
         if chat is None:
@@ -209,6 +544,9 @@ class ChatTable:
 
         return chat.chat.get("title", "New Chat")
 
+    async def aget_chat_title_by_id(self, id: str) -> Optional[str]:
+        return await run_db(self.get_chat_title_by_id, id)
+
     def get_messages_by_chat_id(self, id: str) -> Optional[dict]:
         chat = self.get_chat_by_id(id)
         if chat is None:
@@ -216,60 +554,147 @@ class ChatTable:
 
         return chat.chat.get("history", {}).get("messages", {}) or {}
 
+    async def aget_messages_by_chat_id(self, id: str) -> Optional[dict]:
+        return await run_db(self.get_messages_by_chat_id, id)
+
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        try:
+            with get_db() as db:
+                # Only extract the one message from the chat document
+                row = (
+                    db.query(Chat.id, Chat.chat[("history", "messages", message_id)])
+                    .filter_by(id=id)
+                    .first()
+                )
+                if row is None:
+                    return None
 
-        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+                message = row[1] or {}
+                chat_message = db.get(ChatMessage, (id, message_id))
+                if chat_message:
+                    message = (
+                        merge_chat_messages(
+                            (
+                                {"history": {"messages": {message_id: message}}}
+                                if message
+                                else {}
+                            ),
+                            [chat_message],
+                        )
+                        .get("history", {})
+                        .get("messages", {})
+                        .get(message_id, {})
+                    )
 
-    def upsert_message_to_chat_by_id_and_message_id(
-        self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+                return message
+        except Exception as e:
+            log.exception(f"Error getting message {message_id} of chat {id}: {e}")
             return None
 
-        chat = chat.chat
-        history = chat.get("history", {})
+    async def aget_message_by_id_and_message_id(
+        self, id: str, message_id: str
+    ) -> Optional[dict]:
+        return await run_db(self.get_message_by_id_and_message_id, id, message_id)
 
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
+    def upsert_message_to_chat_by_id_and_message_id(
+        self, id: str, message_id: str, message: dict
+    ) -> Optional[dict]:
+        """
+        Merge `message` into the message and make it the current one. Only the
+        message overlay row is written, the chat document is left untouched.
+        Returns the pending message fields, or None if the chat does not exist.
+        """
+        # A concurrent first write of the message can still insert its row
+        # between the lookup and the insert on other databases, retry once
+        for attempt in range(2):
+            try:
+                with get_db() as db:
+                    if db.query(Chat.id).filter_by(id=id).first() is None:
+                        return None
+
+                    now = int(time.time())
+                    chat_message = self._get_chat_message_for_update(
+                        db, id, message_id, now
+                    )
 
-        history["currentId"] = message_id
+                    chat_message.message = {**(chat_message.message or {}), **message}
+                    if "statusHistory" in message:
+                        chat_message.status_history = None
+                    chat_message.current_at = time.time_ns()
+                    chat_message.updated_at = now
+
+                    db.query(Chat).filter_by(id=id).update({"updated_at": now})
+                    db.commit()
+                    return chat_message.message
+            except IntegrityError as e:
+                if attempt:
+                    log.exception(
+                        f"Error upserting message {message_id} of chat {id}: {e}"
+                    )
+                    return None
+            except Exception as e:
+                log.exception(f"Error upserting message {message_id} of chat {id}: {e}")
+                return None
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+    async def aupsert_message_to_chat_by_id_and_message_id(
+        self, id: str, message_id: str, message: dict
+    ) -> Optional[dict]:
+        return await run_db(
+            self.upsert_message_to_chat_by_id_and_message_id, id, message_id, message
+        )
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
-        chat = chat.chat
-        history = chat.get("history", {})
+    ) -> Optional[list[dict]]:
+        for attempt in range(2):
+            try:
+                with get_db() as db:
+                    if db.query(Chat.id).filter_by(id=id).first() is None:
+                        return None
+
+                    now = int(time.time())
+                    chat_message = self._get_chat_message_for_update(
+                        db, id, message_id, now
+                    )
 
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
+                    if "statusHistory" in (chat_message.message or {}):
+                        chat_message.message = {
+                            **chat_message.message,
+                            "statusHistory": [
+                                *chat_message.message["statusHistory"],
+                                status,
+                            ],
+                        }
+                    else:
+                        chat_message.status_history = [
+                            *(chat_message.status_history or []),
+                            status,
+                        ]
+                    chat_message.updated_at = now
+
+                    db.commit()
+                    return chat_message.status_history
+            except IntegrityError as e:
+                if attempt:
+                    log.exception(f"Error adding status to message {message_id}: {e}")
+                    return None
+            except Exception as e:
+                log.exception(f"Error adding status to message {message_id}: {e}")
+                return None
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+    async def aadd_message_status_to_chat_by_id_and_message_id(
+        self, id: str, message_id: str, status: dict
+    ) -> Optional[list[dict]]:
+        return await run_db(
+            self.add_message_status_to_chat_by_id_and_message_id, id, message_id, status
+        )
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
             # Get the existing chat to share
-            chat = db.get(Chat, chat_id)
+            chat = self._to_chat_model(db, db.get(Chat, chat_id))
             # Check if the chat is already shared
             if chat.share_id:
                 return self.get_chat_by_id_and_user_id(chat.share_id, "shared")
@@ -301,7 +726,7 @@ class ChatTable:
     def update_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
-                chat = db.get(Chat, chat_id)
+                chat = self._to_chat_model(db, db.get(Chat, chat_id))
                 shared_chat = (
                     db.query(Chat).filter_by(user_id=f"shared-{chat_id}").first()
                 )
@@ -339,7 +764,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -351,7 +776,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -363,7 +788,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -382,36 +807,11 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
-
+        cursor: Optional[tuple[int, str]] = None,
+    ) -> list[ChatListResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id, archived=True)
-
-            if filter:
-                query_key = filter.get("query")
-                if query_key:
-                    query = query.filter(Chat.title.ilike(f"%{query_key}%"))
-
-                order_by = filter.get("order_by")
-                direction = filter.get("direction")
-
-                if order_by and direction and getattr(Chat, order_by):
-                    if direction.lower() == "asc":
-                        query = query.order_by(getattr(Chat, order_by).asc())
-                    elif direction.lower() == "desc":
-                        query = query.order_by(getattr(Chat, order_by).desc())
-                    else:
-                        raise ValueError("Invalid direction for ordering")
-            else:
-                query = query.order_by(Chat.updated_at.desc())
-
-            if skip:
-                query = query.offset(skip)
-            if limit:
-                query = query.limit(limit)
-
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._filter_chat_list(query, filter, skip, limit, cursor)
 
     def get_chat_list_by_user_id(
         self,
@@ -420,37 +820,38 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+        cursor: Optional[tuple[int, str]] = None,
+    ) -> list[ChatListResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id)
             if not include_archived:
                 query = query.filter_by(archived=False)
+            return self._filter_chat_list(query, filter, skip, limit, cursor)
+
+    def _filter_chat_list(
+        self, query, filter, skip, limit, cursor
+    ) -> list[ChatListResponse]:
+        if filter:
+            query_key = filter.get("query")
+            if query_key:
+                query = query.filter(Chat.title.ilike(f"%{query_key}%"))
+
+            order_by = filter.get("order_by")
+            direction = filter.get("direction")
+
+            if order_by and direction and getattr(Chat, order_by):
+                if cursor is not None:
+                    raise ValueError("Cursor pagination requires the default order")
+
+                if direction.lower() == "asc":
+                    query = query.order_by(getattr(Chat, order_by).asc())
+                elif direction.lower() == "desc":
+                    query = query.order_by(getattr(Chat, order_by).desc())
+                else:
+                    raise ValueError("Invalid direction for ordering")
 
-            if filter:
-                query_key = filter.get("query")
-                if query_key:
-                    query = query.filter(Chat.title.ilike(f"%{query_key}%"))
-
-                order_by = filter.get("order_by")
-                direction = filter.get("direction")
-
-                if order_by and direction and getattr(Chat, order_by):
-                    if direction.lower() == "asc":
-                        query = query.order_by(getattr(Chat, order_by).asc())
-                    elif direction.lower() == "desc":
-                        query = query.order_by(getattr(Chat, order_by).desc())
-                    else:
-                        raise ValueError("Invalid direction for ordering")
-            else:
-                query = query.order_by(Chat.updated_at.desc())
-
-            if skip:
-                query = query.offset(skip)
-            if limit:
-                query = query.limit(limit)
-
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+        # Any custom order comes first, `_to_chat_list` only breaks ties
+        return self._to_chat_list(query, skip, limit, cursor)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -458,7 +859,8 @@ class ChatTable:
         include_archived: bool = False,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
-    ) -> list[ChatTitleIdResponse]:
+        cursor: Optional[tuple[int, str]] = None,
+    ) -> list[ChatListResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id).filter_by(folder_id=None)
             query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
@@ -466,29 +868,7 @@ class ChatTable:
             if not include_archived:
                 query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
-                Chat.id, Chat.title, Chat.updated_at, Chat.created_at
-            )
-
-            if skip:
-                query = query.offset(skip)
-            if limit:
-                query = query.limit(limit)
-
-            all_chats = query.all()
-
-            # result has to be destructured from sqlalchemy `row` and mapped to a dict since the `ChatModel`is not the returned dataclass.
-            return [
-                ChatTitleIdResponse.model_validate(
-                    {
-                        "id": chat[0],
-                        "title": chat[1],
-                        "updated_at": chat[2],
-                        "created_at": chat[3],
-                    }
-                )
-                for chat in all_chats
-            ]
+            return self._to_chat_list(query, skip, limit, cursor)
 
     def get_chat_list_by_chat_ids(
         self, chat_ids: list[str], skip: int = 0, limit: int = 50
@@ -501,16 +881,19 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
+    async def aget_chat_by_id(self, id: str) -> Optional[ChatModel]:
+        return await run_db(self.get_chat_by_id, id)
+
     def get_chat_by_share_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
@@ -529,7 +912,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -540,7 +923,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -549,7 +932,7 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -558,7 +941,14 @@ class ChatTable:
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
+
+    def get_pinned_chat_list_by_user_id(self, user_id: str) -> list[ChatListResponse]:
+        with get_db() as db:
+            query = db.query(Chat).filter_by(
+                user_id=user_id, pinned=True, archived=False
+            )
+            return self._to_chat_list(query, None, None, None)
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -567,7 +957,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -576,9 +966,14 @@ class ChatTable:
         include_archived: bool = False,
         skip: int = 0,
         limit: int = 60,
-    ) -> list[ChatModel]:
+    ) -> Union[list[ChatModel], list[ChatListResponse]]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Chats whose title or messages contain all words of the search text as
+        word prefixes, best matches first, filtered by any `tag:tag_name`
+        words. Uses the full-text index when it exists.
+
+        Without search text this is the chat list, which only has the columns
+        of ChatListResponse.
         """
         search_text = search_text.lower().strip()
 
@@ -597,7 +992,7 @@ class ChatTable:
         ]
 
         search_text_words = [
-            word for word in search_text_words if not word.startswith("tag:")
+            word for word in search_text_words if word and not word.startswith("tag:")
         ]
 
         search_text = " ".join(search_text_words)
@@ -608,29 +1003,63 @@ class ChatTable:
             if not include_archived:
                 query = query.filter(Chat.archived == False)
 
-            query = query.order_by(Chat.updated_at.desc())
-
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
-            if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
-                query = query.filter(
-                    (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
-                        | text(
-                            """
-                            EXISTS (
-                                SELECT 1 
-                                FROM json_each(Chat.chat, '$.messages') AS message 
-                                WHERE LOWER(message.value->>'content') LIKE '%' || :search_text || '%'
-                            )
-                            """
-                        )
-                    ).params(search_text=search_text)
+            if dialect_name not in ("sqlite", "postgresql"):
+                raise NotImplementedError(
+                    f"Unsupported dialect: {db.bind.dialect.name}"
                 )
 
+            # Words without letters or digits match everything in the index
+            search_words = [
+                word for word in search_text_words if any(c.isalnum() for c in word)
+            ]
+            if search_words and self._has_search_index(db):
+                search = self._get_search_subquery(db, user_id, search_words)
+                query = query.join(search, search.c.chat_id == Chat.id).order_by(
+                    search.c.rank, Chat.updated_at.desc()
+                )
+            else:
+                query = query.order_by(Chat.updated_at.desc())
+
+                if search_text and dialect_name == "sqlite":
+                    # SQLite case: using JSON1 extension for JSON searching
+                    query = query.filter(
+                        (
+                            Chat.title.ilike(
+                                f"%{search_text}%"
+                            )  # Case-insensitive search in title
+                            | text(
+                                """
+                                EXISTS (
+                                    SELECT 1 
+                                    FROM json_each(Chat.chat, '$.messages') AS message 
+                                    WHERE LOWER(message.value->>'content') LIKE '%' || :search_text || '%'
+                                )
+                                """
+                            )
+                        ).params(search_text=search_text)
+                    )
+                elif search_text:
+                    # PostgreSQL relies on proper JSON query for search
+                    query = query.filter(
+                        (
+                            Chat.title.ilike(
+                                f"%{search_text}%"
+                            )  # Case-insensitive search in title
+                            | text(
+                                """
+                                EXISTS (
+                                    SELECT 1
+                                    FROM json_array_elements(Chat.chat->'messages') AS message
+                                    WHERE LOWER(message->>'content') LIKE '%' || :search_text || '%'
+                                )
+                                """
+                            )
+                        ).params(search_text=search_text)
+                    )
+
+            if dialect_name == "sqlite":
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
                     query = query.filter(
@@ -662,24 +1091,6 @@ class ChatTable:
                     )
 
             elif dialect_name == "postgresql":
-                # PostgreSQL relies on proper JSON query for search
-                query = query.filter(
-                    (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
-                        | text(
-                            """
-                            EXISTS (
-                                SELECT 1
-                                FROM json_array_elements(Chat.chat->'messages') AS message
-                                WHERE LOWER(message->>'content') LIKE '%' || :search_text || '%'
-                            )
-                            """
-                        )
-                    ).params(search_text=search_text)
-                )
-
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
                     query = query.filter(
@@ -709,10 +1120,6 @@ class ChatTable:
                             ]
                         )
                     )
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
-                )
 
             # Perform pagination at the SQL level
             all_chats = query.offset(skip).limit(limit).all()
@@ -720,7 +1127,7 @@ class ChatTable:
             log.info(f"The number of chats: {len(all_chats)}")
 
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
@@ -733,7 +1140,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -748,7 +1155,19 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
+
+    def get_chat_list_by_folder_ids_and_user_id(
+        self, folder_ids: list[str], user_id: str
+    ) -> list[ChatListResponse]:
+        with get_db() as db:
+            query = db.query(Chat).filter(
+                Chat.folder_id.in_(folder_ids), Chat.user_id == user_id
+            )
+            query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
+            query = query.filter_by(archived=False)
+
+            return self._to_chat_list(query, None, None, None)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -761,7 +1180,7 @@ class ChatTable:
                 chat.pinned = False
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -772,8 +1191,13 @@ class ChatTable:
             return [Tags.get_tag_by_name_and_user_id(tag, user_id) for tag in tags]
 
     def get_chat_list_by_user_id_and_tag_name(
-        self, user_id: str, tag_name: str, skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+        self,
+        user_id: str,
+        tag_name: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[tuple[int, str]] = None,
+    ) -> list[ChatListResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id)
             tag_id = tag_name.replace(" ", "_").lower()
@@ -798,9 +1222,7 @@ class ChatTable:
                     f"Unsupported dialect: {db.bind.dialect.name}"
                 )
 
-            all_chats = query.all()
-            log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_list(query, skip, limit, cursor)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -821,7 +1243,7 @@ class ChatTable:
 
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -898,6 +1320,8 @@ class ChatTable:
         try:
             with get_db() as db:
                 db.query(Chat).filter_by(id=id).delete()
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
+                db.query(ChatSearch).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -907,7 +1331,9 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                if db.query(Chat).filter_by(id=id, user_id=user_id).delete():
+                    db.query(ChatMessage).filter_by(chat_id=id).delete()
+                    db.query(ChatSearch).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -919,6 +1345,12 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id == user_id)
+                    )
+                ).delete(synchronize_session=False)
+                db.query(ChatSearch).filter_by(user_id=user_id).delete()
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -931,6 +1363,20 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
+                db.query(ChatSearch).filter(
+                    ChatSearch.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    Integer,
+    LargeBinary,
+    PrimaryKeyConstraint,
+    String,
+    tuple_,
+)
+from sqlalchemy.exc import IntegrityError
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+# Hashes per IN (...) lookup
+CHUNK_EMBEDDING_QUERY_BATCH_SIZE = 500
+
+# Seconds before a reused embedding's last use is recorded again, so lookups
+# rarely write
+CHUNK_EMBEDDING_TOUCH_INTERVAL = 24 * 60 * 60
+
+####################
+# Chunk Embedding DB Schema
+####################
+
+
+class ChunkEmbedding(Base):
+    __tablename__ = "chunk_embedding"
+
+    # Hash of the embedding engine, model and prefix the vector was created with
+    embedding_key = Column(String, nullable=False)
+    # Hash of the embedded chunk text
+    hash = Column(String, nullable=False)
+
+    dimensions = Column(Integer)
+    vector = Column(LargeBinary)
+
+    created_at = Column(BigInteger)
+    # When the vector was last stored or reused, for pruning unused vectors
+    last_used_at = Column(BigInteger)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("embedding_key", "hash", name="pk_chunk_embedding"),
+        Index("idx_chunk_embedding_last_used_at", "last_used_at"),
+    )
+
+
+####################
+# Table
+####################
+
+
+class ChunkEmbeddingTable:
+    """
+    Content-addressed store of chunk embeddings, shared by all collections.
+
+    Vectors are stored as float32, the precision vector databases keep them in.
+    Since they outlive the files they were created for, the least recently
+    used are removed by `prune_embeddings`.
+    """
+
+    @staticmethod
+    def get_embedding_key(engine: str, model: str, prefix: Optional[str]) -> str:
+        return hashlib.sha256(json.dumps([engine, model, prefix]).encode()).hexdigest()
+
+    def get_embeddings(
+        self, embedding_key: str, hashes: list[str]
+    ) -> dict[str, list[float]]:
+        hashes = list(set(hashes))
+        embeddings = {}
+
+        now = int(time.time())
+        touched = []
+
+        with get_db() as db:
+            for i in range(0, len(hashes), CHUNK_EMBEDDING_QUERY_BATCH_SIZE):
+                rows = (
+                    db.query(
+                        ChunkEmbedding.hash,
+                        ChunkEmbedding.vector,
+                        ChunkEmbedding.last_used_at,
+                    )
+                    .filter(
+                        ChunkEmbedding.embedding_key == embedding_key,
+                        ChunkEmbedding.hash.in_(
+                            hashes[i : i + CHUNK_EMBEDDING_QUERY_BATCH_SIZE]
+                        ),
+                    )
+                    .all()
+                )
+                for hash, vector, last_used_at in rows:
+                    embeddings[hash] = np.frombuffer(vector, dtype=np.float32).tolist()
+                    if (last_used_at or 0) < now - CHUNK_EMBEDDING_TOUCH_INTERVAL:
+                        touched.append(hash)
+
+            # Keep reused vectors from being pruned
+            try:
+                for i in range(0, len(touched), CHUNK_EMBEDDING_QUERY_BATCH_SIZE):
+                    db.query(ChunkEmbedding).filter(
+                        ChunkEmbedding.embedding_key == embedding_key,
+                        ChunkEmbedding.hash.in_(
+                            touched[i : i + CHUNK_EMBEDDING_QUERY_BATCH_SIZE]
+                        ),
+                    ).update(
+                        {ChunkEmbedding.last_used_at: now}, synchronize_session=False
+                    )
+                if touched:
+                    db.commit()
+            except Exception as e:
+                db.rollback()
+                log.warning(f"Error updating the last use of chunk embeddings: {e}")
+
+        return embeddings
+
+    def insert_embeddings(
+        self, embedding_key: str, embeddings: dict[str, list[float]]
+    ) -> bool:
+        if not embeddings:
+            return True
+
+        with get_db() as db:
+            try:
+                # Chunks stored in the meantime, e.g. by a concurrent upload
+                hashes = list(embeddings.keys())
+                existing = set()
+                for i in range(0, len(hashes), CHUNK_EMBEDDING_QUERY_BATCH_SIZE):
+                    existing.update(
+                        hash
+                        for (hash,) in db.query(ChunkEmbedding.hash)
+                        .filter(
+                            ChunkEmbedding.embedding_key == embedding_key,
+                            ChunkEmbedding.hash.in_(
+                                hashes[i : i + CHUNK_EMBEDDING_QUERY_BATCH_SIZE]
+                            ),
+                        )
+                        .all()
+                    )
+
+                now = int(time.time())
+                db.bulk_insert_mappings(
+                    ChunkEmbedding,
+                    [
+                        {
+                            "embedding_key": embedding_key,
+                            "hash": hash,
+                            "dimensions": len(embedding),
+                            "vector": np.asarray(embedding, dtype=np.float32).tobytes(),
+                            "created_at": now,
+                            "last_used_at": now,
+                        }
+                        for hash, embedding in embeddings.items()
+                        if hash not in existing
+                    ],
+                )
+                db.commit()
+                return True
+            except IntegrityError:
+                db.rollback()
+                log.debug("Chunk embeddings were stored concurrently, skipping")
+                return False
+            except Exception as e:
+                db.rollback()
+                log.exception(f"Error storing chunk embeddings: {e}")
+                return False
+
+    def prune_embeddings(self, max_age: int = 0, max_size: int = 0) -> int:
+        """
+        Delete the embeddings not used for `max_age` seconds, then the least
+        recently used ones beyond `max_size`. 0 disables either limit.
+        Returns the number of embeddings deleted.
+        """
+        with get_db() as db:
+            try:
+                deleted = 0
+                if max_age > 0:
+                    deleted += (
+                        db.query(ChunkEmbedding)
+                        .filter(
+                            ChunkEmbedding.last_used_at < int(time.time()) - max_age
+                        )
+                        .delete(synchronize_session=False)
+                    )
+
+                if max_size > 0:
+                    excess = db.query(ChunkEmbedding).count() - max_size
+                    while excess > 0:
+                        keys = (
+                            db.query(ChunkEmbedding.embedding_key, ChunkEmbedding.hash)
+                            .order_by(ChunkEmbedding.last_used_at)
+                            .limit(min(excess, CHUNK_EMBEDDING_QUERY_BATCH_SIZE))
+                            .all()
+                        )
+                        if not keys:
+                            break
+                        db.query(ChunkEmbedding).filter(
+                            tuple_(
+                                ChunkEmbedding.embedding_key, ChunkEmbedding.hash
+                            ).in_([tuple(key) for key in keys])
+                        ).delete(synchronize_session=False)
+                        deleted += len(keys)
+                        excess -= len(keys)
+
+                db.commit()
+                return deleted
+            except Exception as e:
+                db.rollback()
+                log.exception(f"Error pruning chunk embeddings: {e}")
+                return 0
+
+    def delete_all_embeddings(self) -> bool:
+        with get_db() as db:
+            try:
+                db.query(ChunkEmbedding).delete()
+                db.commit()
+                return True
+            except Exception as e:
+                db.rollback()
+                log.exception(f"Error deleting chunk embeddings: {e}")
+                return False
+
+
+ChunkEmbeddings = ChunkEmbeddingTable()
@@ -211,6 +211,37 @@ class FilesTable:
             except Exception:
                 return None
 
+    def update_files_by_ids(self, updates: dict[str, dict]) -> list[FileModel]:
+        """
+        Update several files in one transaction, `updates` maps the id of each
+        file to its new `hash` and the `data` and `meta` to merge into its own.
+        """
+        if not updates:
+            return []
+
+        with get_db() as db:
+            try:
+                files = db.query(File).filter(File.id.in_(list(updates.keys()))).all()
+                for file in files:
+                    update = updates[file.id]
+                    if "hash" in update:
+                        file.hash = update["hash"]
+                    if "data" in update:
+                        file.data = {
+                            **(file.data if file.data else {}),
+                            **update["data"],
+                        }
+                    if "meta" in update:
+                        file.meta = {
+                            **(file.meta if file.meta else {}),
+                            **update["meta"],
+                        }
+                db.commit()
+                return [FileModel.model_validate(file) for file in files]
+            except Exception as e:
+                log.exception(f"Error updating files: {e}")
+                return []
+
     def delete_file_by_id(self, id: str) -> bool:
         with get_db() as db:
             try:
@@ -2,7 +2,7 @@ import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import Base, JSONField, get_db, run_db
 from open_webui.models.users import Users
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
@@ -164,6 +164,9 @@ class FunctionsTable:
         except Exception:
             return None
 
+    async def aget_function_by_id(self, id: str) -> Optional[FunctionModel]:
+        return await run_db(self.get_function_by_id, id)
+
     def get_functions(self, active_only=False) -> list[FunctionModel]:
         with get_db() as db:
             if active_only:
@@ -194,6 +197,11 @@ class FunctionsTable:
                     for function in db.query(Function).filter_by(type=type).all()
                 ]
 
+    async def aget_functions_by_type(
+        self, type: str, active_only=False
+    ) -> list[FunctionModel]:
+        return await run_db(self.get_functions_by_type, type, active_only)
+
     def get_global_filter_functions(self) -> list[FunctionModel]:
         with get_db() as db:
             return [
@@ -221,6 +229,18 @@ class FunctionsTable:
                 log.exception(f"Error getting function valves by id {id}: {e}")
                 return None
 
+    async def aget_function_valves_by_id(self, id: str) -> Optional[dict]:
+        return await run_db(self.get_function_valves_by_id, id)
+
+    def get_function_valves_by_ids(self, ids: list[str]) -> dict[str, dict]:
+        with get_db() as db:
+            return {
+                id: valves or {}
+                for id, valves in db.query(Function.id, Function.valves)
+                .filter(Function.id.in_(ids))
+                .all()
+            }
+
     def update_function_valves_by_id(
         self, id: str, valves: dict
     ) -> Optional[FunctionValves]:
@@ -255,6 +275,11 @@ class FunctionsTable:
             )
             return None
 
+    async def aget_user_valves_by_id_and_user_id(
+        self, id: str, user_id: str
+    ) -> Optional[dict]:
+        return await run_db(self.get_user_valves_by_id_and_user_id, id, user_id)
+
     def update_user_valves_by_id_and_user_id(
         self, id: str, user_id: str, valves: dict
     ) -> Optional[dict]:
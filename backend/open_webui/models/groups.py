@@ -5,7 +5,7 @@ from typing import Optional
 import uuid
 
 from open_webui.internal.db import Base, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, ACCESS_CONTROL_CACHE_TTL
 
 from open_webui.models.files import FileMetadataResponse
 
@@ -104,6 +104,13 @@ class GroupUpdateForm(GroupForm):
 
 
 class GroupTable:
+    def __init__(self):
+        # user_id -> (expires_at, group ids), see ACCESS_CONTROL_CACHE_TTL
+        self._member_group_ids: dict[str, tuple[float, frozenset[str]]] = {}
+
+    def clear_member_group_ids_cache(self):
+        self._member_group_ids = {}
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -120,6 +127,7 @@ class GroupTable:
             try:
                 db.add(group)
                 db.commit()
+                self.clear_member_group_ids_cache()
                 db.refresh(group)
                 if group:
                     return GroupModel.model_validate(group)
@@ -151,6 +159,32 @@ class GroupTable:
                 .all()
             ]
 
+    def get_group_ids_by_member_id(self, user_id: str) -> frozenset[str]:
+        """
+        Ids of the groups `user_id` is a member of, for access checks. Cached
+        for ACCESS_CONTROL_CACHE_TTL seconds if set.
+        """
+        if ACCESS_CONTROL_CACHE_TTL > 0:
+            entry = self._member_group_ids.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+
+        with get_db() as db:
+            group_ids = frozenset(
+                id
+                for (id,) in db.query(Group.id)
+                .filter(func.json_array_length(Group.user_ids) > 0)
+                .filter(Group.user_ids.cast(String).like(f'%"{user_id}"%'))
+                .all()
+            )
+
+        if ACCESS_CONTROL_CACHE_TTL > 0:
+            self._member_group_ids[user_id] = (
+                time.monotonic() + ACCESS_CONTROL_CACHE_TTL,
+                group_ids,
+            )
+        return group_ids
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -178,6 +212,7 @@ class GroupTable:
                     }
                 )
                 db.commit()
+                self.clear_member_group_ids_cache()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -188,6 +223,7 @@ class GroupTable:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
                 db.commit()
+                self.clear_member_group_ids_cache()
                 return True
         except Exception:
             return False
@@ -197,6 +233,7 @@ class GroupTable:
             try:
                 db.query(Group).delete()
                 db.commit()
+                self.clear_member_group_ids_cache()
 
                 return True
             except Exception:
@@ -216,6 +253,7 @@ class GroupTable:
                         }
                     )
                     db.commit()
+                    self.clear_member_group_ids_cache()
 
                 return True
             except Exception:
@@ -254,6 +292,7 @@ class GroupTable:
                         )
 
                 db.commit()
+                self.clear_member_group_ids_cache()
                 return True
             except Exception as e:
                 log.exception(e)
@@ -294,6 +333,7 @@ class GroupTable:
                 )
                 db.add(group)
                 db.commit()
+                self.clear_member_group_ids_cache()
                 db.refresh(group)
                 
                 if group:
@@ -320,6 +360,7 @@ class GroupTable:
                     }
                 )
                 db.commit()
+                self.clear_member_group_ids_cache()
                 
                 group = db.query(Group).filter_by(id=id).first()
                 return GroupModel.model_validate(group) if group else None
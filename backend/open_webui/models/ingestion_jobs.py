@@ -0,0 +1,353 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Index,
+    Integer,
+    String,
+    Text,
+    exists,
+    or_,
+)
+from sqlalchemy.orm import aliased
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+# Delay before the first retry of a failed job, doubled for each further attempt
+INGESTION_JOB_RETRY_DELAY = 5
+
+####################
+# Ingestion Job DB Schema
+####################
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_job"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+    file_id = Column(String, nullable=False)
+
+    # Knowledge base the file is added to, the file's own collection if None
+    collection_name = Column(String, nullable=True)
+    # Content to index instead of the file's, e.g. an audio transcript
+    content = Column(Text, nullable=True)
+
+    # pending, running, completed or failed
+    status = Column(String, nullable=False)
+    # extract, split, embed or index
+    stage = Column(String, nullable=True)
+    progress = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    worker_id = Column(String, nullable=True)
+    # Not claimed before, to back off retries
+    run_at = Column(BigInteger, nullable=False)
+
+    # Timestamps in nanoseconds, to keep the jobs of a file in order
+    created_at = Column(BigInteger, nullable=False)
+    updated_at = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index("idx_ingestion_job_status_run_at", "status", "run_at"),
+        Index("idx_ingestion_job_file_id", "file_id", "created_at"),
+    )
+
+
+class IngestionJobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+    file_id: str
+
+    collection_name: Optional[str] = None
+    content: Optional[str] = None
+
+    status: str
+    stage: Optional[str] = None
+    progress: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+
+    worker_id: Optional[str] = None
+    run_at: int
+
+    created_at: int  # timestamp in epoch nanoseconds
+    updated_at: int  # timestamp in epoch nanoseconds
+
+
+class IngestionJobResponse(BaseModel):
+    id: str
+    file_id: str
+    collection_name: Optional[str] = None
+
+    status: str
+    stage: Optional[str] = None
+    progress: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+
+    created_at: int
+    updated_at: int
+
+
+####################
+# Table
+####################
+
+
+class IngestionJobTable:
+    """
+    Durable queue of file ingestion jobs.
+
+    Jobs are claimed by flipping them from pending to running with a
+    conditional update, so any number of workers can share the table. The jobs
+    of a file run one at a time in the order they were enqueued, a knowledge
+    base job waits for the upload job that extracts the file's content.
+    """
+
+    def insert_new_job(
+        self,
+        user_id: str,
+        file_id: str,
+        collection_name: Optional[str] = None,
+        content: Optional[str] = None,
+    ) -> Optional[IngestionJobModel]:
+        now = time.time_ns()
+        job = IngestionJobModel(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            file_id=file_id,
+            collection_name=collection_name,
+            content=content,
+            status="pending",
+            run_at=now,
+            created_at=now,
+            updated_at=now,
+        )
+
+        with get_db() as db:
+            try:
+                db.add(IngestionJob(**job.model_dump()))
+                db.commit()
+                return job
+            except Exception as e:
+                log.exception(f"Error enqueueing ingestion job: {e}")
+                return None
+
+    def get_job_by_id(self, id: str) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            job = db.get(IngestionJob, id)
+            return IngestionJobModel.model_validate(job) if job else None
+
+    def get_latest_job_by_file_id(
+        self, file_id: str, collection_name: Optional[str] = None
+    ) -> Optional[IngestionJobModel]:
+        # Without a collection name, the job processing the file itself
+        with get_db() as db:
+            job = (
+                db.query(IngestionJob)
+                .filter(
+                    IngestionJob.file_id == file_id,
+                    IngestionJob.collection_name == collection_name,
+                )
+                .order_by(IngestionJob.created_at.desc())
+                .first()
+            )
+            return IngestionJobModel.model_validate(job) if job else None
+
+    def claim_jobs(self, worker_id: str, limit: int) -> list[IngestionJobModel]:
+        now = time.time_ns()
+        claimed = []
+
+        # Jobs queued behind an earlier job of their file wait for it
+        earlier = aliased(IngestionJob)
+        blocked = exists().where(
+            earlier.file_id == IngestionJob.file_id,
+            earlier.status.in_(["pending", "running"]),
+            earlier.created_at < IngestionJob.created_at,
+        )
+
+        with get_db() as db:
+            candidates = (
+                db.query(IngestionJob.id)
+                .filter(
+                    IngestionJob.status == "pending",
+                    IngestionJob.run_at <= now,
+                    ~blocked,
+                )
+                .order_by(IngestionJob.run_at, IngestionJob.created_at)
+                .limit(limit)
+                .all()
+            )
+
+            for (id,) in candidates:
+                # Skipped if claimed by another worker in the meantime
+                count = (
+                    db.query(IngestionJob)
+                    .filter(IngestionJob.id == id, IngestionJob.status == "pending")
+                    .update(
+                        {
+                            "status": "running",
+                            "worker_id": worker_id,
+                            "attempts": IngestionJob.attempts + 1,
+                            "error": None,
+                            "updated_at": now,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+
+                if count:
+                    claimed.append(
+                        IngestionJobModel.model_validate(db.get(IngestionJob, id))
+                    )
+
+        return claimed
+
+    def update_job_by_id(self, id: str, **fields) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            db.query(IngestionJob).filter_by(id=id).update(
+                {**fields, "updated_at": time.time_ns()}
+            )
+            db.commit()
+
+            job = db.get(IngestionJob, id)
+            return IngestionJobModel.model_validate(job) if job else None
+
+    def complete_job_by_id(self, id: str) -> Optional[IngestionJobModel]:
+        return self.update_job_by_id(
+            id, status="completed", progress=100, worker_id=None
+        )
+
+    def fail_job_by_id(
+        self, id: str, error: str, max_attempts: int, retry: bool = True
+    ) -> Optional[IngestionJobModel]:
+        """
+        Requeue the job with an exponential backoff, or mark it as failed once
+        it ran `max_attempts` times or should not be retried.
+        """
+        job = self.get_job_by_id(id)
+        if job is None:
+            return None
+
+        if retry and job.attempts < max_attempts:
+            delay = INGESTION_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            return self.update_job_by_id(
+                id,
+                status="pending",
+                error=error,
+                worker_id=None,
+                run_at=time.time_ns() + delay * 1_000_000_000,
+            )
+
+        return self.update_job_by_id(id, status="failed", error=error, worker_id=None)
+
+    def touch_jobs_by_ids(self, ids: list[str], worker_id: str) -> int:
+        """
+        Refresh the running jobs the worker still holds, so that jobs waiting
+        for a stage or in a long stage are not considered stale.
+        """
+        if not ids:
+            return 0
+
+        with get_db() as db:
+            count = (
+                db.query(IngestionJob)
+                .filter(
+                    IngestionJob.id.in_(ids),
+                    IngestionJob.status == "running",
+                    IngestionJob.worker_id == worker_id,
+                )
+                .update({"updated_at": time.time_ns()}, synchronize_session=False)
+            )
+            db.commit()
+            return count
+
+    def requeue_stale_jobs(self, timeout: int, worker_id: Optional[str] = None) -> int:
+        """
+        Requeue running jobs without progress for `timeout` seconds, left
+        behind by a worker that stopped or crashed. Jobs of `worker_id` and of
+        workers that refreshed any of their jobs since are still being run.
+        """
+        now = time.time_ns()
+        before = now - int(timeout * 1_000_000_000)
+
+        with get_db() as db:
+            live_worker_ids = (
+                db.query(IngestionJob.worker_id)
+                .filter(
+                    IngestionJob.status == "running",
+                    IngestionJob.worker_id.isnot(None),
+                    IngestionJob.updated_at >= before,
+                )
+                .distinct()
+                .scalar_subquery()
+            )
+
+            query = db.query(IngestionJob).filter(
+                IngestionJob.status == "running",
+                IngestionJob.updated_at < before,
+                or_(
+                    IngestionJob.worker_id.is_(None),
+                    IngestionJob.worker_id.notin_(live_worker_ids),
+                ),
+            )
+            if worker_id is not None:
+                query = query.filter(IngestionJob.worker_id != worker_id)
+
+            count = query.update(
+                {"status": "pending", "worker_id": None, "run_at": now},
+                synchronize_session=False,
+            )
+            db.commit()
+            return count
+
+    def requeue_jobs_by_worker_id(self, worker_id: str) -> int:
+        now = time.time_ns()
+        with get_db() as db:
+            count = (
+                db.query(IngestionJob)
+                .filter(
+                    IngestionJob.status == "running",
+                    IngestionJob.worker_id == worker_id,
+                )
+                .update(
+                    {
+                        "status": "pending",
+                        "worker_id": None,
+                        "attempts": IngestionJob.attempts - 1,
+                        "run_at": now,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return count
+
+    def delete_finished_jobs(self, before: int) -> int:
+        with get_db() as db:
+            count = (
+                db.query(IngestionJob)
+                .filter(
+                    IngestionJob.status.in_(["completed", "failed"]),
+                    IngestionJob.updated_at < before,
+                )
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            return count
+
+
+IngestionJobs = IngestionJobTable()
@@ -16,7 +16,7 @@ from open_webui.models.groups import Groups
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text, JSON
 
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import has_access, get_user_group_ids
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -132,12 +132,13 @@ class KnowledgeTable:
         with get_db() as db:
             # Alle Wissensdatenbanken abrufen (datenbankagnostisch)
             all_knowledge = db.query(Knowledge).order_by(Knowledge.updated_at.desc()).all()
-            
+            user_group_ids = get_user_group_ids(user_id)
+
             knowledge_bases = []
             for knowledge in all_knowledge:
                 # DSGVO-konforme Zugriffsprüfung
                 if (knowledge.user_id == user_id or  # Eigene Datenbanken
-                    has_access(user_id, "read", knowledge.access_control)):  # Freigegebene
+                    has_access(user_id, "read", knowledge.access_control, user_group_ids)):  # Freigegebene
                     
                     user = Users.get_user_by_id(knowledge.user_id)
                     knowledge_bases.append(
@@ -154,11 +155,14 @@ class KnowledgeTable:
         self, user_id: str, permission: str = "write"
     ) -> list[KnowledgeUserModel]:
         knowledge_bases = self.get_knowledge_bases(user_id)
+        user_group_ids = get_user_group_ids(user_id)
         return [
             knowledge_base
             for knowledge_base in knowledge_bases
             if knowledge_base.user_id == user_id
-            or has_access(user_id, permission, knowledge_base.access_control)
+            or has_access(
+                user_id, permission, knowledge_base.access_control, user_group_ids
+            )
         ]
 
     def get_knowledge_by_id(self, id: str) -> Optional[KnowledgeModel]:
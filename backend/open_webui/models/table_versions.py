@@ -0,0 +1,41 @@
+from open_webui.internal.db import Base, get_db
+from sqlalchemy import BigInteger, Column, String, update
+from sqlalchemy.orm import Session
+
+####################
+# Table Version DB Schema
+####################
+
+
+class TableVersion(Base):
+    """
+    Version counter of a table, bumped in the same transaction as the changes
+    to its rows, so other instances can tell when to reload what they cache.
+    """
+
+    __tablename__ = "table_version"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+class TableVersionsTable:
+    def get_versions(self, names: list[str]) -> tuple:
+        with get_db() as db:
+            versions = dict(
+                db.query(TableVersion.name, TableVersion.version).filter(
+                    TableVersion.name.in_(names)
+                )
+            )
+            return tuple(versions.get(name, 0) for name in names)
+
+    def bump_versions(self, db: Session, names: list[str]):
+        """Bump the versions of the tables in the transaction of `db`."""
+        db.execute(
+            update(TableVersion)
+            .where(TableVersion.name.in_(names))
+            .values(version=TableVersion.version + 1)
+        )
+
+
+TableVersions = TableVersionsTable()
@@ -1,7 +1,21 @@
+import asyncio
+import logging
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import Base, JSONField, get_db, run_db
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+    USER_LAST_ACTIVE_FLUSH_INTERVAL,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
 
 
 from open_webui.models.chats import Chats
@@ -10,7 +24,12 @@ from open_webui.models.groups import Groups
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text
-from sqlalchemy import or_
+from sqlalchemy import or_, update
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+REDIS_USER_CACHE_CHANNEL = "open-webui:user-cache-invalidations"
 
 
 ####################
@@ -111,6 +130,19 @@ class UserUpdateForm(BaseModel):
 
 
 class UsersTable:
+    def __init__(self, redis=None):
+        # Publishes user cache invalidations to the other instances
+        self.redis = redis
+
+        # id -> (expires_at, user), least recently used first
+        self._user_cache: OrderedDict[str, tuple[float, UserModel]] = OrderedDict()
+        self._user_cache_generation = 0
+        self._user_cache_lock = threading.Lock()
+
+        # id -> last active timestamp not yet written, see flush_last_active
+        self._last_active: dict[str, int] = {}
+        self._last_active_lock = threading.Lock()
+
     def insert_new_user(
         self,
         id: str,
@@ -151,6 +183,54 @@ class UsersTable:
         except Exception:
             return None
 
+    async def aget_user_by_id(self, id: str) -> Optional[UserModel]:
+        return await run_db(self.get_user_by_id, id)
+
+    async def aget_cached_user_by_id(self, id: str) -> Optional[UserModel]:
+        """
+        `get_user_by_id` for authenticating requests: users are cached for
+        USER_CACHE_TTL seconds, and dropped from the cache on every instance
+        when they are updated or deleted.
+        """
+        if USER_CACHE_TTL <= 0:
+            return await self.aget_user_by_id(id)
+
+        with self._user_cache_lock:
+            entry = self._user_cache.get(id)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._user_cache.move_to_end(id)
+                    return entry[1].model_copy()
+                del self._user_cache[id]
+            generation = self._user_cache_generation
+
+        user = await self.aget_user_by_id(id)
+        if user is not None:
+            with self._user_cache_lock:
+                # Unless the user was changed while being read
+                if generation == self._user_cache_generation:
+                    self._user_cache[id] = (time.monotonic() + USER_CACHE_TTL, user)
+                    while len(self._user_cache) > USER_CACHE_SIZE:
+                        self._user_cache.popitem(last=False)
+            user = user.model_copy()
+        return user
+
+    def invalidate_cached_user(self, id: str, publish: bool = True):
+        with self._user_cache_lock:
+            self._user_cache.pop(id, None)
+            self._user_cache_generation += 1
+
+        if publish and self.redis is not None:
+            try:
+                self.redis.publish(REDIS_USER_CACHE_CHANNEL, id)
+            except Exception as e:
+                log.warning(f"Failed to publish user cache invalidation: {e}")
+
+    def clear_user_cache(self):
+        with self._user_cache_lock:
+            self._user_cache.clear()
+            self._user_cache_generation += 1
+
     def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -159,6 +239,9 @@ class UsersTable:
         except Exception:
             return None
 
+    async def aget_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        return await run_db(self.get_user_by_api_key, api_key)
+
     def get_user_by_email(self, email: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -278,11 +361,15 @@ class UsersTable:
         except Exception:
             return None
 
+    async def aget_user_webhook_url_by_id(self, id: str) -> Optional[str]:
+        return await run_db(self.get_user_webhook_url_by_id, id)
+
     def update_user_role_by_id(self, id: str, role: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                self.invalidate_cached_user(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -297,6 +384,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                self.invalidate_cached_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -316,6 +404,36 @@ class UsersTable:
         except Exception:
             return None
 
+    async def aupdate_user_last_active_by_id(self, id: str) -> Optional[UserModel]:
+        return await run_db(self.update_user_last_active_by_id, id)
+
+    def mark_user_active(self, id: str):
+        """Record activity of the user, written by the next `flush_last_active`."""
+        with self._last_active_lock:
+            self._last_active[id] = int(time.time())
+
+    def flush_last_active(self) -> int:
+        """Write the recorded last active timestamps in one bulk UPDATE."""
+        with self._last_active_lock:
+            last_active, self._last_active = self._last_active, {}
+        if not last_active:
+            return 0
+
+        try:
+            with get_db() as db:
+                db.execute(
+                    update(User),
+                    [
+                        {"id": id, "last_active_at": last_active_at}
+                        for id, last_active_at in last_active.items()
+                    ],
+                )
+                db.commit()
+            return len(last_active)
+        except Exception as e:
+            log.exception(f"Error updating last active timestamps: {e}")
+            return 0
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
@@ -323,6 +441,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                self.invalidate_cached_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -334,6 +453,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                self.invalidate_cached_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -353,6 +473,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                self.invalidate_cached_user(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -371,6 +492,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                    self.invalidate_cached_user(id)
 
                 return True
             else:
@@ -383,6 +505,7 @@ class UsersTable:
             with get_db() as db:
                 result = db.query(User).filter_by(id=id).update({"api_key": api_key})
                 db.commit()
+                self.invalidate_cached_user(id)
                 return True if result == 1 else False
         except Exception:
             return False
@@ -409,4 +532,41 @@ class UsersTable:
                 return None
 
 
-Users = UsersTable()
+Users = UsersTable(
+    redis=(
+        get_redis_connection(
+            REDIS_URL,
+            get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+        )
+        if REDIS_URL and USER_CACHE_TTL > 0
+        else None
+    )
+)
+
+
+async def redis_user_cache_listener(app):
+    """Drop users changed on other instances from the user cache."""
+    redis = app.state.redis
+
+    while True:
+        try:
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(REDIS_USER_CACHE_CHANNEL)
+
+            # Changes may have been missed while disconnected
+            Users.clear_user_cache()
+
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    Users.invalidate_cached_user(message["data"], publish=False)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning(f"User cache listener disconnected from Redis: {e}")
+            await asyncio.sleep(1)
+
+
+async def periodic_last_active_flush():
+    while True:
+        await asyncio.sleep(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+        await run_db(Users.flush_last_active)
@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from open_webui.config import (
+    RAG_EMBEDDING_CACHE_SIZE,
+    RAG_EMBEDDING_CACHE_TTL,
+    ENABLE_RAG_EMBEDDING_CACHE_REDIS,
+)
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+REDIS_EMBEDDING_CACHE_KEY_PREFIX = "open-webui:embedding-cache"
+
+
+class EmbeddingCache:
+    """
+    Bounded cache of embeddings keyed by (engine, model, prefix, text).
+
+    Entries live in an in-process LRU with a TTL and, when a Redis client is
+    given, in Redis as well so they are shared between instances. Embeddings
+    are stored as float64 arrays, which keeps them much smaller than lists of
+    Python floats without changing their values.
+    """
+
+    def __init__(
+        self,
+        max_size: int = RAG_EMBEDDING_CACHE_SIZE,
+        ttl: int = RAG_EMBEDDING_CACHE_TTL,
+        redis=None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis = redis
+
+        self._entries: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            "hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "redis_errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def get_key(engine: str, model: str, prefix: Optional[str], text: str) -> str:
+        # The exact text: whitespace changes the tokens, and so the embedding
+        return hashlib.sha256(
+            json.dumps([engine, model, prefix, text]).encode()
+        ).hexdigest()
+
+    def _get_local(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, embedding = entry
+            if self.ttl and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return embedding
+
+    def _set_local(self, key: str, embedding: np.ndarray):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, embedding)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.metrics["evictions"] += 1
+
+    def get_many(self, keys: list[str]) -> list[Optional[list[float]]]:
+        embeddings = [self._get_local(key) for key in keys]
+
+        missing = [idx for idx, embedding in enumerate(embeddings) if embedding is None]
+        if missing and self.redis is not None:
+            try:
+                values = self.redis.mget(
+                    [
+                        f"{REDIS_EMBEDDING_CACHE_KEY_PREFIX}:{keys[idx]}"
+                        for idx in missing
+                    ]
+                )
+                for idx, value in zip(missing, values):
+                    if value is not None:
+                        embeddings[idx] = np.frombuffer(value, dtype=np.float64)
+                        self._set_local(keys[idx], embeddings[idx])
+                        self.metrics["redis_hits"] += 1
+            except Exception as e:
+                self.metrics["redis_errors"] += 1
+                log.warning(f"Error reading embeddings from Redis: {e}")
+
+        hits = sum(1 for embedding in embeddings if embedding is not None)
+        self.metrics["hits"] += hits
+        self.metrics["misses"] += len(keys) - hits
+
+        return [
+            embedding.tolist() if embedding is not None else None
+            for embedding in embeddings
+        ]
+
+    def set_many(self, items: dict[str, list[float]]):
+        arrays = {
+            key: np.asarray(embedding, dtype=np.float64)
+            for key, embedding in items.items()
+        }
+        for key, embedding in arrays.items():
+            self._set_local(key, embedding)
+
+        if self.redis is not None and arrays:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for key, embedding in arrays.items():
+                    pipe.set(
+                        f"{REDIS_EMBEDDING_CACHE_KEY_PREFIX}:{key}",
+                        embedding.tobytes(),
+                        ex=self.ttl or None,
+                    )
+                pipe.execute()
+            except Exception as e:
+                self.metrics["redis_errors"] += 1
+                log.warning(f"Error writing embeddings to Redis: {e}")
+
+    def clear(self):
+        """
+        Drop the in-process entries. Redis entries are keyed by engine and model
+        and expire on their own, so they are left alone.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def get_metrics(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_rate": self.metrics["hits"] / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+
+def cached_embedding_function(
+    embedding_function, engine: str, model: str, cache: EmbeddingCache
+):
+    """
+    Wrap `embedding_function(query, prefix=None, user=None)` so only the texts
+    missing from `cache` are sent to the embedding backend, in one call.
+    """
+
+    def embed(query, prefix=None, user=None):
+        if not cache.enabled:
+            return embedding_function(query, prefix=prefix, user=user)
+
+        texts = query if isinstance(query, list) else [query]
+        keys = [cache.get_key(engine, model, prefix, text) for text in texts]
+        embeddings = cache.get_many(keys)
+
+        # Embed every missing text once, even if it is repeated in the query
+        missing: dict[str, int] = {}
+        for idx, (key, embedding) in enumerate(zip(keys, embeddings)):
+            if embedding is None and key not in missing:
+                missing[key] = idx
+
+        if missing:
+            missing_texts = [texts[idx] for idx in missing.values()]
+            new_embeddings = (
+                embedding_function(missing_texts, prefix=prefix, user=user)
+                if isinstance(query, list)
+                else [embedding_function(missing_texts[0], prefix=prefix, user=user)]
+            )
+            if new_embeddings is None or any(
+                embedding is None for embedding in new_embeddings
+            ):
+                return None
+
+            new_embeddings = dict(zip(missing.keys(), new_embeddings))
+            cache.set_many(new_embeddings)
+            embeddings = [
+                embedding if embedding is not None else new_embeddings[key]
+                for key, embedding in zip(keys, embeddings)
+            ]
+
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+    return embed
+
+
+def acached_embedding_function(
+    embedding_function, engine: str, model: str, cache: EmbeddingCache
+):
+    """
+    Async `cached_embedding_function`, for an async `embedding_function`. The
+    cache is read and written in a worker thread, since it may call Redis.
+    """
+
+    async def embed(query, prefix=None, user=None):
+        if not cache.enabled:
+            return await embedding_function(query, prefix=prefix, user=user)
+
+        texts = query if isinstance(query, list) else [query]
+        keys = [cache.get_key(engine, model, prefix, text) for text in texts]
+        embeddings = await asyncio.to_thread(cache.get_many, keys)
+
+        missing: dict[str, int] = {}
+        for idx, (key, embedding) in enumerate(zip(keys, embeddings)):
+            if embedding is None and key not in missing:
+                missing[key] = idx
+
+        if missing:
+            missing_texts = [texts[idx] for idx in missing.values()]
+            new_embeddings = (
+                await embedding_function(missing_texts, prefix=prefix, user=user)
+                if isinstance(query, list)
+                else [
+                    await embedding_function(missing_texts[0], prefix=prefix, user=user)
+                ]
+            )
+            if new_embeddings is None or any(
+                embedding is None for embedding in new_embeddings
+            ):
+                return None
+
+            new_embeddings = dict(zip(missing.keys(), new_embeddings))
+            await asyncio.to_thread(cache.set_many, new_embeddings)
+            embeddings = [
+                embedding if embedding is not None else new_embeddings[key]
+                for key, embedding in zip(keys, embeddings)
+            ]
+
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+    return embed
+
+
+QUERY_EMBEDDING_CACHE = EmbeddingCache(
+    redis=(
+        get_redis_connection(
+            REDIS_URL,
+            get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+            decode_responses=False,
+        )
+        if ENABLE_RAG_EMBEDDING_CACHE_REDIS and REDIS_URL
+        else None
+    )
+)
+
+
+def get_query_embedding_cache_metrics() -> dict:
+    return QUERY_EMBEDDING_CACHE.get_metrics()
@@ -1,15 +1,18 @@
+import asyncio
 import logging
 import os
+import random
 from typing import Optional, Union
 
+import aiohttp
+import numpy as np
 import requests
 import hashlib
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import time
 
 from huggingface_hub import snapshot_download
-from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
@@ -17,61 +20,90 @@ from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
+from open_webui.models.bm25 import BM25Indexes
+from open_webui.models.chunk_embeddings import ChunkEmbeddings
+from open_webui.retrieval.embedding_cache import (
+    EmbeddingCache,
+    acached_embedding_function,
+    cached_embedding_function,
+)
 
-from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.vector.main import (
+    GetResult,
+    run_in_vector_db_pool,
+)
+from open_webui.internal.db import run_db
 
 
 from open_webui.env import (
     SRC_LOG_LEVELS,
     OFFLINE_MODE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    AIOHTTP_CLIENT_TIMEOUT,
+    AIOHTTP_CLIENT_SESSION_SSL,
 )
 from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    RAG_EMBEDDING_CONCURRENT_REQUESTS,
+    RAG_EMBEDDING_MAX_RETRIES,
+    ENABLE_RAG_CHUNK_EMBEDDING_STORE,
+    RAG_CHUNK_EMBEDDING_STORE_MAX_SIZE,
+    RAG_CHUNK_EMBEDDING_STORE_PRUNE_INTERVAL,
+    RAG_CHUNK_EMBEDDING_STORE_TTL,
+    RAG_RERANKING_POOL_SIZE,
 )
+from open_webui.utils.misc import calculate_sha256_string
+from open_webui.utils.session_pool import get_client_session
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
+# Reranking runs in its own pool, so slow reranking models cannot take all the
+# vector DB workers and hold up the searches of other requests
+RERANKING_POOL = ThreadPoolExecutor(
+    max_workers=RAG_RERANKING_POOL_SIZE, thread_name_prefix="reranking"
+)
 
-from typing import Any
 
-from langchain_core.callbacks import CallbackManagerForRetrieverRun
-from langchain_core.retrievers import BaseRetriever
+# Embedding batches of all requests share one pool, which bounds the requests
+# in flight to the embedding engine per worker
+EMBEDDING_POOL = ThreadPoolExecutor(
+    max_workers=RAG_EMBEDDING_CONCURRENT_REQUESTS, thread_name_prefix="embedding"
+)
 
 
-class VectorSearchRetriever(BaseRetriever):
-    collection_name: Any
-    embedding_function: Any
-    top_k: int
+async def run_in_reranking_pool(fn, *args, **kwargs):
+    """Run a blocking reranking call in the reranking worker pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(RERANKING_POOL, partial(fn, *args, **kwargs))
 
-    def _get_relevant_documents(
-        self,
-        query: str,
-        *,
-        run_manager: CallbackManagerForRetrieverRun,
-    ) -> list[Document]:
-        result = VECTOR_DB_CLIENT.search(
-            collection_name=self.collection_name,
-            vectors=[self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)],
-            limit=self.top_k,
-        )
 
-        ids = result.ids[0]
-        metadatas = result.metadatas[0]
-        documents = result.documents[0]
+from typing import Any
 
-        results = []
-        for idx in range(len(ids)):
-            results.append(
-                Document(
-                    metadata=metadatas[idx],
-                    page_content=documents[idx],
-                )
+
+def ensure_bm25_index(collection_name: str) -> bool:
+    """
+    Build the persistent BM25 index of a collection from the vector DB if it
+    does not exist yet (e.g. collections created before the index existed).
+    Later changes are applied incrementally by the ingestion/deletion paths.
+    """
+
+    def get_items():
+        log.info(f"ensure_bm25_index:building index for collection {collection_name}")
+        result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+        if result is None or not result.ids:
+            return None
+
+        return [
+            {"id": id, "text": text, "metadata": metadata}
+            for id, text, metadata in zip(
+                result.ids[0], result.documents[0], result.metadatas[0]
             )
-        return results
+        ]
+
+    return BM25Indexes.ensure_index(collection_name, get_items)
 
 
 def query_doc(
@@ -94,6 +126,26 @@ def query_doc(
         raise e
 
 
+async def aquery_doc(
+    collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
+):
+    try:
+        log.debug(f"aquery_doc:doc {collection_name}")
+        result = await VECTOR_DB_CLIENT.asearch(
+            collection_name=collection_name,
+            vectors=[query_embedding],
+            limit=k,
+        )
+
+        if result:
+            log.info(f"aquery_doc:result {result.ids} {result.metadatas}")
+
+        return result
+    except Exception as e:
+        log.exception(f"Error querying doc {collection_name} with limit {k}: {e}")
+        raise e
+
+
 def get_doc(collection_name: str, user: UserModel = None):
     try:
         log.debug(f"get_doc:doc {collection_name}")
@@ -108,75 +160,180 @@ def get_doc(collection_name: str, user: UserModel = None):
         raise e
 
 
-def query_doc_with_hybrid_search(
+# Rank constant of reciprocal rank fusion, as used by LangChain's EnsembleRetriever
+RRF_RANK_CONSTANT = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[int]], weights: list[float], c: int = RRF_RANK_CONSTANT
+) -> list[int]:
+    """
+    Fuse rankings of candidate indices by weighted reciprocal rank fusion and
+    return the candidates ordered by fused score. Ties keep the order in which
+    candidates first appear in `rankings`.
+    """
+    scores: dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, idx in enumerate(ranking, start=1):
+            scores[idx] = scores.get(idx, 0.0) + weight / (rank + c)
+    return sorted(scores, key=scores.__getitem__, reverse=True)
+
+
+def get_top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, highest first, without a full sort."""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.size:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(scores.size)
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def get_cosine_scores(query_embedding, embeddings) -> np.ndarray:
+    query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    if matrix.size == 0:
+        return np.empty(0, dtype=np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    return np.divide(
+        matrix @ query,
+        norms,
+        out=np.zeros(len(matrix), dtype=np.float32),
+        where=norms > 0,
+    )
+
+
+def get_hybrid_search_candidates(
     collection_name: str,
-    collection_result: GetResult,
     query: str,
     embedding_function,
     k: int,
-    reranking_function,
-    k_reranker: int,
-    r: float,
     hybrid_bm25_weight: float,
-) -> dict:
-    try:
-        log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=collection_result.documents[0],
-            metadatas=collection_result.metadatas[0],
+) -> tuple[list[str], list[dict], list, Optional[list[float]]]:
+    """
+    Candidates of the BM25 and vector searches of a collection, deduplicated by
+    their text and ordered by reciprocal rank fusion. Returns their texts,
+    metadatas and stored vectors (None where not returned by the vector DB),
+    and the query embedding if the vector search ran.
+    """
+    candidates: dict[str, int] = {}
+    texts, metadatas, embeddings = [], [], []
+
+    def add_candidate(text, metadata, embedding=None) -> int:
+        idx = candidates.get(text)
+        if idx is None:
+            idx = candidates[text] = len(texts)
+            texts.append(text)
+            metadatas.append(metadata or {})
+            embeddings.append(embedding)
+        elif embeddings[idx] is None:
+            embeddings[idx] = embedding
+        return idx
+
+    rankings, weights = [], []
+    if hybrid_bm25_weight > 0:
+        results = BM25Indexes.search(collection_name=collection_name, query=query, k=k)
+        rankings.append(
+            [add_candidate(result.text, result.metadata) for result in results]
         )
-        bm25_retriever.k = k
-
-        vector_search_retriever = VectorSearchRetriever(
+        weights.append(min(hybrid_bm25_weight, 1.0))
+
+    query_embedding = None
+    if hybrid_bm25_weight < 1:
+        query_embedding = embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
+        # Stored vectors, where the vector DB returns them, spare re-embedding
+        # the candidates for scoring
+        result = VECTOR_DB_CLIENT.search_with_vectors(
             collection_name=collection_name,
-            embedding_function=embedding_function,
-            top_k=k,
+            vectors=[query_embedding],
+            limit=k,
         )
-
-        if hybrid_bm25_weight <= 0:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[vector_search_retriever], weights=[1.0]
-            )
-        elif hybrid_bm25_weight >= 1:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever], weights=[1.0]
-            )
-        else:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever, vector_search_retriever],
-                weights=[hybrid_bm25_weight, 1.0 - hybrid_bm25_weight],
+        ranking = []
+        if result is not None and result.ids:
+            vectors = (
+                result.embeddings[0]
+                if result.embeddings
+                else [None] * len(result.ids[0])
             )
+            ranking = [
+                add_candidate(document, metadata, vector)
+                for document, metadata, vector in zip(
+                    result.documents[0], result.metadatas[0], vectors
+                )
+            ]
+        rankings.append(ranking)
+        weights.append(1.0 - max(hybrid_bm25_weight, 0.0))
+
+    order = reciprocal_rank_fusion(rankings, weights)
+    return (
+        [texts[idx] for idx in order],
+        [metadatas[idx] for idx in order],
+        [embeddings[idx] for idx in order],
+        query_embedding,
+    )
 
-        compressor = RerankCompressor(
-            embedding_function=embedding_function,
-            top_n=k_reranker,
-            reranking_function=reranking_function,
-            r_score=r,
-        )
 
-        compression_retriever = ContextualCompressionRetriever(
-            base_compressor=compressor, base_retriever=ensemble_retriever
-        )
+def rerank_hybrid_search_candidates(
+    query: str,
+    texts: list[str],
+    metadatas: list[dict],
+    embeddings: list,
+    query_embedding: Optional[list[float]],
+    embedding_function,
+    k: int,
+    reranking_function,
+    k_reranker: int,
+    r: float,
+) -> dict:
+    compressor = RerankCompressor(
+        embedding_function=embedding_function,
+        top_n=min(k, k_reranker),
+        reranking_function=reranking_function,
+        r_score=r,
+    )
+    top, scores = compressor.rerank(
+        query, texts, embeddings=embeddings, query_embedding=query_embedding
+    )
 
-        result = compression_retriever.invoke(query)
+    return {
+        "distances": [scores],
+        "documents": [[texts[idx] for idx in top]],
+        "metadatas": [
+            [{**metadatas[idx], "score": score} for idx, score in zip(top, scores)]
+        ],
+    }
 
-        distances = [d.metadata.get("score") for d in result]
-        documents = [d.page_content for d in result]
-        metadatas = [d.metadata for d in result]
 
-        # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
-        if k < k_reranker:
-            sorted_items = sorted(
-                zip(distances, metadatas, documents), key=lambda x: x[0], reverse=True
-            )
-            sorted_items = sorted_items[:k]
-            distances, documents, metadatas = map(list, zip(*sorted_items))
+def query_doc_with_hybrid_search(
+    collection_name: str,
+    query: str,
+    embedding_function,
+    k: int,
+    reranking_function,
+    k_reranker: int,
+    r: float,
+    hybrid_bm25_weight: float,
+) -> dict:
+    try:
+        log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
 
-        result = {
-            "distances": [distances],
-            "documents": [documents],
-            "metadatas": [metadatas],
-        }
+        texts, metadatas, embeddings, query_embedding = get_hybrid_search_candidates(
+            collection_name, query, embedding_function, k, hybrid_bm25_weight
+        )
+        result = rerank_hybrid_search_candidates(
+            query,
+            texts,
+            metadatas,
+            embeddings,
+            query_embedding,
+            embedding_function,
+            k,
+            reranking_function,
+            k_reranker,
+            r,
+        )
 
         log.info(
             "query_doc_with_hybrid_search:result "
@@ -249,6 +406,20 @@ def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
     }
 
 
+async def aget_doc(collection_name: str, user: UserModel = None):
+    try:
+        log.debug(f"aget_doc:doc {collection_name}")
+        result = await VECTOR_DB_CLIENT.aget(collection_name=collection_name)
+
+        if result:
+            log.info(f"aget_doc:result {result.ids} {result.metadatas}")
+
+        return result
+    except Exception as e:
+        log.exception(f"Error getting doc {collection_name}: {e}")
+        raise e
+
+
 def get_all_items_from_collections(collection_names: list[str]) -> dict:
     results = []
 
@@ -266,19 +437,126 @@ def get_all_items_from_collections(collection_names: list[str]) -> dict:
     return merge_get_results(results)
 
 
+async def aget_all_items_from_collections(collection_names: list[str]) -> dict:
+    async def process_collection(collection_name):
+        try:
+            result = await aget_doc(collection_name=collection_name)
+            if result is not None:
+                return result.model_dump()
+        except Exception as e:
+            log.exception(f"Error when querying the collection: {e}")
+        return None
+
+    results = await asyncio.gather(
+        *[process_collection(name) for name in collection_names if name]
+    )
+    return merge_get_results([result for result in results if result is not None])
+
+
 def query_collection(
     collection_names: list[str],
     queries: list[str],
     embedding_function,
     k: int,
 ) -> dict:
+    """
+    Blocking version of `aquery_collection`, for callers outside the event loop
+    (e.g. pipelines and tools). `embedding_function` is the sync one.
+    """
+
+    def process_query_collection(collection_name, query_embedding):
+        try:
+            return query_doc(
+                collection_name=collection_name,
+                k=k,
+                query_embedding=query_embedding,
+            )
+        except Exception as e:
+            log.exception(f"Error when querying the collection: {e}")
+            return None
+
+    query_embeddings = embedding_function(queries, prefix=RAG_EMBEDDING_QUERY_PREFIX)
+    tasks = [
+        (collection_name, query_embedding)
+        for query_embedding in query_embeddings
+        for collection_name in collection_names
+        if collection_name
+    ]
+    with ThreadPoolExecutor() as executor:
+        task_results = list(
+            executor.map(lambda task: process_query_collection(*task), tasks)
+        )
+
+    results = [result.model_dump() for result in task_results if result is not None]
+    return merge_and_sort_query_results(results, k=k)
+
+
+def query_collection_with_hybrid_search(
+    collection_names: list[str],
+    queries: list[str],
+    embedding_function,
+    k: int,
+    reranking_function,
+    k_reranker: int,
+    r: float,
+    hybrid_bm25_weight: float,
+) -> dict:
+    """
+    Blocking version of `aquery_collection_with_hybrid_search`, for callers
+    outside the event loop (e.g. pipelines and tools).
+    """
     results = []
     error = False
 
-    def process_query_collection(collection_name, query_embedding):
+    for collection_name in collection_names:
+        try:
+            if hybrid_bm25_weight > 0 and not ensure_bm25_index(collection_name):
+                continue
+        except Exception as e:
+            log.exception(f"Failed to index collection {collection_name}: {e}")
+            continue
+
+        for query in queries:
+            try:
+                results.append(
+                    query_doc_with_hybrid_search(
+                        collection_name=collection_name,
+                        query=query,
+                        embedding_function=embedding_function,
+                        k=k,
+                        reranking_function=reranking_function,
+                        k_reranker=k_reranker,
+                        r=r,
+                        hybrid_bm25_weight=hybrid_bm25_weight,
+                    )
+                )
+            except Exception:
+                error = True
+
+    if error and not results:
+        raise Exception(
+            "Hybrid search failed for all collections. Using Non-hybrid search as fallback."
+        )
+
+    return merge_and_sort_query_results(results, k=k)
+
+
+async def aquery_collection(
+    collection_names: list[str],
+    queries: list[str],
+    embedding_function,
+    k: int,
+) -> dict:
+    """
+    Search the collections for the queries, awaiting the searches of all the
+    queries and collections concurrently on the vector DB client. The queries
+    are embedded with the async `embedding_function`.
+    """
+
+    async def process_query_collection(collection_name, query_embedding):
         try:
             if collection_name:
-                result = query_doc(
+                result = await aquery_doc(
                     collection_name=collection_name,
                     k=k,
                     query_embedding=query_embedding,
@@ -291,21 +569,23 @@ def query_collection(
             return None, e
 
     # Generate all query embeddings (in one call)
-    query_embeddings = embedding_function(queries, prefix=RAG_EMBEDDING_QUERY_PREFIX)
+    query_embeddings = await embedding_function(
+        queries, prefix=RAG_EMBEDDING_QUERY_PREFIX
+    )
     log.debug(
-        f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
+        f"aquery_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
-    with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
-                )
-                future_results.append(result)
-        task_results = [future.result() for future in future_results]
+    task_results = await asyncio.gather(
+        *[
+            process_query_collection(collection_name, query_embedding)
+            for query_embedding in query_embeddings
+            for collection_name in collection_names
+        ]
+    )
 
+    results = []
+    error = False
     for result, err in task_results:
         if err is not None:
             error = True
@@ -318,7 +598,7 @@ def query_collection(
     return merge_and_sort_query_results(results, k=k)
 
 
-def query_collection_with_hybrid_search(
+async def aquery_collection_with_hybrid_search(
     collection_names: list[str],
     queries: list[str],
     embedding_function,
@@ -328,57 +608,70 @@ def query_collection_with_hybrid_search(
     r: float,
     hybrid_bm25_weight: float,
 ) -> dict:
+    """
+    Hybrid search of the collections for the queries. BM25 lookups and
+    reranking are blocking: the searches of each query of each collection run
+    in the shared vector DB worker pool, their reranking in `RERANKING_POOL`.
+    """
     results = []
     error = False
-    # Fetch collection data once per collection sequentially
-    # Avoid fetching the same data multiple times later
-    collection_results = {}
-    for collection_name in collection_names:
+
+    async def ensure_index(collection_name):
         try:
-            log.debug(
-                f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
-            )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=collection_name
+            return (
+                await run_in_vector_db_pool(ensure_bm25_index, collection_name)
+                if hybrid_bm25_weight > 0
+                else True
             )
         except Exception as e:
-            log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
+            log.exception(f"Failed to index collection {collection_name}: {e}")
+            return False
+
+    indexed = await asyncio.gather(*[ensure_index(cn) for cn in collection_names])
+    indexed_collections = dict(zip(collection_names, indexed))
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
     )
 
-    def process_query(collection_name, query):
+    async def process_query(collection_name, query):
         try:
-            result = query_doc_with_hybrid_search(
-                collection_name=collection_name,
-                collection_result=collection_results[collection_name],
-                query=query,
-                embedding_function=embedding_function,
-                k=k,
-                reranking_function=reranking_function,
-                k_reranker=k_reranker,
-                r=r,
-                hybrid_bm25_weight=hybrid_bm25_weight,
+            log.debug(f"aquery_collection_with_hybrid_search:doc {collection_name}")
+            texts, metadatas, embeddings, query_embedding = await run_in_vector_db_pool(
+                get_hybrid_search_candidates,
+                collection_name,
+                query,
+                embedding_function,
+                k,
+                hybrid_bm25_weight,
+            )
+            result = await run_in_reranking_pool(
+                rerank_hybrid_search_candidates,
+                query,
+                texts,
+                metadatas,
+                embeddings,
+                query_embedding,
+                embedding_function,
+                k,
+                reranking_function,
+                k_reranker,
+                r,
             )
             return result, None
         except Exception as e:
             log.exception(f"Error when querying the collection with hybrid_search: {e}")
             return None, e
 
-    # Prepare tasks for all collections and queries
-    # Avoid running any tasks for collections that failed to fetch data (have assigned None)
-    tasks = [
-        (cn, q)
-        for cn in collection_names
-        if collection_results[cn] is not None
-        for q in queries
-    ]
-
-    with ThreadPoolExecutor() as executor:
-        future_results = [executor.submit(process_query, cn, q) for cn, q in tasks]
-        task_results = [future.result() for future in future_results]
+    # Avoid running any tasks for collections that failed to be indexed
+    task_results = await asyncio.gather(
+        *[
+            process_query(cn, q)
+            for cn in collection_names
+            if indexed_collections[cn]
+            for q in queries
+        ]
+    )
 
     for result, err in task_results:
         if err is not None:
@@ -394,6 +687,37 @@ def query_collection_with_hybrid_search(
     return merge_and_sort_query_results(results, k=k)
 
 
+def generate_embeddings_in_batches(
+    func,
+    texts: list[str],
+    batch_size: int,
+    prefix: Optional[str] = None,
+    user: UserModel = None,
+) -> list[list[float]]:
+    """
+    Embed `texts` in batches of `batch_size` in `EMBEDDING_POOL`, with up to
+    RAG_EMBEDDING_CONCURRENT_REQUESTS batches of all requests in flight.
+    Embeddings are returned in the order of `texts`.
+    """
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    if len(batches) <= 1 or RAG_EMBEDDING_CONCURRENT_REQUESTS <= 1:
+        results = [func(batch, prefix=prefix, user=user) for batch in batches]
+    else:
+        results = list(
+            EMBEDDING_POOL.map(
+                lambda batch: func(batch, prefix=prefix, user=user), batches
+            )
+        )
+
+    embeddings = []
+    for batch, result in zip(batches, results):
+        if result is None or len(result) != len(batch):
+            raise Exception("Failed to generate embeddings for a batch of texts")
+        embeddings.extend(result)
+    return embeddings
+
+
 def get_embedding_function(
     embedding_engine,
     embedding_model,
@@ -402,7 +726,24 @@ def get_embedding_function(
     key,
     embedding_batch_size,
     azure_api_version=None,
+    cache: Optional[EmbeddingCache] = None,
 ):
+    if cache is not None:
+        return cached_embedding_function(
+            get_embedding_function(
+                embedding_engine,
+                embedding_model,
+                embedding_function,
+                url,
+                key,
+                embedding_batch_size,
+                azure_api_version,
+            ),
+            embedding_engine,
+            embedding_model,
+            cache,
+        )
+
     if embedding_engine == "":
         return lambda query, prefix=None, user=None: embedding_function.encode(
             query, **({"prompt": prefix} if prefix else {})
@@ -421,16 +762,9 @@ def get_embedding_function(
 
         def generate_multiple(query, prefix, user, func):
             if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    embeddings.extend(
-                        func(
-                            query[i : i + embedding_batch_size],
-                            prefix=prefix,
-                            user=user,
-                        )
-                    )
-                return embeddings
+                return generate_embeddings_in_batches(
+                    func, query, embedding_batch_size, prefix, user
+                )
             else:
                 return func(query, prefix, user)
 
@@ -441,7 +775,197 @@ def get_embedding_function(
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
 
-def get_sources_from_files(
+def get_async_embedding_function(
+    embedding_engine,
+    embedding_model,
+    embedding_function,
+    url,
+    key,
+    embedding_batch_size,
+    azure_api_version=None,
+    cache: Optional[EmbeddingCache] = None,
+):
+    """
+    Async counterpart of `get_embedding_function`. Remote batches are sent
+    from the event loop, up to RAG_EMBEDDING_CONCURRENT_REQUESTS at a time, and
+    local models are run in a worker thread.
+    """
+    if cache is not None:
+        return acached_embedding_function(
+            get_async_embedding_function(
+                embedding_engine,
+                embedding_model,
+                embedding_function,
+                url,
+                key,
+                embedding_batch_size,
+                azure_api_version,
+            ),
+            embedding_engine,
+            embedding_model,
+            cache,
+        )
+
+    if embedding_engine == "":
+
+        async def embed(query, prefix=None, user=None):
+            return await asyncio.to_thread(
+                lambda: embedding_function.encode(
+                    query, **({"prompt": prefix} if prefix else {})
+                ).tolist()
+            )
+
+        return embed
+    elif embedding_engine in ["ollama", "openai", "azure_openai"]:
+
+        async def func(query, prefix=None, user=None):
+            return await agenerate_embeddings(
+                engine=embedding_engine,
+                model=embedding_model,
+                text=query,
+                prefix=prefix,
+                url=url,
+                key=key,
+                user=user,
+                azure_api_version=azure_api_version,
+            )
+
+        async def embed(query, prefix=None, user=None):
+            if not isinstance(query, list):
+                return await func(query, prefix, user)
+
+            semaphore = asyncio.Semaphore(RAG_EMBEDDING_CONCURRENT_REQUESTS)
+
+            async def embed_batch(batch):
+                async with semaphore:
+                    return await func(batch, prefix, user)
+
+            batches = [
+                query[i : i + embedding_batch_size]
+                for i in range(0, len(query), embedding_batch_size)
+            ]
+            results = await asyncio.gather(*[embed_batch(batch) for batch in batches])
+
+            embeddings = []
+            for batch, result in zip(batches, results):
+                if result is None or len(result) != len(batch):
+                    raise Exception(
+                        "Failed to generate embeddings for a batch of texts"
+                    )
+                embeddings.extend(result)
+            return embeddings
+
+        return embed
+    else:
+        raise ValueError(f"Unknown embedding engine: {embedding_engine}")
+
+
+def get_new_chunks(
+    texts: list[str], hashes: list[str], embeddings: dict
+) -> dict[str, str]:
+    """Texts of the chunks without a stored vector, by hash, once each."""
+    new_texts = {}
+    for hash, text in zip(hashes, texts):
+        if hash not in embeddings and hash not in new_texts:
+            new_texts[hash] = text
+
+    log.info(f"Reusing {len(texts) - len(new_texts)} of {len(texts)} chunk embeddings")
+    return new_texts
+
+
+def get_new_chunk_embeddings(new_texts: dict[str, str], new_embeddings) -> dict:
+    """The vectors of `new_texts` by hash, checking the backend embedded all."""
+    if new_embeddings is None or len(new_embeddings) != len(new_texts):
+        raise Exception("Failed to generate embeddings for the chunks")
+    return dict(zip(new_texts.keys(), new_embeddings))
+
+
+def embed_chunks(
+    texts: list[str],
+    embedding_function,
+    embedding_engine: str,
+    embedding_model: str,
+    prefix: Optional[str] = None,
+    user: UserModel = None,
+) -> list[list[float]]:
+    """
+    Embed document chunks, reusing the stored vectors of chunks that were
+    already embedded with the same model, in any collection. Only new chunks
+    are sent to the embedding backend.
+    """
+    if not ENABLE_RAG_CHUNK_EMBEDDING_STORE:
+        return embedding_function(texts, prefix=prefix, user=user)
+
+    embedding_key = ChunkEmbeddings.get_embedding_key(
+        embedding_engine, embedding_model, prefix
+    )
+    hashes = [calculate_sha256_string(text) for text in texts]
+    embeddings = ChunkEmbeddings.get_embeddings(embedding_key, hashes)
+
+    new_texts = get_new_chunks(texts, hashes, embeddings)
+    if new_texts:
+        new_embeddings = get_new_chunk_embeddings(
+            new_texts,
+            embedding_function(list(new_texts.values()), prefix=prefix, user=user),
+        )
+        ChunkEmbeddings.insert_embeddings(embedding_key, new_embeddings)
+        embeddings.update(new_embeddings)
+
+    return [embeddings[hash] for hash in hashes]
+
+
+async def aembed_chunks(
+    texts: list[str],
+    embedding_function,
+    embedding_engine: str,
+    embedding_model: str,
+    prefix: Optional[str] = None,
+    user: UserModel = None,
+) -> list[list[float]]:
+    """
+    Async `embed_chunks`, for an async `embedding_function`. The stored vectors
+    are read and written in a worker thread.
+    """
+    if not ENABLE_RAG_CHUNK_EMBEDDING_STORE:
+        return await embedding_function(texts, prefix=prefix, user=user)
+
+    embedding_key = ChunkEmbeddings.get_embedding_key(
+        embedding_engine, embedding_model, prefix
+    )
+    hashes = [calculate_sha256_string(text) for text in texts]
+    embeddings = await asyncio.to_thread(
+        ChunkEmbeddings.get_embeddings, embedding_key, hashes
+    )
+
+    new_texts = get_new_chunks(texts, hashes, embeddings)
+    if new_texts:
+        new_embeddings = get_new_chunk_embeddings(
+            new_texts,
+            await embedding_function(
+                list(new_texts.values()), prefix=prefix, user=user
+            ),
+        )
+        await asyncio.to_thread(
+            ChunkEmbeddings.insert_embeddings, embedding_key, new_embeddings
+        )
+        embeddings.update(new_embeddings)
+
+    return [embeddings[hash] for hash in hashes]
+
+
+async def periodic_chunk_embedding_prune():
+    while True:
+        await asyncio.sleep(RAG_CHUNK_EMBEDDING_STORE_PRUNE_INTERVAL)
+        deleted = await run_db(
+            ChunkEmbeddings.prune_embeddings,
+            max_age=RAG_CHUNK_EMBEDDING_STORE_TTL,
+            max_size=RAG_CHUNK_EMBEDDING_STORE_MAX_SIZE,
+        )
+        if deleted:
+            log.info(f"Pruned {deleted} unused chunk embeddings")
+
+
+async def get_sources_from_files(
     request,
     files,
     queries,
@@ -453,6 +977,7 @@ def get_sources_from_files(
     hybrid_bm25_weight,
     hybrid_search,
     full_context=False,
+    async_embedding_function=None,
 ):
     log.debug(
         f"files: {files} {queries} {embedding_function} {reranking_function} {full_context}"
@@ -487,7 +1012,7 @@ def get_sources_from_files(
                 documents = []
                 metadatas = []
                 for file_id in file_ids:
-                    file_object = Files.get_file_by_id(file_id)
+                    file_object = await run_db(Files.get_file_by_id, file_id)
 
                     if file_object:
                         documents.append(file_object.data.get("content", ""))
@@ -505,7 +1030,7 @@ def get_sources_from_files(
                 }
 
             elif file.get("id"):
-                file_object = Files.get_file_by_id(file.get("id"))
+                file_object = await run_db(Files.get_file_by_id, file.get("id"))
                 if file_object:
                     context = {
                         "documents": [[file_object.data.get("content", "")]],
@@ -548,7 +1073,9 @@ def get_sources_from_files(
 
             if full_context:
                 try:
-                    context = get_all_items_from_collections(collection_names)
+                    context = await aget_all_items_from_collections(
+                        list(collection_names)
+                    )
                 except Exception as e:
                     log.exception(e)
 
@@ -560,8 +1087,8 @@ def get_sources_from_files(
                     else:
                         if hybrid_search:
                             try:
-                                context = query_collection_with_hybrid_search(
-                                    collection_names=collection_names,
+                                context = await aquery_collection_with_hybrid_search(
+                                    collection_names=list(collection_names),
                                     queries=queries,
                                     embedding_function=embedding_function,
                                     k=k,
@@ -577,10 +1104,13 @@ def get_sources_from_files(
                                 )
 
                         if (not hybrid_search) or (context is None):
-                            context = query_collection(
-                                collection_names=collection_names,
+                            context = await aquery_collection(
+                                collection_names=list(collection_names),
                                 queries=queries,
-                                embedding_function=embedding_function,
+                                embedding_function=(
+                                    async_embedding_function
+                                    or partial(asyncio.to_thread, embedding_function)
+                                ),
                                 k=k,
                             )
                 except Exception as e:
@@ -655,6 +1185,129 @@ def get_model_path(model: str, update_model: bool = False):
         return model
 
 
+# Transient statuses an embedding request is retried on
+EMBEDDING_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Longest wait before retrying an embedding request, whatever Retry-After asks
+# for, since the wait blocks the worker sending the batch
+EMBEDDING_RETRY_MAX_DELAY = 30
+
+
+def get_embedding_retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after:
+        try:
+            return min(EMBEDDING_RETRY_MAX_DELAY, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    # Exponential backoff with jitter, so concurrent batches don't retry in lockstep
+    return min(0.5 * 2**attempt, EMBEDDING_RETRY_MAX_DELAY) * random.uniform(0.5, 1)
+
+
+def get_embeddings_request(
+    engine: str,
+    model: str,
+    texts: list[str],
+    url: str,
+    key: str = "",
+    prefix: str = None,
+    user: UserModel = None,
+    azure_api_version: str = "",
+) -> tuple[str, dict, dict]:
+    """Return the (url, headers, json) of the embeddings request for `engine`."""
+    headers = {
+        "Content-Type": "application/json",
+        **(
+            {
+                "X-OpenWebUI-User-Name": user.name,
+                "X-OpenWebUI-User-Id": user.id,
+                "X-OpenWebUI-User-Email": user.email,
+                "X-OpenWebUI-User-Role": user.role,
+            }
+            if ENABLE_FORWARD_USER_INFO_HEADERS and user
+            else {}
+        ),
+    }
+
+    json_data = {"input": texts}
+    if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
+        json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+    if engine == "ollama":
+        headers["Authorization"] = f"Bearer {key}"
+        json_data["model"] = model
+        return f"{url}/api/embed", headers, json_data
+    elif engine == "openai":
+        headers["Authorization"] = f"Bearer {key}"
+        json_data["model"] = model
+        return f"{url}/embeddings", headers, json_data
+    elif engine == "azure_openai":
+        headers["api-key"] = key
+        return (
+            f"{url}/openai/deployments/{model}/embeddings?api-version={azure_api_version}",
+            headers,
+            json_data,
+        )
+    else:
+        raise ValueError(f"Unknown embedding engine: {engine}")
+
+
+def get_embeddings_from_response(engine: str, data: dict) -> list[list[float]]:
+    if engine == "ollama":
+        if "embeddings" in data:
+            return data["embeddings"]
+    elif "data" in data:
+        return [elem["embedding"] for elem in data["data"]]
+    raise Exception("Something went wrong :/")
+
+
+def post_embeddings_request(url: str, headers: dict, json_data: dict) -> dict:
+    for attempt in range(RAG_EMBEDDING_MAX_RETRIES + 1):
+        retry = attempt < RAG_EMBEDDING_MAX_RETRIES
+        try:
+            r = requests.post(url, headers=headers, json=json_data)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if not retry:
+                raise e
+            log.warning(f"Embedding request failed ({e}), retrying")
+            time.sleep(get_embedding_retry_delay(attempt))
+            continue
+
+        if r.status_code in EMBEDDING_RETRY_STATUS_CODES and retry:
+            log.warning(f"Embedding request returned {r.status_code}, retrying")
+            time.sleep(get_embedding_retry_delay(attempt, r.headers.get("Retry-After")))
+            continue
+
+        r.raise_for_status()
+        return r.json()
+
+
+async def apost_embeddings_request(url: str, headers: dict, json_data: dict) -> dict:
+    for attempt in range(RAG_EMBEDDING_MAX_RETRIES + 1):
+        retry = attempt < RAG_EMBEDDING_MAX_RETRIES
+        try:
+            async with get_client_session(url).post(
+                url,
+                headers=headers,
+                json=json_data,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+                ssl=AIOHTTP_CLIENT_SESSION_SSL,
+            ) as r:
+                if r.status in EMBEDDING_RETRY_STATUS_CODES and retry:
+                    log.warning(f"Embedding request returned {r.status}, retrying")
+                    await asyncio.sleep(
+                        get_embedding_retry_delay(attempt, r.headers.get("Retry-After"))
+                    )
+                    continue
+
+                r.raise_for_status()
+                return await r.json()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if not retry:
+                raise e
+            log.warning(f"Embedding request failed ({e}), retrying")
+            await asyncio.sleep(get_embedding_retry_delay(attempt))
+
+
 def generate_openai_batch_embeddings(
     model: str,
     texts: list[str],
@@ -667,34 +1320,10 @@ def generate_openai_batch_embeddings(
         log.debug(
             f"generate_openai_batch_embeddings:model {model} batch size: {len(texts)}"
         )
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            json=json_data,
+        data = post_embeddings_request(
+            *get_embeddings_request("openai", model, texts, url, key, prefix, user)
         )
-        r.raise_for_status()
-        data = r.json()
-        if "data" in data:
-            return [elem["embedding"] for elem in data["data"]]
-        else:
-            raise "Something went wrong :/"
+        return get_embeddings_from_response("openai", data)
     except Exception as e:
         log.exception(f"Error generating openai batch embeddings: {e}")
         return None
@@ -713,42 +1342,12 @@ def generate_azure_openai_batch_embeddings(
         log.debug(
             f"generate_azure_openai_batch_embeddings:deployment {model} batch size: {len(texts)}"
         )
-        json_data = {"input": texts}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        url = f"{url}/openai/deployments/{model}/embeddings?api-version={version}"
-
-        for _ in range(5):
-            r = requests.post(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": key,
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                json=json_data,
+        data = post_embeddings_request(
+            *get_embeddings_request(
+                "azure_openai", model, texts, url, key, prefix, user, version
             )
-            if r.status_code == 429:
-                retry = float(r.headers.get("Retry-After", "1"))
-                time.sleep(retry)
-                continue
-            r.raise_for_status()
-            data = r.json()
-            if "data" in data:
-                return [elem["embedding"] for elem in data["data"]]
-            else:
-                raise Exception("Something went wrong :/")
-        return None
+        )
+        return get_embeddings_from_response("azure_openai", data)
     except Exception as e:
         log.exception(f"Error generating azure openai batch embeddings: {e}")
         return None
@@ -766,35 +1365,10 @@ def generate_ollama_batch_embeddings(
         log.debug(
             f"generate_ollama_batch_embeddings:model {model} batch size: {len(texts)}"
         )
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS
-                    else {}
-                ),
-            },
-            json=json_data,
+        data = post_embeddings_request(
+            *get_embeddings_request("ollama", model, texts, url, key, prefix, user)
         )
-        r.raise_for_status()
-        data = r.json()
-
-        if "embeddings" in data:
-            return data["embeddings"]
-        else:
-            raise "Something went wrong :/"
+        return get_embeddings_from_response("ollama", data)
     except Exception as e:
         log.exception(f"Error generating ollama batch embeddings: {e}")
         return None
@@ -848,7 +1422,43 @@ def generate_embeddings(
         return embeddings[0] if isinstance(text, str) else embeddings
 
 
-import operator
+async def agenerate_embeddings(
+    engine: str,
+    model: str,
+    text: Union[str, list[str]],
+    prefix: Union[str, None] = None,
+    **kwargs,
+):
+    """Async `generate_embeddings`, sending the request from the event loop."""
+    if prefix is not None and RAG_EMBEDDING_PREFIX_FIELD_NAME is None:
+        if isinstance(text, list):
+            text = [f"{prefix}{text_element}" for text_element in text]
+        else:
+            text = f"{prefix}{text}"
+
+    texts = text if isinstance(text, list) else [text]
+    try:
+        log.debug(f"agenerate_embeddings:{engine} {model} batch size: {len(texts)}")
+        data = await apost_embeddings_request(
+            *get_embeddings_request(
+                engine,
+                model,
+                texts,
+                kwargs.get("url", ""),
+                kwargs.get("key", ""),
+                prefix,
+                kwargs.get("user"),
+                kwargs.get("azure_api_version", ""),
+            )
+        )
+        embeddings = get_embeddings_from_response(engine, data)
+    except Exception as e:
+        log.exception(f"Error generating {engine} embeddings: {e}")
+        return None
+
+    return embeddings[0] if isinstance(text, str) else embeddings
+
+
 from typing import Optional, Sequence
 
 from langchain_core.callbacks import Callbacks
@@ -865,43 +1475,74 @@ class RerankCompressor(BaseDocumentCompressor):
         extra = "forbid"
         arbitrary_types_allowed = True
 
-    def compress_documents(
+    def get_scores(
         self,
-        documents: Sequence[Document],
         query: str,
-        callbacks: Optional[Callbacks] = None,
-    ) -> Sequence[Document]:
-        reranking = self.reranking_function is not None
+        texts: list[str],
+        embeddings: Optional[list] = None,
+        query_embedding: Optional[list[float]] = None,
+    ) -> np.ndarray:
+        if self.reranking_function is not None:
+            scores = self.reranking_function.predict([(query, text) for text in texts])
+            if scores is None:
+                raise Exception("Reranking failed")
+            return np.asarray(scores, dtype=np.float64).reshape(-1)
+
+        if query_embedding is None:
+            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
 
-        if reranking:
-            scores = self.reranking_function.predict(
-                [(query, doc.page_content) for doc in documents]
-            )
-        else:
-            from sentence_transformers import util
+        # Only embed the texts whose vectors were not returned by the vector DB
+        embeddings = list(embeddings) if embeddings is not None else [None] * len(texts)
+        missing = [idx for idx, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            for idx, embedding in zip(
+                missing,
+                self.embedding_function(
+                    [texts[idx] for idx in missing], RAG_EMBEDDING_CONTENT_PREFIX
+                ),
+            ):
+                embeddings[idx] = embedding
 
-            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
-            )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
+        return get_cosine_scores(query_embedding, embeddings).astype(np.float64)
 
-        docs_with_scores = list(
-            zip(documents, scores.tolist() if not isinstance(scores, list) else scores)
-        )
+    def rerank(
+        self,
+        query: str,
+        texts: list[str],
+        embeddings: Optional[list] = None,
+        query_embedding: Optional[list[float]] = None,
+    ) -> tuple[list[int], list[float]]:
+        """
+        Return the indices of the `top_n` texts scoring at least `r_score`,
+        best first, and their scores.
+        """
+        if not texts:
+            return [], []
+
+        scores = self.get_scores(query, texts, embeddings, query_embedding)
         if self.r_score:
-            docs_with_scores = [
-                (d, s) for d, s in docs_with_scores if s >= self.r_score
-            ]
+            candidates = np.flatnonzero(scores >= self.r_score)
+        else:
+            candidates = np.arange(scores.size)
+
+        top = candidates[get_top_k_indices(scores[candidates], self.top_n)]
+        return top.tolist(), scores[top].tolist()
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        top, scores = self.rerank(query, [doc.page_content for doc in documents])
 
-        result = sorted(docs_with_scores, key=operator.itemgetter(1), reverse=True)
         final_results = []
-        for doc, doc_score in result[: self.top_n]:
-            metadata = doc.metadata
-            metadata["score"] = doc_score
-            doc = Document(
-                page_content=doc.page_content,
-                metadata=metadata,
+        for idx, doc_score in zip(top, scores):
+            doc = documents[idx]
+            final_results.append(
+                Document(
+                    page_content=doc.page_content,
+                    metadata={**doc.metadata, "score": doc_score},
+                )
             )
-            final_results.append(doc)
         return final_results
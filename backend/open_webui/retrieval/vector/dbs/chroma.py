@@ -1,3 +1,4 @@
+import asyncio
 import chromadb
 import logging
 from chromadb import Settings
@@ -30,6 +31,22 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 class ChromaClient(VectorDBBase):
     def __init__(self):
+        # Created on first use, within the event loop. Only the HTTP client has
+        # an async counterpart, the persistent one runs in the worker pool.
+        self.async_client = None
+        self._async_client_lock = asyncio.Lock()
+
+        if CHROMA_HTTP_HOST != "":
+            self.client = chromadb.HttpClient(**self._get_http_client_kwargs())
+        else:
+            self.client = chromadb.PersistentClient(
+                path=CHROMA_DATA_PATH,
+                settings=self._get_settings(),
+                tenant=CHROMA_TENANT,
+                database=CHROMA_DATABASE,
+            )
+
+    def _get_settings(self) -> Settings:
         settings_dict = {
             "allow_reset": True,
             "anonymized_telemetry": False,
@@ -40,24 +57,63 @@ class ChromaClient(VectorDBBase):
             settings_dict["chroma_client_auth_credentials"] = (
                 CHROMA_CLIENT_AUTH_CREDENTIALS
             )
+        return Settings(**settings_dict)
 
-        if CHROMA_HTTP_HOST != "":
-            self.client = chromadb.HttpClient(
-                host=CHROMA_HTTP_HOST,
-                port=CHROMA_HTTP_PORT,
-                headers=CHROMA_HTTP_HEADERS,
-                ssl=CHROMA_HTTP_SSL,
-                tenant=CHROMA_TENANT,
-                database=CHROMA_DATABASE,
-                settings=Settings(**settings_dict),
-            )
-        else:
-            self.client = chromadb.PersistentClient(
-                path=CHROMA_DATA_PATH,
-                settings=Settings(**settings_dict),
-                tenant=CHROMA_TENANT,
-                database=CHROMA_DATABASE,
-            )
+    def _get_http_client_kwargs(self) -> dict:
+        return {
+            "host": CHROMA_HTTP_HOST,
+            "port": CHROMA_HTTP_PORT,
+            "headers": CHROMA_HTTP_HEADERS,
+            "ssl": CHROMA_HTTP_SSL,
+            "tenant": CHROMA_TENANT,
+            "database": CHROMA_DATABASE,
+            "settings": self._get_settings(),
+        }
+
+    async def _get_async_client(self):
+        if self.async_client is None:
+            async with self._async_client_lock:
+                if self.async_client is None:
+                    self.async_client = await chromadb.AsyncHttpClient(
+                        **self._get_http_client_kwargs()
+                    )
+        return self.async_client
+
+    def _to_search_result(
+        self, result, include_embeddings: bool = False
+    ) -> SearchResult:
+        # chromadb has cosine distance, 2 (worst) -> 0 (best). Re-odering to 0 -> 1
+        # https://docs.trychroma.com/docs/collections/configure cosine equation
+        distances: list = result["distances"][0]
+        distances = [2 - dist for dist in distances]
+        distances = [[dist / 2 for dist in distances]]
+
+        return SearchResult(
+            **{
+                "ids": result["ids"],
+                "distances": distances,
+                "documents": result["documents"],
+                "metadatas": result["metadatas"],
+                "embeddings": (result["embeddings"] if include_embeddings else None),
+            }
+        )
+
+    def _to_get_result(self, result) -> GetResult:
+        return GetResult(
+            **{
+                "ids": [result["ids"]],
+                "documents": [result["documents"]],
+                "metadatas": [result["metadatas"]],
+            }
+        )
+
+    def _get_columns(self, items: list[VectorItem]) -> dict:
+        return {
+            "ids": [item["id"] for item in items],
+            "documents": [item["text"] for item in items],
+            "embeddings": [item["vector"] for item in items],
+            "metadatas": [item["metadata"] for item in items],
+        }
 
     def has_collection(self, collection_name: str) -> bool:
         # Check if the collection exists based on the collection name.
@@ -70,6 +126,20 @@ class ChromaClient(VectorDBBase):
 
     def search(
         self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        return self._search(collection_name, vectors, limit)
+
+    def search_with_vectors(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        return self._search(collection_name, vectors, limit, include_embeddings=True)
+
+    def _search(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_embeddings: bool = False,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         try:
@@ -78,22 +148,10 @@ class ChromaClient(VectorDBBase):
                 result = collection.query(
                     query_embeddings=vectors,
                     n_results=limit,
+                    include=["documents", "metadatas", "distances"]
+                    + (["embeddings"] if include_embeddings else []),
                 )
-
-                # chromadb has cosine distance, 2 (worst) -> 0 (best). Re-odering to 0 -> 1
-                # https://docs.trychroma.com/docs/collections/configure cosine equation
-                distances: list = result["distances"][0]
-                distances = [2 - dist for dist in distances]
-                distances = [[dist / 2 for dist in distances]]
-
-                return SearchResult(
-                    **{
-                        "ids": result["ids"],
-                        "distances": distances,
-                        "documents": result["documents"],
-                        "metadatas": result["metadatas"],
-                    }
-                )
+                return self._to_search_result(result, include_embeddings)
             return None
         except Exception as e:
             return None
@@ -109,14 +167,7 @@ class ChromaClient(VectorDBBase):
                     where=filter,
                     limit=limit,
                 )
-
-                return GetResult(
-                    **{
-                        "ids": [result["ids"]],
-                        "documents": [result["documents"]],
-                        "metadatas": [result["metadatas"]],
-                    }
-                )
+                return self._to_get_result(result)
             return None
         except:
             return None
@@ -126,13 +177,7 @@ class ChromaClient(VectorDBBase):
         collection = self.client.get_collection(name=collection_name)
         if collection:
             result = collection.get()
-            return GetResult(
-                **{
-                    "ids": [result["ids"]],
-                    "documents": [result["documents"]],
-                    "metadatas": [result["metadatas"]],
-                }
-            )
+            return self._to_get_result(result)
         return None
 
     def insert(self, collection_name: str, items: list[VectorItem]):
@@ -141,18 +186,7 @@ class ChromaClient(VectorDBBase):
             name=collection_name, metadata={"hnsw:space": "cosine"}
         )
 
-        ids = [item["id"] for item in items]
-        documents = [item["text"] for item in items]
-        embeddings = [item["vector"] for item in items]
-        metadatas = [item["metadata"] for item in items]
-
-        for batch in create_batches(
-            api=self.client,
-            documents=documents,
-            embeddings=embeddings,
-            ids=ids,
-            metadatas=metadatas,
-        ):
+        for batch in create_batches(api=self.client, **self._get_columns(items)):
             collection.add(*batch)
 
     def upsert(self, collection_name: str, items: list[VectorItem]):
@@ -161,14 +195,7 @@ class ChromaClient(VectorDBBase):
             name=collection_name, metadata={"hnsw:space": "cosine"}
         )
 
-        ids = [item["id"] for item in items]
-        documents = [item["text"] for item in items]
-        embeddings = [item["vector"] for item in items]
-        metadatas = [item["metadata"] for item in items]
-
-        collection.upsert(
-            ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas
-        )
+        collection.upsert(**self._get_columns(items))
 
     def delete(
         self,
@@ -194,3 +221,100 @@ class ChromaClient(VectorDBBase):
     def reset(self):
         # Resets the database. This will delete all collections and item entries.
         return self.client.reset()
+
+    async def ahas_collection(self, collection_name: str) -> bool:
+        if CHROMA_HTTP_HOST == "":
+            return await super().ahas_collection(collection_name)
+
+        client = await self._get_async_client()
+        return collection_name in await client.list_collections()
+
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        if CHROMA_HTTP_HOST == "":
+            return await super().asearch(collection_name, vectors, limit)
+        return await self._asearch(collection_name, vectors, limit)
+
+    async def asearch_with_vectors(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        if CHROMA_HTTP_HOST == "":
+            return await super().asearch_with_vectors(collection_name, vectors, limit)
+        return await self._asearch(
+            collection_name, vectors, limit, include_embeddings=True
+        )
+
+    async def _asearch(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        include_embeddings: bool = False,
+    ) -> Optional[SearchResult]:
+        try:
+            client = await self._get_async_client()
+            collection = await client.get_collection(name=collection_name)
+            if collection:
+                result = await collection.query(
+                    query_embeddings=vectors,
+                    n_results=limit,
+                    include=["documents", "metadatas", "distances"]
+                    + (["embeddings"] if include_embeddings else []),
+                )
+                return self._to_search_result(result, include_embeddings)
+            return None
+        except Exception as e:
+            return None
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if CHROMA_HTTP_HOST == "":
+            return await super().aquery(collection_name, filter, limit)
+
+        try:
+            client = await self._get_async_client()
+            collection = await client.get_collection(name=collection_name)
+            if collection:
+                result = await collection.get(where=filter, limit=limit)
+                return self._to_get_result(result)
+            return None
+        except:
+            return None
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        if CHROMA_HTTP_HOST == "":
+            return await super().aget(collection_name)
+
+        client = await self._get_async_client()
+        collection = await client.get_collection(name=collection_name)
+        if collection:
+            return self._to_get_result(await collection.get())
+        return None
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        if CHROMA_HTTP_HOST == "":
+            return await super().ainsert(collection_name, items)
+
+        client = await self._get_async_client()
+        collection = await client.get_or_create_collection(
+            name=collection_name, metadata={"hnsw:space": "cosine"}
+        )
+
+        columns = self._get_columns(items)
+        batch_size = await client.get_max_batch_size()
+        for i in range(0, len(items), batch_size):
+            await collection.add(
+                **{key: values[i : i + batch_size] for key, values in columns.items()}
+            )
+
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        if CHROMA_HTTP_HOST == "":
+            return await super().aupsert(collection_name, items)
+
+        client = await self._get_async_client()
+        collection = await client.get_or_create_collection(
+            name=collection_name, metadata={"hnsw:space": "cosine"}
+        )
+        await collection.upsert(**self._get_columns(items))
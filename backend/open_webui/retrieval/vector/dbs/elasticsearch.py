@@ -1,7 +1,7 @@
-from elasticsearch import Elasticsearch, BadRequestError
+from elasticsearch import AsyncElasticsearch, Elasticsearch, BadRequestError
 from typing import Optional
 import ssl
-from elasticsearch.helpers import bulk, scan
+from elasticsearch.helpers import async_bulk, async_scan, bulk, scan
 from open_webui.retrieval.vector.main import (
     VectorDBBase,
     VectorItem,
@@ -30,18 +30,28 @@ class ElasticsearchClient(VectorDBBase):
 
     def __init__(self):
         self.index_prefix = ELASTICSEARCH_INDEX_PREFIX
-        self.client = Elasticsearch(
-            hosts=[ELASTICSEARCH_URL],
-            ca_certs=ELASTICSEARCH_CA_CERTS,
-            api_key=ELASTICSEARCH_API_KEY,
-            cloud_id=ELASTICSEARCH_CLOUD_ID,
-            basic_auth=(
+        self.client = Elasticsearch(**self._get_client_kwargs())
+        # Created on first use, within the event loop
+        self.async_client = None
+
+    def _get_client_kwargs(self) -> dict:
+        return {
+            "hosts": [ELASTICSEARCH_URL],
+            "ca_certs": ELASTICSEARCH_CA_CERTS,
+            "api_key": ELASTICSEARCH_API_KEY,
+            "cloud_id": ELASTICSEARCH_CLOUD_ID,
+            "basic_auth": (
                 (ELASTICSEARCH_USERNAME, ELASTICSEARCH_PASSWORD)
                 if ELASTICSEARCH_USERNAME and ELASTICSEARCH_PASSWORD
                 else None
             ),
-            ssl_assert_fingerprint=SSL_ASSERT_FINGERPRINT,
-        )
+            "ssl_assert_fingerprint": SSL_ASSERT_FINGERPRINT,
+        }
+
+    def _get_async_client(self) -> AsyncElasticsearch:
+        if self.async_client is None:
+            self.async_client = AsyncElasticsearch(**self._get_client_kwargs())
+        return self.async_client
 
     # Status: works
     def _get_index_name(self, dimension: int) -> str:
@@ -98,8 +108,8 @@ class ElasticsearchClient(VectorDBBase):
         )
 
     # Status: works
-    def _create_index(self, dimension: int):
-        body = {
+    def _get_index_body(self, dimension: int) -> dict:
+        return {
             "mappings": {
                 "dynamic_templates": [
                     {
@@ -123,7 +133,12 @@ class ElasticsearchClient(VectorDBBase):
                 },
             }
         }
-        self.client.indices.create(index=self._get_index_name(dimension), body=body)
+
+    # Status: works
+    def _create_index(self, dimension: int):
+        self.client.indices.create(
+            index=self._get_index_name(dimension), body=self._get_index_body(dimension)
+        )
 
     # Status: works
 
@@ -131,12 +146,13 @@ class ElasticsearchClient(VectorDBBase):
         for i in range(0, len(items), batch_size):
             yield items[i : min(i + batch_size, len(items))]
 
+    # Status: works
+    def _get_collection_query(self, collection_name: str) -> dict:
+        return {"bool": {"filter": [{"term": {"collection": collection_name}}]}}
+
     # Status: works
     def has_collection(self, collection_name) -> bool:
-        query_body = {"query": {"bool": {"filter": []}}}
-        query_body["query"]["bool"]["filter"].append(
-            {"term": {"collection": collection_name}}
-        )
+        query_body = {"query": self._get_collection_query(collection_name)}
 
         try:
             result = self.client.count(index=f"{self.index_prefix}*", body=query_body)
@@ -150,17 +166,15 @@ class ElasticsearchClient(VectorDBBase):
         self.client.delete_by_query(index=f"{self.index_prefix}*", body=query)
 
     # Status: works
-    def search(
+    def _get_search_body(
         self, collection_name: str, vectors: list[list[float]], limit: int
-    ) -> Optional[SearchResult]:
-        query = {
+    ) -> dict:
+        return {
             "size": limit,
             "_source": ["text", "metadata"],
             "query": {
                 "script_score": {
-                    "query": {
-                        "bool": {"filter": [{"term": {"collection": collection_name}}]}
-                    },
+                    "query": self._get_collection_query(collection_name),
                     "script": {
                         "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
                         "params": {
@@ -171,19 +185,17 @@ class ElasticsearchClient(VectorDBBase):
             },
         }
 
+    def search(
+        self, collection_name: str, vectors: list[list[float]], limit: int
+    ) -> Optional[SearchResult]:
         result = self.client.search(
-            index=self._get_index_name(len(vectors[0])), body=query
+            index=self._get_index_name(len(vectors[0])),
+            body=self._get_search_body(collection_name, vectors, limit),
         )
 
         return self._result_to_search_result(result)
 
-    # Status: only tested halfwat
-    def query(
-        self, collection_name: str, filter: dict, limit: Optional[int] = None
-    ) -> Optional[GetResult]:
-        if not self.has_collection(collection_name):
-            return None
-
+    def _get_query_body(self, collection_name: str, filter: dict) -> dict:
         query_body = {
             "query": {"bool": {"filter": []}},
             "_source": ["text", "metadata"],
@@ -194,13 +206,20 @@ class ElasticsearchClient(VectorDBBase):
         query_body["query"]["bool"]["filter"].append(
             {"term": {"collection": collection_name}}
         )
-        size = limit if limit else 10
+        return query_body
+
+    # Status: only tested halfwat
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not self.has_collection(collection_name):
+            return None
 
         try:
             result = self.client.search(
                 index=f"{self.index_prefix}*",
-                body=query_body,
-                size=size,
+                body=self._get_query_body(collection_name, filter),
+                size=limit if limit else 10,
             )
 
             return self._result_to_get_result(result)
@@ -222,55 +241,63 @@ class ElasticsearchClient(VectorDBBase):
     def get(self, collection_name: str) -> Optional[GetResult]:
         # Get all the items in the collection.
         query = {
-            "query": {"bool": {"filter": [{"term": {"collection": collection_name}}]}},
+            "query": self._get_collection_query(collection_name),
             "_source": ["text", "metadata"],
         }
         results = list(scan(self.client, index=f"{self.index_prefix}*", query=query))
 
         return self._scan_result_to_get_result(results)
 
+    def _get_insert_actions(
+        self, collection_name: str, items: list[VectorItem]
+    ) -> list[dict]:
+        return [
+            {
+                "_index": self._get_index_name(dimension=len(items[0]["vector"])),
+                "_id": item["id"],
+                "_source": {
+                    "collection": collection_name,
+                    "vector": item["vector"],
+                    "text": item["text"],
+                    "metadata": item["metadata"],
+                },
+            }
+            for item in items
+        ]
+
+    def _get_upsert_actions(
+        self, collection_name: str, items: list[VectorItem]
+    ) -> list[dict]:
+        return [
+            {
+                "_op_type": "update",
+                "_index": self._get_index_name(dimension=len(item["vector"])),
+                "_id": item["id"],
+                "doc": {
+                    "collection": collection_name,
+                    "vector": item["vector"],
+                    "text": item["text"],
+                    "metadata": item["metadata"],
+                },
+                "doc_as_upsert": True,
+            }
+            for item in items
+        ]
+
     # Status: works
     def insert(self, collection_name: str, items: list[VectorItem]):
         if not self._has_index(dimension=len(items[0]["vector"])):
             self._create_index(dimension=len(items[0]["vector"]))
 
         for batch in self._create_batches(items):
-            actions = [
-                {
-                    "_index": self._get_index_name(dimension=len(items[0]["vector"])),
-                    "_id": item["id"],
-                    "_source": {
-                        "collection": collection_name,
-                        "vector": item["vector"],
-                        "text": item["text"],
-                        "metadata": item["metadata"],
-                    },
-                }
-                for item in batch
-            ]
-            bulk(self.client, actions)
+            bulk(self.client, self._get_insert_actions(collection_name, batch))
 
     # Upsert documents using the update API with doc_as_upsert=True.
     def upsert(self, collection_name: str, items: list[VectorItem]):
         if not self._has_index(dimension=len(items[0]["vector"])):
             self._create_index(dimension=len(items[0]["vector"]))
         for batch in self._create_batches(items):
-            actions = [
-                {
-                    "_op_type": "update",
-                    "_index": self._get_index_name(dimension=len(item["vector"])),
-                    "_id": item["id"],
-                    "doc": {
-                        "collection": collection_name,
-                        "vector": item["vector"],
-                        "text": item["text"],
-                        "metadata": item["metadata"],
-                    },
-                    "doc_as_upsert": True,
-                }
-                for item in batch
-            ]
-            bulk(self.client, actions)
+            bulk(self.client, self._get_upsert_actions(collection_name, batch))
 
     # Delete specific documents from a collection by filtering on both collection and document IDs.
     def delete(
@@ -298,3 +325,80 @@ class ElasticsearchClient(VectorDBBase):
         indices = self.client.indices.get(index=f"{self.index_prefix}*")
         for index in indices:
             self.client.indices.delete(index=index)
+
+    async def ahas_collection(self, collection_name: str) -> bool:
+        try:
+            result = await self._get_async_client().count(
+                index=f"{self.index_prefix}*",
+                body={"query": self._get_collection_query(collection_name)},
+            )
+            return result.body["count"] > 0
+        except Exception as e:
+            return None
+
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float]], limit: int
+    ) -> Optional[SearchResult]:
+        result = await self._get_async_client().search(
+            index=self._get_index_name(len(vectors[0])),
+            body=self._get_search_body(collection_name, vectors, limit),
+        )
+        return self._result_to_search_result(result)
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not await self.ahas_collection(collection_name):
+            return None
+
+        try:
+            result = await self._get_async_client().search(
+                index=f"{self.index_prefix}*",
+                body=self._get_query_body(collection_name, filter),
+                size=limit if limit else 10,
+            )
+            return self._result_to_get_result(result)
+        except Exception as e:
+            return None
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        query = {
+            "query": self._get_collection_query(collection_name),
+            "_source": ["text", "metadata"],
+        }
+        results = [
+            hit
+            async for hit in async_scan(
+                self._get_async_client(), index=f"{self.index_prefix}*", query=query
+            )
+        ]
+        return self._scan_result_to_get_result(results)
+
+    async def _aget_or_create_index(self, dimension: int):
+        client = self._get_async_client()
+        if not await client.indices.exists(index=self._get_index_name(dimension)):
+            await client.indices.create(
+                index=self._get_index_name(dimension),
+                body=self._get_index_body(dimension),
+            )
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        await self._aget_or_create_index(len(items[0]["vector"]))
+        for batch in self._create_batches(items):
+            await async_bulk(
+                self._get_async_client(),
+                self._get_insert_actions(collection_name, batch),
+            )
+
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        await self._aget_or_create_index(len(items[0]["vector"]))
+        for batch in self._create_batches(items):
+            await async_bulk(
+                self._get_async_client(),
+                self._get_upsert_actions(collection_name, batch),
+            )
+
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
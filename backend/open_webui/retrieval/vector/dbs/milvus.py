@@ -8,6 +8,7 @@ from open_webui.retrieval.vector.main import (
     VectorItem,
     SearchResult,
     GetResult,
+    run_in_vector_db_pool,
 )
 from open_webui.config import (
     MILVUS_URI,
@@ -21,17 +22,56 @@ from open_webui.config import (
 )
 from open_webui.env import SRC_LOG_LEVELS
 
+try:
+    # pymilvus 2.5.3 and later, the async methods run in the worker pool before
+    from pymilvus import AsyncMilvusClient
+except ImportError:
+    AsyncMilvusClient = None
+
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
+# The maximum number of records per query request
+QUERY_MAX_LIMIT = 16383
+
 
 class MilvusClient(VectorDBBase):
     def __init__(self):
         self.collection_prefix = "open_webui"
+        self.client = Client(**self._get_client_kwargs())
+        # Created on first use, within the event loop
+        self.async_client = None
+
+    def _get_client_kwargs(self) -> dict:
         if MILVUS_TOKEN is None:
-            self.client = Client(uri=MILVUS_URI, db_name=MILVUS_DB)
-        else:
-            self.client = Client(uri=MILVUS_URI, db_name=MILVUS_DB, token=MILVUS_TOKEN)
+            return {"uri": MILVUS_URI, "db_name": MILVUS_DB}
+        return {"uri": MILVUS_URI, "db_name": MILVUS_DB, "token": MILVUS_TOKEN}
+
+    def _get_async_client(self):
+        # The async client only covers data operations, collections are still
+        # managed with the sync client
+        if self.async_client is None:
+            self.async_client = AsyncMilvusClient(**self._get_client_kwargs())
+        return self.async_client
+
+    def _get_filter_string(self, filter: dict) -> str:
+        return " && ".join(
+            [
+                f'metadata["{key}"] == {json.dumps(value)}'
+                for key, value in filter.items()
+            ]
+        )
+
+    def _get_rows(self, items: list[VectorItem]) -> list[dict]:
+        return [
+            {
+                "id": item["id"],
+                "vector": item["vector"],
+                "data": {"text": item["text"]},
+                "metadata": item["metadata"],
+            }
+            for item in items
+        ]
 
     def _result_to_get_result(self, result) -> GetResult:
         ids = []
@@ -154,6 +194,28 @@ class MilvusClient(VectorDBBase):
             f"Successfully created collection '{self.collection_prefix}_{collection_name}' with index type '{index_type}' and metric '{metric_type}'."
         )
 
+    def _create_collection_if_not_exists(
+        self, collection_name: str, items: list[VectorItem]
+    ):
+        if self.client.has_collection(
+            collection_name=f"{self.collection_prefix}_{collection_name}"
+        ):
+            return
+
+        log.info(
+            f"Collection {self.collection_prefix}_{collection_name} does not exist. Creating now."
+        )
+        if not items:
+            log.error(
+                f"Cannot create collection {self.collection_prefix}_{collection_name} without items to determine dimension."
+            )
+            raise ValueError(
+                "Cannot create Milvus collection without items to determine vector dimension."
+            )
+        self._create_collection(
+            collection_name=collection_name, dimension=len(items[0]["vector"])
+        )
+
     def has_collection(self, collection_name: str) -> bool:
         # Check if the collection exists based on the collection name.
         collection_name = collection_name.replace("-", "_")
@@ -193,13 +255,8 @@ class MilvusClient(VectorDBBase):
                 f"Query attempted on non-existent collection: {self.collection_prefix}_{collection_name}"
             )
             return None
-        filter_string = " && ".join(
-            [
-                f'metadata["{key}"] == {json.dumps(value)}'
-                for key, value in filter.items()
-            ]
-        )
-        max_limit = 16383  # The maximum number of records per request
+        filter_string = self._get_filter_string(filter)
+        max_limit = QUERY_MAX_LIMIT
         all_results = []
         if limit is None:
             # Milvus default limit for query if not specified is 16384, but docs mention iteration.
@@ -284,73 +341,27 @@ class MilvusClient(VectorDBBase):
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection_name = collection_name.replace("-", "_")
-        if not self.client.has_collection(
-            collection_name=f"{self.collection_prefix}_{collection_name}"
-        ):
-            log.info(
-                f"Collection {self.collection_prefix}_{collection_name} does not exist. Creating now."
-            )
-            if not items:
-                log.error(
-                    f"Cannot create collection {self.collection_prefix}_{collection_name} without items to determine dimension."
-                )
-                raise ValueError(
-                    "Cannot create Milvus collection without items to determine vector dimension."
-                )
-            self._create_collection(
-                collection_name=collection_name, dimension=len(items[0]["vector"])
-            )
+        self._create_collection_if_not_exists(collection_name, items)
 
         log.info(
             f"Inserting {len(items)} items into collection {self.collection_prefix}_{collection_name}."
         )
         return self.client.insert(
             collection_name=f"{self.collection_prefix}_{collection_name}",
-            data=[
-                {
-                    "id": item["id"],
-                    "vector": item["vector"],
-                    "data": {"text": item["text"]},
-                    "metadata": item["metadata"],
-                }
-                for item in items
-            ],
+            data=self._get_rows(items),
         )
 
     def upsert(self, collection_name: str, items: list[VectorItem]):
         # Update the items in the collection, if the items are not present, insert them. If the collection does not exist, it will be created.
         collection_name = collection_name.replace("-", "_")
-        if not self.client.has_collection(
-            collection_name=f"{self.collection_prefix}_{collection_name}"
-        ):
-            log.info(
-                f"Collection {self.collection_prefix}_{collection_name} does not exist for upsert. Creating now."
-            )
-            if not items:
-                log.error(
-                    f"Cannot create collection {self.collection_prefix}_{collection_name} for upsert without items to determine dimension."
-                )
-                raise ValueError(
-                    "Cannot create Milvus collection for upsert without items to determine vector dimension."
-                )
-            self._create_collection(
-                collection_name=collection_name, dimension=len(items[0]["vector"])
-            )
+        self._create_collection_if_not_exists(collection_name, items)
 
         log.info(
             f"Upserting {len(items)} items into collection {self.collection_prefix}_{collection_name}."
         )
         return self.client.upsert(
             collection_name=f"{self.collection_prefix}_{collection_name}",
-            data=[
-                {
-                    "id": item["id"],
-                    "vector": item["vector"],
-                    "data": {"text": item["text"]},
-                    "metadata": item["metadata"],
-                }
-                for item in items
-            ],
+            data=self._get_rows(items),
         )
 
     def delete(
@@ -376,12 +387,7 @@ class MilvusClient(VectorDBBase):
                 ids=ids,
             )
         elif filter:
-            filter_string = " && ".join(
-                [
-                    f'metadata["{key}"] == {json.dumps(value)}'
-                    for key, value in filter.items()
-                ]
-            )
+            filter_string = self._get_filter_string(filter)
             log.info(
                 f"Deleting items by filter from {self.collection_prefix}_{collection_name}. Filter: {filter_string}"
             )
@@ -411,3 +417,92 @@ class MilvusClient(VectorDBBase):
                 except Exception as e:
                     log.error(f"Error deleting collection {collection_name_full}: {e}")
         log.info(f"Milvus reset complete. Deleted collections: {deleted_collections}")
+
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        if AsyncMilvusClient is None:
+            return await super().asearch(collection_name, vectors, limit)
+
+        collection_name = collection_name.replace("-", "_")
+        result = await self._get_async_client().search(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            data=vectors,
+            limit=limit,
+            output_fields=["data", "metadata"],
+        )
+        return self._result_to_search_result(result)
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ):
+        if AsyncMilvusClient is None:
+            return await super().aquery(collection_name, filter, limit)
+
+        collection_name = collection_name.replace("-", "_")
+        if not await self.ahas_collection(collection_name):
+            log.warning(
+                f"Query attempted on non-existent collection: {self.collection_prefix}_{collection_name}"
+            )
+            return None
+
+        filter_string = self._get_filter_string(filter)
+        if limit is None:
+            limit = 16384 * 10
+
+        all_results = []
+        try:
+            # Paginated like `query`
+            while len(all_results) < limit:
+                current_fetch = min(QUERY_MAX_LIMIT, limit - len(all_results))
+                results = await self._get_async_client().query(
+                    collection_name=f"{self.collection_prefix}_{collection_name}",
+                    filter=filter_string,
+                    output_fields=["id", "data", "metadata"],
+                    limit=current_fetch,
+                    offset=len(all_results),
+                )
+                all_results.extend(results)
+                if len(results) < current_fetch:
+                    break
+
+            return self._result_to_get_result([all_results])
+        except Exception as e:
+            log.exception(
+                f"Error querying collection {self.collection_prefix}_{collection_name} with filter '{filter_string}' and limit {limit}: {e}"
+            )
+            return None
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        return await self.aquery(collection_name=collection_name, filter={}, limit=None)
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        if AsyncMilvusClient is None:
+            return await super().ainsert(collection_name, items)
+
+        collection_name = collection_name.replace("-", "_")
+        await run_in_vector_db_pool(
+            self._create_collection_if_not_exists, collection_name, items
+        )
+        return await self._get_async_client().insert(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            data=self._get_rows(items),
+        )
+
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        if AsyncMilvusClient is None:
+            return await super().aupsert(collection_name, items)
+
+        collection_name = collection_name.replace("-", "_")
+        await run_in_vector_db_pool(
+            self._create_collection_if_not_exists, collection_name, items
+        )
+        return await self._get_async_client().upsert(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            data=self._get_rows(items),
+        )
+
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
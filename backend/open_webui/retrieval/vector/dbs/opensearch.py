@@ -1,5 +1,5 @@
-from opensearchpy import OpenSearch
-from opensearchpy.helpers import bulk
+from opensearchpy import AsyncOpenSearch, OpenSearch
+from opensearchpy.helpers import async_bulk, bulk
 from typing import Optional
 
 from open_webui.retrieval.vector.main import (
@@ -20,12 +20,22 @@ from open_webui.config import (
 class OpenSearchClient(VectorDBBase):
     def __init__(self):
         self.index_prefix = "open_webui"
-        self.client = OpenSearch(
-            hosts=[OPENSEARCH_URI],
-            use_ssl=OPENSEARCH_SSL,
-            verify_certs=OPENSEARCH_CERT_VERIFY,
-            http_auth=(OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD),
-        )
+        self.client = OpenSearch(**self._get_client_kwargs())
+        # Created on first use, within the event loop
+        self.async_client = None
+
+    def _get_client_kwargs(self) -> dict:
+        return {
+            "hosts": [OPENSEARCH_URI],
+            "use_ssl": OPENSEARCH_SSL,
+            "verify_certs": OPENSEARCH_CERT_VERIFY,
+            "http_auth": (OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD),
+        }
+
+    def _get_async_client(self) -> AsyncOpenSearch:
+        if self.async_client is None:
+            self.async_client = AsyncOpenSearch(**self._get_client_kwargs())
+        return self.async_client
 
     def _get_index_name(self, collection_name: str) -> str:
         return f"{self.index_prefix}_{collection_name}"
@@ -67,8 +77,8 @@ class OpenSearchClient(VectorDBBase):
             metadatas=[metadatas],
         )
 
-    def _create_index(self, collection_name: str, dimension: int):
-        body = {
+    def _get_index_body(self, dimension: int) -> dict:
+        return {
             "settings": {"index": {"knn": True}},
             "mappings": {
                 "properties": {
@@ -93,8 +103,11 @@ class OpenSearchClient(VectorDBBase):
                 }
             },
         }
+
+    def _create_index(self, collection_name: str, dimension: int):
         self.client.indices.create(
-            index=self._get_index_name(collection_name), body=body
+            index=self._get_index_name(collection_name),
+            body=self._get_index_body(dimension),
         )
 
     def _create_batches(self, items: list[VectorItem], batch_size=100):
@@ -111,6 +124,36 @@ class OpenSearchClient(VectorDBBase):
         # We are simply adapting to the norms of the other DBs.
         self.client.indices.delete(index=self._get_index_name(collection_name))
 
+    def _get_search_body(self, vectors: list[list[float | int]], limit: int) -> dict:
+        return {
+            "size": limit,
+            "_source": ["text", "metadata"],
+            "query": {
+                "script_score": {
+                    "query": {"match_all": {}},
+                    "script": {
+                        "source": "(cosineSimilarity(params.query_value, doc[params.field]) + 1.0) / 2.0",
+                        "params": {
+                            "field": "vector",
+                            "query_value": vectors[0],
+                        },  # Assuming single query vector
+                    },
+                }
+            },
+        }
+
+    def _get_query_body(self, filter: dict) -> dict:
+        query_body = {
+            "query": {"bool": {"filter": []}},
+            "_source": ["text", "metadata"],
+        }
+
+        for field, value in filter.items():
+            query_body["query"]["bool"]["filter"].append(
+                {"match": {"metadata." + str(field): value}}
+            )
+        return query_body
+
     def search(
         self, collection_name: str, vectors: list[list[float | int]], limit: int
     ) -> Optional[SearchResult]:
@@ -118,25 +161,9 @@ class OpenSearchClient(VectorDBBase):
             if not self.has_collection(collection_name):
                 return None
 
-            query = {
-                "size": limit,
-                "_source": ["text", "metadata"],
-                "query": {
-                    "script_score": {
-                        "query": {"match_all": {}},
-                        "script": {
-                            "source": "(cosineSimilarity(params.query_value, doc[params.field]) + 1.0) / 2.0",
-                            "params": {
-                                "field": "vector",
-                                "query_value": vectors[0],
-                            },  # Assuming single query vector
-                        },
-                    }
-                },
-            }
-
             result = self.client.search(
-                index=self._get_index_name(collection_name), body=query
+                index=self._get_index_name(collection_name),
+                body=self._get_search_body(vectors, limit),
             )
 
             return self._result_to_search_result(result)
@@ -150,23 +177,11 @@ class OpenSearchClient(VectorDBBase):
         if not self.has_collection(collection_name):
             return None
 
-        query_body = {
-            "query": {"bool": {"filter": []}},
-            "_source": ["text", "metadata"],
-        }
-
-        for field, value in filter.items():
-            query_body["query"]["bool"]["filter"].append(
-                {"match": {"metadata." + str(field): value}}
-            )
-
-        size = limit if limit else 10
-
         try:
             result = self.client.search(
                 index=self._get_index_name(collection_name),
-                body=query_body,
-                size=size,
+                body=self._get_query_body(filter),
+                size=limit if limit else 10,
             )
 
             return self._result_to_get_result(result)
@@ -186,26 +201,48 @@ class OpenSearchClient(VectorDBBase):
         )
         return self._result_to_get_result(result)
 
+    def _get_insert_actions(
+        self, collection_name: str, items: list[VectorItem]
+    ) -> list[dict]:
+        return [
+            {
+                "_op_type": "index",
+                "_index": self._get_index_name(collection_name),
+                "_id": item["id"],
+                "_source": {
+                    "vector": item["vector"],
+                    "text": item["text"],
+                    "metadata": item["metadata"],
+                },
+            }
+            for item in items
+        ]
+
+    def _get_upsert_actions(
+        self, collection_name: str, items: list[VectorItem]
+    ) -> list[dict]:
+        return [
+            {
+                "_op_type": "update",
+                "_index": self._get_index_name(collection_name),
+                "_id": item["id"],
+                "doc": {
+                    "vector": item["vector"],
+                    "text": item["text"],
+                    "metadata": item["metadata"],
+                },
+                "doc_as_upsert": True,
+            }
+            for item in items
+        ]
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         self._create_index_if_not_exists(
             collection_name=collection_name, dimension=len(items[0]["vector"])
         )
 
         for batch in self._create_batches(items):
-            actions = [
-                {
-                    "_op_type": "index",
-                    "_index": self._get_index_name(collection_name),
-                    "_id": item["id"],
-                    "_source": {
-                        "vector": item["vector"],
-                        "text": item["text"],
-                        "metadata": item["metadata"],
-                    },
-                }
-                for item in batch
-            ]
-            bulk(self.client, actions)
+            bulk(self.client, self._get_insert_actions(collection_name, batch))
 
     def upsert(self, collection_name: str, items: list[VectorItem]):
         self._create_index_if_not_exists(
@@ -213,21 +250,7 @@ class OpenSearchClient(VectorDBBase):
         )
 
         for batch in self._create_batches(items):
-            actions = [
-                {
-                    "_op_type": "update",
-                    "_index": self._get_index_name(collection_name),
-                    "_id": item["id"],
-                    "doc": {
-                        "vector": item["vector"],
-                        "text": item["text"],
-                        "metadata": item["metadata"],
-                    },
-                    "doc_as_upsert": True,
-                }
-                for item in batch
-            ]
-            bulk(self.client, actions)
+            bulk(self.client, self._get_upsert_actions(collection_name, batch))
 
     def delete(
         self,
@@ -261,3 +284,79 @@ class OpenSearchClient(VectorDBBase):
         indices = self.client.indices.get(index=f"{self.index_prefix}_*")
         for index in indices:
             self.client.indices.delete(index=index)
+
+    async def ahas_collection(self, collection_name: str) -> bool:
+        return await self._get_async_client().indices.exists(
+            index=self._get_index_name(collection_name)
+        )
+
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        try:
+            if not await self.ahas_collection(collection_name):
+                return None
+
+            result = await self._get_async_client().search(
+                index=self._get_index_name(collection_name),
+                body=self._get_search_body(vectors, limit),
+            )
+            return self._result_to_search_result(result)
+        except Exception as e:
+            return None
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not await self.ahas_collection(collection_name):
+            return None
+
+        try:
+            result = await self._get_async_client().search(
+                index=self._get_index_name(collection_name),
+                body=self._get_query_body(filter),
+                size=limit if limit else 10,
+            )
+            return self._result_to_get_result(result)
+        except Exception as e:
+            return None
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        query = {"query": {"match_all": {}}, "_source": ["text", "metadata"]}
+
+        result = await self._get_async_client().search(
+            index=self._get_index_name(collection_name), body=query
+        )
+        return self._result_to_get_result(result)
+
+    async def _acreate_index_if_not_exists(self, collection_name: str, dimension: int):
+        if not await self.ahas_collection(collection_name):
+            await self._get_async_client().indices.create(
+                index=self._get_index_name(collection_name),
+                body=self._get_index_body(dimension),
+            )
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        await self._acreate_index_if_not_exists(
+            collection_name=collection_name, dimension=len(items[0]["vector"])
+        )
+        for batch in self._create_batches(items):
+            await async_bulk(
+                self._get_async_client(),
+                self._get_insert_actions(collection_name, batch),
+            )
+
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        await self._acreate_index_if_not_exists(
+            collection_name=collection_name, dimension=len(items[0]["vector"])
+        )
+        for batch in self._create_batches(items):
+            await async_bulk(
+                self._get_async_client(),
+                self._get_upsert_actions(collection_name, batch),
+            )
+
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
@@ -15,13 +15,15 @@ from sqlalchemy import (
     text,
     Text,
     Table,
+    bindparam,
     values,
 )
 from sqlalchemy.sql import true
 from sqlalchemy.pool import NullPool
 
 from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.dialects.postgresql import JSONB, array, insert
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
@@ -32,6 +34,7 @@ from open_webui.retrieval.vector.main import (
     SearchResult,
     GetResult,
 )
+from open_webui.internal.db import get_async_database_url
 from open_webui.config import (
     PGVECTOR_DB_URL,
     PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH,
@@ -56,6 +59,33 @@ def pgcrypto_decrypt(col, key, outtype="text"):
     return func.cast(func.pgp_sym_decrypt(col, literal(key)), outtype)
 
 
+# Use raw SQL for BYTEA/pgcrypto
+PGCRYPTO_INSERT_SQL = """
+    INSERT INTO document_chunk
+    (id, vector, collection_name, text, vmetadata)
+    VALUES (
+        :id, :vector, :collection_name,
+        pgp_sym_encrypt(:text, :key),
+        pgp_sym_encrypt(CAST(:metadata AS TEXT), :key)
+    )
+"""
+
+PGCRYPTO_INSERT_STATEMENT = text(
+    PGCRYPTO_INSERT_SQL + "ON CONFLICT (id) DO NOTHING"
+).bindparams(bindparam("vector", type_=Vector(VECTOR_LENGTH)))
+
+PGCRYPTO_UPSERT_STATEMENT = text(
+    PGCRYPTO_INSERT_SQL
+    + """
+    ON CONFLICT (id) DO UPDATE SET
+      vector = EXCLUDED.vector,
+      collection_name = EXCLUDED.collection_name,
+      text = EXCLUDED.text,
+      vmetadata = EXCLUDED.vmetadata
+    """
+).bindparams(bindparam("vector", type_=Vector(VECTOR_LENGTH)))
+
+
 class DocumentChunk(Base):
     __tablename__ = "document_chunk"
 
@@ -74,11 +104,22 @@ class DocumentChunk(Base):
 class PgvectorClient(VectorDBBase):
     def __init__(self) -> None:
 
+        # Sessions of the async driver, None when there is none and the async
+        # methods run the sync ones in the worker pool
+        self.async_session = None
+        self.async_engine = None
+
         # if no pgvector uri, use the existing database connection
         if not PGVECTOR_DB_URL:
-            from open_webui.internal.db import Session
+            from open_webui.internal.db import (
+                AsyncSessionLocal,
+                Session,
+                async_engine,
+            )
 
             self.session = Session
+            if async_engine is not None and async_engine.dialect.name == "postgresql":
+                self.async_session = AsyncSessionLocal
         else:
             engine = create_engine(
                 PGVECTOR_DB_URL, pool_pre_ping=True, poolclass=NullPool
@@ -88,6 +129,22 @@ class PgvectorClient(VectorDBBase):
             )
             self.session = scoped_session(SessionLocal)
 
+            async_url = get_async_database_url(PGVECTOR_DB_URL)
+            if async_url and async_url.startswith("postgresql"):
+                try:
+                    # Pooled, unlike the sync engine: the connections are
+                    # reused across the concurrent queries of the event loop
+                    self.async_engine = create_async_engine(
+                        async_url, pool_pre_ping=True
+                    )
+                    self.async_session = async_sessionmaker(
+                        bind=self.async_engine,
+                        autoflush=False,
+                        expire_on_commit=False,
+                    )
+                except ImportError as e:
+                    log.warning(f"Async pgvector driver not available: {e}")
+
         try:
             # Ensure the pgvector extension is available
             self.session.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
@@ -176,49 +233,148 @@ class PgvectorClient(VectorDBBase):
             vector = vector[:VECTOR_LENGTH]
         return vector
 
+    def _get_chunk(self, collection_name: str, item: VectorItem) -> DocumentChunk:
+        return DocumentChunk(
+            id=item["id"],
+            vector=self.adjust_vector_length(item["vector"]),
+            collection_name=collection_name,
+            text=item["text"],
+            vmetadata=item["metadata"],
+        )
+
+    def _get_pgcrypto_params(self, collection_name: str, item: VectorItem) -> dict:
+        return {
+            "id": item["id"],
+            "vector": self.adjust_vector_length(item["vector"]),
+            "collection_name": collection_name,
+            "text": item["text"],
+            "metadata": json.dumps(item["metadata"]),
+            "key": PGVECTOR_PGCRYPTO_KEY,
+        }
+
+    def _get_result_fields(self) -> list:
+        if PGVECTOR_PGCRYPTO:
+            return [
+                DocumentChunk.id,
+                pgcrypto_decrypt(DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text).label(
+                    "text"
+                ),
+                pgcrypto_decrypt(
+                    DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
+                ).label("vmetadata"),
+            ]
+        return [DocumentChunk.id, DocumentChunk.text, DocumentChunk.vmetadata]
+
+    def _get_search_statement(
+        self, collection_name: str, vectors: List[List[float]], limit: Optional[int]
+    ):
+        def vector_expr(vector):
+            return cast(array(vector), Vector(VECTOR_LENGTH))
+
+        # Create the values for query vectors
+        qid_col = column("qid", Integer)
+        q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
+        query_vectors = (
+            values(qid_col, q_vector_col)
+            .data([(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)])
+            .alias("query_vectors")
+        )
+
+        result_fields = self._get_result_fields()
+        result_fields.append(
+            (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
+                "distance"
+            )
+        )
+
+        # Build the lateral subquery for each query vector
+        subq = (
+            select(*result_fields)
+            .where(DocumentChunk.collection_name == collection_name)
+            .order_by((DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)))
+        )
+        if limit is not None:
+            subq = subq.limit(limit)
+        subq = subq.lateral("result")
+
+        # Build the main query by joining query_vectors and the lateral subquery
+        return (
+            select(
+                query_vectors.c.qid,
+                subq.c.id,
+                subq.c.text,
+                subq.c.vmetadata,
+                subq.c.distance,
+            )
+            .select_from(query_vectors)
+            .join(subq, true())
+            .order_by(query_vectors.c.qid, subq.c.distance)
+        )
+
+    def _to_search_result(self, results, num_queries: int) -> SearchResult:
+        ids = [[] for _ in range(num_queries)]
+        distances = [[] for _ in range(num_queries)]
+        documents = [[] for _ in range(num_queries)]
+        metadatas = [[] for _ in range(num_queries)]
+
+        for row in results:
+            qid = int(row.qid)
+            ids[qid].append(row.id)
+            # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
+            # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
+            distances[qid].append((2.0 - row.distance) / 2.0)
+            documents[qid].append(row.text)
+            metadatas[qid].append(row.vmetadata)
+
+        return SearchResult(
+            ids=ids, distances=distances, documents=documents, metadatas=metadatas
+        )
+
+    def _get_query_statement(
+        self,
+        collection_name: str,
+        filter: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ):
+        if PGVECTOR_PGCRYPTO:
+            # decrypt then check key: JSON filter after decryption
+            vmetadata = pgcrypto_decrypt(
+                DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
+            )
+        else:
+            vmetadata = DocumentChunk.vmetadata
+
+        where_clauses = [DocumentChunk.collection_name == collection_name]
+        for key, value in (filter or {}).items():
+            where_clauses.append(vmetadata[key].astext == str(value))
+
+        stmt = select(*self._get_result_fields()).where(*where_clauses)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    def _to_get_result(self, results) -> GetResult:
+        return GetResult(
+            ids=[[row.id for row in results]],
+            documents=[[row.text for row in results]],
+            metadatas=[[row.vmetadata for row in results]],
+        )
+
     def insert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
             if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    # Use raw SQL for BYTEA/pgcrypto
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata::text, :key)
-                            )
-                            ON CONFLICT (id) DO NOTHING
-                        """
-                        ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata": json.dumps(item["metadata"]),
-                            "key": PGVECTOR_PGCRYPTO_KEY,
-                        },
-                    )
+                self.session.execute(
+                    PGCRYPTO_INSERT_STATEMENT,
+                    [
+                        self._get_pgcrypto_params(collection_name, item)
+                        for item in items
+                    ],
+                )
                 self.session.commit()
                 log.info(f"Encrypted & inserted {len(items)} into '{collection_name}'")
 
             else:
-                new_items = []
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    new_chunk = DocumentChunk(
-                        id=item["id"],
-                        vector=vector,
-                        collection_name=collection_name,
-                        text=item["text"],
-                        vmetadata=item["metadata"],
-                    )
-                    new_items.append(new_chunk)
+                new_items = [self._get_chunk(collection_name, item) for item in items]
                 self.session.bulk_save_objects(new_items)
                 self.session.commit()
                 log.info(
@@ -232,34 +388,13 @@ class PgvectorClient(VectorDBBase):
     def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
             if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata::text, :key)
-                            )
-                            ON CONFLICT (id) DO UPDATE SET
-                              vector = EXCLUDED.vector,
-                              collection_name = EXCLUDED.collection_name,
-                              text = EXCLUDED.text,
-                              vmetadata = EXCLUDED.vmetadata
-                        """
-                        ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata": json.dumps(item["metadata"]),
-                            "key": PGVECTOR_PGCRYPTO_KEY,
-                        },
-                    )
+                self.session.execute(
+                    PGCRYPTO_UPSERT_STATEMENT,
+                    [
+                        self._get_pgcrypto_params(collection_name, item)
+                        for item in items
+                    ],
+                )
                 self.session.commit()
                 log.info(f"Encrypted & upserted {len(items)} into '{collection_name}'")
             else:
@@ -278,14 +413,7 @@ class PgvectorClient(VectorDBBase):
                             collection_name  # Update collection_name if necessary
                         )
                     else:
-                        new_chunk = DocumentChunk(
-                            id=item["id"],
-                            vector=vector,
-                            collection_name=collection_name,
-                            text=item["text"],
-                            vmetadata=item["metadata"],
-                        )
-                        self.session.add(new_chunk)
+                        self.session.add(self._get_chunk(collection_name, item))
                 self.session.commit()
                 log.info(
                     f"Upserted {len(items)} items into collection '{collection_name}'."
@@ -307,99 +435,9 @@ class PgvectorClient(VectorDBBase):
 
             # Adjust query vectors to VECTOR_LENGTH
             vectors = [self.adjust_vector_length(vector) for vector in vectors]
-            num_queries = len(vectors)
-
-            def vector_expr(vector):
-                return cast(array(vector), Vector(VECTOR_LENGTH))
-
-            # Create the values for query vectors
-            qid_col = column("qid", Integer)
-            q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
-            query_vectors = (
-                values(qid_col, q_vector_col)
-                .data(
-                    [(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)]
-                )
-                .alias("query_vectors")
-            )
-
-            result_fields = [
-                DocumentChunk.id,
-            ]
-            if PGVECTOR_PGCRYPTO:
-                result_fields.append(
-                    pgcrypto_decrypt(
-                        DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text
-                    ).label("text")
-                )
-                result_fields.append(
-                    pgcrypto_decrypt(
-                        DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
-                    ).label("vmetadata")
-                )
-            else:
-                result_fields.append(DocumentChunk.text)
-                result_fields.append(DocumentChunk.vmetadata)
-            result_fields.append(
-                (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
-                    "distance"
-                )
-            )
-
-            # Build the lateral subquery for each query vector
-            subq = (
-                select(*result_fields)
-                .where(DocumentChunk.collection_name == collection_name)
-                .order_by(
-                    (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
-                )
-            )
-            if limit is not None:
-                subq = subq.limit(limit)
-            subq = subq.lateral("result")
-
-            # Build the main query by joining query_vectors and the lateral subquery
-            stmt = (
-                select(
-                    query_vectors.c.qid,
-                    subq.c.id,
-                    subq.c.text,
-                    subq.c.vmetadata,
-                    subq.c.distance,
-                )
-                .select_from(query_vectors)
-                .join(subq, true())
-                .order_by(query_vectors.c.qid, subq.c.distance)
-            )
-
-            result_proxy = self.session.execute(stmt)
-            results = result_proxy.all()
-
-            ids = [[] for _ in range(num_queries)]
-            distances = [[] for _ in range(num_queries)]
-            documents = [[] for _ in range(num_queries)]
-            metadatas = [[] for _ in range(num_queries)]
-
-            if not results:
-                return SearchResult(
-                    ids=ids,
-                    distances=distances,
-                    documents=documents,
-                    metadatas=metadatas,
-                )
-
-            for row in results:
-                qid = int(row.qid)
-                ids[qid].append(row.id)
-                # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
-                # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
-                distances[qid].append((2.0 - row.distance) / 2.0)
-                documents[qid].append(row.text)
-                metadatas[qid].append(row.vmetadata)
-
-            return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
-            )
+            stmt = self._get_search_statement(collection_name, vectors, limit)
+            results = self.session.execute(stmt).all()
+            return self._to_search_result(results, len(vectors))
         except Exception as e:
             log.exception(f"Error during search: {e}")
             return None
@@ -408,56 +446,11 @@ class PgvectorClient(VectorDBBase):
         self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
     ) -> Optional[GetResult]:
         try:
-            if PGVECTOR_PGCRYPTO:
-                # Build where clause for vmetadata filter
-                where_clauses = [DocumentChunk.collection_name == collection_name]
-                for key, value in filter.items():
-                    # decrypt then check key: JSON filter after decryption
-                    where_clauses.append(
-                        pgcrypto_decrypt(
-                            DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
-                        )[key].astext
-                        == str(value)
-                    )
-                stmt = select(
-                    DocumentChunk.id,
-                    pgcrypto_decrypt(
-                        DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text
-                    ).label("text"),
-                    pgcrypto_decrypt(
-                        DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
-                    ).label("vmetadata"),
-                ).where(*where_clauses)
-                if limit is not None:
-                    stmt = stmt.limit(limit)
-                results = self.session.execute(stmt).all()
-            else:
-                query = self.session.query(DocumentChunk).filter(
-                    DocumentChunk.collection_name == collection_name
-                )
-
-                for key, value in filter.items():
-                    query = query.filter(
-                        DocumentChunk.vmetadata[key].astext == str(value)
-                    )
-
-                if limit is not None:
-                    query = query.limit(limit)
-
-                results = query.all()
-
+            stmt = self._get_query_statement(collection_name, filter, limit)
+            results = self.session.execute(stmt).all()
             if not results:
                 return None
-
-            ids = [[result.id for result in results]]
-            documents = [[result.text for result in results]]
-            metadatas = [[result.vmetadata for result in results]]
-
-            return GetResult(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas,
-            )
+            return self._to_get_result(results)
         except Exception as e:
             log.exception(f"Error during query: {e}")
             return None
@@ -466,40 +459,11 @@ class PgvectorClient(VectorDBBase):
         self, collection_name: str, limit: Optional[int] = None
     ) -> Optional[GetResult]:
         try:
-            if PGVECTOR_PGCRYPTO:
-                stmt = select(
-                    DocumentChunk.id,
-                    pgcrypto_decrypt(
-                        DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text
-                    ).label("text"),
-                    pgcrypto_decrypt(
-                        DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
-                    ).label("vmetadata"),
-                ).where(DocumentChunk.collection_name == collection_name)
-                if limit is not None:
-                    stmt = stmt.limit(limit)
-                results = self.session.execute(stmt).all()
-                ids = [[row.id for row in results]]
-                documents = [[row.text for row in results]]
-                metadatas = [[row.vmetadata for row in results]]
-            else:
-
-                query = self.session.query(DocumentChunk).filter(
-                    DocumentChunk.collection_name == collection_name
-                )
-                if limit is not None:
-                    query = query.limit(limit)
-
-                results = query.all()
-
-                if not results:
-                    return None
-
-                ids = [[result.id for result in results]]
-                documents = [[result.text for result in results]]
-                metadatas = [[result.vmetadata for result in results]]
-
-            return GetResult(ids=ids, documents=documents, metadatas=metadatas)
+            stmt = self._get_query_statement(collection_name, limit=limit)
+            results = self.session.execute(stmt).all()
+            if not results and not PGVECTOR_PGCRYPTO:
+                return None
+            return self._to_get_result(results)
         except Exception as e:
             log.exception(f"Error during get: {e}")
             return None
@@ -576,3 +540,135 @@ class PgvectorClient(VectorDBBase):
     def delete_collection(self, collection_name: str) -> None:
         self.delete(collection_name)
         log.info(f"Collection '{collection_name}' deleted.")
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: List[List[float]],
+        limit: Optional[int] = None,
+    ) -> Optional[SearchResult]:
+        if self.async_session is None:
+            return await super().asearch(collection_name, vectors, limit)
+
+        try:
+            if not vectors:
+                return None
+
+            vectors = [self.adjust_vector_length(vector) for vector in vectors]
+            stmt = self._get_search_statement(collection_name, vectors, limit)
+            async with self.async_session() as db:
+                results = (await db.execute(stmt)).all()
+            return self._to_search_result(results, len(vectors))
+        except Exception as e:
+            log.exception(f"Error during search: {e}")
+            return None
+
+    async def aquery(
+        self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if self.async_session is None:
+            return await super().aquery(collection_name, filter, limit)
+
+        try:
+            stmt = self._get_query_statement(collection_name, filter, limit)
+            async with self.async_session() as db:
+                results = (await db.execute(stmt)).all()
+            if not results:
+                return None
+            return self._to_get_result(results)
+        except Exception as e:
+            log.exception(f"Error during query: {e}")
+            return None
+
+    async def aget(
+        self, collection_name: str, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if self.async_session is None:
+            return await super().aget(collection_name)
+
+        try:
+            stmt = self._get_query_statement(collection_name, limit=limit)
+            async with self.async_session() as db:
+                results = (await db.execute(stmt)).all()
+            if not results and not PGVECTOR_PGCRYPTO:
+                return None
+            return self._to_get_result(results)
+        except Exception as e:
+            log.exception(f"Error during get: {e}")
+            return None
+
+    async def ainsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        if self.async_session is None:
+            return await super().ainsert(collection_name, items)
+
+        try:
+            async with self.async_session() as db:
+                if PGVECTOR_PGCRYPTO:
+                    await db.execute(
+                        PGCRYPTO_INSERT_STATEMENT,
+                        [
+                            self._get_pgcrypto_params(collection_name, item)
+                            for item in items
+                        ],
+                    )
+                else:
+                    db.add_all(
+                        [self._get_chunk(collection_name, item) for item in items]
+                    )
+                await db.commit()
+            log.info(
+                f"Inserted {len(items)} items into collection '{collection_name}'."
+            )
+        except Exception as e:
+            log.exception(f"Error during insert: {e}")
+            raise
+
+    async def aupsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        if self.async_session is None:
+            return await super().aupsert(collection_name, items)
+
+        try:
+            async with self.async_session() as db:
+                if PGVECTOR_PGCRYPTO:
+                    await db.execute(
+                        PGCRYPTO_UPSERT_STATEMENT,
+                        [
+                            self._get_pgcrypto_params(collection_name, item)
+                            for item in items
+                        ],
+                    )
+                else:
+                    stmt = insert(DocumentChunk).values(
+                        [
+                            {
+                                "id": item["id"],
+                                "vector": self.adjust_vector_length(item["vector"]),
+                                "collection_name": collection_name,
+                                "text": item["text"],
+                                "vmetadata": item["metadata"],
+                            }
+                            for item in items
+                        ]
+                    )
+                    await db.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=[DocumentChunk.id],
+                            set_={
+                                "vector": stmt.excluded.vector,
+                                "collection_name": stmt.excluded.collection_name,
+                                "text": stmt.excluded.text,
+                                "vmetadata": stmt.excluded.vmetadata,
+                            },
+                        )
+                    )
+                await db.commit()
+            log.info(
+                f"Upserted {len(items)} items into collection '{collection_name}'."
+            )
+        except Exception as e:
+            log.exception(f"Error during upsert: {e}")
+            raise
+
+    async def aclose(self) -> None:
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
@@ -2,7 +2,7 @@ from typing import Optional
 import logging
 from urllib.parse import urlparse
 
-from qdrant_client import QdrantClient as Qclient
+from qdrant_client import AsyncQdrantClient, QdrantClient as Qclient
 from qdrant_client.http.models import PointStruct
 from qdrant_client.models import models
 
@@ -36,25 +36,36 @@ class QdrantClient(VectorDBBase):
         self.PREFER_GRPC = QDRANT_PREFER_GRPC
         self.GRPC_PORT = QDRANT_GRPC_PORT
 
+        # Created on first use, within the event loop
+        self.async_client = None
+
         if not self.QDRANT_URI:
             self.client = None
             return
 
+        self.client = Qclient(**self._get_client_kwargs())
+
+    def _get_client_kwargs(self) -> dict:
+        if not self.PREFER_GRPC:
+            return {"url": self.QDRANT_URI, "api_key": self.QDRANT_API_KEY}
+
         # Unified handling for either scheme
         parsed = urlparse(self.QDRANT_URI)
         host = parsed.hostname or self.QDRANT_URI
         http_port = parsed.port or 6333  # default REST port
 
-        if self.PREFER_GRPC:
-            self.client = Qclient(
-                host=host,
-                port=http_port,
-                grpc_port=self.GRPC_PORT,
-                prefer_grpc=self.PREFER_GRPC,
-                api_key=self.QDRANT_API_KEY,
-            )
-        else:
-            self.client = Qclient(url=self.QDRANT_URI, api_key=self.QDRANT_API_KEY)
+        return {
+            "host": host,
+            "port": http_port,
+            "grpc_port": self.GRPC_PORT,
+            "prefer_grpc": self.PREFER_GRPC,
+            "api_key": self.QDRANT_API_KEY,
+        }
+
+    def _get_async_client(self) -> AsyncQdrantClient:
+        if self.async_client is None:
+            self.async_client = AsyncQdrantClient(**self._get_client_kwargs())
+        return self.async_client
 
     def _result_to_get_result(self, points) -> GetResult:
         ids = []
@@ -75,15 +86,39 @@ class QdrantClient(VectorDBBase):
             }
         )
 
+    def _to_search_result(self, points, with_vectors: bool = False) -> SearchResult:
+        get_result = self._result_to_get_result(points)
+        return SearchResult(
+            ids=get_result.ids,
+            documents=get_result.documents,
+            metadatas=get_result.metadatas,
+            # qdrant distance is [-1, 1], normalize to [0, 1]
+            distances=[[(point.score + 1.0) / 2.0 for point in points]],
+            embeddings=[[point.vector for point in points]] if with_vectors else None,
+        )
+
+    def _get_vectors_config(self, dimension: int) -> models.VectorParams:
+        return models.VectorParams(
+            size=dimension,
+            distance=models.Distance.COSINE,
+            on_disk=self.QDRANT_ON_DISK,
+        )
+
+    def _get_query_filter(self, filter: dict) -> models.Filter:
+        return models.Filter(
+            should=[
+                models.FieldCondition(
+                    key=f"metadata.{key}", match=models.MatchValue(value=value)
+                )
+                for key, value in filter.items()
+            ]
+        )
+
     def _create_collection(self, collection_name: str, dimension: int):
         collection_name_with_prefix = f"{self.collection_prefix}_{collection_name}"
         self.client.create_collection(
             collection_name=collection_name_with_prefix,
-            vectors_config=models.VectorParams(
-                size=dimension,
-                distance=models.Distance.COSINE,
-                on_disk=self.QDRANT_ON_DISK,
-            ),
+            vectors_config=self._get_vectors_config(dimension),
         )
 
         log.info(f"collection {collection_name_with_prefix} successfully created!")
@@ -116,6 +151,20 @@ class QdrantClient(VectorDBBase):
 
     def search(
         self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        return self._search(collection_name, vectors, limit)
+
+    def search_with_vectors(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        return self._search(collection_name, vectors, limit, with_vectors=True)
+
+    def _search(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        with_vectors: bool = False,
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         if limit is None:
@@ -125,15 +174,9 @@ class QdrantClient(VectorDBBase):
             collection_name=f"{self.collection_prefix}_{collection_name}",
             query=vectors[0],
             limit=limit,
+            with_vectors=with_vectors,
         )
-        get_result = self._result_to_get_result(query_response.points)
-        return SearchResult(
-            ids=get_result.ids,
-            documents=get_result.documents,
-            metadatas=get_result.metadatas,
-            # qdrant distance is [-1, 1], normalize to [0, 1]
-            distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
-        )
+        return self._to_search_result(query_response.points, with_vectors)
 
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         # Construct the filter string for querying
@@ -143,17 +186,9 @@ class QdrantClient(VectorDBBase):
             if limit is None:
                 limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
 
-            field_conditions = []
-            for key, value in filter.items():
-                field_conditions.append(
-                    models.FieldCondition(
-                        key=f"metadata.{key}", match=models.MatchValue(value=value)
-                    )
-                )
-
             points = self.client.query_points(
                 collection_name=f"{self.collection_prefix}_{collection_name}",
-                query_filter=models.Filter(should=field_conditions),
+                query_filter=self._get_query_filter(filter),
                 limit=limit,
             )
             return self._result_to_get_result(points.points)
@@ -220,3 +255,89 @@ class QdrantClient(VectorDBBase):
         for collection_name in collection_names:
             if collection_name.name.startswith(self.collection_prefix):
                 self.client.delete_collection(collection_name=collection_name.name)
+
+    async def ahas_collection(self, collection_name: str) -> bool:
+        return await self._get_async_client().collection_exists(
+            f"{self.collection_prefix}_{collection_name}"
+        )
+
+    async def _acreate_collection_if_not_exists(self, collection_name, dimension):
+        if not await self.ahas_collection(collection_name=collection_name):
+            collection_name_with_prefix = f"{self.collection_prefix}_{collection_name}"
+            await self._get_async_client().create_collection(
+                collection_name=collection_name_with_prefix,
+                vectors_config=self._get_vectors_config(dimension),
+            )
+            log.info(f"collection {collection_name_with_prefix} successfully created!")
+
+    async def asearch(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        return await self._asearch(collection_name, vectors, limit)
+
+    async def asearch_with_vectors(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        return await self._asearch(collection_name, vectors, limit, with_vectors=True)
+
+    async def _asearch(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        limit: int,
+        with_vectors: bool = False,
+    ) -> Optional[SearchResult]:
+        if limit is None:
+            limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+        query_response = await self._get_async_client().query_points(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            query=vectors[0],
+            limit=limit,
+            with_vectors=with_vectors,
+        )
+        return self._to_search_result(query_response.points, with_vectors)
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ):
+        if not await self.ahas_collection(collection_name):
+            return None
+        try:
+            if limit is None:
+                limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+            points = await self._get_async_client().query_points(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                query_filter=self._get_query_filter(filter),
+                limit=limit,
+            )
+            return self._result_to_get_result(points.points)
+        except Exception as e:
+            log.exception(f"Error querying a collection '{collection_name}': {e}")
+            return None
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        points = await self._get_async_client().query_points(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            limit=NO_LIMIT,  # otherwise qdrant would set limit to 10!
+        )
+        return self._result_to_get_result(points.points)
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        # upload_points has no async counterpart, upsert batches the points as well
+        await self.aupsert(collection_name, items)
+
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        await self._acreate_collection_if_not_exists(
+            collection_name, len(items[0]["vector"])
+        )
+        points = self._create_points(items)
+        return await self._get_async_client().upsert(
+            f"{self.collection_prefix}_{collection_name}", points
+        )
+
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
@@ -1,6 +1,24 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from open_webui.config import VECTOR_DB_POOL_SIZE
+
+# Long-lived pool running the calls of the synchronous vector DB clients, shared
+# by all the requests instead of a new executor per query
+VECTOR_DB_POOL = ThreadPoolExecutor(
+    max_workers=VECTOR_DB_POOL_SIZE, thread_name_prefix="vector-db"
+)
+
+
+async def run_in_vector_db_pool(fn: Callable, *args, **kwargs):
+    """Run a blocking vector DB call in the shared worker pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(VECTOR_DB_POOL, partial(fn, *args, **kwargs))
 
 
 class VectorItem(BaseModel):
@@ -18,6 +36,9 @@ class GetResult(BaseModel):
 
 class SearchResult(GetResult):
     distances: Optional[List[List[float | int]]]
+    # Stored vectors of the results per query (lists or arrays), if requested
+    # and supported by the backend
+    embeddings: Optional[List[Any]] = None
 
 
 class VectorDBBase(ABC):
@@ -29,6 +50,10 @@ class VectorDBBase(ABC):
 
     Any custom vector database integration must inherit from this class and
     implement all abstract methods.
+
+    The `a`-prefixed methods are the async variants used from request
+    handlers. By default they run the synchronous methods in the shared
+    `VECTOR_DB_POOL`, backends with an async client override them.
     """
 
     @abstractmethod
@@ -58,6 +83,15 @@ class VectorDBBase(ABC):
         """Search for similar vectors in a collection."""
         pass
 
+    def search_with_vectors(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        """
+        Search like `search`, also returning the stored vectors of the results
+        in `embeddings`. Backends that cannot return them leave it unset.
+        """
+        return self.search(collection_name, vectors, limit)
+
     @abstractmethod
     def query(
         self, collection_name: str, filter: Dict, limit: Optional[int] = None
@@ -84,3 +118,36 @@ class VectorDBBase(ABC):
     def reset(self) -> None:
         """Reset the vector database by removing all collections or those matching a condition."""
         pass
+
+    async def ahas_collection(self, collection_name: str) -> bool:
+        return await run_in_vector_db_pool(self.has_collection, collection_name)
+
+    async def asearch(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        return await run_in_vector_db_pool(self.search, collection_name, vectors, limit)
+
+    async def asearch_with_vectors(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        return await run_in_vector_db_pool(
+            self.search_with_vectors, collection_name, vectors, limit
+        )
+
+    async def aquery(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return await run_in_vector_db_pool(self.query, collection_name, filter, limit)
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        return await run_in_vector_db_pool(self.get, collection_name)
+
+    async def ainsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        return await run_in_vector_db_pool(self.insert, collection_name, items)
+
+    async def aupsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        return await run_in_vector_db_pool(self.upsert, collection_name, items)
+
+    async def aclose(self) -> None:
+        """Close the async clients, if any."""
+        pass
@@ -0,0 +1,255 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from langchain_core.documents import Document
+
+from open_webui.config import WEB_LOADER_CACHE_MAX_SIZE, WEB_LOADER_CACHE_TTL
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL for use as a cache key, so spelling variants of an address
+    share their entry: the scheme and host are lowercased, the default port
+    and the fragment are dropped.
+    """
+    try:
+        parsed = urlsplit(url.strip())
+        scheme = parsed.scheme.lower()
+        port = parsed.port
+    except ValueError:
+        return url
+
+    netloc = parsed.netloc
+    if parsed.hostname and not (parsed.username or parsed.password):
+        netloc = parsed.hostname
+        if ":" in netloc:
+            netloc = f"[{netloc}]"
+        if port is not None and port != DEFAULT_PORTS.get(scheme):
+            netloc = f"{netloc}:{port}"
+
+    return urlunsplit((scheme, netloc, parsed.path or "/", parsed.query, ""))
+
+
+def get_freshness_lifetime(headers: Mapping[str, str], ttl: int) -> Optional[int]:
+    """
+    Returns the seconds a response may be reused for without revalidating it,
+    at most `ttl`, or None if it must not be stored.
+
+    Pages are fetched without user credentials, so responses marked private
+    are the same for every user and stored as well.
+    """
+    directives = {}
+    for directive in (headers.get("Cache-Control") or "").split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value.strip().strip('"')
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return min(max(int(directives[name]), 0), ttl)
+            except ValueError:
+                break
+
+    if expires := headers.get("Expires"):
+        try:
+            lifetime = parsedate_to_datetime(expires).timestamp() - time.time()
+            return min(max(int(lifetime), 0), ttl)
+        except (TypeError, ValueError):
+            # Invalid dates mean the response is already expired
+            return 0
+
+    return ttl
+
+
+@dataclass
+class WebPageCacheEntry:
+    content: str
+    metadata: dict
+    size: int
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self) -> bool:
+        return self.expires_at > time.monotonic()
+
+    def get_validators(self) -> dict:
+        """Headers of a conditional request for the page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def get_document(self, url: str) -> Document:
+        return Document(
+            page_content=self.content, metadata={**self.metadata, "source": url}
+        )
+
+
+class WebPageCache:
+    """
+    Bounded cache of the text and metadata extracted from fetched web pages,
+    keyed by normalized URL.
+
+    Pages are reused until their Cache-Control max-age, or `ttl` if that is
+    shorter. Expired pages with an ETag or Last-Modified date are kept to be
+    revalidated with a conditional request, which skips downloading and parsing
+    them again if they did not change. The least recently used pages are
+    evicted once their text takes more than `max_size` bytes.
+    """
+
+    def __init__(
+        self,
+        max_size: int = WEB_LOADER_CACHE_MAX_SIZE,
+        ttl: int = WEB_LOADER_CACHE_TTL,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries: OrderedDict[str, WebPageCacheEntry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "revalidations": 0,
+            "evictions": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, url: str) -> Optional[WebPageCacheEntry]:
+        """
+        Returns the cached page, which may be expired and need revalidating
+        before it is used.
+        """
+        if not self.enabled:
+            return None
+
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.metrics["misses"] += 1
+                return None
+
+            if not entry.is_fresh() and not (entry.etag or entry.last_modified):
+                self._remove(key)
+                self.metrics["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.metrics["hits" if entry.is_fresh() else "stale"] += 1
+            return entry
+
+    def set(
+        self,
+        url: str,
+        content: str,
+        metadata: dict,
+        headers: Mapping[str, str],
+    ):
+        if not self.enabled:
+            return
+
+        lifetime = get_freshness_lifetime(headers, self.ttl)
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if lifetime is None or not (lifetime or etag or last_modified):
+            return
+
+        size = len(content.encode("utf-8"))
+        if size > self.max_size:
+            return
+
+        entry = WebPageCacheEntry(
+            content=content,
+            metadata={key: value for key, value in metadata.items() if key != "source"},
+            size=size,
+            expires_at=time.monotonic() + lifetime,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+        key = normalize_url(url)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._size += size
+
+            while self._size > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.metrics["evictions"] += 1
+
+    def revalidate(
+        self, url: str, entry: WebPageCacheEntry, headers: Mapping[str, str]
+    ) -> WebPageCacheEntry:
+        """Renew a cached page the server answered a conditional request with 304 for."""
+        self.metrics["revalidations"] += 1
+
+        lifetime = get_freshness_lifetime(headers, self.ttl)
+        if lifetime is None:
+            with self._lock:
+                self._remove(normalize_url(url))
+            return entry
+
+        entry.expires_at = time.monotonic() + lifetime
+        entry.etag = headers.get("ETag") or entry.etag
+        entry.last_modified = headers.get("Last-Modified") or entry.last_modified
+        return entry
+
+    def _remove(self, key: str):
+        # Called with self._lock held
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_metrics(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["stale"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_rate": (
+                (self.metrics["hits"] + self.metrics["revalidations"]) / lookups
+                if lookups
+                else 0.0
+            ),
+            "pages": len(self._entries),
+            "size": self._size,
+            "max_size": self.max_size,
+        }
+
+
+WEB_PAGE_CACHE = WebPageCache()
+
+
+def get_web_page_cache_metrics() -> dict:
+    return WEB_PAGE_CACHE.get_metrics()
@@ -12,8 +12,10 @@ from typing import (
     Dict,
     Iterator,
     List,
+    Mapping,
     Optional,
     Sequence,
+    Tuple,
     Union,
     Literal,
 )
@@ -26,6 +28,7 @@ from langchain_community.document_loaders.base import BaseLoader
 from langchain_core.documents import Document
 from open_webui.retrieval.loaders.tavily import TavilyLoader
 from open_webui.retrieval.loaders.external_web import ExternalWebLoader
+from open_webui.retrieval.web.cache import WEB_PAGE_CACHE
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.config import (
     ENABLE_RAG_LOCAL_WEB_FETCH,
@@ -505,31 +508,46 @@ class SafeWebBaseLoader(WebBaseLoader):
         self, url: str, retries: int = 3, cooldown: int = 2, backoff: float = 1.5
     ) -> str:
         async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
-            for i in range(retries):
-                try:
-                    kwargs: Dict = dict(
-                        headers=self.session.headers,
-                        cookies=self.session.cookies.get_dict(),
+            _, text, _ = await self._fetch_response(
+                session, url, retries=retries, cooldown=cooldown, backoff=backoff
+            )
+            return text
+
+    async def _fetch_response(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: Optional[Dict] = None,
+        retries: int = 3,
+        cooldown: int = 2,
+        backoff: float = 1.5,
+    ) -> Tuple[int, str, Mapping[str, str]]:
+        """Fetch the url, returning the status, text and headers of the response."""
+        for i in range(retries):
+            try:
+                kwargs: Dict = dict(
+                    headers={**self.session.headers, **(headers or {})},
+                    cookies=self.session.cookies.get_dict(),
+                )
+                if not self.session.verify:
+                    kwargs["ssl"] = False
+
+                async with session.get(
+                    url,
+                    **(self.requests_kwargs | kwargs),
+                ) as response:
+                    if self.raise_for_status:
+                        response.raise_for_status()
+                    return response.status, await response.text(), response.headers
+            except aiohttp.ClientConnectionError as e:
+                if i == retries - 1:
+                    raise
+                else:
+                    log.warning(
+                        f"Error fetching {url} with attempt "
+                        f"{i + 1}/{retries}: {e}. Retrying..."
                     )
-                    if not self.session.verify:
-                        kwargs["ssl"] = False
-
-                    async with session.get(
-                        url,
-                        **(self.requests_kwargs | kwargs),
-                    ) as response:
-                        if self.raise_for_status:
-                            response.raise_for_status()
-                        return await response.text()
-                except aiohttp.ClientConnectionError as e:
-                    if i == retries - 1:
-                        raise
-                    else:
-                        log.warning(
-                            f"Error fetching {url} with attempt "
-                            f"{i + 1}/{retries}: {e}. Retrying..."
-                        )
-                        await asyncio.sleep(cooldown * backoff**i)
+                    await asyncio.sleep(cooldown * backoff**i)
         raise ValueError("retry count exceeded")
 
     def _unpack_fetch_results(
@@ -572,21 +590,77 @@ class SafeWebBaseLoader(WebBaseLoader):
                 # Log the error and continue with the next URL
                 log.exception(f"Error loading {path}: {e}")
 
+    def _parse_document(self, url: str, html: str) -> Document:
+        soup = self._unpack_fetch_results([html], [url])[0]
+        text = soup.get_text(**self.bs_get_text_kwargs)
+        metadata = {"source": url}
+        if title := soup.find("title"):
+            metadata["title"] = title.get_text()
+        if description := soup.find("meta", attrs={"name": "description"}):
+            metadata["description"] = description.get(
+                "content", "No description found."
+            )
+        if html := soup.find("html"):
+            metadata["language"] = html.get("lang", "No language found.")
+        return Document(page_content=text, metadata=metadata)
+
+    async def _load_document(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        semaphore: asyncio.Semaphore,
+    ) -> Document:
+        """
+        Load the url from the page cache, revalidating or fetching and parsing
+        it only if it is missing or expired. An expired page is still served if
+        revalidating it fails.
+        """
+        entry = WEB_PAGE_CACHE.get(url)
+        if entry is not None and entry.is_fresh():
+            return entry.get_document(url)
+
+        async with semaphore:
+            try:
+                status, html, headers = await self._fetch_response(
+                    session,
+                    url,
+                    headers=entry.get_validators() if entry is not None else None,
+                )
+            except Exception as e:
+                if entry is not None:
+                    # Serve the expired page while the site is unavailable
+                    log.warning(f"Error revalidating {url}, serving cached page: {e}")
+                    return entry.get_document(url)
+                if not self.continue_on_failure:
+                    raise
+                log.warning(f"Error fetching {url}, skipping: {e}")
+                return self._parse_document(url, "")
+
+        if entry is not None:
+            if status == 304:
+                return WEB_PAGE_CACHE.revalidate(url, entry, headers).get_document(url)
+            if status >= 500:
+                log.warning(f"Error revalidating {url} ({status}), serving cached page")
+                return entry.get_document(url)
+
+        document = self._parse_document(url, html)
+        if status == 200:
+            WEB_PAGE_CACHE.set(url, document.page_content, document.metadata, headers)
+        return document
+
     async def alazy_load(self) -> AsyncIterator[Document]:
         """Async lazy load text from the url(s) in web_path."""
-        results = await self.ascrape_all(self.web_paths)
-        for path, soup in zip(self.web_paths, results):
-            text = soup.get_text(**self.bs_get_text_kwargs)
-            metadata = {"source": path}
-            if title := soup.find("title"):
-                metadata["title"] = title.get_text()
-            if description := soup.find("meta", attrs={"name": "description"}):
-                metadata["description"] = description.get(
-                    "content", "No description found."
-                )
-            if html := soup.find("html"):
-                metadata["language"] = html.get("lang", "No language found.")
-            yield Document(page_content=text, metadata=metadata)
+        # One session, and its connections, for all the urls
+        semaphore = asyncio.Semaphore(self.requests_per_second)
+        async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
+            documents = await asyncio.gather(
+                *[
+                    self._load_document(session, path, semaphore)
+                    for path in self.web_paths
+                ]
+            )
+        for document in documents:
+            yield document
 
     async def aload(self) -> list[Document]:
         """Load data into Document objects."""
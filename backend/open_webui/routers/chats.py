@@ -7,9 +7,11 @@ from open_webui.socket.main import get_event_emitter
 from open_webui.models.chats import (
     ChatForm,
     ChatImportForm,
+    ChatListResponse,
     ChatResponse,
     Chats,
     ChatTitleIdResponse,
+    parse_chat_list_cursor,
 )
 from open_webui.models.tags import TagModel, Tags
 from open_webui.models.folders import Folders
@@ -34,16 +36,37 @@ router = APIRouter()
 ############################
 
 
-@router.get("/", response_model=list[ChatTitleIdResponse])
-@router.get("/list", response_model=list[ChatTitleIdResponse])
+def get_cursor(cursor: Optional[str] = None) -> Optional[tuple[int, str]]:
+    """
+    Lists can be paged with `cursor`, the `<updated_at>:<id>` of the last chat
+    of the previous page, instead of `page` which gets slower the deeper it is.
+    """
+    if cursor is None:
+        return None
+
+    try:
+        return parse_chat_list_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Invalid cursor"),
+        )
+
+
+@router.get("/", response_model=list[ChatListResponse])
+@router.get("/list", response_model=list[ChatListResponse])
 async def get_session_user_chat_list(
-    user=Depends(get_verified_user), page: Optional[int] = None
+    user=Depends(get_verified_user),
+    page: Optional[int] = None,
+    cursor: Optional[tuple[int, str]] = Depends(get_cursor),
 ):
-    if page is not None:
+    if page is not None or cursor is not None:
         limit = 60
-        skip = (page - 1) * limit
+        skip = (page - 1) * limit if page else 0
 
-        return Chats.get_chat_title_id_list_by_user_id(user.id, skip=skip, limit=limit)
+        return Chats.get_chat_title_id_list_by_user_id(
+            user.id, skip=skip, limit=limit, cursor=cursor
+        )
     else:
         return Chats.get_chat_title_id_list_by_user_id(user.id)
 
@@ -172,12 +195,9 @@ async def get_chats_by_folder_id(folder_id: str, user=Depends(get_verified_user)
 ############################
 
 
-@router.get("/pinned", response_model=list[ChatTitleIdResponse])
+@router.get("/pinned", response_model=list[ChatListResponse])
 async def get_user_pinned_chats(user=Depends(get_verified_user)):
-    return [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_pinned_chats_by_user_id(user.id)
-    ]
+    return Chats.get_pinned_chat_list_by_user_id(user.id)
 
 
 ############################
@@ -233,12 +253,13 @@ async def get_all_user_tags(user=Depends(get_verified_user)):
 ############################
 
 
-@router.get("/archived", response_model=list[ChatTitleIdResponse])
+@router.get("/archived", response_model=list[ChatListResponse])
 async def get_archived_session_user_chat_list(
     page: Optional[int] = None,
     query: Optional[str] = None,
     order_by: Optional[str] = None,
     direction: Optional[str] = None,
+    cursor: Optional[tuple[int, str]] = Depends(get_cursor),
     user=Depends(get_verified_user),
 ):
     if page is None:
@@ -255,17 +276,18 @@ async def get_archived_session_user_chat_list(
     if direction:
         filter["direction"] = direction
 
-    chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_archived_chat_list_by_user_id(
+    try:
+        return Chats.get_archived_chat_list_by_user_id(
             user.id,
             filter=filter,
             skip=skip,
             limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=ERROR_MESSAGES.DEFAULT(e)
         )
-    ]
-
-    return chat_list
 
 
 ############################
@@ -316,16 +338,21 @@ class TagForm(BaseModel):
 class TagFilterForm(TagForm):
     skip: Optional[int] = 0
     limit: Optional[int] = 50
+    cursor: Optional[str] = None
 
 
-@router.post("/tags", response_model=list[ChatTitleIdResponse])
+@router.post("/tags", response_model=list[ChatListResponse])
 async def get_user_chat_list_by_tag_name(
     form_data: TagFilterForm, user=Depends(get_verified_user)
 ):
     chats = Chats.get_chat_list_by_user_id_and_tag_name(
-        user.id, form_data.name, form_data.skip, form_data.limit
+        user.id,
+        form_data.name,
+        form_data.skip,
+        form_data.limit,
+        cursor=get_cursor(form_data.cursor),
     )
-    if len(chats) == 0:
+    if len(chats) == 0 and form_data.cursor is None and not form_data.skip:
         Tags.delete_tag_by_name_and_user_id(form_data.name, user.id)
 
     return chats
@@ -395,13 +422,14 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    Chats.upsert_message_to_chat_by_id_and_message_id(
         id,
         message_id,
         {
             "content": form_data.content,
         },
     )
+    chat = Chats.get_chat_by_id(id)
 
     event_emitter = get_event_emitter(
         {
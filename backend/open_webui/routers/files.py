@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import os
 import uuid
@@ -14,13 +15,14 @@ from fastapi import (
     Form,
     HTTPException,
     Request,
+    Response,
     UploadFile,
     status,
     Query,
 )
 from fastapi.responses import FileResponse, StreamingResponse
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import ENABLE_BACKGROUND_FILE_PROCESSING, SRC_LOG_LEVELS
 
 from open_webui.models.users import Users
 from open_webui.models.files import (
@@ -29,6 +31,7 @@ from open_webui.models.files import (
     FileModelResponse,
     Files,
 )
+from open_webui.models.ingestion_jobs import IngestionJobs, IngestionJobResponse
 from open_webui.models.knowledge import Knowledges
 
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
@@ -36,6 +39,11 @@ from open_webui.routers.retrieval import ProcessFileForm, process_file
 from open_webui.routers.audio import transcribe
 from open_webui.storage.provider import Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.ingestion import (
+    enqueue_file_processing,
+    is_audio_content_type,
+    is_processable_content_type,
+)
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -44,6 +52,11 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+# Stored files never change, browsers reuse them for a day before revalidating.
+# Extracted text can be edited, so it is revalidated on every use.
+FILE_CACHE_CONTROL = "private, max-age=86400"
+FILE_CONTENT_CACHE_CONTROL = "private, no-cache"
+
 
 ############################
 # Check if the current user has access to a file through any knowledge bases the user may be in.
@@ -134,7 +147,7 @@ def upload_file(
             "OpenWebUI-User-Name": user.name,
             "OpenWebUI-File-Id": id,
         }
-        contents, file_path = Storage.upload_file(file.file, filename, tags)
+        upload_metadata, file_path = Storage.upload_file(file.file, filename, tags)
 
         file_item = Files.insert_new_file(
             user.id,
@@ -146,34 +159,34 @@ def upload_file(
                     "meta": {
                         "name": name,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": upload_metadata["size"],
+                        "sha256": upload_metadata["sha256"],
                         "data": file_metadata,
                     },
                 }
             ),
         )
-        if process:
+        if process and is_processable_content_type(request, file.content_type):
             try:
-                if file.content_type:
-                    if file.content_type.startswith("audio/") or file.content_type in {
-                        "video/webm"
-                    }:
-                        file_path = Storage.get_file(file_path)
-                        result = transcribe(request, file_path, file_metadata)
-
-                        process_file(
-                            request,
-                            ProcessFileForm(file_id=id, content=result.get("text", "")),
-                            user=user,
-                        )
-                    elif (not file.content_type.startswith(("image/", "video/"))) or (
-                        request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
-                    ):
-                        process_file(request, ProcessFileForm(file_id=id), user=user)
-                else:
+                if not file.content_type:
                     log.info(
                         f"File type {file.content_type} is not provided, but trying to process anyway"
                     )
+
+                if ENABLE_BACKGROUND_FILE_PROCESSING:
+                    # Transcribed, extracted and embedded by the ingestion worker,
+                    # progress is emitted as file-events
+                    enqueue_file_processing(request, user.id, id)
+                elif is_audio_content_type(file.content_type):
+                    file_path = Storage.get_file(file_path)
+                    result = transcribe(request, file_path, file_metadata)
+
+                    process_file(
+                        request,
+                        ProcessFileForm(file_id=id, content=result.get("text", "")),
+                        user=user,
+                    )
+                else:
                     process_file(request, ProcessFileForm(file_id=id), user=user)
 
                 file_item = Files.get_file_by_id(id=id)
@@ -319,6 +332,50 @@ async def get_file_by_id(id: str, user=Depends(get_verified_user)):
         )
 
 
+############################
+# Get File Process Status By Id
+############################
+
+
+@router.get("/{id}/process/status")
+async def get_file_process_status_by_id(
+    id: str, collection_name: Optional[str] = None, user=Depends(get_verified_user)
+):
+    file = Files.get_file_by_id(id)
+
+    if not file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    if (
+        file.user_id == user.id
+        or user.role == "admin"
+        or has_access_to_file(id, "read", user)
+    ):
+        job = IngestionJobs.get_latest_job_by_file_id(id, collection_name)
+        if collection_name is None:
+            # Files processed within the upload request have no status
+            data = file.data or {}
+            return {
+                "status": data.get("status", "completed"),
+                "error": data.get("error"),
+                "job": IngestionJobResponse(**job.model_dump()) if job else None,
+            }
+
+        return {
+            "status": job.status if job else "completed",
+            "error": job.error if job else None,
+            "job": IngestionJobResponse(**job.model_dump()) if job else None,
+        }
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+
 ############################
 # Get File Data Content By Id
 ############################
@@ -392,6 +449,167 @@ async def update_file_data_content_by_id(
         )
 
 
+############################
+# File Content Responses
+############################
+
+
+def get_file_etag(file: FileModel) -> Optional[str]:
+    # Uploads are hashed as they are stored, older files by their content
+    hash = (file.meta or {}).get("sha256") or file.hash
+    return f'"{hash}"' if hash else None
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match calls for
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in tags
+
+
+def get_byte_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parses a single range `Range` header into the start and (exclusive) end
+    offsets. Returns None for headers the whole content is sent for, including
+    multiple ranges, and raises ValueError for unsatisfiable ranges.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip() != "bytes" or "," in ranges:
+        return None
+
+    start, sep, end = ranges.strip().partition("-")
+    try:
+        if not sep or (start == "" and end == ""):
+            return None
+        if start == "":
+            # Suffix range, the last `end` bytes
+            start, end = max(size - int(end), 0), size
+        else:
+            start, end = int(start), min(int(end) + 1, size) if end else size
+    except ValueError:
+        return None
+
+    if start < 0 or start >= size or end <= start:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    return start, end
+
+
+def get_range_response(
+    request: Request, size: int, etag: Optional[str], headers: dict
+) -> Optional[tuple[int, int] | Response]:
+    """
+    Returns the byte range requested, if any, or the 416 response for an
+    unsatisfiable one.
+    """
+    range_header = request.headers.get("range")
+    if not range_header:
+        return None
+
+    # The range is of an older version of the file
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        return None
+
+    try:
+        return get_byte_range(range_header, size)
+    except ValueError:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{size}"},
+        )
+
+
+def get_content_response(
+    request: Request, content: str, headers: dict, media_type: str = "text/plain"
+) -> Response:
+    """
+    Responds with the extracted text of a file that is not stored, supporting
+    conditional and range requests like stored files.
+    """
+    data = content.encode("utf-8")
+    etag = f'"{hashlib.sha256(data).hexdigest()}"'
+    headers = {
+        **headers,
+        "ETag": etag,
+        "Cache-Control": FILE_CONTENT_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = get_range_response(request, len(data), etag, headers)
+    if isinstance(byte_range, Response):
+        return byte_range
+    if byte_range:
+        start, end = byte_range
+        return Response(
+            data[start:end],
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers={
+                **headers,
+                "Content-Range": f"bytes {start}-{end - 1}/{len(data)}",
+            },
+        )
+
+    return Response(data, media_type=media_type, headers=headers)
+
+
+def get_file_response(
+    request: Request,
+    file: FileModel,
+    headers: dict,
+    media_type: Optional[str] = None,
+) -> Response:
+    """
+    Responds with a stored file, or a 304 if the client's copy is current.
+
+    Ranges of files in remote storage that are not cached locally are streamed
+    from the storage, without downloading the whole file. Other requests are
+    served from the local copy, which also answers range requests.
+    """
+    etag = get_file_etag(file)
+    headers = {**headers, "Cache-Control": FILE_CACHE_CONTROL}
+    if etag:
+        headers["ETag"] = etag
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if request.headers.get("range") and Storage.get_local_file(file.path) is None:
+        size = (file.meta or {}).get("size") or Storage.get_file_size(file.path)
+        byte_range = get_range_response(request, size, etag, headers)
+        if isinstance(byte_range, Response):
+            return byte_range
+        if byte_range:
+            start, end = byte_range
+            return StreamingResponse(
+                Storage.iter_file_range(file.path, start, end),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type=media_type,
+                headers={
+                    **headers,
+                    "Accept-Ranges": "bytes",
+                    "Content-Range": f"bytes {start}-{end - 1}/{size}",
+                    "Content-Length": str(end - start),
+                },
+            )
+
+    file_path = Path(Storage.get_file(file.path))
+    if not file_path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    # Answers range requests, with If-Range compared to the ETag set here
+    return FileResponse(file_path, headers=headers, media_type=media_type)
+
+
 ############################
 # Get File Content By Id
 ############################
@@ -399,7 +617,10 @@ async def update_file_data_content_by_id(
 
 @router.get("/{id}/content")
 async def get_file_content_by_id(
-    id: str, user=Depends(get_verified_user), attachment: bool = Query(False)
+    id: str,
+    request: Request,
+    user=Depends(get_verified_user),
+    attachment: bool = Query(False),
 ):
     file = Files.get_file_by_id(id)
 
@@ -415,44 +636,31 @@ async def get_file_content_by_id(
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
-            file_path = Path(file_path)
+            # Handle Unicode filenames
+            filename = file.meta.get("name", file.filename)
+            encoded_filename = quote(filename)  # RFC5987 encoding
 
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                # Handle Unicode filenames
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)  # RFC5987 encoding
+            content_type = file.meta.get("content_type")
+            headers = {}
 
-                content_type = file.meta.get("content_type")
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)
-                headers = {}
-
-                if attachment:
+            if attachment:
+                headers["Content-Disposition"] = (
+                    f"attachment; filename*=UTF-8''{encoded_filename}"
+                )
+            else:
+                if content_type == "application/pdf" or filename.lower().endswith(
+                    ".pdf"
+                ):
+                    headers["Content-Disposition"] = (
+                        f"inline; filename*=UTF-8''{encoded_filename}"
+                    )
+                    content_type = "application/pdf"
+                elif content_type != "text/plain":
                     headers["Content-Disposition"] = (
                         f"attachment; filename*=UTF-8''{encoded_filename}"
                     )
-                else:
-                    if content_type == "application/pdf" or filename.lower().endswith(
-                        ".pdf"
-                    ):
-                        headers["Content-Disposition"] = (
-                            f"inline; filename*=UTF-8''{encoded_filename}"
-                        )
-                        content_type = "application/pdf"
-                    elif content_type != "text/plain":
-                        headers["Content-Disposition"] = (
-                            f"attachment; filename*=UTF-8''{encoded_filename}"
-                        )
-
-                return FileResponse(file_path, headers=headers, media_type=content_type)
 
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=ERROR_MESSAGES.NOT_FOUND,
-                )
+            return get_file_response(request, file, headers, media_type=content_type)
         except Exception as e:
             log.exception(e)
             log.error("Error getting file content")
@@ -468,7 +676,9 @@ async def get_file_content_by_id(
 
 
 @router.get("/{id}/content/html")
-async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
+async def get_html_file_content_by_id(
+    id: str, request: Request, user=Depends(get_verified_user)
+):
     file = Files.get_file_by_id(id)
 
     if not file:
@@ -490,18 +700,7 @@ async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
-            file_path = Path(file_path)
-
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                log.info(f"file_path: {file_path}")
-                return FileResponse(file_path)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=ERROR_MESSAGES.NOT_FOUND,
-                )
+            return get_file_response(request, file, {})
         except Exception as e:
             log.exception(e)
             log.error("Error getting file content")
@@ -517,7 +716,9 @@ async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
 
 
 @router.get("/{id}/content/{file_name}")
-async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
+async def get_file_content_by_id(
+    id: str, request: Request, user=Depends(get_verified_user)
+):
     file = Files.get_file_by_id(id)
 
     if not file:
@@ -541,30 +742,11 @@ async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
         }
 
         if file_path:
-            file_path = Storage.get_file(file_path)
-            file_path = Path(file_path)
-
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                return FileResponse(file_path, headers=headers)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=ERROR_MESSAGES.NOT_FOUND,
-                )
+            return get_file_response(request, file, headers)
         else:
             # File path doesn’t exist, return the content as .txt if possible
-            file_content = file.content.get("content", "")
-            file_name = file.filename
-
-            # Create a generator that encodes the file content
-            def generator():
-                yield file_content.encode("utf-8")
-
-            return StreamingResponse(
-                generator(),
-                media_type="text/plain",
-                headers=headers,
+            return get_content_response(
+                request, (file.data or {}).get("content", ""), headers
             )
     else:
         raise HTTPException(
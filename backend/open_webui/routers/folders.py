@@ -44,17 +44,18 @@ router = APIRouter()
 async def get_folders(user=Depends(get_verified_user)):
     folders = Folders.get_folders_by_user_id(user.id)
 
+    folder_chats = {}
+    for chat in Chats.get_chat_list_by_folder_ids_and_user_id(
+        [folder.id for folder in folders], user.id
+    ):
+        folder_chats.setdefault(chat.folder_id, []).append(
+            {"title": chat.title, "id": chat.id}
+        )
+
     return [
         {
             **folder.model_dump(),
-            "items": {
-                "chats": [
-                    {"title": chat.title, "id": chat.id}
-                    for chat in Chats.get_chats_by_folder_id_and_user_id(
-                        folder.id, user.id
-                    )
-                ]
-            },
+            "items": {"chats": folder_chats.get(folder.id, [])},
         }
         for folder in folders
     ]
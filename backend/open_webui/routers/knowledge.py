@@ -11,6 +11,7 @@ from open_webui.models.knowledge import (
 )
 from open_webui.models.files import Files, FileModel, FileMetadataResponse
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.models.bm25 import BM25Indexes
 from open_webui.routers.retrieval import (
     process_file,
     ProcessFileForm,
@@ -21,10 +22,11 @@ from open_webui.storage.provider import Storage
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user
+from open_webui.utils.ingestion import enqueue_file_processing
 from open_webui.utils.access_control import has_access, has_permission
 from open_webui.config import ENABLE_ADMIN_KNOWLEDGE_ACCESS_OVERRIDE
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import ENABLE_BACKGROUND_FILE_PROCESSING, SRC_LOG_LEVELS
 from open_webui.models.models import Models, ModelForm
 
 
@@ -263,6 +265,7 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
                     VECTOR_DB_CLIENT.delete_collection(
                         collection_name=knowledge_base.id
                     )
+                BM25Indexes.delete_index(knowledge_base.id)
             except Exception as e:
                 log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
                 continue  # Skip, don't raise
@@ -426,19 +429,26 @@ def add_file_to_knowledge_by_id(
             detail=ERROR_MESSAGES.FILE_NOT_PROCESSED,
         )
 
-    # Add content to the vector database
-    try:
-        process_file(
-            request,
-            ProcessFileForm(file_id=form_data.file_id, collection_name=id),
-            user=user,
-        )
-    except Exception as e:
-        log.debug(e)
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e),
-        )
+    if ENABLE_BACKGROUND_FILE_PROCESSING:
+        if file.data.get("status") == "failed":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=file.data.get("error") or ERROR_MESSAGES.FILE_NOT_PROCESSED,
+            )
+    else:
+        # Add content to the vector database
+        try:
+            process_file(
+                request,
+                ProcessFileForm(file_id=form_data.file_id, collection_name=id),
+                user=user,
+            )
+        except Exception as e:
+            log.debug(e)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
 
     if knowledge:
         data = knowledge.data or {}
@@ -451,6 +461,13 @@ def add_file_to_knowledge_by_id(
         knowledge = Knowledges.update_knowledge_data_by_id(id=id, data=data)
 
         if knowledge:
+            if ENABLE_BACKGROUND_FILE_PROCESSING:
+                # Added to the vector database by the ingestion worker once the
+                # file itself is processed, and removed again if that fails
+                enqueue_file_processing(
+                    request, user.id, form_data.file_id, collection_name=id
+                )
+
             files = Files.get_file_metadatas_by_ids(file_ids)
 
             return KnowledgeFilesResponse(
@@ -1,7 +1,16 @@
+import asyncio
 import json
+import logging
+import time
 import uuid
+from typing import Optional
+
+from open_webui.env import SRC_LOG_LEVELS
 from open_webui.utils.redis import get_redis_connection
 
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
+
 
 class RedisLock:
     def __init__(self, redis_url, lock_name, timeout_secs, redis_sentinels=[]):
@@ -10,82 +19,317 @@ class RedisLock:
         self.timeout_secs = timeout_secs
         self.lock_obtained = False
         self.redis = get_redis_connection(
-            redis_url, redis_sentinels, decode_responses=True
+            redis_url, redis_sentinels, async_mode=True, decode_responses=True
+        )
+        self._release_script = self.redis.register_script(
+            """
+            if redis.call('GET', KEYS[1]) == ARGV[1] then
+                return redis.call('DEL', KEYS[1])
+            end
+            return 0
+            """
         )
 
-    def aquire_lock(self):
+    async def aquire_lock(self):
         # nx=True will only set this key if it _hasn't_ already been set
-        self.lock_obtained = self.redis.set(
+        self.lock_obtained = await self.redis.set(
             self.lock_name, self.lock_id, nx=True, ex=self.timeout_secs
         )
         return self.lock_obtained
 
-    def renew_lock(self):
+    async def renew_lock(self):
         # xx=True will only set this key if it _has_ already been set
-        return self.redis.set(
+        return await self.redis.set(
             self.lock_name, self.lock_id, xx=True, ex=self.timeout_secs
         )
 
-    def release_lock(self):
-        lock_value = self.redis.get(self.lock_name)
-        if lock_value and lock_value == self.lock_id:
-            self.redis.delete(self.lock_name)
+    async def release_lock(self):
+        await self._release_script(keys=[self.lock_name], args=[self.lock_id])
+
+
+class SocketPool:
+    """
+    Connected sessions, the sessions of each user and the models in use by
+    each session, in memory for a single worker. `RedisSocketPool` shares them
+    between workers with the same interface.
+    """
+
+    def __init__(self, usage_timeout: int):
+        self.usage_timeout = usage_timeout
+
+        self._sessions: dict[str, dict] = {}
+        self._user_sessions: dict[str, list[str]] = {}
+        # model_id -> last usage timestamp, by any session
+        self._usage: dict[str, int] = {}
+
+    async def add_session(self, sid: str, user: dict):
+        self._sessions[sid] = user
+        sids = self._user_sessions.setdefault(user["id"], [])
+        if sid not in sids:
+            sids.append(sid)
+
+    async def remove_session(self, sid: str) -> Optional[dict]:
+        user = self._sessions.pop(sid, None)
+        if user is None:
+            return None
+
+        sids = self._user_sessions.get(user["id"], [])
+        if sid in sids:
+            sids.remove(sid)
+        if not sids:
+            self._user_sessions.pop(user["id"], None)
+        return user
+
+    async def get_session(self, sid: str) -> Optional[dict]:
+        return self._sessions.get(sid)
+
+    async def get_sessions(self, sids: list[str]) -> list[Optional[dict]]:
+        return [self._sessions.get(sid) for sid in sids]
+
+    async def get_user_session_ids(self, user_id: str) -> list[str]:
+        return list(self._user_sessions.get(user_id, []))
+
+    async def get_user_ids(self) -> list[str]:
+        return list(self._user_sessions.keys())
+
+    async def is_user_active(self, user_id: str) -> bool:
+        return user_id in self._user_sessions
+
+    async def set_usage(self, model_id: str, sid: str):
+        self._usage[model_id] = int(time.time())
+
+    async def get_models_in_use(self) -> list[str]:
+        since = int(time.time()) - self.usage_timeout
+        return [
+            model_id
+            for model_id, updated_at in self._usage.items()
+            if updated_at >= since
+        ]
+
+    async def expire_usage(self):
+        since = int(time.time()) - self.usage_timeout
+        for model_id, updated_at in list(self._usage.items()):
+            if updated_at < since:
+                log.debug(f"Cleaning up model {model_id} from usage pool")
+                del self._usage[model_id]
+
+
+class RedisSocketPool(SocketPool):
+    """
+    Redis layout, under the `prefix`:
 
+    - `session_pool` hash: sid -> user JSON,
+    - `user_pool` hash: user_id -> number of sessions,
+    - `user_pool:<user_id>` set: sids of the user,
+    - `usage_models` sorted set: model_id scored by its last usage timestamp, so
+      that recording usage and listing the models in use don't depend on the
+      number of sessions; `expire_usage` removes the models no longer in use.
+
+    Sessions and their users are added and removed atomically by Lua scripts,
+    which publish the user id on the `session_pool:changes` channel. Sessions
+    connected to this worker are kept in memory, since their events are handled
+    here. While `listen` is subscribed to the channel, the sessions of each user
+    and the user list are cached for up to `cache_ttl` seconds, and dropped as
+    soon as any worker changes them.
+    """
+
+    ADD_SESSION_SCRIPT = """
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('SADD', KEYS[3], ARGV[1])
+    redis.call('HSET', KEYS[2], ARGV[3], redis.call('SCARD', KEYS[3]))
+    redis.call('PUBLISH', ARGV[4], ARGV[3])
+    """
+
+    REMOVE_SESSION_SCRIPT = """
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    redis.call('SREM', KEYS[3], ARGV[1])
+    local count = redis.call('SCARD', KEYS[3])
+    if count == 0 then
+        redis.call('HDEL', KEYS[2], ARGV[2])
+    else
+        redis.call('HSET', KEYS[2], ARGV[2], count)
+    end
+    redis.call('PUBLISH', ARGV[3], ARGV[2])
+    return count
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        redis_url: str,
+        redis_sentinels=[],
+        usage_timeout: int = 3,
+        cache_ttl: float = 1,
+    ):
+        super().__init__(usage_timeout)
+        self.session_pool_key = f"{prefix}:session_pool"
+        self.user_pool_key = f"{prefix}:user_pool"
+        # A sorted set, the `usage_pool` key of earlier versions is a hash
+        self.usage_pool_key = f"{prefix}:usage_models"
+        self.changes_channel = f"{prefix}:session_pool:changes"
+        self.cache_ttl = cache_ttl
 
-class RedisDict:
-    def __init__(self, name, redis_url, redis_sentinels=[]):
-        self.name = name
         self.redis = get_redis_connection(
-            redis_url, redis_sentinels, decode_responses=True
+            redis_url, redis_sentinels, async_mode=True, decode_responses=True
+        )
+        self._add_session_script = self.redis.register_script(self.ADD_SESSION_SCRIPT)
+        self._remove_session_script = self.redis.register_script(
+            self.REMOVE_SESSION_SCRIPT
+        )
+
+        # user_id -> (expires_at, sids)
+        self._user_sessions_cache: dict[str, tuple[float, list[str]]] = {}
+        self._user_ids_cache: Optional[tuple[float, list[str]]] = None
+        self._cache_evicted_at = 0.0
+        # Bumped on invalidation, so reads made before it are not cached
+        self._cache_generation = 0
+        # Whether `listen` receives the changes of the other workers
+        self._subscribed = False
+
+    def _user_sessions_key(self, user_id: str) -> str:
+        return f"{self.user_pool_key}:{user_id}"
+
+    def _invalidate(self, user_id: str):
+        self._user_sessions_cache.pop(user_id, None)
+        self._user_ids_cache = None
+        self._cache_generation += 1
+
+    def _clear_cache(self):
+        self._user_sessions_cache.clear()
+        self._user_ids_cache = None
+        self._cache_generation += 1
+
+    def _use_cache(self, generation: int) -> bool:
+        return (
+            self._subscribed
+            and self.cache_ttl > 0
+            and generation == self._cache_generation
+        )
+
+    def _evict_expired(self, now: float):
+        # At most once per TTL, so cache misses don't scan every user
+        if now - self._cache_evicted_at < self.cache_ttl:
+            return
+        self._cache_evicted_at = now
+        for user_id, (expires_at, _) in list(self._user_sessions_cache.items()):
+            if expires_at <= now:
+                del self._user_sessions_cache[user_id]
+
+    async def listen(self):
+        """Drop the cached sessions of the users changed by any worker."""
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(self.changes_channel)
+
+                # Changes may have been missed while disconnected
+                self._clear_cache()
+                self._subscribed = True
+
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._invalidate(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"Socket pool listener disconnected from Redis: {e}")
+                await asyncio.sleep(1)
+            finally:
+                self._subscribed = False
+
+    async def add_session(self, sid: str, user: dict):
+        await self._add_session_script(
+            keys=[
+                self.session_pool_key,
+                self.user_pool_key,
+                self._user_sessions_key(user["id"]),
+            ],
+            args=[sid, json.dumps(user), user["id"], self.changes_channel],
+        )
+        self._sessions[sid] = user
+        self._invalidate(user["id"])
+
+    async def remove_session(self, sid: str) -> Optional[dict]:
+        user = self._sessions.pop(sid, None)
+        if user is None:
+            # Connected to another worker, or before this worker restarted
+            user = await self.get_session(sid)
+            if user is None:
+                return None
+
+        await self._remove_session_script(
+            keys=[
+                self.session_pool_key,
+                self.user_pool_key,
+                self._user_sessions_key(user["id"]),
+            ],
+            args=[sid, user["id"], self.changes_channel],
         )
+        self._invalidate(user["id"])
+        return user
 
-    def __setitem__(self, key, value):
-        serialized_value = json.dumps(value)
-        self.redis.hset(self.name, key, serialized_value)
+    async def get_session(self, sid: str) -> Optional[dict]:
+        if sid in self._sessions:
+            return self._sessions[sid]
 
-    def __getitem__(self, key):
-        value = self.redis.hget(self.name, key)
-        if value is None:
-            raise KeyError(key)
-        return json.loads(value)
+        value = await self.redis.hget(self.session_pool_key, sid)
+        return json.loads(value) if value is not None else None
 
-    def __delitem__(self, key):
-        result = self.redis.hdel(self.name, key)
-        if result == 0:
-            raise KeyError(key)
+    async def get_sessions(self, sids: list[str]) -> list[Optional[dict]]:
+        missing = [sid for sid in sids if sid not in self._sessions]
+        values = {}
+        if missing:
+            values = dict(
+                zip(missing, await self.redis.hmget(self.session_pool_key, missing))
+            )
 
-    def __contains__(self, key):
-        return self.redis.hexists(self.name, key)
+        return [
+            (
+                self._sessions[sid]
+                if sid in self._sessions
+                else json.loads(values[sid]) if values[sid] is not None else None
+            )
+            for sid in sids
+        ]
 
-    def __len__(self):
-        return self.redis.hlen(self.name)
+    async def get_user_session_ids(self, user_id: str) -> list[str]:
+        now = time.monotonic()
+        cached = self._user_sessions_cache.get(user_id)
+        if cached is not None and cached[0] > now:
+            return list(cached[1])
 
-    def keys(self):
-        return self.redis.hkeys(self.name)
+        generation = self._cache_generation
+        sids = list(await self.redis.smembers(self._user_sessions_key(user_id)))
+        if self._use_cache(generation):
+            self._evict_expired(now)
+            self._user_sessions_cache[user_id] = (now + self.cache_ttl, sids)
+        return list(sids)
 
-    def values(self):
-        return [json.loads(v) for v in self.redis.hvals(self.name)]
+    async def get_user_ids(self) -> list[str]:
+        now = time.monotonic()
+        if self._user_ids_cache is not None and self._user_ids_cache[0] > now:
+            return list(self._user_ids_cache[1])
 
-    def items(self):
-        return [(k, json.loads(v)) for k, v in self.redis.hgetall(self.name).items()]
+        generation = self._cache_generation
+        user_ids = await self.redis.hkeys(self.user_pool_key)
+        if self._use_cache(generation):
+            self._user_ids_cache = (now + self.cache_ttl, user_ids)
+        return list(user_ids)
 
-    def get(self, key, default=None):
-        try:
-            return self[key]
-        except KeyError:
-            return default
+    async def is_user_active(self, user_id: str) -> bool:
+        if self._user_ids_cache is not None and (
+            self._user_ids_cache[0] > time.monotonic()
+        ):
+            return user_id in self._user_ids_cache[1]
+        return bool(await self.redis.hexists(self.user_pool_key, user_id))
 
-    def clear(self):
-        self.redis.delete(self.name)
+    async def set_usage(self, model_id: str, sid: str):
+        await self.redis.zadd(self.usage_pool_key, {model_id: int(time.time())})
 
-    def update(self, other=None, **kwargs):
-        if other is not None:
-            for k, v in other.items() if hasattr(other, "items") else other:
-                self[k] = v
-        for k, v in kwargs.items():
-            self[k] = v
+    async def get_models_in_use(self) -> list[str]:
+        since = int(time.time()) - self.usage_timeout
+        return list(await self.redis.zrangebyscore(self.usage_pool_key, since, "+inf"))
 
-    def setdefault(self, key, default=None):
-        if key not in self:
-            self[key] = default
-        return self[key]
+    async def expire_usage(self):
+        since = int(time.time()) - self.usage_timeout
+        await self.redis.zremrangebyscore(self.usage_pool_key, "-inf", f"({since}")
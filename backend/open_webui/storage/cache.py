@@ -0,0 +1,307 @@
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Seconds a cached file is kept after it was last returned, even over the size
+# bound, since the caller may still be reading it
+EVICTION_GRACE_PERIOD = 60
+
+# Seconds after which a partial download left in the cache directory, e.g. by a
+# crashed worker, is removed on startup
+STALE_DOWNLOAD_AGE = 60 * 60
+
+
+@dataclass
+class StorageCacheEntry:
+    size: int
+    etag: Optional[str] = None
+    validated_at: float = 0.0
+    used_at: float = 0.0
+
+
+class StorageCache:
+    """
+    Bounded on-disk read-through cache of objects in remote storage.
+
+    Files are cached at the local path the provider downloads them to and
+    evicted least recently used first once they take more than `max_size`
+    bytes. A cached file is served without asking the remote storage for
+    `validation_ttl` seconds, after that its ETag (or generation) is compared
+    with the remote one and the file is downloaded again if it changed.
+    Concurrent requests for the same file wait for a single download, which is
+    written to a temporary file and moved into place once complete.
+
+    The cache owns `directory`: the files left there by earlier runs are
+    tracked again on startup, least recently used first by their modification
+    time, which is refreshed whenever a file is served. Like files registered
+    with `add`, they are validated on their first use and adopt the remote
+    ETag. Files downloaded by another worker sharing the directory are only
+    tracked by that worker until the next start, so the size is bounded per
+    process.
+    """
+
+    def __init__(
+        self, max_size: int, validation_ttl: int, directory: Optional[str] = None
+    ):
+        self.max_size = max_size
+        self.validation_ttl = validation_ttl
+        self.directory = directory
+
+        self._entries: OrderedDict[str, StorageCacheEntry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        # path -> (lock, number of callers holding or waiting for it)
+        self._path_locks: dict[str, tuple[threading.Lock, int]] = {}
+
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            # Lookups without a download, e.g. to stream a range remotely instead
+            "uncached": 0,
+            "revalidations": 0,
+            "stale": 0,
+            "validation_errors": 0,
+            "waits": 0,
+            "evictions": 0,
+            "bytes_downloaded": 0,
+        }
+
+        if self.enabled and self.directory:
+            self.load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get_path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def load(self):
+        """
+        Track the files in the cache directory, e.g. after a restart, and evict
+        the least recently used ones beyond the size bound.
+        """
+        if not os.path.isdir(self.directory):
+            return
+
+        files = []
+        for entry in os.scandir(self.directory):
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if entry.name.endswith(".part"):
+                    # Downloads of other workers sharing the directory are kept
+                    if time.time() - stat.st_mtime > STALE_DOWNLOAD_AGE:
+                        os.remove(entry.path)
+                    continue
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+            except OSError as e:
+                log.warning(f"Error loading cached file {entry.path}: {e}")
+
+        with self._lock:
+            for _, path, size in sorted(files):
+                # Validated on first use, since the remote object may have
+                # changed while the file was not tracked
+                self._set(path, StorageCacheEntry(size=size, validated_at=-math.inf))
+        log.info(f"Loaded {len(files)} cached files from {self.directory}")
+        self._evict()
+
+    @contextmanager
+    def _path_lock(self, path: str):
+        with self._lock:
+            lock, count = self._path_locks.get(path, (threading.Lock(), 0))
+            self._path_locks[path] = (lock, count + 1)
+
+        if not lock.acquire(blocking=False):
+            self.metrics["waits"] += 1
+            lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()
+            with self._lock:
+                lock, count = self._path_locks[path]
+                if count == 1:
+                    del self._path_locks[path]
+                else:
+                    self._path_locks[path] = (lock, count - 1)
+
+    def _set(self, path: str, entry: StorageCacheEntry):
+        # Called with self._lock held
+        previous = self._entries.pop(path, None)
+        if previous is not None:
+            self._size -= previous.size
+        self._entries[path] = entry
+        self._size += entry.size
+
+    def get(
+        self,
+        path: str,
+        get_etag: Callable[[], Optional[str]],
+        download: Optional[Callable[[str], None]] = None,
+    ) -> Optional[str]:
+        """
+        Return `path`, downloading it with `download(tmp_path)` unless a valid
+        copy is cached. `get_etag()` returns the ETag of the remote object.
+
+        Without `download`, None is returned instead of downloading the file.
+        """
+        with self._path_lock(path):
+            now = time.monotonic()
+            entry = None
+            if self.enabled:
+                with self._lock:
+                    entry = self._entries.get(path)
+
+            etag = None
+            if entry is not None and os.path.isfile(path):
+                if now - entry.validated_at < self.validation_ttl:
+                    return self._hit(path, entry, now)
+
+                self.metrics["revalidations"] += 1
+                try:
+                    etag = get_etag()
+                except Exception as e:
+                    # Serve the cached copy while the remote storage is unavailable
+                    self.metrics["validation_errors"] += 1
+                    log.warning(f"Error validating cached file {path}: {e}")
+                    return self._hit(path, entry, now)
+
+                # Files cached on upload adopt the ETag
+                if entry.etag is None or entry.etag == etag:
+                    entry.etag = etag
+                    entry.validated_at = now
+                    return self._hit(path, entry, now)
+
+                self.metrics["stale"] += 1
+                log.debug(f"Cached file {path} changed remotely")
+
+            if download is None:
+                self.metrics["uncached"] += 1
+                return None
+
+            self.metrics["misses"] += 1
+            if etag is None:
+                etag = get_etag()
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+            try:
+                download(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.isfile(tmp_path):
+                    os.remove(tmp_path)
+
+            size = os.path.getsize(path)
+            self.metrics["bytes_downloaded"] += size
+            if self.enabled:
+                with self._lock:
+                    self._set(
+                        path,
+                        StorageCacheEntry(
+                            size=size, etag=etag, validated_at=now, used_at=now
+                        ),
+                    )
+        self._evict()
+        return path
+
+    def _hit(self, path: str, entry: StorageCacheEntry, now: float) -> str:
+        self.metrics["hits"] += 1
+        entry.used_at = now
+        try:
+            # Keeps the order of use across restarts
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self._set(path, entry)
+        return path
+
+    def add(self, path: str, size: int, etag: Optional[str] = None):
+        """
+        Register a file written locally, e.g. the local copy of an upload.
+        """
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._set(
+                path,
+                StorageCacheEntry(size=size, etag=etag, validated_at=now, used_at=now),
+            )
+        self._evict()
+
+    def discard(self, path: str):
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._size -= entry.size
+
+    def delete(self, path: str):
+        """
+        Stop tracking `path` and remove the file, e.g. once the remote object
+        was deleted.
+        """
+        self.discard(path)
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _evict(self):
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for path in list(self._entries.keys()):
+                if self._size <= self.max_size:
+                    break
+
+                entry = self._entries[path]
+                if path in self._path_locks or (
+                    entry.used_at and now - entry.used_at < EVICTION_GRACE_PERIOD
+                ):
+                    continue
+
+                del self._entries[path]
+                self._size -= entry.size
+                evicted.append(path)
+
+        for path in evicted:
+            try:
+                os.remove(path)
+                self.metrics["evictions"] += 1
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                log.warning(f"Error evicting cached file {path}: {e}")
+
+    def get_metrics(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_rate": self.metrics["hits"] / lookups if lookups else 0.0,
+            "files": len(self._entries),
+            "size": self._size,
+            "max_size": self.max_size,
+        }
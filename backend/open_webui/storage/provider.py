@@ -1,12 +1,14 @@
 import os
 import shutil
 import json
+import hashlib
 import logging
 import re
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple, Dict
+from typing import Any, BinaryIO, Iterator, Optional, Tuple, Dict
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from open_webui.config import (
@@ -25,6 +27,8 @@ from open_webui.config import (
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
+    STORAGE_CACHE_MAX_SIZE,
+    STORAGE_CACHE_VALIDATION_TTL,
     UPLOAD_DIR,
 )
 from google.cloud import storage
@@ -34,21 +38,54 @@ from azure.identity import DefaultAzureCredential
 from azure.storage.blob import BlobServiceClient
 from azure.core.exceptions import ResourceNotFoundError
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.storage.cache import StorageCache
 
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+# Bytes of an upload read, hashed and written at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Part size and parallel parts of multipart uploads, S3 parts are at least 5 MiB,
+# GCS chunks a multiple of 256 KiB and Azure puts larger blobs in blocks
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+MULTIPART_CONCURRENCY = 2
+
 
 class StorageProvider(ABC):
     @abstractmethod
     def get_file(self, file_path: str) -> str:
         pass
 
+    @abstractmethod
+    def get_local_file(self, file_path: str) -> Optional[str]:
+        """
+        Returns the path of the file if a valid local copy exists, without
+        downloading it.
+        """
+        pass
+
+    @abstractmethod
+    def get_file_size(self, file_path: str) -> int:
+        pass
+
+    @abstractmethod
+    def iter_file_range(self, file_path: str, start: int, end: int) -> Iterator[bytes]:
+        """
+        Streams the bytes from `start` up to `end` (exclusive) of the file in
+        chunks, straight from the storage.
+        """
+        pass
+
     @abstractmethod
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Stores the file and returns its metadata, the `size` in bytes and the
+        `sha256` hex digest of its contents, along with its path.
+        """
         pass
 
     @abstractmethod
@@ -60,24 +97,84 @@ class StorageProvider(ABC):
         pass
 
 
+def get_storage_cache() -> StorageCache:
+    """
+    Cache of the local copies remote storage providers keep in a directory of
+    their own in UPLOAD_DIR.
+    """
+    return StorageCache(
+        STORAGE_CACHE_MAX_SIZE,
+        STORAGE_CACHE_VALIDATION_TTL,
+        os.path.join(UPLOAD_DIR, "cache"),
+    )
+
+
+def write_file(file: BinaryIO, file_path: str) -> Dict[str, Any]:
+    """
+    Streams the file to `file_path` in chunks, hashing and counting them on
+    the way, so the upload is never held in memory as a whole.
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    size = 0
+    sha256 = hashlib.sha256()
+    try:
+        with open(file_path, "wb") as f:
+            while chunk := file.read(UPLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                sha256.update(chunk)
+                size += len(chunk)
+    except Exception:
+        if os.path.isfile(file_path):
+            os.remove(file_path)
+        raise
+
+    if size == 0:
+        os.remove(file_path)
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    return {"size": size, "sha256": sha256.hexdigest()}
+
+
+def delete_local_copy(cache: StorageCache, filename: str):
+    cache.delete(cache.get_path(filename))
+
+    # Copies kept in UPLOAD_DIR before the cache had a directory of its own
+    file_path = f"{UPLOAD_DIR}/{filename}"
+    if os.path.isfile(file_path):
+        os.remove(file_path)
+
+
 class LocalStorageProvider(StorageProvider):
     @staticmethod
     def upload_file(
         file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
-        contents = file.read()
-        if not contents:
-            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    ) -> Tuple[Dict[str, Any], str]:
         file_path = f"{UPLOAD_DIR}/{filename}"
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        return contents, file_path
+        return write_file(file, file_path), file_path
 
     @staticmethod
     def get_file(file_path: str) -> str:
         """Handles downloading of the file from local storage."""
         return file_path
 
+    @staticmethod
+    def get_local_file(file_path: str) -> Optional[str]:
+        return file_path
+
+    @staticmethod
+    def get_file_size(file_path: str) -> int:
+        return os.path.getsize(file_path)
+
+    @staticmethod
+    def iter_file_range(file_path: str, start: int, end: int) -> Iterator[bytes]:
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            while start < end:
+                chunk = f.read(min(UPLOAD_CHUNK_SIZE, end - start))
+                if not chunk:
+                    break
+                start += len(chunk)
+                yield chunk
+
     @staticmethod
     def delete_file(file_path: str) -> None:
         """Handles deletion of the file from local storage."""
@@ -136,6 +233,12 @@ class S3StorageProvider(StorageProvider):
 
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+            max_concurrency=MULTIPART_CONCURRENCY,
+        )
+        self.cache = get_storage_cache()
 
     @staticmethod
     def sanitize_tag_value(s: str) -> str:
@@ -144,12 +247,17 @@ class S3StorageProvider(StorageProvider):
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[Dict[str, Any], str]:
         """Handles uploading of the file to S3 storage."""
-        _, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        file_path = self.cache.get_path(filename)
+        metadata = write_file(file, file_path)
+        self.cache.add(file_path, metadata["size"])
         s3_key = os.path.join(self.key_prefix, filename)
         try:
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
+            # Multipart upload streamed from the local copy
+            self.s3_client.upload_file(
+                file_path, self.bucket_name, s3_key, Config=self.transfer_config
+            )
             if S3_ENABLE_TAGGING and tags:
                 sanitized_tags = {
                     self.sanitize_tag_value(k): self.sanitize_tag_value(v)
@@ -165,20 +273,53 @@ class S3StorageProvider(StorageProvider):
                     Key=s3_key,
                     Tagging=tagging,
                 )
-            return (
-                open(file_path, "rb").read(),
-                f"s3://{self.bucket_name}/{s3_key}",
-            )
+            return metadata, f"s3://{self.bucket_name}/{s3_key}"
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
     def get_file(self, file_path: str) -> str:
         """Handles downloading of the file from S3 storage."""
+        return self._get_file(file_path, download=True)
+
+    def get_local_file(self, file_path: str) -> Optional[str]:
+        return self._get_file(file_path, download=False)
+
+    def _get_file(self, file_path: str, download: bool) -> Optional[str]:
+        s3_key = self._extract_s3_key(file_path)
+
+        def get_etag():
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+            return response["ETag"]
+
+        def fetch(tmp_path):
+            self.s3_client.download_file(
+                self.bucket_name, s3_key, tmp_path, Config=self.transfer_config
+            )
+
         try:
-            s3_key = self._extract_s3_key(file_path)
-            local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+            return self.cache.get(
+                self._get_local_file_path(s3_key), get_etag, fetch if download else None
+            )
+        except ClientError as e:
+            raise RuntimeError(f"Error downloading file from S3: {e}")
+
+    def get_file_size(self, file_path: str) -> int:
+        try:
+            response = self.s3_client.head_object(
+                Bucket=self.bucket_name, Key=self._extract_s3_key(file_path)
+            )
+            return response["ContentLength"]
+        except ClientError as e:
+            raise RuntimeError(f"Error getting file size from S3: {e}")
+
+    def iter_file_range(self, file_path: str, start: int, end: int) -> Iterator[bytes]:
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=self._extract_s3_key(file_path),
+                Range=f"bytes={start}-{end - 1}",
+            )
+            return response["Body"].iter_chunks(UPLOAD_CHUNK_SIZE)
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
@@ -191,7 +332,7 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from S3: {e}")
 
         # Always delete from local storage
-        LocalStorageProvider.delete_file(file_path)
+        delete_local_copy(self.cache, s3_key.split("/")[-1])
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from S3 storage."""
@@ -210,6 +351,7 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from S3: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
     # The s3 key is the name assigned to an object. It excludes the bucket name, but includes the internal path and the file name.
@@ -217,7 +359,7 @@ class S3StorageProvider(StorageProvider):
         return "/".join(full_file_path.split("//")[1].split("/")[1:])
 
     def _get_local_file_path(self, s3_key: str) -> str:
-        return f"{UPLOAD_DIR}/{s3_key.split('/')[-1]}"
+        return self.cache.get_path(s3_key.split("/")[-1])
 
 
 class GCSStorageProvider(StorageProvider):
@@ -234,31 +376,72 @@ class GCSStorageProvider(StorageProvider):
             # if running on a Compute Engine instance, credentials would be from Google Metadata server
             self.gcs_client = storage.Client()
         self.bucket = self.gcs_client.bucket(GCS_BUCKET_NAME)
+        self.cache = get_storage_cache()
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[Dict[str, Any], str]:
         """Handles uploading of the file to GCS storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        file_path = self.cache.get_path(filename)
+        metadata = write_file(file, file_path)
+        self.cache.add(file_path, metadata["size"])
         try:
-            blob = self.bucket.blob(filename)
+            # Resumable upload in chunks streamed from the local copy
+            blob = self.bucket.blob(filename, chunk_size=MULTIPART_CHUNK_SIZE)
             blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
+            return metadata, "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
     def get_file(self, file_path: str) -> str:
         """Handles downloading of the file from GCS storage."""
-        try:
-            filename = file_path.removeprefix("gs://").split("/")[1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
+        return self._get_file(file_path, download=True)
+
+    def get_local_file(self, file_path: str) -> Optional[str]:
+        return self._get_file(file_path, download=False)
+
+    def _get_file(self, file_path: str, download: bool) -> Optional[str]:
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        blob = None
+
+        def get_etag():
+            nonlocal blob
             blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
+            if blob is None:
+                raise NotFound(f"{filename} not found")
+            # Changes with every overwrite of the object
+            return str(blob.generation)
 
-            return local_file_path
+        def fetch(tmp_path):
+            blob.download_to_filename(tmp_path)
+
+        try:
+            return self.cache.get(
+                self.cache.get_path(filename), get_etag, fetch if download else None
+            )
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
+    def get_file_size(self, file_path: str) -> int:
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        blob = self.bucket.get_blob(filename)
+        if blob is None:
+            raise RuntimeError(
+                f"Error getting file size from GCS: {filename} not found"
+            )
+        return blob.size
+
+    def iter_file_range(self, file_path: str, start: int, end: int) -> Iterator[bytes]:
+        blob = self.bucket.blob(file_path.removeprefix("gs://").split("/")[1])
+        # One ranged request per chunk
+        for offset in range(start, end, MULTIPART_CHUNK_SIZE):
+            try:
+                yield blob.download_as_bytes(
+                    start=offset, end=min(offset + MULTIPART_CHUNK_SIZE, end) - 1
+                )
+            except NotFound as e:
+                raise RuntimeError(f"Error downloading file from GCS: {e}")
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from GCS storage."""
         try:
@@ -269,7 +452,7 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from GCS: {e}")
 
         # Always delete from local storage
-        LocalStorageProvider.delete_file(file_path)
+        delete_local_copy(self.cache, filename)
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from GCS storage."""
@@ -283,6 +466,7 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from GCS: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
 
@@ -295,39 +479,90 @@ class AzureStorageProvider(StorageProvider):
         if storage_key:
             # Configure using the Azure Storage Account Endpoint and Key
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=storage_key
+                account_url=self.endpoint,
+                credential=storage_key,
+                max_single_put_size=MULTIPART_CHUNK_SIZE,
+                max_block_size=MULTIPART_CHUNK_SIZE,
             )
         else:
             # Configure using the Azure Storage Account Endpoint and DefaultAzureCredential
             # If the key is not configured, then the DefaultAzureCredential will be used to support Managed Identity authentication
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=DefaultAzureCredential()
+                account_url=self.endpoint,
+                credential=DefaultAzureCredential(),
+                max_single_put_size=MULTIPART_CHUNK_SIZE,
+                max_block_size=MULTIPART_CHUNK_SIZE,
             )
         self.container_client = self.blob_service_client.get_container_client(
             self.container_name
         )
+        self.cache = get_storage_cache()
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[Dict[str, Any], str]:
         """Handles uploading of the file to Azure Blob Storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        file_path = self.cache.get_path(filename)
+        metadata = write_file(file, file_path)
+        self.cache.add(file_path, metadata["size"])
         try:
             blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
-            return contents, f"{self.endpoint}/{self.container_name}/{filename}"
+            # Staged as blocks streamed from the local copy
+            with open(file_path, "rb") as f:
+                blob_client.upload_blob(
+                    f,
+                    length=metadata["size"],
+                    overwrite=True,
+                    max_concurrency=MULTIPART_CONCURRENCY,
+                )
+            return metadata, f"{self.endpoint}/{self.container_name}/{filename}"
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
     def get_file(self, file_path: str) -> str:
         """Handles downloading of the file from Azure Blob Storage."""
+        return self._get_file(file_path, download=True)
+
+    def get_local_file(self, file_path: str) -> Optional[str]:
+        return self._get_file(file_path, download=False)
+
+    def _get_file(self, file_path: str, download: bool) -> Optional[str]:
+        filename = file_path.split("/")[-1]
+        blob_client = self.container_client.get_blob_client(filename)
+
+        def get_etag():
+            return blob_client.get_blob_properties().etag
+
+        def fetch(tmp_path):
+            # Streamed to disk rather than read into memory as a whole
+            with open(tmp_path, "wb") as download_file:
+                blob_client.download_blob(
+                    max_concurrency=MULTIPART_CONCURRENCY
+                ).readinto(download_file)
+
         try:
-            filename = file_path.split("/")[-1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
-            blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+            return self.cache.get(
+                self.cache.get_path(filename), get_etag, fetch if download else None
+            )
+        except ResourceNotFoundError as e:
+            raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
+
+    def get_file_size(self, file_path: str) -> int:
+        try:
+            blob_client = self.container_client.get_blob_client(
+                file_path.split("/")[-1]
+            )
+            return blob_client.get_blob_properties().size
+        except ResourceNotFoundError as e:
+            raise RuntimeError(f"Error getting file size from Azure Blob Storage: {e}")
+
+    def iter_file_range(self, file_path: str, start: int, end: int) -> Iterator[bytes]:
+        try:
+            blob_client = self.container_client.get_blob_client(
+                file_path.split("/")[-1]
+            )
+            downloader = blob_client.download_blob(offset=start, length=end - start)
+            return downloader.chunks()
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
@@ -341,7 +576,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from Azure Blob Storage: {e}")
 
         # Always delete from local storage
-        LocalStorageProvider.delete_file(file_path)
+        delete_local_copy(self.cache, filename)
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from Azure Blob Storage."""
@@ -353,6 +588,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
 
@@ -371,3 +607,9 @@ def get_storage_provider(storage_provider: str):
 
 
 Storage = get_storage_provider(STORAGE_PROVIDER)
+
+
+def get_storage_cache_metrics() -> Optional[dict]:
+    # Local storage serves files in place, without a cache
+    cache = getattr(Storage, "cache", None)
+    return cache.get_metrics() if cache else None
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from open_webui.internal import db as db_module
+from open_webui.internal.db import get_db, run_db
+from open_webui.models.memories import Memories
+
+
+@pytest.fixture(params=["thread", "async"])
+def async_sessions(request, monkeypatch):
+    """Run `run_db` in a worker thread, or on an async engine."""
+    if request.param == "thread":
+        monkeypatch.setattr(db_module, "AsyncSessionLocal", None)
+        yield
+        return
+
+    url = db_module.get_async_database_url(db_module.SQLALCHEMY_DATABASE_URL)
+    if url is None:
+        pytest.skip("No async driver for the database")
+    try:
+        # No pooling: each test runs its queries in a new event loop
+        async_engine = create_async_engine(url, poolclass=NullPool)
+    except ImportError as e:
+        pytest.skip(f"Async database driver not installed: {e}")
+
+    monkeypatch.setattr(
+        db_module,
+        "AsyncSessionLocal",
+        async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False),
+    )
+    yield async_engine
+    asyncio.run(async_engine.dispose())
+
+
+def test_run_db_shares_one_session_across_nested_get_db(async_sessions):
+    sessions = []
+
+    def nested():
+        with get_db() as outer:
+            with get_db() as inner:
+                sessions.append((outer, inner))
+
+    asyncio.run(run_db(nested))
+    outer, inner = sessions[0]
+    if async_sessions is None:
+        # Each call opens its own session outside an async session
+        assert outer is not inner
+    else:
+        assert outer is inner
+
+    # The shared session does not leak out of `run_db`
+    assert db_module._current_session.get() is None
+
+
+def test_run_db_commits(async_sessions):
+    memory = asyncio.run(run_db(Memories.insert_new_memory, "user", "first"))
+    try:
+        # Committed, as seen by a session outside `run_db`
+        assert Memories.get_memory_by_id(memory.id).content == "first"
+
+        # Updates, then reads back in a nested `get_db()` of the same session
+        updated = asyncio.run(
+            run_db(
+                Memories.update_memory_by_id_and_user_id, memory.id, "user", "second"
+            )
+        )
+        assert updated.content == "second"
+        assert Memories.get_memory_by_id(memory.id).content == "second"
+    finally:
+        Memories.delete_memory_by_id(memory.id)
@@ -0,0 +1,194 @@
+import math
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from open_webui.models import bm25
+from open_webui.models.bm25 import BM25Indexes
+
+corpus = {
+    "a": "The quick brown fox jumps over the lazy dog",
+    "b": "A quick brown dog outpaces a quick fox",
+    "c": "Lazy dogs sleep all day long",
+    "d": "Foxes are quick and clever animals, the fox is quick",
+    "e": "Nothing to see here",
+    "f": "The dog, the fox and the cat are friends",
+}
+
+queries = ["quick fox", "lazy dog", "the fox", "cat", "clever quick animals"]
+
+
+def get_items(ids: list[str]) -> list[dict]:
+    return [
+        {"id": id, "text": corpus[id], "metadata": {"hash": f"hash-{id}"}} for id in ids
+    ]
+
+
+def score_in_memory(ids: list[str], query: str) -> dict[str, float]:
+    """Okapi BM25 scoring every document of the corpus, with the index's idf."""
+    documents = {id: Counter(bm25.tokenize(corpus[id])) for id in ids}
+    avg_length = sum(sum(terms.values()) for terms in documents.values()) / len(ids)
+
+    scores = {}
+    for id, terms in documents.items():
+        length = sum(terms.values())
+        score = 0.0
+        for term, count in Counter(bm25.tokenize(query)).items():
+            df = sum(1 for other in documents.values() if term in other)
+            tf = terms[term]
+            if not tf:
+                continue
+            idf = math.log(1 + (len(ids) - df + 0.5) / (df + 0.5))
+            norm = bm25.BM25_K1 * (1 - bm25.BM25_B + bm25.BM25_B * length / avg_length)
+            score += count * idf * tf * (bm25.BM25_K1 + 1) / (tf + norm)
+        if score:
+            scores[id] = score
+    return scores
+
+
+def assert_matches_in_memory(collection_name: str, ids: list[str]):
+    for query in queries:
+        expected = score_in_memory(ids, query)
+        results = BM25Indexes.search(collection_name, query, k=len(corpus))
+
+        assert {result.id for result in results} == set(expected), query
+        for result in results:
+            assert result.score == pytest.approx(expected[result.id]), query
+            assert result.text == corpus[result.id]
+        # Ranked by descending score
+        scores = [result.score for result in results]
+        assert scores == sorted(scores, reverse=True), query
+
+
+@pytest.fixture(autouse=True)
+def clear_indexes():
+    BM25Indexes.delete_all_indexes()
+    yield
+    BM25Indexes.delete_all_indexes()
+
+
+def test_search_matches_in_memory_bm25():
+    assert BM25Indexes.build_index("collection", get_items(list(corpus)))
+
+    collection = BM25Indexes.get_collection("collection")
+    assert collection.doc_count == len(corpus)
+    assert collection.total_length == sum(
+        len(bm25.tokenize(text)) for text in corpus.values()
+    )
+    assert_matches_in_memory("collection", list(corpus))
+
+    results = BM25Indexes.search("collection", "quick fox", k=2)
+    assert [result.id for result in results] == ["b", "d"]
+    assert results[0].metadata == {"hash": "hash-b"}
+
+
+def test_search_after_deleting_documents():
+    BM25Indexes.build_index("collection", get_items(list(corpus)))
+
+    assert BM25Indexes.delete_documents("collection", ids=["b", "c"])
+    assert BM25Indexes.delete_documents("collection", hash="hash-e")
+
+    ids = ["a", "d", "f"]
+    collection = BM25Indexes.get_collection("collection")
+    assert collection.doc_count == len(ids)
+    assert collection.total_length == sum(len(bm25.tokenize(corpus[id])) for id in ids)
+    assert_matches_in_memory("collection", ids)
+
+
+def test_search_after_adding_documents(monkeypatch):
+    BM25Indexes.build_index("collection", get_items(["a", "b"]))
+    # Inserted in several batches
+    monkeypatch.setattr(bm25, "BM25_INSERT_BATCH_SIZE", 2)
+    assert BM25Indexes.add_documents("collection", get_items(["c", "d", "e", "f"]))
+
+    assert_matches_in_memory("collection", list(corpus))
+
+
+def test_search_without_index():
+    assert BM25Indexes.search("collection", "quick fox", k=3) == []
+    # Documents are only indexed into existing collections unless created
+    assert not BM25Indexes.add_documents("collection", get_items(["a"]), create=False)
+    assert not BM25Indexes.has_index("collection")
+
+    BM25Indexes.build_index("collection", get_items(["a"]))
+    assert BM25Indexes.search("collection", "", k=3) == []
+    assert BM25Indexes.search("collection", "quick fox", k=0) == []
+    assert BM25Indexes.search("other", "quick fox", k=3) == []
+
+
+def test_build_index_replaces_documents():
+    BM25Indexes.build_index("collection", get_items(list(corpus)))
+    BM25Indexes.build_index("other", get_items(["a"]))
+
+    assert BM25Indexes.build_index("collection", get_items(["c", "d"]))
+
+    assert BM25Indexes.get_collection("collection").doc_count == 2
+    assert_matches_in_memory("collection", ["c", "d"])
+    # Other collections are left as they are
+    assert [result.id for result in BM25Indexes.search("other", "fox", k=3)] == ["a"]
+
+
+def test_ensure_index_builds_once():
+    calls = []
+
+    def snapshot():
+        calls.append(1)
+        return get_items(["a", "b"])
+
+    assert BM25Indexes.ensure_index("collection", snapshot)
+    assert BM25Indexes.ensure_index("collection", snapshot)
+
+    assert calls == [1]
+    assert BM25Indexes.has_index("collection")
+    assert_matches_in_memory("collection", ["a", "b"])
+
+
+def test_ensure_index_without_documents():
+    assert not BM25Indexes.ensure_index("collection", lambda: None)
+    assert BM25Indexes.get_collection("collection") is None
+
+
+def test_writes_during_ensure_index_are_kept():
+    writers = []
+
+    def write(fn, *args, **kwargs):
+        thread = threading.Thread(target=fn, args=args, kwargs=kwargs)
+        thread.start()
+        writers.append(thread)
+
+    def snapshot():
+        # Read from the vector DB before "c" is inserted and "a" is deleted
+        items = get_items(["a", "b"])
+        write(BM25Indexes.add_documents, "collection", get_items(["c"]), create=False)
+        write(BM25Indexes.delete_documents, "collection", ids=["a"])
+        # The writers wait for the build
+        time.sleep(0.2)
+        assert all(thread.is_alive() for thread in writers)
+        return items
+
+    assert BM25Indexes.ensure_index("collection", snapshot)
+    for thread in writers:
+        thread.join()
+
+    assert BM25Indexes.get_collection("collection").doc_count == 2
+    assert_matches_in_memory("collection", ["b", "c"])
+
+
+def test_documents_added_before_the_build_are_not_indexed_twice():
+    BM25Indexes.ensure_index("collection", lambda: get_items(["a", "b"]))
+    assert BM25Indexes.add_documents("collection", get_items(["b", "c"]))
+
+    assert BM25Indexes.get_collection("collection").doc_count == 3
+    assert_matches_in_memory("collection", ["a", "b", "c"])
+
+
+def test_abandoned_build_is_taken_over(monkeypatch):
+    monkeypatch.setattr(bm25, "BM25_BUILD_TIMEOUT", 0)
+    assert BM25Indexes._claim_build("collection")
+    assert not BM25Indexes.has_index("collection")
+
+    assert BM25Indexes.ensure_index("collection", lambda: get_items(["a"]))
+    assert BM25Indexes.has_index("collection")
+    assert_matches_in_memory("collection", ["a"])
@@ -0,0 +1,280 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.internal.db import get_db
+from open_webui.models.chats import (
+    Chat,
+    ChatForm,
+    ChatMessage,
+    Chats,
+    merge_chat_messages,
+)
+
+
+def overlay(id, message=None, status_history=None, current_at=None):
+    return SimpleNamespace(
+        id=id, message=message, status_history=status_history, current_at=current_at
+    )
+
+
+def get_stored_chat(id: str) -> dict:
+    """The chat document as stored, without the message overlay."""
+    with get_db() as db:
+        return db.get(Chat, id).chat
+
+
+def get_chat_messages(id: str) -> list[ChatMessage]:
+    with get_db() as db:
+        return db.query(ChatMessage).filter_by(chat_id=id).all()
+
+
+@pytest.fixture(autouse=True)
+def clear_chats():
+    yield
+    with get_db() as db:
+        db.query(ChatMessage).delete()
+        db.commit()
+    Chats.delete_chats_by_user_id("1")
+
+
+@pytest.fixture
+def chat_id() -> str:
+    chat = Chats.insert_new_chat(
+        "1",
+        ChatForm(
+            chat={
+                "title": "Chat",
+                "history": {
+                    "currentId": "a",
+                    "messages": {
+                        "a": {"id": "a", "role": "user", "content": "Hello"},
+                    },
+                },
+            }
+        ),
+    )
+    return chat.id
+
+
+def test_merge_chat_messages():
+    chat = {
+        "title": "Chat",
+        "history": {
+            "currentId": "a",
+            "messages": {
+                "a": {"id": "a", "content": "Hello", "statusHistory": [{"n": 1}]},
+                "b": {"id": "b", "content": "Hi"},
+            },
+        },
+    }
+
+    merged = merge_chat_messages(
+        chat,
+        [
+            overlay("a", status_history=[{"n": 2}]),
+            overlay("b", {"content": "Hi there", "done": True}, current_at=2),
+            overlay("c", {"id": "c", "content": "New"}, current_at=1),
+            # Status of a message that does not exist
+            overlay("d", status_history=[{"n": 1}]),
+        ],
+    )
+
+    assert merged["title"] == "Chat"
+    assert merged["history"]["currentId"] == "b"
+    assert merged["history"]["messages"] == {
+        "a": {"id": "a", "content": "Hello", "statusHistory": [{"n": 1}, {"n": 2}]},
+        "b": {"id": "b", "content": "Hi there", "done": True},
+        "c": {"id": "c", "content": "New"},
+    }
+    # The chat itself is left as it was
+    assert chat["history"]["currentId"] == "a"
+    assert chat["history"]["messages"]["b"] == {"id": "b", "content": "Hi"}
+    assert chat["history"]["messages"]["a"]["statusHistory"] == [{"n": 1}]
+
+    assert merge_chat_messages(chat, []) is chat
+
+
+def test_upsert_message(chat_id):
+    assert Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat_id, "b", {"id": "b", "role": "assistant", "content": "Hi"}
+    ) == {"id": "b", "role": "assistant", "content": "Hi"}
+    assert Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat_id, "b", {"content": "Hi there", "done": True}
+    ) == {"id": "b", "role": "assistant", "content": "Hi there", "done": True}
+
+    # Only the overlay is written
+    assert get_stored_chat(chat_id)["history"]["currentId"] == "a"
+    assert "b" not in get_stored_chat(chat_id)["history"]["messages"]
+    assert len(get_chat_messages(chat_id)) == 1
+
+    assert (
+        Chats.upsert_message_to_chat_by_id_and_message_id(
+            "missing", "b", {"content": "Hi"}
+        )
+        is None
+    )
+
+
+def test_messages_are_merged_on_read(chat_id):
+    Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat_id, "b", {"id": "b", "role": "assistant", "content": "Hi"}
+    )
+    Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat_id, "a", {"content": "Hello!"}
+    )
+
+    chat = Chats.get_chat_by_id(chat_id).chat
+    # The last upserted message is the current one
+    assert chat["history"]["currentId"] == "a"
+    assert chat["history"]["messages"] == {
+        "a": {"id": "a", "role": "user", "content": "Hello!"},
+        "b": {"id": "b", "role": "assistant", "content": "Hi"},
+    }
+    assert Chats.get_chat_by_id_and_user_id(chat_id, "1").chat == chat
+    assert [chat.chat for chat in Chats.get_chats_by_user_id("1")] == [chat]
+    assert Chats.get_messages_by_chat_id(chat_id) == chat["history"]["messages"]
+
+    assert Chats.get_message_by_id_and_message_id(chat_id, "a") == {
+        "id": "a",
+        "role": "user",
+        "content": "Hello!",
+    }
+    # Only in the overlay
+    assert Chats.get_message_by_id_and_message_id(chat_id, "b") == {
+        "id": "b",
+        "role": "assistant",
+        "content": "Hi",
+    }
+    assert Chats.get_message_by_id_and_message_id(chat_id, "c") == {}
+
+
+def test_add_message_status(chat_id):
+    assert Chats.add_message_status_to_chat_by_id_and_message_id(
+        chat_id, "a", {"description": "Searching"}
+    ) == [{"description": "Searching"}]
+    assert Chats.add_message_status_to_chat_by_id_and_message_id(
+        chat_id, "a", {"description": "Done"}
+    ) == [{"description": "Searching"}, {"description": "Done"}]
+
+    message = Chats.get_message_by_id_and_message_id(chat_id, "a")
+    assert message["statusHistory"] == [
+        {"description": "Searching"},
+        {"description": "Done"},
+    ]
+    # Status updates do not change the current message
+    assert Chats.get_chat_by_id(chat_id).chat["history"]["currentId"] == "a"
+
+    # An upserted statusHistory replaces the pending statuses, later ones are
+    # appended to it
+    Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat_id, "a", {"statusHistory": [{"description": "Reset"}]}
+    )
+    Chats.add_message_status_to_chat_by_id_and_message_id(
+        chat_id, "a", {"description": "Again"}
+    )
+    message = Chats.get_message_by_id_and_message_id(chat_id, "a")
+    assert message["statusHistory"] == [
+        {"description": "Reset"},
+        {"description": "Again"},
+    ]
+
+
+def test_concurrent_first_writes_of_a_message(chat_id):
+    barrier = threading.Barrier(2)
+    results = {}
+
+    def upsert():
+        barrier.wait()
+        results["upsert"] = Chats.upsert_message_to_chat_by_id_and_message_id(
+            chat_id, "b", {"id": "b", "role": "assistant", "content": "Hi"}
+        )
+
+    def add_status():
+        barrier.wait()
+        results["status"] = Chats.add_message_status_to_chat_by_id_and_message_id(
+            chat_id, "b", {"description": "Searching"}
+        )
+
+    threads = [threading.Thread(target=upsert), threading.Thread(target=add_status)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results["upsert"] is not None
+    assert results["status"] == [{"description": "Searching"}]
+    assert len(get_chat_messages(chat_id)) == 1
+    assert Chats.get_message_by_id_and_message_id(chat_id, "b") == {
+        "id": "b",
+        "role": "assistant",
+        "content": "Hi",
+        "statusHistory": [{"description": "Searching"}],
+    }
+
+
+def test_status_of_missing_message_is_dropped(chat_id):
+    Chats.add_message_status_to_chat_by_id_and_message_id(
+        chat_id, "b", {"description": "Searching"}
+    )
+
+    chat = Chats.get_chat_by_id(chat_id).chat
+    assert list(chat["history"]["messages"]) == ["a"]
+
+
+def test_update_chat_folds_messages(chat_id):
+    Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat_id, "b", {"id": "b", "role": "assistant", "content": "Hi"}
+    )
+    Chats.add_message_status_to_chat_by_id_and_message_id(
+        chat_id, "b", {"description": "Done"}
+    )
+
+    # Saved from the merged chat, like the chat update endpoint does
+    chat = Chats.update_chat_title_by_id(chat_id, "Renamed")
+
+    expected = {
+        "a": {"id": "a", "role": "user", "content": "Hello"},
+        "b": {
+            "id": "b",
+            "role": "assistant",
+            "content": "Hi",
+            "statusHistory": [{"description": "Done"}],
+        },
+    }
+    assert chat.chat["history"]["messages"] == expected
+    stored_chat = get_stored_chat(chat_id)
+    assert stored_chat["title"] == "Renamed"
+    assert stored_chat["history"]["currentId"] == "b"
+    assert stored_chat["history"]["messages"] == expected
+    assert get_chat_messages(chat_id) == []
+
+
+def test_update_chat_supersedes_messages(chat_id):
+    Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat_id, "a", {"content": "Pending"}
+    )
+
+    Chats.update_chat_by_id(
+        chat_id,
+        {
+            "title": "Chat",
+            "history": {
+                "currentId": "a",
+                "messages": {"a": {"id": "a", "role": "user", "content": "Saved"}},
+            },
+        },
+    )
+
+    assert get_chat_messages(chat_id) == []
+    assert Chats.get_message_by_id_and_message_id(chat_id, "a")["content"] == "Saved"
+
+
+def test_delete_chat_deletes_messages(chat_id):
+    Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat_id, "b", {"id": "b", "content": "Hi"}
+    )
+
+    assert Chats.delete_chat_by_id(chat_id)
+    assert get_chat_messages(chat_id) == []
@@ -0,0 +1,175 @@
+import pytest
+
+from open_webui.internal.db import get_db
+from open_webui.models.chats import (
+    ChatForm,
+    ChatSearch,
+    Chats,
+    get_fts5_search_query,
+    get_tsquery_search_query,
+)
+
+
+def create_chat(title: str, *contents: str, user_id: str = "1") -> str:
+    chat = Chats.insert_new_chat(
+        user_id,
+        ChatForm(
+            chat={
+                "title": title,
+                "messages": [{"role": "user", "content": c} for c in contents],
+            }
+        ),
+    )
+    return chat.id
+
+
+def search(search_text: str, user_id: str = "1", **kwargs) -> list[str]:
+    return [
+        chat.id
+        for chat in Chats.get_chats_by_user_id_and_search_text(
+            user_id, search_text, **kwargs
+        )
+    ]
+
+
+@pytest.fixture(autouse=True)
+def clear_chats():
+    yield
+    for user_id in ("1", "2"):
+        Chats.delete_chats_by_user_id(user_id)
+
+
+@pytest.fixture(autouse=True)
+def search_index():
+    # Found by the migration, the test database is created from it
+    with get_db() as db:
+        assert Chats._has_search_index(db)
+
+
+def test_search_query_quoting():
+    assert get_fts5_search_query("1", ["foo", 'a"b']) == (
+        'user_id : "1" AND {title content} : ("foo"* "a""b"*)'
+    )
+    assert get_tsquery_search_query(["foo", "it's", "a\\b"]) == (
+        "'foo':* & 'it''s':* & 'a\\\\b':*"
+    )
+
+
+def test_search_matches_word_prefixes():
+    hello = create_chat("Greetings", "Hello there")
+    world = create_chat("Worldwide", "Nothing else")
+
+    assert search("hel") == [hello]
+    assert search("HELLO") == [hello]
+    assert search("world") == [world]
+    # Prefixes of words only, not any substring
+    assert search("ello") == []
+
+
+def test_search_matches_all_words():
+    both = create_chat("Python tips", "Use list comprehensions")
+    python = create_chat("Python", "Decorators")
+    create_chat("Lists", "Linked lists")
+
+    assert search("python list") == [both]
+    assert sorted(search("python")) == sorted([both, python])
+    # Extra spaces between the words are ignored
+    assert search("  python   comprehension ") == [both]
+
+
+def test_search_ranks_title_matches_first():
+    content = create_chat("Notes", "A recipe for bread")
+    title = create_chat("Bread recipe", "Flour and water")
+
+    assert search("bread") == [title, content]
+
+
+@pytest.mark.parametrize(
+    "search_text, found",
+    [
+        ('"hello', True),
+        ("hello*", True),
+        ("(hello", True),
+        ("hello -world", True),
+        ("it's", True),
+        ("test-case", True),
+        # FTS5 operators and column filters are searched as words
+        ('say "hello', False),
+        ("hello OR nothing", False),
+        ("NOT hello", False),
+        ("title : hello", False),
+        ("hello'); DROP TABLE chat; --", False),
+    ],
+)
+def test_search_special_characters(search_text, found):
+    hello = create_chat("Greetings", 'hello "world", it\'s a (test-case)')
+    create_chat("Other", "nothing")
+
+    assert search(search_text) == ([hello] if found else [])
+    assert search("hello") == [hello]
+
+
+def test_search_without_words():
+    plus = create_chat("C++", "templates")
+    create_chat("Other", "nothing")
+
+    # Searched as a substring without the index
+    assert search("c++") == [plus]
+    assert search("++") == [plus]
+    assert search("***") == []
+
+
+def test_search_is_scoped_to_the_user():
+    own = create_chat("Secret plans", "hello")
+    create_chat("Secret plans", "hello", user_id="2")
+
+    assert search("secret") == [own]
+    # Column filters in the search text can't reach other users' chats
+    assert search('user_id : "2"') == []
+    assert search('secret user_id : "2"') == []
+
+
+def test_search_index_is_refreshed_on_update():
+    id = create_chat("Draft", "first version")
+    assert search("first") == [id]
+
+    Chats.update_chat_by_id(
+        id, {"title": "Final", "messages": [{"content": "second version"}]}
+    )
+
+    assert search("first") == []
+    assert search("draft") == []
+    assert search("second") == [id]
+    assert search("final version") == [id]
+
+    Chats.update_chat_title_by_id(id, "Renamed")
+    assert search("renamed second") == [id]
+    assert search("final") == []
+
+
+def test_search_excludes_archived_chats():
+    id = create_chat("Archived", "hello")
+    assert search("hello") == [id]
+
+    Chats.toggle_chat_archive_by_id(id)
+    assert search("hello") == []
+    assert search("hello", include_archived=True) == [id]
+
+    Chats.toggle_chat_archive_by_id(id)
+    assert search("hello") == [id]
+
+
+def test_search_index_is_removed_on_delete():
+    id = create_chat("Deleted", "hello")
+    kept = create_chat("Kept", "hello")
+
+    assert Chats.delete_chat_by_id(id)
+
+    assert search("hello") == [kept]
+    with get_db() as db:
+        assert [entry.chat_id for entry in db.query(ChatSearch).all()] == [kept]
+
+    Chats.delete_chats_by_user_id("1")
+    assert search("hello") == []
+    with get_db() as db:
+        assert db.query(ChatSearch).count() == 0
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from open_webui.internal.db import get_db
+from open_webui.models import chunk_embeddings
+from open_webui.models.chunk_embeddings import ChunkEmbedding, ChunkEmbeddings
+
+embedding_key = ChunkEmbeddings.get_embedding_key("openai", "model", None)
+
+
+@pytest.fixture(autouse=True)
+def clear_embeddings():
+    ChunkEmbeddings.delete_all_embeddings()
+    yield
+    ChunkEmbeddings.delete_all_embeddings()
+
+
+def set_last_used_at(hashes: list[str], last_used_at: int):
+    with get_db() as db:
+        db.query(ChunkEmbedding).filter(ChunkEmbedding.hash.in_(hashes)).update(
+            {ChunkEmbedding.last_used_at: last_used_at}, synchronize_session=False
+        )
+        db.commit()
+
+
+def get_last_used_at() -> dict[str, int]:
+    with get_db() as db:
+        return dict(db.query(ChunkEmbedding.hash, ChunkEmbedding.last_used_at).all())
+
+
+def test_insert_and_get_embeddings():
+    assert ChunkEmbeddings.insert_embeddings(
+        embedding_key, {"a": [0.5, 1.0], "b": [2.0, 0.25]}
+    )
+    # Stored already, e.g. by a concurrent upload
+    assert ChunkEmbeddings.insert_embeddings(embedding_key, {"a": [0.5, 1.0]})
+
+    assert ChunkEmbeddings.get_embeddings(embedding_key, ["a", "b", "c", "a"]) == {
+        "a": [0.5, 1.0],
+        "b": [2.0, 0.25],
+    }
+    other_key = ChunkEmbeddings.get_embedding_key("openai", "other", None)
+    assert ChunkEmbeddings.get_embeddings(other_key, ["a"]) == {}
+
+
+def test_get_embeddings_records_use():
+    ChunkEmbeddings.insert_embeddings(embedding_key, {"a": [1.0], "b": [1.0]})
+    now = int(time.time())
+
+    # Used within the touch interval, so not written again
+    recent = now - 60
+    set_last_used_at(["a", "b"], recent)
+    ChunkEmbeddings.get_embeddings(embedding_key, ["a"])
+    assert get_last_used_at() == {"a": recent, "b": recent}
+
+    old = now - chunk_embeddings.CHUNK_EMBEDDING_TOUCH_INTERVAL - 60
+    set_last_used_at(["a", "b"], old)
+    ChunkEmbeddings.get_embeddings(embedding_key, ["a"])
+    last_used_at = get_last_used_at()
+    assert last_used_at["a"] >= now
+    assert last_used_at["b"] == old
+
+
+def test_prune_embeddings_by_age():
+    ChunkEmbeddings.insert_embeddings(embedding_key, {"a": [1.0], "b": [1.0]})
+    set_last_used_at(["a"], int(time.time()) - 7200)
+
+    assert ChunkEmbeddings.prune_embeddings(max_age=3600) == 1
+    assert ChunkEmbeddings.get_embeddings(embedding_key, ["a", "b"]) == {"b": [1.0]}
+    # Without limits nothing is pruned
+    assert ChunkEmbeddings.prune_embeddings() == 0
+
+
+def test_prune_embeddings_by_size(monkeypatch):
+    hashes = [f"h{i}" for i in range(10)]
+    ChunkEmbeddings.insert_embeddings(
+        embedding_key, {hash: [float(i)] for i, hash in enumerate(hashes)}
+    )
+    now = int(time.time())
+    for i, hash in enumerate(hashes):
+        set_last_used_at([hash], now - 100 + i)
+
+    # Deleted in several batches
+    monkeypatch.setattr(chunk_embeddings, "CHUNK_EMBEDDING_QUERY_BATCH_SIZE", 3)
+    assert ChunkEmbeddings.prune_embeddings(max_size=3) == 7
+
+    # The least recently used went first
+    assert set(get_last_used_at()) == {"h7", "h8", "h9"}
+
+
+def test_prune_embeddings_by_size_with_equal_timestamps():
+    # Inserted in the same second, e.g. by a bulk import
+    ChunkEmbeddings.insert_embeddings(
+        embedding_key, {f"h{i}": [float(i)] for i in range(5)}
+    )
+
+    assert ChunkEmbeddings.prune_embeddings(max_size=2) == 3
+    assert len(get_last_used_at()) == 2
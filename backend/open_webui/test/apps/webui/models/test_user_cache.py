@@ -0,0 +1,170 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from open_webui.internal.db import async_engine, engine
+from open_webui.models import users as users_module
+from open_webui.models.users import UsersTable
+
+
+def run(coroutine):
+    """Run `coroutine`, closing the async database connections of its loop."""
+
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            if async_engine is not None:
+                await async_engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        users_module,
+        "time",
+        SimpleNamespace(monotonic=lambda: clock.now, time=time.time),
+    )
+    return clock
+
+
+@pytest.fixture
+def users(monkeypatch, clock):
+    monkeypatch.setattr(users_module, "USER_CACHE_TTL", 60)
+    users = UsersTable()
+    for id in ("1", "2", "3"):
+        users.insert_new_user(id, f"User {id}", f"user{id}@openwebui.com", role="user")
+
+    # Counts the reads of the cache misses
+    users.reads = []
+    get_user_by_id = users.get_user_by_id
+
+    def counting_get_user_by_id(id):
+        users.reads.append(id)
+        return get_user_by_id(id)
+
+    monkeypatch.setattr(users, "get_user_by_id", counting_get_user_by_id)
+    yield users
+    for id in ("1", "2", "3"):
+        users.delete_user_by_id(id)
+
+
+def get_cached_users(users, *ids):
+    async def get_all():
+        return [await users.aget_cached_user_by_id(id) for id in ids]
+
+    return run(get_all())
+
+
+def test_cached_user_expires(users, clock):
+    first, second = get_cached_users(users, "1", "1")
+    assert first.name == second.name == "User 1"
+    assert users.reads == ["1"]
+    # Callers get copies of the cached user
+    assert first is not second
+
+    clock.now += 59
+    get_cached_users(users, "1")
+    assert users.reads == ["1"]
+
+    clock.now += 2
+    get_cached_users(users, "1")
+    assert users.reads == ["1", "1"]
+
+
+def test_missing_user_is_not_cached(users):
+    assert get_cached_users(users, "missing", "missing") == [None, None]
+    assert users.reads == ["missing", "missing"]
+
+
+def test_cache_is_disabled_without_ttl(users, monkeypatch):
+    monkeypatch.setattr(users_module, "USER_CACHE_TTL", 0)
+
+    get_cached_users(users, "1", "1")
+    assert users.reads == ["1", "1"]
+
+
+def test_cache_is_bounded(users, monkeypatch):
+    monkeypatch.setattr(users_module, "USER_CACHE_SIZE", 2)
+
+    get_cached_users(users, "1", "2", "1", "3")
+    assert list(users._user_cache) == ["1", "3"]
+
+    # The least recently used user was dropped
+    get_cached_users(users, "1", "3", "2")
+    assert users.reads == ["1", "2", "3", "2"]
+
+
+def test_user_changes_invalidate_cache(users):
+    get_cached_users(users, "1", "2")
+
+    users.update_user_role_by_id("1", "admin")
+    assert get_cached_users(users, "1")[0].role == "admin"
+    assert users.reads == ["1", "2", "1"]
+
+    users.update_user_settings_by_id("1", {"ui": {"theme": "dark"}})
+    assert get_cached_users(users, "1")[0].settings.ui == {"theme": "dark"}
+    assert users.reads == ["1", "2", "1", "1"]
+
+    assert users.delete_user_by_id("1")
+    assert get_cached_users(users, "1") == [None]
+
+    # Other users stay cached
+    get_cached_users(users, "2")
+    assert users.reads == ["1", "2", "1", "1", "1"]
+
+
+def test_user_changed_while_read_is_not_cached(users, monkeypatch):
+    get_user_by_id = users.get_user_by_id
+
+    def get_user_by_id_while_changed(id):
+        user = get_user_by_id(id)
+        # Changed after the read, before the user is cached
+        users.update_user_role_by_id(id, "admin")
+        return user
+
+    monkeypatch.setattr(users, "get_user_by_id", get_user_by_id_while_changed)
+    assert get_cached_users(users, "1")[0].role == "user"
+    assert "1" not in users._user_cache
+
+    monkeypatch.setattr(users, "get_user_by_id", get_user_by_id)
+    assert get_cached_users(users, "1")[0].role == "admin"
+    assert users.reads == ["1", "1"]
+
+
+def test_flush_last_active(users):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if statement.lstrip().upper().startswith("UPDATE"):
+            statements.append((statement, parameters, many))
+
+    assert users.flush_last_active() == 0
+
+    now = int(time.time())
+    users.mark_user_active("1")
+    users.mark_user_active("2")
+    users.mark_user_active("1")
+    users._last_active["2"] = now - 100
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        assert users.flush_last_active() == 2
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    # One UPDATE for all users
+    assert len(statements) == 1
+    statement, parameters, many = statements[0]
+    assert many and len(parameters) == 2
+
+    assert users.get_user_by_id("1").last_active_at >= now
+    assert users.get_user_by_id("2").last_active_at == now - 100
+    assert users._last_active == {}
+    assert users.flush_last_active() == 0
@@ -0,0 +1,115 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.retrieval import embedding_cache as embedding_cache_module
+from open_webui.retrieval.embedding_cache import (
+    EmbeddingCache,
+    acached_embedding_function,
+    cached_embedding_function,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        embedding_cache_module, "time", SimpleNamespace(monotonic=lambda: clock.now)
+    )
+    return clock
+
+
+class FakeEmbeddingFunction:
+    """Embeds each text as its length, recording the texts it was sent."""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, query, prefix=None, user=None):
+        texts = query if isinstance(query, list) else [query]
+        self.texts.extend(texts)
+        embeddings = [[float(len(text)), 0.5] for text in texts]
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+
+def test_key_is_the_exact_text():
+    key = EmbeddingCache.get_key("openai", "model", None, "a  query")
+    assert key == EmbeddingCache.get_key("openai", "model", None, "a  query")
+    assert key != EmbeddingCache.get_key("openai", "model", None, "a query")
+    assert key != EmbeddingCache.get_key("openai", "model", "q: ", "a  query")
+    assert key != EmbeddingCache.get_key("openai", "other", None, "a  query")
+    assert key != EmbeddingCache.get_key("ollama", "model", None, "a  query")
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = EmbeddingCache(max_size=2, ttl=60)
+    cache.set_many({"a": [1.0], "b": [2.0]})
+    assert cache.get_many(["a"]) == [[1.0]]
+
+    cache.set_many({"c": [3.0]})
+    assert cache.get_many(["a", "b", "c"]) == [[1.0], None, [3.0]]
+    assert cache.get_metrics()["evictions"] == 1
+    assert cache.get_metrics()["size"] == 2
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = EmbeddingCache(max_size=10, ttl=60)
+    cache.set_many({"a": [1.0]})
+
+    clock.now += 59
+    assert cache.get_many(["a"]) == [[1.0]]
+    clock.now += 2
+    assert cache.get_many(["a"]) == [None]
+    assert cache.get_metrics()["size"] == 0
+
+    metrics = cache.get_metrics()
+    assert (metrics["hits"], metrics["misses"]) == (1, 1)
+    assert metrics["hit_rate"] == 0.5
+
+
+def test_entries_are_shared_through_redis(clock):
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    get_redis = lambda: fakeredis.FakeRedis(server=server, decode_responses=False)
+
+    cache = EmbeddingCache(max_size=10, ttl=60, redis=get_redis())
+    other = EmbeddingCache(max_size=10, ttl=60, redis=get_redis())
+
+    cache.set_many({"a": [0.1, 0.2], "b": [1.0 / 3]})
+    # Read back exactly, and kept locally
+    assert other.get_many(["a", "b", "c"]) == [[0.1, 0.2], [1.0 / 3], None]
+    assert other.get_metrics()["redis_hits"] == 2
+    assert other.get_metrics()["size"] == 2
+
+    redis = get_redis()
+    key = f"{embedding_cache_module.REDIS_EMBEDDING_CACHE_KEY_PREFIX}:a"
+    assert 0 < redis.ttl(key) <= 60
+
+    # Redis failures fall back to embedding
+    other.clear()
+    other.redis = SimpleNamespace(mget=lambda keys: 1 / 0)
+    assert other.get_many(["a"]) == [None]
+    assert other.get_metrics()["redis_errors"] == 1
+
+
+def test_cached_embedding_function_embeds_missing_texts_once():
+    cache = EmbeddingCache(max_size=10, ttl=60)
+    embedding_function = FakeEmbeddingFunction()
+    embed = cached_embedding_function(embedding_function, "openai", "model", cache)
+
+    assert embed(["one", "three", "one"]) == [[3.0, 0.5], [5.0, 0.5], [3.0, 0.5]]
+    assert embed("three") == [5.0, 0.5]
+    assert embed(["three", "three "]) == [[5.0, 0.5], [6.0, 0.5]]
+    assert embedding_function.texts == ["one", "three", "three "]
+
+    # Another prefix is another embedding
+    embed("one", prefix="q: ")
+    assert embedding_function.texts[-1] == "one"
+
+    async def aembedding_function(query, prefix=None, user=None):
+        return embedding_function(query, prefix=prefix, user=user)
+
+    aembed = acached_embedding_function(aembedding_function, "openai", "model", cache)
+    assert asyncio.run(aembed(["one", "four"])) == [[3.0, 0.5], [4.0, 0.5]]
+    assert embedding_function.texts[-1:] == ["four"]
@@ -0,0 +1,238 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.models.bm25 import BM25Indexes
+from open_webui.models.chunk_embeddings import ChunkEmbeddings
+from open_webui.retrieval import utils
+
+
+class FakeEmbeddingFunction:
+    """Embeds each text as its length, recording the texts it was sent."""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts, prefix=None, user=None):
+        self.texts.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def chunk_embedding_store(monkeypatch):
+    monkeypatch.setattr(utils, "ENABLE_RAG_CHUNK_EMBEDDING_STORE", True)
+    ChunkEmbeddings.delete_all_embeddings()
+    yield
+    ChunkEmbeddings.delete_all_embeddings()
+
+
+def test_embed_chunks_reuses_stored_embeddings():
+    embedding_function = FakeEmbeddingFunction()
+
+    assert utils.embed_chunks(
+        ["page one", "page two", "page one"], embedding_function, "openai", "model"
+    ) == [[8.0], [8.0], [8.0]]
+    assert embedding_function.texts == ["page one", "page two"]
+
+    # Saving the same pages again, e.g. a repeated web search, embeds only the
+    # new chunk
+    assert utils.embed_chunks(
+        ["page two", "page three"], embedding_function, "openai", "model"
+    ) == [[8.0], [10.0]]
+    assert embedding_function.texts == ["page one", "page two", "page three"]
+
+    # Vectors of another model or prefix are not reused
+    utils.embed_chunks(["page one"], embedding_function, "openai", "other")
+    utils.embed_chunks(["page one"], embedding_function, "openai", "model", "p: ")
+    assert embedding_function.texts[3:] == ["page one", "page one"]
+
+
+def test_embed_chunks_without_store(monkeypatch):
+    monkeypatch.setattr(utils, "ENABLE_RAG_CHUNK_EMBEDDING_STORE", False)
+    embedding_function = FakeEmbeddingFunction()
+
+    utils.embed_chunks(["page"], embedding_function, "openai", "model")
+    utils.embed_chunks(["page"], embedding_function, "openai", "model")
+    assert embedding_function.texts == ["page", "page"]
+
+
+def test_aembed_chunks_reuses_stored_embeddings():
+    embedding_function = FakeEmbeddingFunction()
+
+    async def aembedding_function(texts, prefix=None, user=None):
+        return embedding_function(texts, prefix=prefix, user=user)
+
+    utils.embed_chunks(["page one"], embedding_function, "openai", "model")
+    assert asyncio.run(
+        utils.aembed_chunks(
+            ["page one", "page two"], aembedding_function, "openai", "model"
+        )
+    ) == [[8.0], [8.0]]
+    assert embedding_function.texts == ["page one", "page two"]
+
+
+def test_concurrent_queries_build_bm25_index_once(monkeypatch):
+    gets = []
+
+    def get(collection_name):
+        gets.append(collection_name)
+        time.sleep(0.05)
+        return SimpleNamespace(
+            ids=[["a", "b"]],
+            documents=[["quick brown fox", "lazy dog"]],
+            metadatas=[[{"hash": "a"}, {"hash": "b"}]],
+        )
+
+    monkeypatch.setattr(utils, "VECTOR_DB_CLIENT", SimpleNamespace(get=get))
+    BM25Indexes.delete_index("collection")
+
+    barrier = threading.Barrier(4)
+    results = []
+
+    def query():
+        barrier.wait()
+        results.append(utils.ensure_bm25_index("collection"))
+
+    threads = [threading.Thread(target=query) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert results == [True] * 4
+        assert gets == ["collection"]
+        assert BM25Indexes.get_collection("collection").doc_count == 2
+        assert [
+            result.id for result in BM25Indexes.search("collection", "fox", k=2)
+        ] == ["a"]
+    finally:
+        BM25Indexes.delete_index("collection")
+
+
+def test_query_collection_matches_aquery_collection(monkeypatch):
+    from open_webui.retrieval.vector.main import SearchResult
+
+    def search(collection_name, vectors, limit):
+        return SearchResult(
+            ids=[[f"{collection_name}-{vectors[0][0]}"]],
+            documents=[[f"{collection_name} document"]],
+            metadatas=[[{"collection": collection_name}]],
+            distances=[[vectors[0][0] / 10]],
+        )
+
+    async def asearch(**kwargs):
+        return search(**kwargs)
+
+    monkeypatch.setattr(
+        utils, "VECTOR_DB_CLIENT", SimpleNamespace(search=search, asearch=asearch)
+    )
+    embedding_function = FakeEmbeddingFunction()
+
+    async def aembedding_function(texts, prefix=None, user=None):
+        return embedding_function(texts, prefix=prefix, user=user)
+
+    args = (["first", "second"], ["query", "longer query"])
+    result = utils.query_collection(*args, embedding_function, k=3)
+    assert result == asyncio.run(
+        utils.aquery_collection(*args, aembedding_function, k=3)
+    )
+    # Best match of each document, over both queries
+    assert result["documents"] == [["first document", "second document"]]
+    assert result["distances"] == [[1.2, 1.2]]
+
+
+class FakeResponse:
+    def __init__(self, status_code, json=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._json = json
+
+    def json(self):
+        return self._json
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise utils.requests.HTTPError(f"{self.status_code} Error")
+
+
+class FakeEmbeddingEndpoint:
+    """
+    Stands in for `requests.post` to an OpenAI embeddings endpoint, embedding
+    each text as its number. Each batch first gets the responses of
+    `failures`, and earlier batches take longer, so they complete out of order.
+    """
+
+    def __init__(self, failures=()):
+        self.failures = failures
+        self.attempts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, url, headers, json):
+        first = int(json["input"][0])
+        with self.lock:
+            attempt = self.attempts.get(first, 0)
+            self.attempts[first] = attempt + 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.05 / (first + 1))
+            if attempt < len(self.failures):
+                return self.failures[attempt]
+            return FakeResponse(
+                200,
+                {"data": [{"embedding": [float(text)]} for text in json["input"]]},
+            )
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def retry_delays(monkeypatch):
+    delays = []
+    monkeypatch.setattr(
+        utils, "time", SimpleNamespace(sleep=delays.append, time=time.time)
+    )
+    monkeypatch.setattr(utils, "RAG_EMBEDDING_MAX_RETRIES", 2)
+    return delays
+
+
+def test_embedding_batches_retry_and_keep_their_order(monkeypatch, retry_delays):
+    endpoint = FakeEmbeddingEndpoint(
+        failures=[
+            FakeResponse(429, headers={"Retry-After": "2"}),
+            FakeResponse(503),
+        ]
+    )
+    monkeypatch.setattr(utils.requests, "post", endpoint)
+    embedding_function = utils.get_embedding_function(
+        "openai", "model", None, "http://embeddings", "key", 2
+    )
+
+    texts = [str(i) for i in range(12)]
+    assert embedding_function(texts) == [[float(i)] for i in range(12)]
+
+    # Each of the 6 batches was retried twice, after Retry-After then backoff
+    assert endpoint.attempts == {i: 3 for i in range(0, 12, 2)}
+    assert sorted(retry_delays)[-6:] == [2.0] * 6
+    assert all(0.5 <= delay <= 2.0 for delay in retry_delays)
+    assert 1 < endpoint.max_in_flight <= utils.RAG_EMBEDDING_CONCURRENT_REQUESTS
+
+
+def test_embedding_batches_fail_after_the_retries(monkeypatch, retry_delays):
+    endpoint = FakeEmbeddingEndpoint(failures=[FakeResponse(500)] * 3)
+    monkeypatch.setattr(utils.requests, "post", endpoint)
+    embedding_function = utils.get_embedding_function(
+        "openai", "model", None, "http://embeddings", "key", 2
+    )
+
+    with pytest.raises(Exception, match="Failed to generate embeddings"):
+        embedding_function([str(i) for i in range(4)])
+    assert endpoint.attempts == {0: 3, 2: 3}
+    assert len(retry_delays) == 4
@@ -0,0 +1,167 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+items = [
+    {
+        "id": "a",
+        "text": "alpha",
+        "vector": [1.0, 0.0, 0.0],
+        "metadata": {"file_id": "1"},
+    },
+    {
+        "id": "b",
+        "text": "beta",
+        "vector": [0.0, 1.0, 0.0],
+        "metadata": {"file_id": "1"},
+    },
+    {
+        "id": "c",
+        "text": "gamma",
+        "vector": [0.0, 0.0, 1.0],
+        "metadata": {"file_id": "2"},
+    },
+]
+
+
+async def round_trip(client):
+    """Write and read a collection through the async methods of `client`."""
+    collection_name = f"test-{uuid.uuid4().hex}"
+
+    try:
+        await client.ainsert(collection_name, items)
+        assert await client.ahas_collection(collection_name)
+
+        result = await client.asearch(collection_name, [[0.9, 0.1, 0.0]], 2)
+        assert result.ids[0] == ["a", "b"]
+        assert result.documents[0] == ["alpha", "beta"]
+        # Same results as the sync client
+        sync_result = client.search(collection_name, [[0.9, 0.1, 0.0]], 2)
+        assert sync_result.ids == result.ids
+        assert sync_result.distances[0] == pytest.approx(result.distances[0])
+
+        result = await client.asearch_with_vectors(collection_name, [[0, 0, 1.0]], 1)
+        assert result.ids[0] == ["c"]
+
+        result = await client.aquery(collection_name, {"file_id": "1"})
+        assert sorted(result.ids[0]) == ["a", "b"]
+
+        await client.aupsert(
+            collection_name,
+            [
+                {**items[0], "text": "alpha 2"},
+                {
+                    "id": "d",
+                    "text": "delta",
+                    "vector": [0.5, 0.5, 0.0],
+                    "metadata": {"file_id": "2"},
+                },
+            ],
+        )
+        result = await client.aget(collection_name)
+        documents = dict(zip(result.ids[0], result.documents[0]))
+        assert documents == {
+            "a": "alpha 2",
+            "b": "beta",
+            "c": "gamma",
+            "d": "delta",
+        }
+
+        client.delete(collection_name, ids=["b"])
+        result = await client.aget(collection_name)
+        assert sorted(result.ids[0]) == ["a", "c", "d"]
+    finally:
+        client.delete_collection(collection_name)
+
+    assert not await client.ahas_collection(collection_name)
+
+
+####################
+# Chroma
+####################
+
+
+class AsyncChromaCollection:
+    """The async API of a Chroma collection, over a local collection."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+class AsyncChromaClient(AsyncChromaCollection):
+    """Stands in for `chromadb.AsyncHttpClient`, over a persistent client."""
+
+    async def get_collection(self, **kwargs):
+        return AsyncChromaCollection(self.collection.get_collection(**kwargs))
+
+    async def get_or_create_collection(self, **kwargs):
+        return AsyncChromaCollection(self.collection.get_or_create_collection(**kwargs))
+
+
+@pytest.fixture
+def chroma_client(monkeypatch, tmp_path):
+    from open_webui.retrieval.vector.dbs import chroma
+
+    monkeypatch.setattr(chroma, "CHROMA_HTTP_HOST", "")
+    monkeypatch.setattr(chroma, "CHROMA_DATA_PATH", str(tmp_path))
+    return chroma.ChromaClient()
+
+
+def test_chroma_async_methods_in_worker_pool(chroma_client):
+    asyncio.run(round_trip(chroma_client))
+
+
+def test_chroma_async_http_client(chroma_client, monkeypatch):
+    from open_webui.retrieval.vector.dbs import chroma
+
+    monkeypatch.setattr(chroma, "CHROMA_HTTP_HOST", "localhost")
+    chroma_client.async_client = AsyncChromaClient(chroma_client.client)
+
+    asyncio.run(round_trip(chroma_client))
+
+
+####################
+# pgvector
+####################
+
+
+PGVECTOR_TEST_DB_URL = os.environ.get("PGVECTOR_TEST_DB_URL", "")
+
+
+@pytest.fixture
+def pgvector_client(monkeypatch):
+    from open_webui.retrieval.vector.dbs import pgvector
+
+    monkeypatch.setattr(pgvector, "PGVECTOR_DB_URL", PGVECTOR_TEST_DB_URL)
+    return pgvector.PgvectorClient()
+
+
+@pytest.mark.skipif(
+    not PGVECTOR_TEST_DB_URL,
+    reason="PGVECTOR_TEST_DB_URL is not set to a PostgreSQL database with pgvector",
+)
+@pytest.mark.parametrize("use_async_driver", [True, False])
+def test_pgvector_async_methods(pgvector_client, use_async_driver):
+    if use_async_driver:
+        assert pgvector_client.async_session is not None
+    else:
+        # Run the sync methods in the worker pool instead
+        pgvector_client.async_session = None
+
+    async def run():
+        try:
+            await round_trip(pgvector_client)
+        finally:
+            await pgvector_client.aclose()
+
+    asyncio.run(run())
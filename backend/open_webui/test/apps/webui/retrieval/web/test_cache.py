@@ -0,0 +1,271 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+from aiohttp import web
+
+from open_webui.retrieval.web import cache, utils
+
+
+def test_normalize_url():
+    assert cache.normalize_url("HTTPS://Example.COM:443?q=1#x") == (
+        "https://example.com/?q=1"
+    )
+    assert cache.normalize_url("http://example.com:80/path") == (
+        "http://example.com/path"
+    )
+    assert cache.normalize_url("http://example.com:8080/path#section") == (
+        "http://example.com:8080/path"
+    )
+    assert cache.normalize_url("http://[::1]:8080/p") == "http://[::1]:8080/p"
+    # Credentials are kept as they are
+    assert cache.normalize_url("http://user:pw@Example.com/") == (
+        "http://user:pw@Example.com/"
+    )
+    # The path and query are case sensitive
+    assert cache.normalize_url("https://example.com/Path?Q=A") == (
+        "https://example.com/Path?Q=A"
+    )
+    # Invalid ports leave the url as it is
+    assert cache.normalize_url("http://example.com:port/") == (
+        "http://example.com:port/"
+    )
+
+
+@pytest.mark.parametrize(
+    "headers, lifetime",
+    [
+        ({"Cache-Control": "no-store"}, None),
+        ({"Cache-Control": "max-age=60, no-store"}, None),
+        ({"Cache-Control": "no-cache"}, 0),
+        ({"Cache-Control": "private, max-age=60"}, 60),
+        ({"Cache-Control": 'max-age="60"'}, 60),
+        ({"Cache-Control": "max-age=86400"}, 900),
+        ({"Cache-Control": "max-age=-1"}, 0),
+        ({"Cache-Control": "s-maxage=30, max-age=600"}, 30),
+        ({"Expires": "Thu, 01 Dec 1994 16:00:00 GMT"}, 0),
+        ({"Expires": "0"}, 0),
+        # max-age takes precedence over Expires
+        (
+            {
+                "Cache-Control": "max-age=60",
+                "Expires": "Thu, 01 Dec 1994 16:00:00 GMT",
+            },
+            60,
+        ),
+        ({}, 900),
+    ],
+)
+def test_get_freshness_lifetime(headers, lifetime):
+    assert cache.get_freshness_lifetime(headers, 900) == lifetime
+
+
+@pytest.mark.parametrize("expires_in, lifetime", [(120, 120), (86400, 900)])
+def test_get_freshness_lifetime_from_expires(expires_in, lifetime):
+    headers = {"Expires": formatdate(time.time() + expires_in, usegmt=True)}
+    # Seconds may pass between formatting the date and parsing it
+    assert lifetime - 2 <= cache.get_freshness_lifetime(headers, 900) <= lifetime
+
+
+class TestWebPageCache:
+    url = "https://example.com/page"
+    metadata = {"source": url, "title": "Page"}
+
+    def test_set_and_get(self):
+        page_cache = cache.WebPageCache(max_size=1024, ttl=900)
+        page_cache.set(self.url, "content", self.metadata, {})
+
+        entry = page_cache.get("HTTPS://example.com:443/page#top")
+        assert entry is not None and entry.is_fresh()
+        document = entry.get_document("https://example.com/page#top")
+        assert document.page_content == "content"
+        assert document.metadata == {
+            "source": "https://example.com/page#top",
+            "title": "Page",
+        }
+        assert page_cache.get_metrics()["hits"] == 1
+
+    def test_set_skips_uncacheable_pages(self):
+        page_cache = cache.WebPageCache(max_size=1024, ttl=900)
+        page_cache.set(self.url, "content", {}, {"Cache-Control": "no-store"})
+        # Expired at once and cannot be revalidated
+        page_cache.set(
+            "https://example.com/other", "content", {}, {"Cache-Control": "no-cache"}
+        )
+        # Larger than the whole cache
+        page_cache.set("https://example.com/large", "x" * 2048, {}, {})
+
+        assert page_cache.get_metrics()["pages"] == 0
+
+    def test_evicts_least_recently_used(self):
+        page_cache = cache.WebPageCache(max_size=10, ttl=900)
+        page_cache.set("https://example.com/a", "aaaa", {}, {})
+        page_cache.set("https://example.com/b", "bbbb", {}, {})
+        page_cache.get("https://example.com/a")
+        page_cache.set("https://example.com/c", "cccc", {}, {})
+
+        assert page_cache.get("https://example.com/a") is not None
+        assert page_cache.get("https://example.com/b") is None
+        assert page_cache.get("https://example.com/c") is not None
+        assert page_cache.get_metrics()["evictions"] == 1
+
+    def test_expired_page_without_validators(self):
+        page_cache = cache.WebPageCache(max_size=1024, ttl=900)
+        page_cache.set(self.url, "content", {}, {})
+        page_cache.get(self.url).expires_at = 0
+
+        assert page_cache.get(self.url) is None
+        assert page_cache.get_metrics()["pages"] == 0
+
+    def test_revalidate(self):
+        page_cache = cache.WebPageCache(max_size=1024, ttl=900)
+        page_cache.set(
+            self.url,
+            "content",
+            {},
+            {
+                "Cache-Control": "no-cache",
+                "ETag": '"v1"',
+                "Last-Modified": "Thu, 01 Dec 1994 16:00:00 GMT",
+            },
+        )
+
+        entry = page_cache.get(self.url)
+        assert entry is not None and not entry.is_fresh()
+        assert entry.get_validators() == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Thu, 01 Dec 1994 16:00:00 GMT",
+        }
+
+        # 304 response renewing the page
+        entry = page_cache.revalidate(
+            self.url, entry, {"Cache-Control": "max-age=60", "ETag": '"v2"'}
+        )
+        assert entry.is_fresh()
+        assert entry.etag == '"v2"'
+        assert entry.last_modified == "Thu, 01 Dec 1994 16:00:00 GMT"
+        assert page_cache.get(self.url) is entry
+
+        metrics = page_cache.get_metrics()
+        assert metrics["stale"] == 1
+        assert metrics["revalidations"] == 1
+        assert metrics["hits"] == 1
+
+    def test_revalidate_no_store(self):
+        page_cache = cache.WebPageCache(max_size=1024, ttl=900)
+        page_cache.set(
+            self.url, "content", {}, {"Cache-Control": "no-cache", "ETag": '"v1"'}
+        )
+        entry = page_cache.get(self.url)
+
+        # Still returned for the current request, but no longer stored
+        assert page_cache.revalidate(self.url, entry, {"Cache-Control": "no-store"})
+        assert page_cache.get_metrics()["pages"] == 0
+
+
+class TestSafeWebBaseLoader:
+    @pytest.fixture
+    def page_cache(self, monkeypatch):
+        page_cache = cache.WebPageCache(max_size=1024 * 1024, ttl=900)
+        monkeypatch.setattr(utils, "WEB_PAGE_CACHE", page_cache)
+        return page_cache
+
+    @staticmethod
+    async def load(handler, path="/page"):
+        """Load a page served by `handler` twice, returning both documents."""
+        app = web.Application()
+        app.router.add_get(path, handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        try:
+            documents = []
+            for _ in range(2):
+                loader = utils.SafeWebBaseLoader(
+                    web_paths=[f"http://127.0.0.1:{port}{path}"],
+                    continue_on_failure=True,
+                )
+                documents.extend(await loader.aload())
+            return documents
+        finally:
+            await runner.cleanup()
+
+    def test_caches_page(self, page_cache):
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            return web.Response(
+                text="<html><title>Page</title><body>content</body></html>",
+                content_type="text/html",
+                headers={"Cache-Control": "max-age=60"},
+            )
+
+        documents = asyncio.run(self.load(handler))
+
+        assert len(requests) == 1
+        assert [document.page_content.strip() for document in documents] == [
+            "Pagecontent",
+            "Pagecontent",
+        ]
+        assert documents[1].metadata == documents[0].metadata
+
+    def test_revalidates_expired_page(self, page_cache):
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            headers = {"ETag": '"v1"', "Cache-Control": "no-cache"}
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304, headers=headers)
+            return web.Response(
+                text="<html><body>content</body></html>",
+                content_type="text/html",
+                headers=headers,
+            )
+
+        documents = asyncio.run(self.load(handler))
+
+        assert len(requests) == 2
+        assert "If-None-Match" not in requests[0].headers
+        assert requests[1].headers["If-None-Match"] == '"v1"'
+        assert documents[1].page_content == documents[0].page_content
+        assert page_cache.get_metrics()["revalidations"] == 1
+
+    def test_serves_expired_page_on_error(self, page_cache):
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            if len(requests) > 1:
+                return web.Response(status=503)
+            return web.Response(
+                text="<html><body>content</body></html>",
+                content_type="text/html",
+                headers={"ETag": '"v1"', "Cache-Control": "no-cache"},
+            )
+
+        documents = asyncio.run(self.load(handler))
+
+        assert len(requests) == 2
+        assert documents[1].page_content == documents[0].page_content
+        assert "content" in documents[1].page_content
+
+    def test_serves_expired_page_when_unreachable(self, page_cache):
+        async def handler(request):
+            return web.Response(
+                text="<html><body>content</body></html>",
+                content_type="text/html",
+                headers={"ETag": '"v1"', "Cache-Control": "no-cache"},
+            )
+
+        url = asyncio.run(self.load(handler))[0].metadata["source"]
+        # The server is stopped once the pages were loaded
+        loader = utils.SafeWebBaseLoader(web_paths=[url], continue_on_failure=True)
+        documents = asyncio.run(loader.aload())
+
+        assert "content" in documents[0].page_content
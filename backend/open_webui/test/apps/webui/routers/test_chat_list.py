@@ -0,0 +1,184 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from open_webui.internal.db import engine, get_db
+from open_webui.models.chats import (
+    Chat,
+    ChatForm,
+    Chats,
+    get_chat_list_cursor,
+    parse_chat_list_cursor,
+)
+from open_webui.models.users import UserModel
+from open_webui.routers import chats
+
+list_keys = {"id", "title", "updated_at", "created_at", "pinned", "folder_id", "meta"}
+
+
+def create_chats(
+    updated_ats: list[int], user_id: str = "1", archived: bool = False
+) -> list[str]:
+    ids = []
+    for i, updated_at in enumerate(updated_ats):
+        id = Chats.insert_new_chat(
+            user_id, ChatForm(chat={"title": f"Chat {i}", "messages": []})
+        ).id
+        with get_db() as db:
+            db.query(Chat).filter_by(id=id).update(
+                {"updated_at": updated_at, "archived": archived}
+            )
+            db.commit()
+        ids.append(id)
+    return ids
+
+
+def get_all_pages(limit: int, **kwargs) -> list[list[str]]:
+    pages = []
+    cursor = None
+    while True:
+        page = Chats.get_chat_title_id_list_by_user_id(
+            "1", limit=limit, cursor=cursor, **kwargs
+        )
+        if not page:
+            return pages
+        pages.append([chat.id for chat in page])
+        cursor = parse_chat_list_cursor(get_chat_list_cursor(page[-1]))
+
+
+@pytest.fixture(autouse=True)
+def clear_chats():
+    yield
+    for user_id in ("1", "2"):
+        Chats.delete_chats_by_user_id(user_id)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(chats.router, prefix="/api/v1/chats")
+    app.dependency_overrides[chats.get_verified_user] = lambda: UserModel(
+        id="1",
+        name="John Doe",
+        email="john.doe@openwebui.com",
+        role="user",
+        profile_image_url="/user.png",
+        last_active_at=1627351200,
+        updated_at=1627351200,
+        created_at=1627351200,
+    )
+    return TestClient(app)
+
+
+def test_parse_chat_list_cursor():
+    assert parse_chat_list_cursor("1627351200:abc") == (1627351200, "abc")
+    # Ids may contain colons themselves
+    assert parse_chat_list_cursor("1627351200:a:b") == (1627351200, "a:b")
+    for cursor in ("", "1627351200", "1627351200:", "abc:def", ":abc"):
+        with pytest.raises(ValueError):
+            parse_chat_list_cursor(cursor)
+
+
+def test_cursor_pages_break_ties_by_id():
+    # Several chats updated in the same second, across page boundaries
+    ids = create_chats([100, 200, 200, 200, 200, 300, 200])
+    expected = sorted(
+        ids,
+        key=lambda id: ({ids[0]: 100, ids[5]: 300}.get(id, 200), id),
+        reverse=True,
+    )
+
+    pages = get_all_pages(limit=2)
+
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    assert [id for page in pages for id in page] == expected
+    # The same order as offset pages
+    assert [
+        chat.id
+        for chat in Chats.get_chat_title_id_list_by_user_id("1", skip=0, limit=10)
+    ] == expected
+
+
+def test_cursor_pages_with_equal_updated_at():
+    ids = create_chats([200] * 5)
+
+    pages = get_all_pages(limit=2)
+
+    assert [id for page in pages for id in page] == sorted(ids, reverse=True)
+
+
+def test_cursor_skips_chats_changed_before_it():
+    ids = create_chats([100, 200, 300])
+    first_page = Chats.get_chat_title_id_list_by_user_id("1", limit=1)
+    assert [chat.id for chat in first_page] == [ids[2]]
+
+    # Updated while paging, so it moves to the top instead of being repeated
+    with get_db() as db:
+        db.query(Chat).filter_by(id=ids[1]).update({"updated_at": 400})
+        db.commit()
+
+    cursor = parse_chat_list_cursor(get_chat_list_cursor(first_page[0]))
+    page = Chats.get_chat_title_id_list_by_user_id("1", limit=10, cursor=cursor)
+    assert [chat.id for chat in page] == [ids[0]]
+
+
+def test_chat_list_is_slim(client):
+    ids = create_chats([100, 200])
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get("/api/v1/chats/list", params={"page": 1})
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200
+    chat_list = response.json()
+    assert [chat["id"] for chat in chat_list] == ids[::-1]
+    assert all(chat.keys() == list_keys for chat in chat_list)
+    assert chat_list[0]["title"] == "Chat 1"
+    # The chat documents are not loaded
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert selects and not any("chat.chat" in select for select in selects)
+
+
+def test_chat_list_cursor(client):
+    ids = create_chats([100, 200, 200])
+    create_chats([200], user_id="2")
+
+    response = client.get("/api/v1/chats/", params={"cursor": f"200:{ids[2]}"})
+
+    assert response.status_code == 200
+    expected = [id for id in sorted(ids[1:], reverse=True) if id < ids[2]] + [ids[0]]
+    assert [chat["id"] for chat in response.json()] == expected
+
+
+@pytest.mark.parametrize("cursor", ["", "200", "abc:def", "200:"])
+def test_invalid_cursor(client, cursor):
+    response = client.get("/api/v1/chats/", params={"cursor": cursor})
+    assert response.status_code == 400
+
+    response = client.get("/api/v1/chats/archived", params={"cursor": cursor})
+    assert response.status_code == 400
+
+    response = client.post("/api/v1/chats/tags", json={"name": "tag", "cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_archived_cursor_requires_default_order(client):
+    ids = create_chats([100, 200], archived=True)
+
+    response = client.get(
+        "/api/v1/chats/archived",
+        params={"cursor": f"200:{ids[1]}", "order_by": "title", "direction": "asc"},
+    )
+    assert response.status_code == 400
+
+    response = client.get("/api/v1/chats/archived", params={"cursor": f"200:{ids[1]}"})
+    assert response.status_code == 200
+    assert [chat["id"] for chat in response.json()] == [ids[0]]
+    assert response.json()[0].keys() == list_keys
@@ -0,0 +1,263 @@
+import hashlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from open_webui.models.files import FileModel
+from open_webui.models.users import UserModel
+from open_webui.routers import files
+from open_webui.storage.provider import LocalStorageProvider
+
+file_content = bytes(range(256)) * 4
+file_etag = f'"{hashlib.sha256(file_content).hexdigest()}"'
+text_content = "hello world"
+text_etag = f'"{hashlib.sha256(text_content.encode()).hexdigest()}"'
+
+
+class RemoteStorageProvider(LocalStorageProvider):
+    """Remote storage without a local copy, recording how files are read."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_local_file(self, file_path):
+        return None
+
+    def get_file(self, file_path):
+        self.calls.append("get_file")
+        return super().get_file(file_path)
+
+    def get_file_size(self, file_path):
+        self.calls.append("get_file_size")
+        return len(file_content)
+
+    def iter_file_range(self, file_path, start, end):
+        self.calls.append(("iter_file_range", start, end))
+        yield file_content[start:end]
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    path = tmp_path / "test.bin"
+    path.write_bytes(file_content)
+
+    file_models = {
+        "file": FileModel(
+            id="file",
+            user_id="1",
+            filename="test.bin",
+            path=str(path),
+            meta={
+                "name": "test.bin",
+                "content_type": "application/octet-stream",
+                "size": len(file_content),
+                "sha256": hashlib.sha256(file_content).hexdigest(),
+            },
+            created_at=1627351200,
+            updated_at=1627351200,
+        ),
+        "text": FileModel(
+            id="text",
+            user_id="1",
+            filename="test.txt",
+            meta={"name": "test.txt"},
+            data={"content": text_content},
+            created_at=1627351200,
+            updated_at=1627351200,
+        ),
+    }
+    monkeypatch.setattr(files.Files, "get_file_by_id", file_models.get)
+    monkeypatch.setattr(files, "Storage", LocalStorageProvider())
+
+    app = FastAPI()
+    app.include_router(files.router, prefix="/api/v1/files")
+    app.dependency_overrides[files.get_verified_user] = lambda: UserModel(
+        id="1",
+        name="John Doe",
+        email="john.doe@openwebui.com",
+        role="user",
+        profile_image_url="/user.png",
+        last_active_at=1627351200,
+        updated_at=1627351200,
+        created_at=1627351200,
+    )
+    return TestClient(app)
+
+
+@pytest.fixture
+def remote_storage(monkeypatch):
+    storage = RemoteStorageProvider()
+    monkeypatch.setattr(files, "Storage", storage)
+    return storage
+
+
+def test_get_byte_range():
+    assert files.get_byte_range("bytes=0-9", 100) == (0, 10)
+    assert files.get_byte_range("bytes=90-", 100) == (90, 100)
+    assert files.get_byte_range("bytes=-10", 100) == (90, 100)
+    assert files.get_byte_range("bytes=-200", 100) == (0, 100)
+    assert files.get_byte_range("bytes=50-200", 100) == (50, 100)
+    # The whole content is sent for these
+    assert files.get_byte_range("bytes=0-9,20-29", 100) is None
+    assert files.get_byte_range("items=0-9", 100) is None
+    assert files.get_byte_range("bytes=abc", 100) is None
+    assert files.get_byte_range("bytes=-", 100) is None
+    with pytest.raises(ValueError):
+        files.get_byte_range("bytes=100-", 100)
+    with pytest.raises(ValueError):
+        files.get_byte_range("bytes=20-10", 100)
+
+
+def test_get_file_content(client):
+    response = client.get("/api/v1/files/file/content")
+    assert response.status_code == 200
+    assert response.content == file_content
+    assert response.headers["etag"] == file_etag
+    assert response.headers["cache-control"] == files.FILE_CACHE_CONTROL
+
+
+@pytest.mark.parametrize(
+    "if_none_match", [file_etag, f"W/{file_etag}", f'"other", {file_etag}', "*"]
+)
+def test_get_file_content_not_modified(client, if_none_match):
+    response = client.get(
+        "/api/v1/files/file/content", headers={"If-None-Match": if_none_match}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == file_etag
+
+
+def test_get_file_content_modified(client):
+    response = client.get(
+        "/api/v1/files/file/content", headers={"If-None-Match": '"other"'}
+    )
+    assert response.status_code == 200
+    assert response.content == file_content
+
+
+@pytest.mark.parametrize(
+    "range_header, start, end",
+    [("bytes=10-19", 10, 20), ("bytes=1000-", 1000, 1024), ("bytes=-24", 1000, 1024)],
+)
+def test_get_file_content_range(client, range_header, start, end):
+    response = client.get("/api/v1/files/file/content", headers={"Range": range_header})
+    assert response.status_code == 206
+    assert response.content == file_content[start:end]
+    assert response.headers["content-range"] == f"bytes {start}-{end - 1}/1024"
+
+
+def test_get_file_content_multiple_ranges(client):
+    response = client.get(
+        "/api/v1/files/file/content", headers={"Range": "bytes=0-9,20-29"}
+    )
+    assert response.status_code == 206
+    # Sent as multipart/byteranges, with a part per range
+    assert b"bytes 0-9/1024" in response.content
+    assert b"bytes 20-29/1024" in response.content
+
+
+def test_get_file_content_unsatisfiable_range(client):
+    response = client.get(
+        "/api/v1/files/file/content", headers={"Range": "bytes=2000-"}
+    )
+    assert response.status_code == 416
+
+
+def test_get_file_content_if_range(client):
+    response = client.get(
+        "/api/v1/files/file/content",
+        headers={"Range": "bytes=10-19", "If-Range": file_etag},
+    )
+    assert response.status_code == 206
+    assert response.content == file_content[10:20]
+
+    # The client's copy is outdated, so the whole file is sent
+    response = client.get(
+        "/api/v1/files/file/content",
+        headers={"Range": "bytes=10-19", "If-Range": '"other"'},
+    )
+    assert response.status_code == 200
+    assert response.content == file_content
+
+
+@pytest.mark.parametrize(
+    "range_header, start, end",
+    [("bytes=10-19", 10, 20), ("bytes=1000-", 1000, 1024), ("bytes=-24", 1000, 1024)],
+)
+def test_get_remote_file_content_range(
+    client, remote_storage, range_header, start, end
+):
+    response = client.get("/api/v1/files/file/content", headers={"Range": range_header})
+    assert response.status_code == 206
+    assert response.content == file_content[start:end]
+    assert response.headers["content-range"] == f"bytes {start}-{end - 1}/1024"
+    assert response.headers["content-length"] == str(end - start)
+    assert response.headers["etag"] == file_etag
+    # Streamed from the storage, with the size taken from the file's metadata
+    assert remote_storage.calls == [("iter_file_range", start, end)]
+
+
+def test_get_remote_file_content_unsatisfiable_range(client, remote_storage):
+    response = client.get(
+        "/api/v1/files/file/content", headers={"Range": "bytes=2000-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+    assert remote_storage.calls == []
+
+
+def test_get_remote_file_content_downloads_file(client, remote_storage):
+    # Multiple ranges and outdated If-Range are answered from the local copy
+    response = client.get(
+        "/api/v1/files/file/content", headers={"Range": "bytes=0-9,20-29"}
+    )
+    assert response.status_code == 206
+    response = client.get(
+        "/api/v1/files/file/content",
+        headers={"Range": "bytes=10-19", "If-Range": '"other"'},
+    )
+    assert response.status_code == 200
+    assert response.content == file_content
+    assert remote_storage.calls == ["get_file", "get_file"]
+
+
+def test_get_remote_file_content_not_modified(client, remote_storage):
+    response = client.get(
+        "/api/v1/files/file/content",
+        headers={"Range": "bytes=10-19", "If-None-Match": file_etag},
+    )
+    assert response.status_code == 304
+    assert remote_storage.calls == []
+
+
+def test_get_text_content(client):
+    response = client.get("/api/v1/files/text/content/test.txt")
+    assert response.status_code == 200
+    assert response.text == text_content
+    assert response.headers["etag"] == text_etag
+    assert response.headers["cache-control"] == files.FILE_CONTENT_CACHE_CONTROL
+
+    response = client.get(
+        "/api/v1/files/text/content/test.txt", headers={"If-None-Match": text_etag}
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize(
+    "range_header, status_code, content",
+    [
+        ("bytes=0-4", 206, b"hello"),
+        ("bytes=6-", 206, b"world"),
+        ("bytes=-5", 206, b"world"),
+        ("bytes=0-1,3-4", 200, b"hello world"),
+        ("bytes=50-", 416, b""),
+    ],
+)
+def test_get_text_content_range(client, range_header, status_code, content):
+    response = client.get(
+        "/api/v1/files/text/content/test.txt", headers={"Range": range_header}
+    )
+    assert response.status_code == status_code
+    assert response.content == content
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from open_webui.socket import utils as socket_utils
+from open_webui.socket.utils import RedisSocketPool
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0, time=1_700_000_000)
+    monkeypatch.setattr(
+        socket_utils,
+        "time",
+        SimpleNamespace(monotonic=lambda: clock.now, time=lambda: clock.time),
+    )
+    return clock
+
+
+@pytest.fixture
+def get_pool(monkeypatch):
+    """Pools of separate workers, sharing one Redis server."""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        socket_utils,
+        "get_redis_connection",
+        lambda *args, **kwargs: fakeredis.aioredis.FakeRedis(
+            server=server, decode_responses=True
+        ),
+    )
+    return lambda **kwargs: RedisSocketPool("test", "redis://", **kwargs)
+
+
+async def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_sessions_are_shared_between_workers(get_pool):
+    async def run():
+        worker, other = get_pool(), get_pool()
+        await worker.add_session("sid-1", {"id": "user-1", "name": "One"})
+        await worker.add_session("sid-2", {"id": "user-1", "name": "One"})
+        await other.add_session("sid-3", {"id": "user-2", "name": "Two"})
+
+        assert sorted(await other.get_user_session_ids("user-1")) == [
+            "sid-1",
+            "sid-2",
+        ]
+        assert sorted(await worker.get_user_ids()) == ["user-1", "user-2"]
+        assert await worker.redis.hget(worker.user_pool_key, "user-1") == "2"
+        assert await other.get_sessions(["sid-1", "sid-3", "missing"]) == [
+            {"id": "user-1", "name": "One"},
+            {"id": "user-2", "name": "Two"},
+            None,
+        ]
+
+        # Removed by a worker the session did not connect to
+        assert await other.remove_session("sid-1") == {"id": "user-1", "name": "One"}
+        assert await worker.get_user_session_ids("user-1") == ["sid-2"]
+        assert await worker.redis.hget(worker.user_pool_key, "user-1") == "1"
+
+        assert await worker.remove_session("sid-2") is not None
+        assert not await worker.is_user_active("user-1")
+        assert await worker.get_user_ids() == ["user-2"]
+        assert not await worker.redis.exists(worker._user_sessions_key("user-1"))
+        assert await worker.remove_session("sid-2") is None
+
+    asyncio.run(run())
+
+
+def test_changes_of_other_workers_invalidate_the_cache(get_pool):
+    async def run():
+        worker, other = get_pool(cache_ttl=60), get_pool(cache_ttl=60)
+        listeners = [asyncio.create_task(pool.listen()) for pool in (worker, other)]
+        try:
+            await wait_for(lambda: worker._subscribed and other._subscribed)
+
+            async def changed_by(change):
+                generation = other._cache_generation
+                await change
+                await wait_for(lambda: other._cache_generation > generation)
+
+            await changed_by(worker.add_session("sid-1", {"id": "user-1"}))
+            assert await other.get_user_session_ids("user-1") == ["sid-1"]
+            assert await other.get_user_ids() == ["user-1"]
+            assert "user-1" in other._user_sessions_cache
+
+            # Seen at once, not after the TTL
+            await changed_by(worker.add_session("sid-2", {"id": "user-1"}))
+            assert "user-1" not in other._user_sessions_cache
+            assert sorted(await other.get_user_session_ids("user-1")) == [
+                "sid-1",
+                "sid-2",
+            ]
+
+            await changed_by(worker.remove_session("sid-1"))
+            assert await other.get_user_session_ids("user-1") == ["sid-2"]
+            assert await other.is_user_active("user-1")
+            await changed_by(worker.remove_session("sid-2"))
+            assert await other.get_user_session_ids("user-1") == []
+            assert not await other.is_user_active("user-1")
+        finally:
+            for listener in listeners:
+                listener.cancel()
+
+    asyncio.run(run())
+
+
+def test_not_cached_without_listener(get_pool):
+    async def run():
+        worker, other = get_pool(cache_ttl=60), get_pool(cache_ttl=60)
+
+        assert await other.get_user_session_ids("user-1") == []
+        await worker.add_session("sid-1", {"id": "user-1"})
+        assert await other.get_user_session_ids("user-1") == ["sid-1"]
+        assert not other._user_sessions_cache
+
+    asyncio.run(run())
+
+
+def test_expired_cache_entries_are_evicted(get_pool, clock):
+    async def run():
+        pool = get_pool(cache_ttl=1)
+        pool._subscribed = True
+
+        for i in range(3):
+            await pool.get_user_session_ids(f"user-{i}")
+        assert len(pool._user_sessions_cache) == 3
+
+        clock.now += 2
+        await pool.get_user_session_ids("user-3")
+        assert list(pool._user_sessions_cache) == ["user-3"]
+
+    asyncio.run(run())
+
+
+def test_models_in_use(get_pool, clock):
+    async def run():
+        pool = get_pool(usage_timeout=3)
+        await pool.set_usage("llama3", "sid-1")
+        clock.time += 2
+        await pool.set_usage("gpt", "sid-2")
+        # Recorded once per model, whatever the number of sessions
+        await pool.set_usage("gpt", "sid-3")
+        assert sorted(await pool.get_models_in_use()) == ["gpt", "llama3"]
+        assert await pool.redis.zcard(pool.usage_pool_key) == 2
+
+        clock.time += 2
+        assert await pool.get_models_in_use() == ["gpt"]
+        await pool.expire_usage()
+        assert await pool.redis.zrange(pool.usage_pool_key, 0, -1) == ["gpt"]
+
+        clock.time += 4
+        await pool.expire_usage()
+        assert await pool.get_models_in_use() == []
+        assert not await pool.redis.exists(pool.usage_pool_key)
+
+    asyncio.run(run())
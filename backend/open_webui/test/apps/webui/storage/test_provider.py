@@ -1,10 +1,13 @@
+import hashlib
 import io
 import os
+import threading
+import time
 import boto3
 import pytest
 from botocore.exceptions import ClientError
 from moto import mock_aws
-from open_webui.storage import provider
+from open_webui.storage import cache, provider
 from gcp_storage_emulator.server import create_server
 from google.cloud import storage
 from azure.storage.blob import BlobServiceClient, ContainerClient, BlobClient
@@ -19,6 +22,17 @@ def mock_upload_dir(monkeypatch, tmp_path):
     return directory
 
 
+def mock_cache_dir(storage, upload_dir, monkeypatch):
+    """Keep the local copies of a remote storage in the temporary UPLOAD_DIR."""
+    directory = upload_dir / "cache"
+    monkeypatch.setattr(storage.cache, "directory", str(directory))
+    return directory
+
+
+def file_metadata(content: bytes) -> dict:
+    return {"size": len(content), "sha256": hashlib.sha256(content).hexdigest()}
+
+
 def test_imports():
     provider.StorageProvider
     provider.LocalStorageProvider
@@ -66,13 +80,15 @@ class TestLocalStorageProvider:
 
     def test_upload_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, file_path = self.Storage.upload_file(self.file_bytesio, self.filename)
+        metadata, file_path = self.Storage.upload_file(
+            self.file_bytesio, self.filename, {}
+        )
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert metadata == file_metadata(self.file_content)
         assert file_path == str(upload_dir / self.filename)
         with pytest.raises(ValueError):
-            self.Storage.upload_file(self.file_bytesio_empty, self.filename)
+            self.Storage.upload_file(self.file_bytesio_empty, self.filename, {})
 
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
@@ -111,43 +127,84 @@ class TestS3StorageProvider:
         super().__init__()
 
     def test_upload_file(self, monkeypatch, tmp_path):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
         # S3 checks
         with pytest.raises(Exception):
-            self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
+            self.Storage.upload_file(io.BytesIO(self.file_content), self.filename, {})
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
-            io.BytesIO(self.file_content), self.filename
+        metadata, s3_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename, {}
         )
         object = self.s3_client.Object(self.Storage.bucket_name, self.filename)
         assert self.file_content == object.get()["Body"].read()
         # local checks
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert (cache_dir / self.filename).exists()
+        assert (cache_dir / self.filename).read_bytes() == self.file_content
+        assert metadata == file_metadata(self.file_content)
         assert s3_file_path == "s3://" + self.Storage.bucket_name + "/" + self.filename
         with pytest.raises(ValueError):
-            self.Storage.upload_file(self.file_bytesio_empty, self.filename)
+            self.Storage.upload_file(self.file_bytesio_empty, self.filename, {})
 
     def test_get_file(self, monkeypatch, tmp_path):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
-            io.BytesIO(self.file_content), self.filename
+        metadata, s3_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename, {}
         )
         file_path = self.Storage.get_file(s3_file_path)
-        assert file_path == str(upload_dir / self.filename)
-        assert (upload_dir / self.filename).exists()
+        assert file_path == str(cache_dir / self.filename)
+        assert (cache_dir / self.filename).exists()
+
+    def test_get_file_downloads_missing_copy(self, monkeypatch, tmp_path):
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
+        self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
+        metadata, s3_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename, {}
+        )
+        (cache_dir / self.filename).unlink()
+        misses = self.Storage.cache.metrics["misses"]
+
+        file_path = self.Storage.get_file(s3_file_path)
+        assert file_path == str(cache_dir / self.filename)
+        assert (cache_dir / self.filename).read_bytes() == self.file_content
+        assert self.Storage.cache.metrics["misses"] == misses + 1
+
+    def test_get_file_revalidates_changed_object(self, monkeypatch, tmp_path):
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
+        monkeypatch.setattr(self.Storage.cache, "validation_ttl", 0)
+        self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
+        metadata, s3_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename, {}
+        )
+        # The copy kept on upload adopts the remote ETag on its first use
+        self.Storage.get_file(s3_file_path)
+        self.s3_client.Object(self.Storage.bucket_name, self.filename).put(
+            Body=b"changed content"
+        )
+
+        file_path = self.Storage.get_file(s3_file_path)
+        assert (cache_dir / self.filename).read_bytes() == b"changed content"
+        assert file_path == str(cache_dir / self.filename)
 
     def test_delete_file(self, monkeypatch, tmp_path):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
-            io.BytesIO(self.file_content), self.filename
+        metadata, s3_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename, {}
         )
-        assert (upload_dir / self.filename).exists()
+        assert (cache_dir / self.filename).exists()
         self.Storage.delete_file(s3_file_path)
-        assert not (upload_dir / self.filename).exists()
+        assert not (cache_dir / self.filename).exists()
         with pytest.raises(ClientError) as exc:
             self.s3_client.Object(self.Storage.bucket_name, self.filename).load()
         error = exc.value.response["Error"]
@@ -155,28 +212,30 @@ class TestS3StorageProvider:
         assert error["Message"] == "Not Found"
 
     def test_delete_all_files(self, monkeypatch, tmp_path):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
         # create 2 files
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename, {})
         object = self.s3_client.Object(self.Storage.bucket_name, self.filename)
         assert self.file_content == object.get()["Body"].read()
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
-        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename_extra)
+        assert (cache_dir / self.filename).exists()
+        assert (cache_dir / self.filename).read_bytes() == self.file_content
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename_extra, {})
         object = self.s3_client.Object(self.Storage.bucket_name, self.filename_extra)
         assert self.file_content == object.get()["Body"].read()
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        assert (cache_dir / self.filename).exists()
+        assert (cache_dir / self.filename).read_bytes() == self.file_content
 
         self.Storage.delete_all_files()
-        assert not (upload_dir / self.filename).exists()
+        assert not (cache_dir / self.filename).exists()
         with pytest.raises(ClientError) as exc:
             self.s3_client.Object(self.Storage.bucket_name, self.filename).load()
         error = exc.value.response["Error"]
         assert error["Code"] == "404"
         assert error["Message"] == "Not Found"
-        assert not (upload_dir / self.filename_extra).exists()
+        assert not (cache_dir / self.filename_extra).exists()
         with pytest.raises(ClientError) as exc:
             self.s3_client.Object(self.Storage.bucket_name, self.filename_extra).load()
         error = exc.value.response["Error"]
@@ -184,8 +243,8 @@ class TestS3StorageProvider:
         assert error["Message"] == "Not Found"
 
         self.Storage.delete_all_files()
-        assert not (upload_dir / self.filename).exists()
-        assert not (upload_dir / self.filename_extra).exists()
+        assert not (cache_dir / self.filename).exists()
+        assert not (cache_dir / self.filename_extra).exists()
 
     def test_init_without_credentials(self, monkeypatch):
         """Test that S3StorageProvider can initialize without explicit credentials."""
@@ -224,60 +283,68 @@ class TestGCSStorageProvider:
         server.stop()
 
     def test_upload_file(self, monkeypatch, tmp_path, setup):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
         # catch error if bucket does not exist
         with pytest.raises(Exception):
             self.Storage.bucket = monkeypatch(self.Storage, "bucket", None)
-            self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
-        contents, gcs_file_path = self.Storage.upload_file(
-            io.BytesIO(self.file_content), self.filename
+            self.Storage.upload_file(io.BytesIO(self.file_content), self.filename, {})
+        metadata, gcs_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename, {}
         )
         object = self.Storage.bucket.get_blob(self.filename)
         assert self.file_content == object.download_as_bytes()
         # local checks
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert (cache_dir / self.filename).exists()
+        assert (cache_dir / self.filename).read_bytes() == self.file_content
+        assert metadata == file_metadata(self.file_content)
         assert gcs_file_path == "gs://" + self.Storage.bucket_name + "/" + self.filename
         # test error if file is empty
         with pytest.raises(ValueError):
-            self.Storage.upload_file(self.file_bytesio_empty, self.filename)
+            self.Storage.upload_file(self.file_bytesio_empty, self.filename, {})
 
     def test_get_file(self, monkeypatch, tmp_path, setup):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
-            io.BytesIO(self.file_content), self.filename
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
+        metadata, gcs_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename, {}
         )
         file_path = self.Storage.get_file(gcs_file_path)
-        assert file_path == str(upload_dir / self.filename)
-        assert (upload_dir / self.filename).exists()
+        assert file_path == str(cache_dir / self.filename)
+        assert (cache_dir / self.filename).exists()
 
     def test_delete_file(self, monkeypatch, tmp_path, setup):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
-            io.BytesIO(self.file_content), self.filename
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
+        metadata, gcs_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename, {}
         )
         # ensure that local directory has the uploaded file as well
-        assert (upload_dir / self.filename).exists()
+        assert (cache_dir / self.filename).exists()
         assert self.Storage.bucket.get_blob(self.filename).name == self.filename
         self.Storage.delete_file(gcs_file_path)
         # check that deleting file from gcs will delete the local file as well
-        assert not (upload_dir / self.filename).exists()
+        assert not (cache_dir / self.filename).exists()
         assert self.Storage.bucket.get_blob(self.filename) == None
 
     def test_delete_all_files(self, monkeypatch, tmp_path, setup):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
         # create 2 files
-        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename, {})
         object = self.Storage.bucket.get_blob(self.filename)
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        assert (cache_dir / self.filename).exists()
+        assert (cache_dir / self.filename).read_bytes() == self.file_content
         assert self.Storage.bucket.get_blob(self.filename).name == self.filename
         assert self.file_content == object.download_as_bytes()
-        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename_extra)
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename_extra, {})
         object = self.Storage.bucket.get_blob(self.filename_extra)
-        assert (upload_dir / self.filename_extra).exists()
-        assert (upload_dir / self.filename_extra).read_bytes() == self.file_content
+        assert (cache_dir / self.filename_extra).exists()
+        assert (cache_dir / self.filename_extra).read_bytes() == self.file_content
         assert (
             self.Storage.bucket.get_blob(self.filename_extra).name
             == self.filename_extra
@@ -285,8 +352,8 @@ class TestGCSStorageProvider:
         assert self.file_content == object.download_as_bytes()
 
         self.Storage.delete_all_files()
-        assert not (upload_dir / self.filename).exists()
-        assert not (upload_dir / self.filename_extra).exists()
+        assert not (cache_dir / self.filename).exists()
+        assert not (cache_dir / self.filename_extra).exists()
         assert self.Storage.bucket.get_blob(self.filename) == None
         assert self.Storage.bucket.get_blob(self.filename_extra) == None
 
@@ -336,62 +403,74 @@ class TestAzureStorageProvider:
         self.Storage.container_client = mock_container_client
 
     def test_upload_file(self, monkeypatch, tmp_path):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
 
         # Simulate an error when container does not exist
         self.Storage.container_client.get_blob_client.side_effect = Exception(
             "Container does not exist"
         )
         with pytest.raises(Exception):
-            self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
+            self.Storage.upload_file(io.BytesIO(self.file_content), self.filename, {})
 
         # Reset side effect and create container
         self.Storage.container_client.get_blob_client.side_effect = None
         self.Storage.create_container()
-        contents, azure_file_path = self.Storage.upload_file(
-            io.BytesIO(self.file_content), self.filename
+        metadata, azure_file_path = self.Storage.upload_file(
+            io.BytesIO(self.file_content), self.filename, {}
         )
 
         # Assertions
         self.Storage.container_client.get_blob_client.assert_called_with(self.filename)
-        self.Storage.container_client.get_blob_client().upload_blob.assert_called_once_with(
-            self.file_content, overwrite=True
-        )
-        assert contents == self.file_content
+        upload_blob = self.Storage.container_client.get_blob_client().upload_blob
+        upload_blob.assert_called_once()
+        assert upload_blob.call_args.kwargs["length"] == len(self.file_content)
+        assert upload_blob.call_args.kwargs["overwrite"] is True
+        assert metadata == file_metadata(self.file_content)
         assert (
             azure_file_path
             == f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
         )
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        assert (cache_dir / self.filename).exists()
+        assert (cache_dir / self.filename).read_bytes() == self.file_content
 
         with pytest.raises(ValueError):
-            self.Storage.upload_file(self.file_bytesio_empty, self.filename)
+            self.Storage.upload_file(self.file_bytesio_empty, self.filename, {})
 
     def test_get_file(self, monkeypatch, tmp_path):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
         self.Storage.create_container()
 
         # Mock upload behavior
-        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename, {})
+        # Drop the copy kept on upload, so the blob is downloaded
+        (cache_dir / self.filename).unlink()
         # Mock blob download behavior
-        self.Storage.container_client.get_blob_client().download_blob().readall.return_value = (
+        blob_client = self.Storage.container_client.get_blob_client()
+        blob_client.get_blob_properties().etag = "etag"
+        blob_client.download_blob().readinto.side_effect = lambda stream: stream.write(
             self.file_content
         )
 
         file_url = f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
         file_path = self.Storage.get_file(file_url)
 
-        assert file_path == str(upload_dir / self.filename)
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        blob_client.download_blob().readinto.assert_called_once()
+        assert file_path == str(cache_dir / self.filename)
+        assert (cache_dir / self.filename).exists()
+        assert (cache_dir / self.filename).read_bytes() == self.file_content
 
     def test_delete_file(self, monkeypatch, tmp_path):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
         self.Storage.create_container()
 
         # Mock file upload
-        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename, {})
         # Mock deletion
         self.Storage.container_client.get_blob_client().delete_blob.return_value = None
 
@@ -399,15 +478,17 @@ class TestAzureStorageProvider:
         self.Storage.delete_file(file_url)
 
         self.Storage.container_client.get_blob_client().delete_blob.assert_called_once()
-        assert not (upload_dir / self.filename).exists()
+        assert not (cache_dir / self.filename).exists()
 
     def test_delete_all_files(self, monkeypatch, tmp_path):
-        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache_dir = mock_cache_dir(
+            self.Storage, mock_upload_dir(monkeypatch, tmp_path), monkeypatch
+        )
         self.Storage.create_container()
 
         # Mock file uploads
-        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
-        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename_extra)
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename, {})
+        self.Storage.upload_file(io.BytesIO(self.file_content), self.filename_extra, {})
 
         # Mock listing and deletion behavior
         self.Storage.container_client.list_blobs.return_value = [
@@ -420,8 +501,8 @@ class TestAzureStorageProvider:
 
         self.Storage.container_client.list_blobs.assert_called_once()
         self.Storage.container_client.get_blob_client().delete_blob.assert_any_call()
-        assert not (upload_dir / self.filename).exists()
-        assert not (upload_dir / self.filename_extra).exists()
+        assert not (cache_dir / self.filename).exists()
+        assert not (cache_dir / self.filename_extra).exists()
 
     def test_get_file_not_found(self, monkeypatch):
         self.Storage.create_container()
@@ -433,3 +514,248 @@ class TestAzureStorageProvider:
         )
         with pytest.raises(Exception, match="Blob not found"):
             self.Storage.get_file(file_url)
+
+
+class TestStorageCache:
+    file_content = b"test content"
+
+    @staticmethod
+    def download(content: bytes):
+        calls = []
+
+        def download(tmp_path):
+            calls.append(tmp_path)
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+
+        return download, calls
+
+    def test_get_downloads_on_miss(self, tmp_path):
+        storage_cache = cache.StorageCache(max_size=1024, validation_ttl=300)
+        path = str(tmp_path / "test.txt")
+        download, calls = self.download(self.file_content)
+
+        assert storage_cache.get(path, lambda: "etag", download) == path
+        assert open(path, "rb").read() == self.file_content
+        assert len(calls) == 1
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+        # Served from the cache without asking the remote storage
+        get_etag = MagicMock(return_value="etag")
+        assert storage_cache.get(path, get_etag, download) == path
+        get_etag.assert_not_called()
+        assert len(calls) == 1
+
+        metrics = storage_cache.get_metrics()
+        assert metrics["hits"] == 1
+        assert metrics["misses"] == 1
+        assert metrics["bytes_downloaded"] == len(self.file_content)
+        assert metrics["size"] == len(self.file_content)
+
+    def test_get_without_download(self, tmp_path):
+        storage_cache = cache.StorageCache(max_size=1024, validation_ttl=300)
+        path = str(tmp_path / "test.txt")
+
+        assert storage_cache.get(path, lambda: "etag") is None
+        assert not os.path.exists(path)
+        assert storage_cache.metrics["uncached"] == 1
+        assert storage_cache.metrics["misses"] == 0
+
+    def test_get_ignores_untracked_files(self, tmp_path):
+        storage_cache = cache.StorageCache(max_size=1024, validation_ttl=300)
+        path = tmp_path / "test.txt"
+        path.write_bytes(b"written by someone else")
+        download, calls = self.download(self.file_content)
+
+        assert storage_cache.get(str(path), lambda: "etag") is None
+        assert storage_cache.get(str(path), lambda: "etag", download) == str(path)
+        assert path.read_bytes() == self.file_content
+        assert len(calls) == 1
+
+    def test_get_revalidates_etag(self, tmp_path):
+        storage_cache = cache.StorageCache(max_size=1024, validation_ttl=0)
+        path = str(tmp_path / "test.txt")
+        download, calls = self.download(self.file_content)
+        storage_cache.get(path, lambda: "etag", download)
+
+        # Unchanged remote object
+        assert storage_cache.get(path, lambda: "etag", download) == path
+        assert len(calls) == 1
+
+        # Changed remote object
+        changed, changed_calls = self.download(b"changed content")
+        assert storage_cache.get(path, lambda: "changed", changed) == path
+        assert open(path, "rb").read() == b"changed content"
+        assert len(changed_calls) == 1
+
+        metrics = storage_cache.get_metrics()
+        assert metrics["revalidations"] == 2
+        assert metrics["stale"] == 1
+        assert metrics["misses"] == 2
+
+    def test_get_adopts_etag_of_added_file(self, tmp_path):
+        storage_cache = cache.StorageCache(max_size=1024, validation_ttl=0)
+        path = tmp_path / "test.txt"
+        path.write_bytes(self.file_content)
+        storage_cache.add(str(path), len(self.file_content))
+        download, calls = self.download(b"changed content")
+
+        assert storage_cache.get(str(path), lambda: "etag", download) == str(path)
+        assert not calls
+        assert storage_cache.get(str(path), lambda: "changed", download) == str(path)
+        assert len(calls) == 1
+
+    def test_get_serves_cached_file_on_validation_error(self, tmp_path):
+        storage_cache = cache.StorageCache(max_size=1024, validation_ttl=0)
+        path = str(tmp_path / "test.txt")
+        download, calls = self.download(self.file_content)
+        storage_cache.get(path, lambda: "etag", download)
+
+        def get_etag():
+            raise ConnectionError("Storage unavailable")
+
+        assert storage_cache.get(path, get_etag, download) == path
+        assert len(calls) == 1
+        assert storage_cache.metrics["validation_errors"] == 1
+
+    def test_get_downloads_once_for_concurrent_requests(self, tmp_path):
+        storage_cache = cache.StorageCache(max_size=1024, validation_ttl=300)
+        path = str(tmp_path / "test.txt")
+        started = threading.Event()
+        calls = []
+
+        def download(tmp_path):
+            calls.append(tmp_path)
+            started.set()
+            # Keep the download running while the other requests arrive
+            time.sleep(0.2)
+            with open(tmp_path, "wb") as f:
+                f.write(self.file_content)
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    storage_cache.get(path, lambda: "etag", download)
+                )
+            )
+            for _ in range(5)
+        ]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [path] * 5
+        assert len(calls) == 1
+        assert storage_cache.metrics["waits"] == 4
+        assert storage_cache.metrics["hits"] == 4
+
+    def test_evicts_least_recently_used(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(cache, "EVICTION_GRACE_PERIOD", 0)
+        storage_cache = cache.StorageCache(
+            max_size=2 * len(self.file_content), validation_ttl=300
+        )
+        untracked = tmp_path / "untracked.txt"
+        untracked.write_bytes(self.file_content)
+        paths = [str(tmp_path / f"test_{i}.txt") for i in range(3)]
+        download, calls = self.download(self.file_content)
+
+        storage_cache.get(paths[0], lambda: "etag", download)
+        storage_cache.get(paths[1], lambda: "etag", download)
+        # Makes the second file the least recently used one
+        storage_cache.get(paths[0], lambda: "etag", download)
+        storage_cache.get(paths[2], lambda: "etag", download)
+
+        assert os.path.exists(paths[0])
+        assert not os.path.exists(paths[1])
+        assert os.path.exists(paths[2])
+        assert untracked.exists()
+
+        metrics = storage_cache.get_metrics()
+        assert metrics["evictions"] == 1
+        assert metrics["files"] == 2
+        assert metrics["size"] == 2 * len(self.file_content)
+
+    def test_keeps_recently_used_files(self, tmp_path):
+        storage_cache = cache.StorageCache(max_size=1, validation_ttl=300)
+        path = str(tmp_path / "test.txt")
+        download, calls = self.download(self.file_content)
+
+        # Over the size bound, but still within the eviction grace period
+        assert storage_cache.get(path, lambda: "etag", download) == path
+        assert os.path.exists(path)
+        assert storage_cache.metrics["evictions"] == 0
+
+    def test_disabled(self, tmp_path):
+        storage_cache = cache.StorageCache(max_size=0, validation_ttl=300)
+        path = str(tmp_path / "test.txt")
+        download, calls = self.download(self.file_content)
+
+        storage_cache.get(path, lambda: "etag", download)
+        storage_cache.get(path, lambda: "etag", download)
+        assert len(calls) == 2
+        assert storage_cache.get_metrics()["files"] == 0
+
+    def test_load_tracks_files_in_directory(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(cache, "EVICTION_GRACE_PERIOD", 0)
+        paths = [tmp_path / f"test_{i}.txt" for i in range(3)]
+        for i, path in enumerate(paths):
+            path.write_bytes(self.file_content)
+            # Used in a previous run, the first file least recently
+            os.utime(path, (1000 + i, 1000 + i))
+        stale = tmp_path / "test.txt.0.part"
+        stale.write_bytes(self.file_content)
+        os.utime(stale, (1000, 1000))
+        downloading = tmp_path / "test.txt.1.part"
+        downloading.write_bytes(self.file_content)
+
+        storage_cache = cache.StorageCache(
+            max_size=2 * len(self.file_content),
+            validation_ttl=300,
+            directory=str(tmp_path),
+        )
+
+        assert not paths[0].exists()
+        assert paths[1].exists() and paths[2].exists()
+        assert not stale.exists()
+        # Possibly still written by another worker
+        assert downloading.exists()
+        metrics = storage_cache.get_metrics()
+        assert metrics["files"] == 2
+        assert metrics["size"] == 2 * len(self.file_content)
+        assert metrics["evictions"] == 1
+
+    def test_get_validates_loaded_files(self, tmp_path):
+        path = tmp_path / "test.txt"
+        path.write_bytes(self.file_content)
+        os.utime(path, (1000, 1000))
+        storage_cache = cache.StorageCache(
+            max_size=1024, validation_ttl=300, directory=str(tmp_path)
+        )
+        download, calls = self.download(b"changed content")
+
+        # Validated on first use, then served until the TTL expires
+        get_etag = MagicMock(return_value="etag")
+        assert storage_cache.get(str(path), get_etag, download) == str(path)
+        assert storage_cache.get(str(path), get_etag, download) == str(path)
+        assert get_etag.call_count == 1
+        assert not calls
+        # Marked as recently used for the next start
+        assert os.path.getmtime(path) > 1000
+
+    def test_delete(self, tmp_path):
+        storage_cache = cache.StorageCache(
+            max_size=1024, validation_ttl=300, directory=str(tmp_path)
+        )
+        path = storage_cache.get_path("test.txt")
+        download, calls = self.download(self.file_content)
+        storage_cache.get(path, lambda: "etag", download)
+
+        storage_cache.delete(path)
+        assert not os.path.exists(path)
+        assert storage_cache.get_metrics()["files"] == 0
+        # Deleting a missing file is a no-op
+        storage_cache.delete(path)
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from open_webui import config as config_module
+from open_webui.config import (
+    REDIS_CONFIG_KEY_PREFIX,
+    REDIS_CONFIG_PUBSUB_CHANNEL,
+    REDIS_CONFIG_VERSION_KEY,
+    AppConfig,
+    PersistentConfig,
+    redis_config_listener,
+)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        config_module,
+        "get_redis_connection",
+        lambda *args, **kwargs: fakeredis.FakeRedis(
+            server=server, decode_responses=True
+        ),
+    )
+    # Writes are only saved in memory
+    monkeypatch.setattr(config_module, "CONFIG_DATA", {})
+    monkeypatch.setattr(config_module, "save_to_db", lambda data: None)
+    monkeypatch.setattr(config_module, "PERSISTENT_CONFIG_REGISTRY", [])
+    return server
+
+
+@pytest.fixture
+def resyncs(monkeypatch):
+    """Versions the listeners resynced at, besides the one when subscribing."""
+    resyncs = []
+    sync_config_from_redis = config_module.sync_config_from_redis
+
+    async def sync(config, redis):
+        await sync_config_from_redis(config, redis)
+        resyncs.append(config.version)
+
+    monkeypatch.setattr(config_module, "sync_config_from_redis", sync)
+    return resyncs
+
+
+def get_config(server) -> AppConfig:
+    """The config of an instance, connected to `server`."""
+    config = AppConfig(redis_url="redis://")
+    config.FIRST = PersistentConfig("FIRST", "test.first", "a")
+    config.SECOND = PersistentConfig("SECOND", "test.second", 1)
+    return config
+
+
+async def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def start_listener(config, server, resyncs):
+    app = SimpleNamespace(
+        state=SimpleNamespace(
+            config=config,
+            redis=fakeredis.aioredis.FakeRedis(server=server, decode_responses=True),
+        )
+    )
+    resynced = len(resyncs)
+    listener = asyncio.create_task(redis_config_listener(app))
+    # Subscribed once synced
+    await wait_for(lambda: len(resyncs) > resynced)
+    del resyncs[resynced:]
+    return listener
+
+
+def test_updates_are_applied_in_order(server, resyncs):
+    async def run():
+        writer, reader = get_config(server), get_config(server)
+        listener = await start_listener(reader, server, resyncs)
+        try:
+            writer.FIRST = "b"
+            writer.SECOND = 2
+            writer.FIRST = "c"
+            assert writer.version == 3
+
+            await wait_for(lambda: reader.version == 3)
+            assert (reader.FIRST, reader.SECOND) == ("c", 2)
+            assert resyncs == []
+        finally:
+            listener.cancel()
+
+    asyncio.run(run())
+
+
+def test_missed_update_resyncs(server, resyncs):
+    async def run():
+        writer, reader = get_config(server), get_config(server)
+        listener = await start_listener(reader, server, resyncs)
+        try:
+            # The update of version 1 never reaches the reader
+            redis = writer._redis
+            redis.set(f"{REDIS_CONFIG_KEY_PREFIX}:FIRST", json.dumps("b"))
+            redis.incr(REDIS_CONFIG_VERSION_KEY)
+
+            writer.SECOND = 2
+            await wait_for(lambda: reader.version == 2)
+            assert (reader.FIRST, reader.SECOND) == ("b", 2)
+            assert resyncs == [2]
+
+            # Updates already applied by the resync are skipped
+            redis.publish(
+                REDIS_CONFIG_PUBSUB_CHANNEL,
+                json.dumps({"key": "FIRST", "value": json.dumps("a"), "version": 1}),
+            )
+            writer.FIRST = "c"
+            await wait_for(lambda: reader.version == 3)
+            assert reader.FIRST == "c"
+            assert resyncs == [2]
+        finally:
+            listener.cancel()
+
+    asyncio.run(run())
+
+
+def test_own_write_while_another_update_is_in_flight(server, resyncs):
+    async def run():
+        config, other = get_config(server), get_config(server)
+        listener = await start_listener(config, server, resyncs)
+        try:
+            # Written by the other instance, not received yet when this
+            # instance writes
+            other.FIRST = "b"
+            config.SECOND = 2
+            assert config.version == 0
+            assert config.FIRST == "a"
+
+            # Both are applied in order once received, without a resync
+            await wait_for(lambda: config.version == 2)
+            assert (config.FIRST, config.SECOND) == ("b", 2)
+            assert resyncs == []
+        finally:
+            listener.cancel()
+
+    asyncio.run(run())
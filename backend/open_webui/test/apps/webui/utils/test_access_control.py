@@ -0,0 +1,137 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.models import groups as groups_module
+from open_webui.models.groups import GroupForm, Groups, GroupUpdateForm
+from open_webui.models.models import ModelForm, ModelMeta, ModelParams, Models
+from open_webui.utils.access_control import get_user_group_ids, has_access
+
+USER_IDS = ["owner", "member", "granted", "other"]
+
+
+def grant(group_ids=(), user_ids=()):
+    return {
+        "read": {"group_ids": list(group_ids), "user_ids": list(user_ids)},
+        "write": {"group_ids": [], "user_ids": []},
+    }
+
+
+@pytest.fixture
+def grants():
+    """Models with owner, group and user grants, and ids of their groups."""
+    Groups.delete_all_groups()
+    team = Groups.insert_new_group(
+        "owner", GroupForm(name="Team", description="", user_ids=["member"])
+    )
+    empty = Groups.insert_new_group(
+        "owner", GroupForm(name="Empty", description="", user_ids=[])
+    )
+
+    access_controls = {
+        # Public
+        "public": None,
+        # Private, only the owner
+        "private": grant(),
+        "team": grant(group_ids=[team.id]),
+        "empty-group": grant(group_ids=[empty.id]),
+        "user": grant(user_ids=["granted"]),
+        "team-and-user": grant(group_ids=[team.id], user_ids=["granted"]),
+        "unknown-group": grant(group_ids=["unknown"]),
+    }
+    for id, access_control in access_controls.items():
+        Models.insert_new_model(
+            ModelForm(
+                id=id,
+                # Custom models on top of a base model, as listed by get_models
+                base_model_id="base",
+                name=id,
+                meta=ModelMeta(),
+                params=ModelParams(),
+                access_control=access_control,
+            ),
+            "owner",
+        )
+
+    yield SimpleNamespace(team=team, empty=empty, model_ids=list(access_controls))
+
+    Models.delete_all_models()
+    Groups.delete_all_groups()
+
+
+def has_read_access_per_model(user_id: str, model_ids: list[str]) -> list[str]:
+    """The access checks done per model, resolving the user's groups each time."""
+    return [
+        model.id
+        for model in (Models.get_model_by_id(id) for id in model_ids)
+        if model.user_id == user_id
+        or has_access(user_id, type="read", access_control=model.access_control)
+    ]
+
+
+@pytest.mark.parametrize("user_id", USER_IDS)
+def test_get_filtered_models_matches_has_access(grants, user_id):
+    from open_webui.routers import ollama, openai
+
+    expected = has_read_access_per_model(user_id, grants.model_ids)
+    user = SimpleNamespace(id=user_id)
+
+    models = {"data": [{"id": id} for id in grants.model_ids + ["not-stored"]]}
+    filtered = asyncio.run(openai.get_filtered_models(models, user))
+    assert [model["id"] for model in filtered] == expected
+
+    models = [{"model": id} for id in grants.model_ids + ["not-stored"]]
+    filtered = asyncio.run(ollama.get_filtered_models({"models": models}, user))
+    assert [model["model"] for model in filtered] == expected
+
+
+@pytest.mark.parametrize("user_id", USER_IDS)
+def test_get_models_by_user_id_matches_has_access(grants, user_id):
+    expected = has_read_access_per_model(user_id, grants.model_ids)
+    assert sorted(
+        model.id for model in Models.get_models_by_user_id(user_id, "read")
+    ) == sorted(expected)
+
+
+def test_access_by_grant(grants):
+    assert has_read_access_per_model("owner", grants.model_ids) == grants.model_ids
+    assert has_read_access_per_model("member", grants.model_ids) == [
+        "public",
+        "team",
+        "team-and-user",
+    ]
+    assert has_read_access_per_model("granted", grants.model_ids) == [
+        "public",
+        "user",
+        "team-and-user",
+    ]
+    assert has_read_access_per_model("other", grants.model_ids) == ["public"]
+
+
+def test_group_writes_clear_the_cache(grants, monkeypatch):
+    monkeypatch.setattr(groups_module, "ACCESS_CONTROL_CACHE_TTL", 60)
+    Groups.clear_member_group_ids_cache()
+    team = grants.team
+
+    assert get_user_group_ids("other") == frozenset()
+    assert "other" in Groups._member_group_ids
+
+    Groups.update_group_by_id(
+        team.id, GroupUpdateForm(name="Team", description="", user_ids=["other"])
+    )
+    assert get_user_group_ids("other") == {team.id}
+    assert has_access("other", "read", grant(group_ids=[team.id]))
+    assert get_user_group_ids("member") == frozenset()
+
+    group = Groups.insert_new_group(
+        "owner", GroupForm(name="New", description="", user_ids=["other"])
+    )
+    assert get_user_group_ids("other") == {team.id, group.id}
+
+    Groups.delete_group_by_id(group.id)
+    assert get_user_group_ids("other") == {team.id}
+
+    Groups.remove_user_from_all_groups("other")
+    assert get_user_group_ids("other") == frozenset()
+    assert not has_access("other", "read", grant(group_ids=[team.id]))
@@ -0,0 +1,238 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.utils import emit_buffer
+from open_webui.utils.emit_buffer import MessageEmitBuffer, get_utf16_length
+
+
+class Client:
+    """Applies `chat:completion` events to a message like Chat.svelte does."""
+
+    def __init__(self):
+        # The content as UTF-16 code units, indexed like a JavaScript string
+        self.units = b""
+        self.seq = None
+
+    @property
+    def content(self) -> str:
+        return self.units.decode("utf-16-le")
+
+    def apply(self, event: dict) -> bool:
+        data = event["data"]
+        if "content_delta" in data:
+            if (
+                self.seq != data["seq"] - 1
+                or len(self.units) // 2 != data["length"]
+                or data["offset"] > data["length"]
+            ):
+                self.seq = None
+                return False
+            self.units = self.units[: data["offset"] * 2] + data[
+                "content_delta"
+            ].encode("utf-16-le")
+        elif isinstance(data.get("content"), str):
+            self.units = data["content"].encode("utf-16-le")
+
+        if "seq" in data:
+            self.seq = data["seq"]
+        return True
+
+
+def content(text: str) -> dict:
+    return {"type": "chat:completion", "data": {"content": text}}
+
+
+async def emit_all(buffer: MessageEmitBuffer, events: list[dict]):
+    for event in events:
+        await buffer(event)
+    await buffer.flush()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Time as seen by the buffers, moved forward by the test."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        emit_buffer,
+        "time",
+        SimpleNamespace(monotonic=lambda: clock.now, perf_counter=lambda: clock.now),
+    )
+    return clock
+
+
+def create_buffer(**kwargs) -> tuple[MessageEmitBuffer, list[dict]]:
+    emitted = []
+
+    async def event_emitter(event):
+        emitted.append(event)
+
+    kwargs = {"mode": "delta", "interval": 0, "resync_interval": 3600, **kwargs}
+    return MessageEmitBuffer(event_emitter, **kwargs), emitted
+
+
+def test_get_utf16_length():
+    assert get_utf16_length("") == 0
+    assert get_utf16_length("abc") == 3
+    assert get_utf16_length("a😀") == 3
+    assert get_utf16_length("é中") == 2
+
+
+def test_deltas_count_surrogate_pairs_as_two_characters():
+    buffer, emitted = create_buffer()
+
+    texts = ["a😀", "a😀b", "a😀b😀", "a😀c"]
+    asyncio.run(emit_all(buffer, [content(text) for text in texts]))
+
+    assert [event["data"] for event in emitted] == [
+        {"content": "a😀", "seq": 1},
+        {"offset": 3, "content_delta": "b", "length": 3, "seq": 2},
+        {"offset": 4, "content_delta": "😀", "length": 4, "seq": 3},
+        # Rewritten after the emoji, which is not split
+        {"offset": 3, "content_delta": "c", "length": 6, "seq": 4},
+    ]
+
+    client = Client()
+    assert all(client.apply(event) for event in emitted)
+    assert client.content == "a😀c"
+
+
+def test_deltas_of_shrinking_and_rewritten_content():
+    buffer, emitted = create_buffer()
+
+    asyncio.run(
+        emit_all(
+            buffer,
+            [
+                content("Hello world"),
+                content("Hello"),
+                content("Help!"),
+                # Unchanged content is not sent again
+                content("Help!"),
+                content("😀😀"),
+                content("😀😁"),
+                content(""),
+            ],
+        )
+    )
+
+    assert [event["data"] for event in emitted] == [
+        {"content": "Hello world", "seq": 1},
+        {"offset": 5, "content_delta": "", "length": 11, "seq": 2},
+        {"offset": 3, "content_delta": "p!", "length": 5, "seq": 3},
+        {"offset": 0, "content_delta": "😀😀", "length": 5, "seq": 4},
+        {"offset": 2, "content_delta": "😁", "length": 4, "seq": 5},
+        {"offset": 0, "content_delta": "", "length": 4, "seq": 6},
+    ]
+
+    client = Client()
+    texts = ["Hello world", "Hello", "Help!", "😀😀", "😀😁", ""]
+    for event, text in zip(emitted, texts):
+        assert client.apply(event)
+        assert client.content == text
+
+
+def test_full_content_is_resent_every_resync_interval(clock):
+    buffer, emitted = create_buffer(resync_interval=10)
+
+    async def run():
+        for text, now in [("a", 1000), ("ab", 1005), ("abc", 1010), ("abcd", 1015)]:
+            clock.now = now
+            await buffer(content(text))
+
+    asyncio.run(run())
+
+    assert [event["data"] for event in emitted] == [
+        {"content": "a", "seq": 1},
+        {"offset": 1, "content_delta": "b", "length": 1, "seq": 2},
+        {"content": "abc", "seq": 3},
+        {"offset": 3, "content_delta": "d", "length": 3, "seq": 4},
+    ]
+
+    # A client that missed a delta drops the deltas until the next resync
+    client = Client()
+    assert client.apply(emitted[0])
+    assert not client.apply(emitted[3])
+    assert client.content == "a"
+    assert client.apply(emitted[2]) and client.apply(emitted[3])
+    assert client.content == "abcd"
+
+
+def test_deltas_after_a_missed_event_are_dropped():
+    buffer, emitted = create_buffer()
+
+    asyncio.run(emit_all(buffer, [content(text) for text in ["a", "ab", "abc"]]))
+
+    client = Client()
+    assert client.apply(emitted[0])
+    # Reordered: the delta of seq 3 arrives before the one of seq 2
+    assert not client.apply(emitted[2])
+    assert not client.apply(emitted[1])
+    assert client.content == "a"
+
+
+def test_other_events_flush_pending_content_first():
+    buffer, emitted = create_buffer(interval=60)
+
+    async def run():
+        await buffer(content("a"))
+        # Held back for the interval
+        await buffer(content("ab"))
+        await buffer(content("abc"))
+        assert len(emitted) == 1
+
+        await buffer({"type": "status", "data": {"description": "Searching"}})
+        await buffer(
+            {"type": "chat:completion", "data": {"content": "abcd", "done": True}}
+        )
+        # The timer of the flushed content is cancelled
+        assert buffer._timer is None
+
+    asyncio.run(run())
+
+    assert emitted == [
+        {"type": "chat:completion", "data": {"content": "a", "seq": 1}},
+        {
+            "type": "chat:completion",
+            "data": {"offset": 1, "content_delta": "bc", "length": 1, "seq": 2},
+        },
+        {"type": "status", "data": {"description": "Searching"}},
+        # Sent as is, numbered as full content
+        {
+            "type": "chat:completion",
+            "data": {"content": "abcd", "done": True, "seq": 3},
+        },
+    ]
+
+    client = Client()
+    for event in emitted:
+        if event["type"] == "chat:completion":
+            assert client.apply(event)
+    assert client.content == "abcd"
+
+
+def test_pending_content_is_sent_after_the_interval():
+    buffer, emitted = create_buffer(interval=0.05)
+
+    async def run():
+        await buffer(content("a"))
+        await buffer(content("ab"))
+        assert len(emitted) == 1
+        await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+
+    assert [event["data"] for event in emitted] == [
+        {"content": "a", "seq": 1},
+        {"offset": 1, "content_delta": "b", "length": 1, "seq": 2},
+    ]
+
+
+def test_full_mode_sends_events_as_they_are():
+    buffer, emitted = create_buffer(mode="full")
+    events = [content("a"), content("ab"), {"type": "status", "data": {}}]
+
+    asyncio.run(emit_all(buffer, events))
+
+    assert emitted == events
@@ -0,0 +1,132 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from open_webui.internal.db import engine
+from open_webui.models.functions import FunctionForm, FunctionMeta, Functions
+from open_webui.utils import filter as filter_utils
+from open_webui.utils.filter import FilterCache, get_sorted_filter_ids
+
+FILTER_CONTENT = """
+from pydantic import BaseModel
+
+
+class Filter:
+    class Valves(BaseModel):
+        priority: int = 0
+
+    def __init__(self):
+        self.valves = self.Valves()
+        self.toggle = {toggle}
+
+    def inlet(self, body):
+        return body
+"""
+
+
+def insert_filter(id, is_global=False, toggle=False, priority=0):
+    Functions.insert_new_function(
+        "1",
+        "filter",
+        FunctionForm(
+            id=id,
+            name=id.title(),
+            content=FILTER_CONTENT.format(toggle=toggle),
+            meta=FunctionMeta(description=f"{id} description"),
+        ),
+    )
+    Functions.update_function_by_id(id, {"is_active": True, "is_global": is_global})
+    Functions.update_function_valves_by_id(id, {"priority": priority})
+
+
+def get_model(*filter_ids):
+    return {"id": "model", "info": {"meta": {"filterIds": list(filter_ids)}}}
+
+
+@pytest.fixture
+def request_():
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+
+
+@pytest.fixture(autouse=True)
+def filter_cache(monkeypatch):
+    cache = FilterCache()
+    monkeypatch.setattr(filter_utils, "FILTER_CACHE", cache)
+    yield cache
+    for function in Functions.get_functions():
+        Functions.delete_function_by_id(function.id)
+
+
+@pytest.fixture
+def queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_filter_chain_is_cached(request_, queries):
+    insert_filter("global_filter", is_global=True, priority=2)
+    insert_filter("model_filter", priority=1)
+    insert_filter("toggle_filter", toggle=True)
+    insert_filter("other_filter")
+    queries.clear()
+
+    assert get_sorted_filter_ids(request_, get_model("model_filter")) == [
+        "model_filter",
+        "global_filter",
+    ]
+    assert queries
+    queries.clear()
+
+    # Repeated passes don't read the functions again
+    for _ in range(3):
+        assert get_sorted_filter_ids(request_, get_model("model_filter")) == [
+            "model_filter",
+            "global_filter",
+        ]
+        assert get_sorted_filter_ids(
+            request_, get_model("model_filter", "toggle_filter"), ["toggle_filter"]
+        ) == ["toggle_filter", "model_filter", "global_filter"]
+        # Toggle filters only run when enabled
+        assert get_sorted_filter_ids(request_, get_model("toggle_filter")) == [
+            "global_filter"
+        ]
+    assert queries == []
+
+
+def test_filter_chain_is_rebuilt_on_function_change(request_, queries, filter_cache):
+    insert_filter("global_filter", is_global=True, priority=2)
+    insert_filter("model_filter", priority=1)
+    assert get_sorted_filter_ids(request_, get_model("model_filter")) == [
+        "model_filter",
+        "global_filter",
+    ]
+    version = filter_cache.version
+
+    Functions.update_function_valves_by_id("model_filter", {"priority": 3})
+    queries.clear()
+
+    assert get_sorted_filter_ids(request_, get_model("model_filter")) == [
+        "global_filter",
+        "model_filter",
+    ]
+    assert queries
+    assert filter_cache.version != version
+    assert filter_cache.filters["model_filter"].valves.priority == 3
+
+    # Deactivated filters are dropped from the chains
+    Functions.update_function_by_id("global_filter", {"is_active": False})
+    assert get_sorted_filter_ids(request_, get_model("model_filter")) == [
+        "model_filter"
+    ]
+    queries.clear()
+    assert get_sorted_filter_ids(request_, get_model("model_filter")) == [
+        "model_filter"
+    ]
+    assert queries == []
@@ -0,0 +1,372 @@
+import asyncio
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+from open_webui.internal.db import get_db
+from open_webui.models import ingestion_jobs
+from open_webui.models.files import FileForm, Files
+from open_webui.models.ingestion_jobs import IngestionJob, IngestionJobs
+from open_webui.utils import ingestion
+from open_webui.utils.ingestion import IngestionWorker, enqueue_file_processing
+
+
+class FakeVectorDB:
+    """In-memory collections, queried by metadata like the vector DB clients."""
+
+    def __init__(self):
+        self.collections: dict[str, dict[str, tuple[str, dict]]] = {}
+
+    def get_ids(self, collection_name: str, filter: dict) -> list[str]:
+        return [
+            id
+            for id, (_, metadata) in self.collections.get(collection_name, {}).items()
+            if all(metadata.get(key) == value for key, value in filter.items())
+        ]
+
+    def query(self, collection_name: str, filter: dict):
+        return SimpleNamespace(ids=[self.get_ids(collection_name, filter)])
+
+    def delete(self, collection_name: str, ids: list[str]):
+        for id in ids:
+            self.collections[collection_name].pop(id, None)
+
+    def insert(self, collection_name, texts, embeddings, metadatas, new_collection):
+        collection = self.collections.setdefault(collection_name, {})
+        for text, metadata in zip(texts, metadatas):
+            collection[str(uuid.uuid4())] = (text, metadata)
+
+    def check_duplicate_content(self, collection_name: str, metadata: dict):
+        if self.get_ids(collection_name, {"hash": metadata["hash"]}):
+            raise ValueError("Duplicate content")
+
+
+@pytest.fixture
+def vector_db(monkeypatch):
+    vector_db = FakeVectorDB()
+    monkeypatch.setattr(ingestion, "VECTOR_DB_CLIENT", vector_db)
+    monkeypatch.setattr(ingestion, "insert_docs_to_vector_db", vector_db.insert)
+    monkeypatch.setattr(
+        ingestion, "check_duplicate_content", vector_db.check_duplicate_content
+    )
+    monkeypatch.setattr(ingestion, "prepare_collection", lambda *args, **kwargs: True)
+    monkeypatch.setattr(
+        ingestion.BM25Indexes, "delete_documents", lambda *args, **kwargs: True
+    )
+    return vector_db
+
+
+@pytest.fixture
+def calls(monkeypatch, vector_db):
+    """Run the stages on fakes, recording the (stage, file_id, collection) calls."""
+    calls = []
+
+    def load_file_docs(request, file, form_data):
+        calls.append(("extract", file.id, form_data.collection_name))
+        time.sleep(0.01)
+        return [Document(page_content=f"content of {file.id}")], f"text of {file.id}"
+
+    async def aembed_texts(request, texts, user=None):
+        calls.append(("embed", texts))
+        return [[1.0] for _ in texts]
+
+    async def emit_to_user(user_id, event, data):
+        pass
+
+    monkeypatch.setattr(ingestion, "load_file_docs", load_file_docs)
+    monkeypatch.setattr(ingestion, "split_docs", lambda request, docs: docs)
+    monkeypatch.setattr(ingestion, "aembed_texts", aembed_texts)
+    monkeypatch.setattr(ingestion, "emit_to_user", emit_to_user)
+    monkeypatch.setattr(ingestion, "INGESTION_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(ingestion_jobs, "INGESTION_JOB_RETRY_DELAY", 0)
+    return calls
+
+
+@pytest.fixture
+def app():
+    config = SimpleNamespace(
+        BYPASS_EMBEDDING_AND_RETRIEVAL=False,
+        CONTENT_EXTRACTION_ENGINE="",
+        RAG_EMBEDDING_ENGINE="",
+        RAG_EMBEDDING_MODEL="model",
+    )
+    return SimpleNamespace(state=SimpleNamespace(config=config))
+
+
+@pytest.fixture(autouse=True)
+def clear_jobs():
+    yield
+    with get_db() as db:
+        db.query(IngestionJob).delete()
+        db.commit()
+    Files.delete_all_files()
+
+
+def create_file(name: str = "test.txt") -> str:
+    id = str(uuid.uuid4())
+    Files.insert_new_file(
+        "1",
+        FileForm(
+            id=id,
+            filename=name,
+            path=f"/tmp/{id}",
+            meta={"name": name, "content_type": "text/plain"},
+        ),
+    )
+    return id
+
+
+def enqueue(app, file_id: str, collection_name=None):
+    request = SimpleNamespace(app=app)
+    return enqueue_file_processing(request, "1", file_id, collection_name)
+
+
+async def run_workers(app, job_ids: list[str], count: int = 1, timeout: float = 10):
+    """Run `count` workers until the jobs are completed or failed."""
+    workers = [IngestionWorker(app) for _ in range(count)]
+    for worker in workers:
+        await worker.start()
+
+    try:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            jobs = [IngestionJobs.get_job_by_id(id) for id in job_ids]
+            # Failed jobs update their file once the job is marked
+            if all(job.status in ("completed", "failed") for job in jobs) and not any(
+                worker.jobs for worker in workers
+            ):
+                return jobs
+            await asyncio.sleep(0.01)
+        raise TimeoutError("Ingestion jobs did not finish")
+    finally:
+        for worker in workers:
+            await worker.stop()
+
+
+def test_claim_jobs_concurrently_is_disjoint(app):
+    job_ids = {enqueue(app, create_file()).id for _ in range(20)}
+
+    claimed = {}
+    barrier = threading.Barrier(2)
+
+    def claim(worker_id):
+        barrier.wait()
+        claimed[worker_id] = []
+        while jobs := IngestionJobs.claim_jobs(worker_id, 3):
+            claimed[worker_id].extend(job.id for job in jobs)
+
+    threads = [threading.Thread(target=claim, args=(id,)) for id in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not set(claimed["a"]) & set(claimed["b"])
+    assert set(claimed["a"]) | set(claimed["b"]) == job_ids
+    for worker_id, ids in claimed.items():
+        for id in ids:
+            job = IngestionJobs.get_job_by_id(id)
+            assert job.status == "running"
+            assert job.worker_id == worker_id
+            assert job.attempts == 1
+
+
+def test_jobs_behind_many_blocked_jobs_are_claimed(app):
+    # A running job with many jobs of the same file queued behind it
+    running = IngestionJobs.insert_new_job("1", "busy")
+    assert [job.id for job in IngestionJobs.claim_jobs("a", 1)] == [running.id]
+    for i in range(20):
+        IngestionJobs.insert_new_job("1", "busy", collection_name=f"knowledge-{i}")
+
+    job = IngestionJobs.insert_new_job("1", "other")
+    assert [job.id for job in IngestionJobs.claim_jobs("b", 2)] == [job.id]
+
+
+def test_workers_process_each_job_once(app, calls, vector_db):
+    file_ids = [create_file() for _ in range(10)]
+    job_ids = [enqueue(app, file_id).id for file_id in file_ids]
+
+    jobs = asyncio.run(run_workers(app, job_ids, count=2))
+
+    assert all(job.status == "completed" for job in jobs)
+    assert all(job.attempts == 1 for job in jobs)
+    extracted = [call[1] for call in calls if call[0] == "extract"]
+    assert sorted(extracted) == sorted(file_ids)
+    for file_id in file_ids:
+        file = Files.get_file_by_id(file_id)
+        assert file.data["status"] == "completed"
+        assert file.meta["collection_name"] == f"file-{file_id}"
+        assert len(vector_db.collections[f"file-{file_id}"]) == 1
+
+
+def test_failed_job_is_retried(app, calls, monkeypatch):
+    load_file_docs = ingestion.load_file_docs
+    failures = []
+
+    def flaky_load_file_docs(request, file, form_data):
+        if not failures:
+            failures.append(file.id)
+            raise RuntimeError("Loader unavailable")
+        return load_file_docs(request, file, form_data)
+
+    monkeypatch.setattr(ingestion, "load_file_docs", flaky_load_file_docs)
+    file_id = create_file()
+    job_id = enqueue(app, file_id).id
+
+    (job,) = asyncio.run(run_workers(app, [job_id]))
+
+    assert job.status == "completed"
+    assert job.attempts == 2
+    assert job.error is None
+    assert Files.get_file_by_id(file_id).data["status"] == "completed"
+
+
+def test_failed_job_is_marked_failed_after_max_attempts(app, calls, monkeypatch):
+    attempts = []
+
+    def load_file_docs(request, file, form_data):
+        attempts.append(file.id)
+        raise RuntimeError("Loader unavailable")
+
+    monkeypatch.setattr(ingestion, "load_file_docs", load_file_docs)
+    monkeypatch.setattr(ingestion, "INGESTION_JOB_MAX_ATTEMPTS", 3)
+    file_id = create_file()
+    job_id = enqueue(app, file_id).id
+
+    (job,) = asyncio.run(run_workers(app, [job_id]))
+
+    assert job.status == "failed"
+    assert job.attempts == 3
+    assert job.error == "Loader unavailable"
+    assert len(attempts) == 3
+    file = Files.get_file_by_id(file_id)
+    assert file.data["status"] == "failed"
+    assert file.data["error"] == "Loader unavailable"
+
+
+def test_invalid_content_is_not_retried(app, calls, monkeypatch):
+    def load_file_docs(request, file, form_data):
+        raise ValueError("Invalid content")
+
+    monkeypatch.setattr(ingestion, "load_file_docs", load_file_docs)
+    job_id = enqueue(app, create_file()).id
+
+    (job,) = asyncio.run(run_workers(app, [job_id]))
+
+    assert job.status == "failed"
+    assert job.attempts == 1
+
+
+def test_knowledge_job_waits_for_file_job(app, calls, vector_db):
+    file_id = create_file()
+    file_job = enqueue(app, file_id)
+    knowledge_job = enqueue(app, file_id, collection_name="knowledge")
+
+    # Only the file's own job can be claimed while it is queued or running
+    assert [job.id for job in IngestionJobs.claim_jobs("a", 10)] == [file_job.id]
+    assert IngestionJobs.claim_jobs("b", 10) == []
+    IngestionJobs.requeue_jobs_by_worker_id("a")
+
+    jobs = asyncio.run(run_workers(app, [file_job.id, knowledge_job.id], count=2))
+
+    assert all(job.status == "completed" for job in jobs)
+    assert [call[1:] for call in calls if call[0] == "extract"] == [
+        (file_id, None),
+        (file_id, "knowledge"),
+    ]
+    assert len(vector_db.collections["knowledge"]) == 1
+
+
+def test_knowledge_job_fails_with_its_file_job(app, calls, monkeypatch):
+    def load_file_docs(request, file, form_data):
+        raise ValueError("Invalid content")
+
+    monkeypatch.setattr(ingestion, "load_file_docs", load_file_docs)
+    file_id = create_file()
+    job_ids = [
+        enqueue(app, file_id).id,
+        enqueue(app, file_id, collection_name="knowledge").id,
+    ]
+
+    file_job, knowledge_job = asyncio.run(run_workers(app, job_ids))
+
+    assert file_job.status == "failed"
+    assert knowledge_job.status == "failed"
+    assert knowledge_job.error == "Invalid content"
+
+
+def test_requeued_knowledge_job_does_not_duplicate_chunks(app, calls, vector_db):
+    file_id = create_file()
+    job_ids = [
+        enqueue(app, file_id).id,
+        enqueue(app, file_id, collection_name="knowledge").id,
+    ]
+    asyncio.run(run_workers(app, job_ids))
+    assert len(vector_db.collections["knowledge"]) == 1
+
+    # The worker stopped after indexing, before the job was completed
+    knowledge_job_id = job_ids[1]
+    IngestionJobs.update_job_by_id(knowledge_job_id, status="running", worker_id="a")
+    with get_db() as db:
+        db.query(IngestionJob).filter_by(id=knowledge_job_id).update(
+            {"updated_at": time.time_ns() - 120 * 1_000_000_000}
+        )
+        db.commit()
+
+    assert IngestionJobs.requeue_stale_jobs(60) == 1
+    job = IngestionJobs.get_job_by_id(knowledge_job_id)
+    assert job.status == "pending" and job.worker_id is None
+
+    (job,) = asyncio.run(run_workers(app, [knowledge_job_id]))
+
+    assert job.status == "completed"
+    assert job.attempts == 2
+    # The chunks of the first run were replaced, not added to
+    assert len(vector_db.collections["knowledge"]) == 1
+
+
+def test_requeue_stale_jobs_skips_active_jobs(app):
+    job_id = enqueue(app, create_file()).id
+    IngestionJobs.claim_jobs("a", 1)
+
+    assert IngestionJobs.requeue_stale_jobs(60) == 0
+    assert IngestionJobs.get_job_by_id(job_id).status == "running"
+
+
+def test_jobs_waiting_for_a_stage_are_not_requeued(app, calls, monkeypatch):
+    load_file_docs = ingestion.load_file_docs
+
+    def slow_load_file_docs(request, file, form_data):
+        time.sleep(1.5)
+        return load_file_docs(request, file, form_data)
+
+    monkeypatch.setattr(ingestion, "load_file_docs", slow_load_file_docs)
+    monkeypatch.setattr(ingestion, "INGESTION_EXTRACT_CONCURRENCY", 1)
+    monkeypatch.setattr(ingestion, "INGESTION_JOB_TIMEOUT", 1)
+    monkeypatch.setattr(ingestion, "HEARTBEAT_INTERVAL", 0.1)
+    monkeypatch.setattr(ingestion, "MAINTENANCE_INTERVAL", 0.1)
+    file_ids = [create_file() for _ in range(2)]
+    job_ids = [enqueue(app, file_id).id for file_id in file_ids]
+
+    async def run():
+        async def requeue_from_another_instance():
+            # One job is in the extract stage, the other waits for it, both
+            # for longer than the timeout by then
+            await asyncio.sleep(1.2)
+            return await asyncio.to_thread(IngestionJobs.requeue_stale_jobs, 1)
+
+        task = asyncio.create_task(requeue_from_another_instance())
+        jobs = await run_workers(app, job_ids)
+        return jobs, await task
+
+    jobs, requeued = asyncio.run(run())
+
+    assert requeued == 0
+    assert all(job.status == "completed" for job in jobs)
+    assert all(job.attempts == 1 for job in jobs)
+    extracted = [call[1] for call in calls if call[0] == "extract"]
+    assert sorted(extracted) == sorted(file_ids)
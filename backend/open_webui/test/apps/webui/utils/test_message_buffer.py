@@ -0,0 +1,259 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.internal.db import get_db
+from open_webui.models.chats import ChatForm, ChatMessage, Chats
+from open_webui.utils import message_buffer
+from open_webui.utils.message_buffer import (
+    MESSAGE_SAVE_BUFFERS,
+    MESSAGE_SAVE_METRICS,
+    MessageSaveBuffer,
+    flush_message_save_buffers,
+    save_message_save_buffers,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_buffers():
+    yield
+    MESSAGE_SAVE_BUFFERS.clear()
+
+
+@pytest.fixture
+def chat_id() -> str:
+    chat = Chats.insert_new_chat(
+        "1",
+        ChatForm(
+            chat={
+                "title": "Chat",
+                "history": {
+                    "currentId": "a",
+                    "messages": {"a": {"id": "a", "role": "user", "content": "Hi"}},
+                },
+            }
+        ),
+    )
+    yield chat.id
+
+    with get_db() as db:
+        db.query(ChatMessage).delete()
+        db.commit()
+    Chats.delete_chats_by_user_id("1")
+
+
+@pytest.fixture
+def saves(monkeypatch):
+    """
+    Saves of the buffers, written to the database unless `failures` are left.
+    Saves wait for `release` when it is set.
+    """
+    saves = SimpleNamespace(messages=[], failures=0, release=None)
+    upsert = Chats.aupsert_message_to_chat_by_id_and_message_id
+
+    async def aupsert_message_to_chat_by_id_and_message_id(id, message_id, message):
+        saves.messages.append(dict(message))
+        if saves.release is not None:
+            await saves.release.wait()
+        if saves.failures:
+            saves.failures -= 1
+            return None
+        return await upsert(id, message_id, message)
+
+    monkeypatch.setattr(
+        Chats,
+        "aupsert_message_to_chat_by_id_and_message_id",
+        aupsert_message_to_chat_by_id_and_message_id,
+    )
+    return saves
+
+
+def get_message(chat_id: str) -> dict:
+    return Chats.get_message_by_id_and_message_id(chat_id, "a")
+
+
+def test_failed_save_is_retried(chat_id, saves):
+    saves.failures = 1
+    flush_errors = MESSAGE_SAVE_METRICS["flush_errors"]
+
+    async def run():
+        buffer = MessageSaveBuffer(chat_id, "a", interval=0.05, max_bytes=1)
+        buffer.update({"content": "Hello"})
+        await asyncio.sleep(0.3)
+        return buffer
+
+    buffer = asyncio.run(run())
+
+    assert saves.messages == [{"content": "Hello"}, {"content": "Hello"}]
+    assert MESSAGE_SAVE_METRICS["flush_errors"] == flush_errors + 1
+    assert buffer.pending == {}
+    assert get_message(chat_id)["content"] == "Hello"
+
+
+def test_updates_within_the_interval_are_coalesced(chat_id, saves):
+    async def run():
+        buffer = MessageSaveBuffer(chat_id, "a", interval=0.1)
+        for content in ["H", "He", "Hel", "Hello"]:
+            buffer.update({"content": content})
+        assert saves.messages == []
+        await asyncio.sleep(0.3)
+
+    asyncio.run(run())
+
+    assert saves.messages == [{"content": "Hello"}]
+    assert get_message(chat_id)["content"] == "Hello"
+
+
+def test_new_buffer_takes_over_pending_fields(chat_id, saves):
+    async def run():
+        previous = MessageSaveBuffer(chat_id, "a", interval=60)
+        previous.update({"content": "Hello", "done": False})
+
+        buffer = MessageSaveBuffer(chat_id, "a", interval=60)
+        assert previous.closed and previous._timer is None
+        assert MESSAGE_SAVE_BUFFERS[(chat_id, "a")] is buffer
+
+        buffer.update({"done": True})
+        await buffer.close()
+
+        # Closing the previous buffer does not remove its successor
+        await previous.close()
+        return buffer
+
+    buffer = asyncio.run(run())
+
+    assert saves.messages == [{"content": "Hello", "done": True}]
+    assert (chat_id, "a") not in MESSAGE_SAVE_BUFFERS
+    message = get_message(chat_id)
+    assert message["content"] == "Hello" and message["done"] is True
+
+
+def test_fields_updated_during_a_flush_stay_pending(chat_id, saves):
+    async def run():
+        saves.release = asyncio.Event()
+        buffer = MessageSaveBuffer(chat_id, "a", interval=60)
+        buffer.update({"content": "Hel", "done": False})
+
+        flush = asyncio.create_task(buffer.flush())
+        await asyncio.sleep(0.01)
+        buffer.update({"content": "Hello"})
+        saves.release.set()
+
+        assert await flush
+        assert buffer.pending == {"content": "Hello"}
+
+        await buffer.close()
+
+    asyncio.run(run())
+
+    assert saves.messages == [{"content": "Hel", "done": False}, {"content": "Hello"}]
+    assert get_message(chat_id)["content"] == "Hello"
+
+
+def test_close_waits_for_the_flush_in_progress(chat_id, saves):
+    async def run():
+        saves.release = asyncio.Event()
+        buffer = MessageSaveBuffer(chat_id, "a", interval=60, max_bytes=1)
+        buffer.update({"content": "Hel"})
+        await asyncio.sleep(0.01)
+        buffer.update({"content": "Hello"})
+
+        close = asyncio.create_task(buffer.close())
+        await asyncio.sleep(0.01)
+        assert not close.done()
+        saves.release.set()
+        return await close
+
+    assert asyncio.run(run())
+    assert saves.messages == [{"content": "Hel"}, {"content": "Hello"}]
+    assert get_message(chat_id)["content"] == "Hello"
+
+
+def test_failed_last_save_is_retried(chat_id, saves, monkeypatch):
+    monkeypatch.setattr(message_buffer, "MESSAGE_SAVE_CLOSE_RETRY_DELAY", 0)
+    saves.failures = 2
+
+    async def run():
+        buffer = MessageSaveBuffer(chat_id, "a", interval=60)
+        buffer.update({"content": "Hello"})
+        return await buffer.close(), buffer
+
+    closed, buffer = asyncio.run(run())
+
+    assert closed
+    assert saves.messages == [{"content": "Hello"}] * 3
+    assert buffer.pending == {}
+    assert (chat_id, "a") not in MESSAGE_SAVE_BUFFERS
+    assert get_message(chat_id)["content"] == "Hello"
+
+
+def test_failed_last_save_falls_back_to_sync_upsert(chat_id, saves, monkeypatch):
+    monkeypatch.setattr(message_buffer, "MESSAGE_SAVE_CLOSE_RETRY_DELAY", 0)
+    saves.failures = 10
+
+    async def run():
+        buffer = MessageSaveBuffer(chat_id, "a", interval=60)
+        buffer.update({"content": "Hello"})
+        return await buffer.close()
+
+    assert asyncio.run(run())
+    assert len(saves.messages) == message_buffer.MESSAGE_SAVE_CLOSE_RETRIES + 1
+    assert (chat_id, "a") not in MESSAGE_SAVE_BUFFERS
+    assert get_message(chat_id)["content"] == "Hello"
+
+
+def test_unsaved_buffer_is_kept_for_shutdown(chat_id, saves, monkeypatch):
+    monkeypatch.setattr(message_buffer, "MESSAGE_SAVE_CLOSE_RETRY_DELAY", 0)
+    saves.failures = 10
+    upsert = Chats.upsert_message_to_chat_by_id_and_message_id
+    monkeypatch.setattr(
+        Chats, "upsert_message_to_chat_by_id_and_message_id", lambda *args: None
+    )
+
+    async def run():
+        buffer = MessageSaveBuffer(chat_id, "a", interval=60)
+        buffer.update({"content": "Hello"})
+        return await buffer.close(), buffer
+
+    closed, buffer = asyncio.run(run())
+
+    assert not closed
+    assert buffer.pending == {"content": "Hello"}
+    # A closed buffer does not retry on its own
+    assert buffer._timer is None
+    assert MESSAGE_SAVE_BUFFERS[(chat_id, "a")] is buffer
+
+    # Written at exit once the database is back
+    monkeypatch.setattr(Chats, "upsert_message_to_chat_by_id_and_message_id", upsert)
+    save_message_save_buffers()
+    assert MESSAGE_SAVE_BUFFERS == {}
+    assert get_message(chat_id)["content"] == "Hello"
+
+
+def test_flush_message_save_buffers_on_shutdown(chat_id, saves):
+    async def run():
+        for message_id, content in [("a", "Hello"), ("b", "Hi")]:
+            MessageSaveBuffer(chat_id, message_id, interval=60).update(
+                {"content": content}
+            )
+        await flush_message_save_buffers()
+
+    asyncio.run(run())
+
+    assert MESSAGE_SAVE_BUFFERS == {}
+    assert get_message(chat_id)["content"] == "Hello"
+    assert Chats.get_message_by_id_and_message_id(chat_id, "b") == {"content": "Hi"}
+
+
+def test_save_message_save_buffers_at_exit(chat_id, saves):
+    async def run():
+        MessageSaveBuffer(chat_id, "a", interval=60).update({"content": "Hello"})
+
+    asyncio.run(run())
+    save_message_save_buffers()
+
+    assert MESSAGE_SAVE_BUFFERS == {}
+    # Written without the event loop
+    assert saves.messages == []
+    assert get_message(chat_id)["content"] == "Hello"
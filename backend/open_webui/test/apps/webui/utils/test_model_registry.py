@@ -0,0 +1,520 @@
+import asyncio
+import copy
+from types import SimpleNamespace
+
+import pytest
+
+from open_webui.internal.db import async_engine
+from open_webui.models.functions import FunctionForm, FunctionMeta, Functions
+from open_webui.models.models import ModelForm, ModelMeta, ModelParams, Models
+from open_webui.utils import model_registry
+from open_webui.utils import models as models_utils
+from open_webui.utils.model_registry import ModelRegistry, ModelSource
+
+
+class FakeSource:
+    """Model list of a backend, recording how often it is fetched."""
+
+    def __init__(self, *ids: str):
+        self.models = [{"id": id, "name": id} for id in ids]
+        self.error = None
+        self.calls = 0
+
+    async def fetch(self, request, user):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return copy.deepcopy(self.models)
+
+
+def get_request(**config):
+    return SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(config=SimpleNamespace(**config), MODELS={})
+        )
+    )
+
+
+@pytest.fixture
+def sources():
+    return {"openai": FakeSource("gpt"), "ollama": FakeSource("llama3:latest")}
+
+
+@pytest.fixture
+def builds():
+    return []
+
+
+@pytest.fixture
+def registry(sources, builds, monkeypatch):
+    fingerprint = [0, 0]
+    monkeypatch.setattr(
+        model_registry, "get_models_db_fingerprint", lambda: tuple(fingerprint)
+    )
+
+    async def build(request, models):
+        builds.append([model["id"] for model in models])
+        return [*models, {"id": "custom", "info": {"base_model_id": "gpt"}}]
+
+    registry = ModelRegistry(
+        sources={
+            "openai": ModelSource(
+                fetch=sources["openai"].fetch,
+                get_config_key=lambda config: config.OPENAI_API_BASE_URLS,
+            ),
+            "ollama": ModelSource(fetch=sources["ollama"].fetch, uses_functions=True),
+        },
+        build=build,
+        get_config_key=lambda config: config.ENABLE_EVALUATION_ARENA_MODELS,
+        ttl=60,
+    )
+    registry.fingerprint = fingerprint
+    return registry
+
+
+def test_snapshot_is_versioned(registry, sources, builds):
+    request = get_request(
+        OPENAI_API_BASE_URLS=["a"], ENABLE_EVALUATION_ARENA_MODELS=False
+    )
+
+    async def run():
+        snapshot = await registry.get_snapshot(request)
+        assert snapshot.version == 1
+        assert [model["id"] for model in snapshot.models] == [
+            "gpt",
+            "llama3:latest",
+            "custom",
+        ]
+        assert snapshot.by_id["gpt"]["name"] == "gpt"
+        assert [model["id"] for model in snapshot.by_base_id["gpt"]] == ["custom"]
+        assert request.app.state.MODELS is snapshot.by_id
+
+        # Served from the snapshot without fetching or building again
+        assert await registry.get_snapshot(request) is snapshot
+        assert registry.metrics["hits"] == 1
+
+        # Refetched, but the same lists keep the snapshot
+        assert await registry.get_snapshot(request, refresh=True) is snapshot
+        assert sources["openai"].calls == 2
+
+        sources["openai"].models.append({"id": "gpt-mini", "name": "gpt-mini"})
+        snapshot = await registry.get_snapshot(request, refresh=True)
+        assert snapshot.version == 2
+        assert "gpt-mini" in snapshot.by_id
+
+        # A config change refetches its source at once, the others are kept
+        request.app.state.config.OPENAI_API_BASE_URLS = ["b"]
+        sources["openai"].models = [{"id": "other", "name": "other"}]
+        snapshot = await registry.get_snapshot(request)
+        assert snapshot.version == 3
+        assert "other" in snapshot.by_id and "gpt" not in snapshot.by_id
+        assert sources["openai"].calls == 4
+        assert sources["ollama"].calls == 3
+
+        # The build's own config rebuilds without fetching
+        request.app.state.config.ENABLE_EVALUATION_ARENA_MODELS = True
+        snapshot = await registry.get_snapshot(request)
+        assert snapshot.version == 4
+        assert sources["openai"].calls == 4
+
+    asyncio.run(run())
+    assert len(builds) == 4
+
+
+def test_stale_source_is_refreshed_in_background(registry, sources):
+    request = get_request(OPENAI_API_BASE_URLS=[], ENABLE_EVALUATION_ARENA_MODELS=False)
+
+    async def run():
+        snapshot = await registry.get_snapshot(request)
+        sources["openai"].models = [{"id": "new", "name": "new"}]
+        registry.states["openai"].refreshed_at -= registry.ttl + 1
+
+        # The stale list is served while it is refreshed
+        assert await registry.get_snapshot(request) is snapshot
+        await registry.states["openai"].task
+
+        snapshot = await registry.get_snapshot(request)
+        assert snapshot.version == 2
+        assert "new" in snapshot.by_id
+
+    asyncio.run(run())
+
+
+def test_failing_source_keeps_its_last_list(registry, sources):
+    request = get_request(OPENAI_API_BASE_URLS=[], ENABLE_EVALUATION_ARENA_MODELS=False)
+
+    async def run():
+        snapshot = await registry.get_snapshot(request)
+        sources["openai"].error = ConnectionError("Connection refused")
+
+        assert await registry.get_snapshot(request, refresh=True) is snapshot
+        assert "gpt" in snapshot.by_id
+        metrics = registry.get_metrics()["sources"]["openai"]
+        assert metrics["healthy"] is False
+        assert metrics["error"] == "Connection refused"
+        assert metrics["failures"] == 1
+        assert metrics["models"] == 1
+        assert registry.metrics["errors"] == 1
+
+        # Retried after the TTL, not on every request
+        calls = sources["openai"].calls
+        await registry.get_snapshot(request)
+        assert sources["openai"].calls == calls
+
+        # The last list belongs to the old config
+        request.app.state.config.OPENAI_API_BASE_URLS = ["b"]
+        snapshot = await registry.get_snapshot(request)
+        assert "gpt" not in snapshot.by_id
+        assert "llama3:latest" in snapshot.by_id
+
+        sources["openai"].error = None
+        snapshot = await registry.get_snapshot(request, refresh=True)
+        assert "gpt" in snapshot.by_id
+        assert registry.get_metrics()["sources"]["openai"]["healthy"] is True
+
+    asyncio.run(run())
+
+
+def test_invalidate_rebuilds_snapshot(registry, sources, builds):
+    request = get_request(OPENAI_API_BASE_URLS=[], ENABLE_EVALUATION_ARENA_MODELS=False)
+
+    async def run():
+        snapshot = await registry.get_snapshot(request)
+
+        # Model rows changed: rebuilt from the same lists
+        registry.invalidate(functions=False)
+        snapshot = await registry.get_snapshot(request)
+        assert snapshot.version == 2
+        assert sources["ollama"].calls == 1
+
+        # Function rows changed: sources listing pipes are refetched too
+        registry.invalidate()
+        snapshot = await registry.get_snapshot(request)
+        assert snapshot.version == 3
+        assert sources["ollama"].calls == 2
+        assert sources["openai"].calls == 1
+
+        # Changed by another instance, seen by the periodic table check
+        registry.fingerprint[0] = 1
+        registry.db_checked_at -= registry.ttl + 1
+        assert await registry.get_snapshot(request) is snapshot
+        await registry.db_task
+        assert (await registry.get_snapshot(request)).version == 4
+
+    asyncio.run(run())
+    assert len(builds) == 4
+
+
+####################
+# Against the database
+####################
+
+
+@pytest.fixture
+def clear_models():
+    yield
+    Models.delete_all_models()
+    for function in Functions.get_functions():
+        Functions.delete_function_by_id(function.id)
+
+
+def run_db_coroutine(coroutine):
+    """Run `coroutine`, closing the async database connections of its loop."""
+
+    async def run():
+        try:
+            return await coroutine
+        finally:
+            if async_engine is not None:
+                await async_engine.dispose()
+
+    return asyncio.run(run())
+
+
+def insert_model(id, base_model_id=None, is_active=True, **meta):
+    model = Models.insert_new_model(
+        ModelForm(
+            id=id,
+            base_model_id=base_model_id,
+            name=f"Custom {id}",
+            meta=ModelMeta(**meta),
+            params=ModelParams(),
+        ),
+        "1",
+    )
+    if not is_active:
+        Models.toggle_model_by_id(id)
+    return model
+
+
+def insert_function(id, type, is_global=False):
+    Functions.insert_new_function(
+        "1",
+        type,
+        FunctionForm(
+            id=id,
+            name=id.title(),
+            content="",
+            meta=FunctionMeta(description=f"{id} description"),
+        ),
+    )
+    return Functions.update_function_by_id(
+        id, {"is_active": True, "is_global": is_global}
+    )
+
+
+def test_model_changes_invalidate_registry(clear_models):
+    registry = models_utils.MODEL_REGISTRY
+    generation = registry.generation
+    function_generation = registry.function_generation
+
+    insert_model("custom", base_model_id="gpt")
+    assert registry.generation == generation + 1
+    assert registry.function_generation == function_generation
+
+    # Bulk query updates and deletes are seen too
+    Models.toggle_model_by_id("custom")
+    Models.delete_all_models()
+    assert registry.generation == generation + 3
+
+    insert_function("action", "action")
+    assert registry.generation == generation + 5
+    assert registry.function_generation == function_generation + 2
+
+    # Reads and other tables leave it as it is
+    Models.get_all_models()
+    Functions.get_functions()
+    assert registry.generation == generation + 5
+
+
+def test_model_changes_bump_table_versions(clear_models):
+    from open_webui.internal.db import get_db
+    from open_webui.models.models import Model
+
+    model_version, function_version = model_registry.get_models_db_fingerprint()
+
+    insert_model("custom", base_model_id="gpt")
+    # Changes made within the same second are told apart
+    Models.toggle_model_by_id("custom")
+    assert model_registry.get_models_db_fingerprint() == (
+        model_version + 2,
+        function_version,
+    )
+
+    insert_function("filter", "filter")
+    assert model_registry.get_models_db_fingerprint()[1] == function_version + 2
+
+    # Rolled back with the changes
+    with get_db() as db:
+        db.query(Model).filter_by(id="custom").delete()
+        db.rollback()
+    assert model_registry.get_models_db_fingerprint()[0] == model_version + 2
+
+
+def merge_models_before_registry(request, models: list[dict]) -> list[dict]:
+    """The model merge `get_all_models` did before the registry, for comparison."""
+    if request.app.state.config.ENABLE_EVALUATION_ARENA_MODELS:
+        models = models + models_utils.get_arena_models(request)
+
+    global_action_ids = [f.id for f in Functions.get_global_action_functions()]
+    enabled_action_ids = [
+        f.id for f in Functions.get_functions_by_type("action", active_only=True)
+    ]
+    global_filter_ids = [f.id for f in Functions.get_global_filter_functions()]
+    enabled_filter_ids = [
+        f.id for f in Functions.get_functions_by_type("filter", active_only=True)
+    ]
+
+    for custom_model in Models.get_all_models():
+        if custom_model.base_model_id is None:
+            for model in models:
+                if custom_model.id == model["id"] or (
+                    model.get("owned_by") == "ollama"
+                    and custom_model.id == model["id"].split(":")[0]
+                ):
+                    if custom_model.is_active:
+                        model["name"] = custom_model.name
+                        model["info"] = custom_model.model_dump()
+                        meta = model["info"]["meta"]
+                        model["action_ids"] = list(meta.get("actionIds", []))
+                        model["filter_ids"] = list(meta.get("filterIds", []))
+                    else:
+                        models.remove(model)
+        elif custom_model.is_active and (
+            custom_model.id not in [model["id"] for model in models]
+        ):
+            owned_by = "openai"
+            pipe = None
+            for model in models:
+                if (
+                    custom_model.base_model_id == model["id"]
+                    or custom_model.base_model_id == model["id"].split(":")[0]
+                ):
+                    owned_by = model.get("owned_by", "unknown owner")
+                    if "pipe" in model:
+                        pipe = model["pipe"]
+                    break
+
+            meta = custom_model.meta.model_dump() if custom_model.meta else {}
+            models.append(
+                {
+                    "id": custom_model.id,
+                    "name": custom_model.name,
+                    "object": "model",
+                    "created": custom_model.created_at,
+                    "owned_by": owned_by,
+                    "info": custom_model.model_dump(),
+                    "preset": True,
+                    **({"pipe": pipe} if pipe is not None else {}),
+                    "action_ids": list(meta.get("actionIds", [])),
+                    "filter_ids": list(meta.get("filterIds", [])),
+                }
+            )
+
+    for model in models:
+        action_ids = set(model.pop("action_ids", []) + global_action_ids)
+        filter_ids = set(model.pop("filter_ids", []) + global_filter_ids)
+
+        model["actions"] = []
+        for action_id in action_ids & set(enabled_action_ids):
+            function = Functions.get_function_by_id(action_id)
+            module, _, _ = models_utils.get_function_module_from_cache(
+                request, action_id
+            )
+            model["actions"].extend(
+                [
+                    {
+                        "id": f"{function.id}.{action['id']}",
+                        "name": action.get("name", f"{function.name} ({action['id']})"),
+                        "description": function.meta.description,
+                        "icon": action.get("icon_url", getattr(module, "icon", None)),
+                    }
+                    for action in module.actions
+                ]
+                if hasattr(module, "actions")
+                else [
+                    {
+                        "id": function.id,
+                        "name": function.name,
+                        "description": function.meta.description,
+                        "icon": getattr(module, "icon", None),
+                    }
+                ]
+            )
+
+        model["filters"] = []
+        for filter_id in filter_ids & set(enabled_filter_ids):
+            function = Functions.get_function_by_id(filter_id)
+            module, _, _ = models_utils.get_function_module_from_cache(
+                request, filter_id
+            )
+            if getattr(module, "toggle", None):
+                model["filters"].append(
+                    {
+                        "id": function.id,
+                        "name": function.name,
+                        "description": function.meta.description,
+                        "icon": getattr(module, "icon", None),
+                    }
+                )
+
+    return models
+
+
+def normalize(models: list[dict]) -> list[dict]:
+    for model in models:
+        model["actions"].sort(key=lambda item: item["id"])
+        model["filters"].sort(key=lambda item: item["id"])
+        if model.get("arena"):
+            # Timestamped when built
+            model.pop("created")
+    return models
+
+
+def test_build_all_models_matches_previous_merge(clear_models, monkeypatch):
+    modules = {
+        "global_action": SimpleNamespace(icon="/action.png"),
+        "multi_action": SimpleNamespace(
+            actions=[{"id": "a", "name": "A"}, {"id": "b", "icon_url": "/b.png"}]
+        ),
+        "toggle_filter": SimpleNamespace(toggle=True),
+        "plain_filter": SimpleNamespace(),
+    }
+    monkeypatch.setattr(
+        models_utils,
+        "get_function_module_from_cache",
+        lambda request, id: (modules[id], None, None),
+    )
+    insert_function("global_action", "action", is_global=True)
+    insert_function("multi_action", "action")
+    insert_function("toggle_filter", "filter")
+    insert_function("plain_filter", "filter", is_global=True)
+    insert_function("inactive_filter", "filter")
+    Functions.update_function_by_id("inactive_filter", {"is_active": False})
+
+    base_models = [
+        {
+            "id": "pipe.model",
+            "name": "Pipe",
+            "owned_by": "openai",
+            "pipe": {"type": "pipe"},
+        },
+        {"id": "gpt-4", "name": "GPT-4", "owned_by": "openai"},
+        {"id": "gpt-3.5", "name": "GPT-3.5", "owned_by": "openai"},
+        {"id": "llama3:latest", "name": "llama3:latest", "owned_by": "ollama"},
+        {"id": "mistral:7b", "name": "mistral:7b", "owned_by": "ollama"},
+        {"id": "qwen:7b", "name": "qwen:7b", "owned_by": "ollama"},
+    ]
+    # Overrides of base models, by id and by Ollama name without the tag
+    insert_model("gpt-4", actionIds=["multi_action"], filterIds=["toggle_filter"])
+    insert_model("llama3", filterIds=["toggle_filter", "inactive_filter"])
+    # Hides its base model
+    insert_model("gpt-3.5", is_active=False)
+    # Built on base models
+    insert_model("assistant", base_model_id="gpt-4", actionIds=["multi_action"])
+    insert_model("mistral-assistant", base_model_id="mistral")
+    insert_model("piped", base_model_id="pipe.model")
+    insert_model("orphan", base_model_id="missing")
+    insert_model("inactive-preset", base_model_id="gpt-4", is_active=False)
+    # Same id as a base model
+    insert_model("qwen:7b", base_model_id="gpt-4")
+
+    request = get_request(
+        ENABLE_EVALUATION_ARENA_MODELS=True, EVALUATION_ARENA_MODELS=[]
+    )
+    models = run_db_coroutine(
+        models_utils.build_all_models(request, copy.deepcopy(base_models))
+    )
+    expected = merge_models_before_registry(request, copy.deepcopy(base_models))
+
+    assert normalize(models) == normalize(expected)
+    assert [model["id"] for model in models] == [
+        "pipe.model",
+        "gpt-4",
+        "llama3:latest",
+        "mistral:7b",
+        "qwen:7b",
+        "arena-model",
+        "assistant",
+        "mistral-assistant",
+        "piped",
+        "orphan",
+    ]
+    by_id = {model["id"]: model for model in models}
+    assert by_id["llama3:latest"]["name"] == "Custom llama3"
+    assert by_id["mistral-assistant"]["owned_by"] == "ollama"
+    assert by_id["piped"]["pipe"] == {"type": "pipe"}
+    assert [item["id"] for item in by_id["gpt-4"]["actions"]] == [
+        "global_action",
+        "multi_action.a",
+        "multi_action.b",
+    ]
+    assert [item["id"] for item in by_id["gpt-4"]["filters"]] == ["toggle_filter"]
+    assert by_id["orphan"]["filters"] == []
+
+
+def test_build_all_models_without_base_models(clear_models):
+    insert_model("assistant", base_model_id="gpt-4")
+    request = get_request(ENABLE_EVALUATION_ARENA_MODELS=True)
+
+    assert run_db_coroutine(models_utils.build_all_models(request, [])) == []
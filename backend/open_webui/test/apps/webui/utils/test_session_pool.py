@@ -0,0 +1,160 @@
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from open_webui.utils.session_pool import (
+    ClientSessionPool,
+    get_base_url,
+    release_response,
+)
+
+
+def test_sessions_are_shared_per_base_url():
+    async def run():
+        pool = ClientSessionPool()
+        try:
+            session = pool.get_session("http://a.test/v1/models")
+            assert pool.get_session("http://a.test/v1/chat/completions") is session
+            assert pool.get_session("https://a.test/v1/models") is not session
+            assert pool.requests["http://a.test"] == 2
+        finally:
+            await pool.close()
+        assert session.closed
+
+    asyncio.run(run())
+
+
+def test_least_recently_used_session_is_closed_after_a_delay():
+    async def run():
+        pool = ClientSessionPool(max_sessions=2, close_delay=0.05)
+        a = pool.get_session("http://a.test")
+        b = pool.get_session("http://b.test")
+        pool.get_session("http://a.test")
+        c = pool.get_session("http://c.test")
+
+        assert list(pool.sessions) == ["http://a.test", "http://c.test"]
+        assert "http://b.test" not in pool.requests
+        # Requests already sent with it can complete
+        assert not b.closed and b in pool.evicted
+
+        await asyncio.sleep(0.1)
+        assert b.closed and not pool.evicted
+        assert not a.closed and not c.closed
+
+        # A new session once requested again
+        assert pool.get_session("http://b.test") is not b
+        await pool.close()
+
+    asyncio.run(run())
+
+
+def test_close_closes_evicted_sessions():
+    async def run():
+        pool = ClientSessionPool(max_sessions=1, close_delay=60)
+        a = pool.get_session("http://a.test")
+        b = pool.get_session("http://b.test")
+        handle = pool.evicted[a]
+
+        await pool.close()
+        assert a.closed and b.closed
+        assert handle.cancelled()
+        assert not pool.evicted and not pool.sessions
+
+    asyncio.run(run())
+
+
+def test_session_of_another_loop_is_closed_on_its_loop():
+    pool = ClientSessionPool(close_delay=0.05)
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+
+    async def get_session():
+        return pool.get_session("http://a.test")
+
+    try:
+        session = asyncio.run_coroutine_threadsafe(get_session(), other_loop).result()
+
+        async def run():
+            replaced = pool.get_session("http://a.test")
+            assert replaced is not session
+            await asyncio.sleep(0.2)
+            assert session.closed
+            await pool.close()
+
+        asyncio.run(run())
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+
+
+def test_session_of_a_closed_loop_is_replaced():
+    pool = ClientSessionPool()
+
+    async def get_session():
+        return pool.get_session("http://a.test")
+
+    session = asyncio.run(get_session())
+
+    async def run():
+        assert pool.get_session("http://a.test") is not session
+        assert not pool.evicted
+        await pool.close()
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def stream_app():
+    """Streams two chunks from /stream, the second one a moment later."""
+
+    async def stream(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b"first")
+        await asyncio.sleep(0.1)
+        try:
+            await response.write(b"second")
+            await response.write_eof()
+        except ConnectionResetError:
+            pass
+        return response
+
+    app = web.Application()
+    app.router.add_get("/stream", stream)
+    return app
+
+
+def test_release_response_reuses_only_fully_read_connections(stream_app):
+    async def run():
+        server = TestServer(stream_app)
+        await server.start_server()
+        pool = ClientSessionPool()
+        url = str(server.make_url("/stream"))
+        metrics = lambda: pool.get_metrics()[get_base_url(url)]
+        try:
+            session = pool.get_session(url)
+
+            response = await session.get(url)
+            assert await response.read() == b"firstsecond"
+            await release_response(response)
+            assert metrics()["acquired"] == 0
+            assert metrics()["idle"] == 1
+
+            # Not read to the end: the connection is closed, not reused
+            response = await session.get(url)
+            assert await response.content.readexactly(5) == b"first"
+            await release_response(response)
+            assert metrics()["acquired"] == 0
+            assert metrics()["idle"] == 0
+
+            await release_response(None)
+        finally:
+            await pool.close()
+            await server.close()
+
+    asyncio.run(run())
@@ -0,0 +1,129 @@
+"""
+Load test of streaming latency while slow database queries run concurrently.
+
+A simulated completion stream sends a chunk every --interval milliseconds
+through an asyncio queue, as the chat completion handler forwards model
+output, and records how late each chunk is received. Meanwhile a worker runs
+a slow query (a recursive CTE counting to --rows) every --pause milliseconds:
+
+- none: no queries, the baseline,
+- sync: through `get_db()` on the event loop, like the previous handlers,
+- async: through `run_db`, using the async engine (or a thread without one).
+
+With `run_db` the p99 chunk delay stays close to the baseline, while sync
+queries delay chunks by the full query time.
+
+Runs against the configured DATABASE_URL (SQLite by default).
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_async_db [--chunks 300] [--interval 10] [--rows 1000000] [--pause 100]
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from open_webui.internal.db import async_engine, get_db, run_db
+
+
+def slow_query(rows: int) -> int:
+    with get_db() as db:
+        return db.execute(
+            text(
+                "WITH RECURSIVE c(x) AS "
+                "(SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < :rows) "
+                "SELECT count(*) FROM c"
+            ),
+            {"rows": rows},
+        ).scalar()
+
+
+async def stream(chunks: int, interval: float) -> list[float]:
+    queue = asyncio.Queue()
+
+    async def produce():
+        start = time.perf_counter()
+        for i in range(chunks):
+            # Chunks are due at a fixed rate, however late the previous one was
+            await asyncio.sleep(max(0, start + i * interval - time.perf_counter()))
+            queue.put_nowait(start + i * interval)
+        queue.put_nowait(None)
+
+    delays = []
+
+    async def consume():
+        while (due := await queue.get()) is not None:
+            delays.append(time.perf_counter() - due)
+
+    await asyncio.gather(produce(), consume())
+    return delays
+
+
+async def run(mode: str, chunks: int, interval: float, rows: int, pause: float):
+    done = asyncio.Event()
+    queries = 0
+
+    async def query_worker():
+        nonlocal queries
+        while not done.is_set():
+            if mode == "sync":
+                slow_query(rows)
+            else:
+                await run_db(slow_query, rows)
+            queries += 1
+            await asyncio.sleep(pause)
+
+    worker = asyncio.create_task(query_worker()) if mode != "none" else None
+    delays = await stream(chunks, interval)
+    done.set()
+    if worker:
+        await worker
+
+    delays.sort()
+    return (
+        delays[len(delays) // 2],
+        delays[min(len(delays) - 1, int(len(delays) * 0.99))],
+        delays[-1],
+        queries,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=300)
+    parser.add_argument(
+        "--interval", type=float, default=10, help="time between chunks, in ms"
+    )
+    parser.add_argument(
+        "--rows", type=int, default=1_000_000, help="size of the slow query"
+    )
+    parser.add_argument(
+        "--pause", type=float, default=100, help="time between queries, in ms"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    slow_query(args.rows)
+    print(
+        f"slow query: {(time.perf_counter() - start) * 1e3:.0f}ms, "
+        f"async engine: {async_engine.url.drivername if async_engine else None}"
+    )
+
+    print(f"{'queries':>8} {'p50':>10} {'p99':>10} {'max':>10} {'count':>6}")
+    for mode in ("none", "sync", "async"):
+        p50, p99, worst, queries = await run(
+            mode, args.chunks, args.interval / 1000, args.rows, args.pause / 1000
+        )
+        print(
+            f"{mode:>8} {p50 * 1e3:>8.2f}ms {p99 * 1e3:>8.2f}ms "
+            f"{worst * 1e3:>8.2f}ms {queries:>6}"
+        )
+
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
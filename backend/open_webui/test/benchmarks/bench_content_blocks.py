@@ -0,0 +1,148 @@
+"""
+Micro-benchmark of the streaming response handler's content-block processing.
+
+Replays an OpenAI-style SSE stream (by default a synthetic one of ~32k tokens
+with a <think> section, or a recorded stream passed with --stream) through:
+
+- the previous behaviour: a full tag rescan and a full serialization of all
+  content blocks for every delta,
+- the incremental `append_content_delta` / `ContentBlocksSerializer` path,
+
+checks that both produce the same blocks and content and prints the timings.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_content_blocks [--tokens 32000] [--stream FILE]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from open_webui.utils.content_blocks import (
+    ContentBlocksSerializer,
+    append_content_delta,
+    append_reasoning_delta,
+    serialize_content_blocks,
+)
+
+WORDS = (
+    "the model streams tokens while the handler renders markdown with code "
+    "blocks lists and tables for every chunk it receives from the provider"
+).split()
+
+
+def generate_stream(tokens: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+
+    values = ["<think>"]
+    for i in range(tokens):
+        if i == tokens // 4:
+            values.append("</think>\n\n")
+
+        word = rng.choice(WORDS)
+        if rng.random() < 0.05:
+            word = f"{word}.\n"
+        elif rng.random() < 0.01:
+            word = f"{word}\n```python\nprint({i})\n```\n"
+        values.append(f" {word}")
+
+    return [
+        "data: " + json.dumps({"choices": [{"delta": {"content": value}}]})
+        for value in values
+    ] + ["data: [DONE]"]
+
+
+def read_deltas(lines: list[str]) -> list[dict]:
+    deltas = []
+    for line in lines:
+        line = line.strip()
+        if not line.startswith("data:"):
+            continue
+
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            break
+
+        choices = json.loads(data).get("choices", [])
+        if choices:
+            deltas.append(choices[0].get("delta", {}))
+    return deltas
+
+
+def replay(deltas: list[dict], incremental: bool) -> tuple[list, str, float]:
+    content = ""
+    content_blocks = [{"type": "text", "content": content}]
+    serialize = ContentBlocksSerializer() if incremental else serialize_content_blocks
+
+    serialized = ""
+    start = time.perf_counter()
+    for delta in deltas:
+        reasoning_content = (
+            delta.get("reasoning_content")
+            or delta.get("reasoning")
+            or delta.get("thinking")
+        )
+        if reasoning_content:
+            content_blocks = append_reasoning_delta(content_blocks, reasoning_content)
+            serialized = serialize(content_blocks)
+
+        value = delta.get("content")
+        if value:
+            content, content_blocks, end = append_content_delta(
+                content, content_blocks, value, incremental=incremental
+            )
+            if end:
+                break
+            serialized = serialize(content_blocks)
+
+    return content_blocks, serialized, time.perf_counter() - start
+
+
+def strip_timings(content_blocks: list[dict]) -> list[dict]:
+    return [
+        {
+            key: value
+            for key, value in block.items()
+            if key not in ("started_at", "ended_at", "duration")
+        }
+        for block in content_blocks
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=32000)
+    parser.add_argument("--stream", help="recorded SSE stream to replay")
+    args = parser.parse_args()
+
+    if args.stream:
+        with open(args.stream) as f:
+            lines = f.readlines()
+    else:
+        lines = generate_stream(args.tokens)
+
+    deltas = read_deltas(lines)
+
+    full_blocks, _, full_time = replay(deltas, incremental=False)
+    incremental_blocks, incremental_content, incremental_time = replay(
+        deltas, incremental=True
+    )
+
+    # Reasoning durations depend on the replay speed, so they are left out
+    assert strip_timings(incremental_blocks) == strip_timings(full_blocks)
+    assert incremental_content == serialize_content_blocks(incremental_blocks)
+
+    print(f"deltas:      {len(deltas)}")
+    print(
+        f"full:        {full_time:.3f}s ({full_time / len(deltas) * 1e6:.1f}us/delta)"
+    )
+    print(
+        f"incremental: {incremental_time:.3f}s "
+        f"({incremental_time / len(deltas) * 1e6:.1f}us/delta)"
+    )
+    print(f"speedup:     {full_time / incremental_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
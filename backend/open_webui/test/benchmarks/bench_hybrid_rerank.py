@@ -0,0 +1,168 @@
+"""
+Micro-benchmark of hybrid search fusion and embedding-based reranking.
+
+For k = 10, 50 and 200 candidates per retriever, times:
+
+- the previous behaviour: LangChain's EnsembleRetriever over the BM25 and
+  vector results, re-embedding every fused candidate, and scoring and sorting
+  Python lists of (document, score) tuples,
+- `reciprocal_rank_fusion` and `RerankCompressor.rerank` using the vectors
+  returned by the vector search,
+
+checks that both select the same documents and prints the per-query latency.
+The embedding backend is simulated by a vector lookup plus --embedding-latency
+milliseconds per call, so the default measures CPU overhead only.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_hybrid_rerank [--dim 768] [--embedding-latency 0]
+"""
+
+import argparse
+import operator
+import time
+
+import numpy as np
+from langchain.retrievers import EnsembleRetriever
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from open_webui.retrieval.utils import RerankCompressor, reciprocal_rank_fusion
+
+
+class StaticRetriever(BaseRetriever):
+    documents: list[Document]
+
+    def _get_relevant_documents(self, query, *, run_manager) -> list[Document]:
+        return self.documents
+
+
+def make_embedding_function(vectors: dict[str, np.ndarray], latency: float):
+    def embedding_function(query, prefix=None):
+        if latency:
+            time.sleep(latency)
+        if isinstance(query, list):
+            return [vectors[text].tolist() for text in query]
+        return vectors[query].tolist()
+
+    return embedding_function
+
+
+def previous_path(query, bm25_docs, vector_docs, embedding_function, top_n):
+    ensemble = EnsembleRetriever(
+        retrievers=[
+            StaticRetriever(documents=bm25_docs),
+            StaticRetriever(documents=vector_docs),
+        ],
+        weights=[0.5, 0.5],
+    )
+    documents = ensemble.invoke(query)
+
+    query_embedding = np.asarray(embedding_function(query))
+    document_embedding = np.asarray(
+        embedding_function([doc.page_content for doc in documents])
+    )
+    # Equivalent of sentence_transformers.util.cos_sim(query, documents)[0]
+    scores = (
+        document_embedding / np.linalg.norm(document_embedding, axis=1)[:, None]
+    ) @ (query_embedding / np.linalg.norm(query_embedding))
+
+    docs_with_scores = list(zip(documents, scores.tolist()))
+    result = sorted(docs_with_scores, key=operator.itemgetter(1), reverse=True)
+    return [
+        Document(page_content=doc.page_content, metadata={**doc.metadata, "score": s})
+        for doc, s in result[:top_n]
+    ]
+
+
+def new_path(query, bm25_results, vector_results, embedding_function, top_n):
+    candidates, texts, embeddings = {}, [], []
+
+    def add(text, embedding=None):
+        idx = candidates.get(text)
+        if idx is None:
+            idx = candidates[text] = len(texts)
+            texts.append(text)
+            embeddings.append(embedding)
+        elif embeddings[idx] is None:
+            embeddings[idx] = embedding
+        return idx
+
+    rankings = [
+        [add(text) for text in bm25_results],
+        [add(text, vector) for text, vector in vector_results],
+    ]
+    order = reciprocal_rank_fusion(rankings, [0.5, 0.5])
+
+    compressor = RerankCompressor(
+        embedding_function=embedding_function,
+        top_n=top_n,
+        reranking_function=None,
+        r_score=0.0,
+    )
+    top, scores = compressor.rerank(
+        query,
+        [texts[idx] for idx in order],
+        embeddings=[embeddings[idx] for idx in order],
+        query_embedding=embedding_function(query),
+    )
+    return [texts[order[idx]] for idx in top]
+
+
+def run(k: int, dim: int, latency: float, iterations: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+
+    # Half of the BM25 hits are also vector hits
+    texts = [f"chunk {i}" for i in range(2 * k)]
+    vectors = {text: rng.standard_normal(dim) for text in texts + ["query"]}
+    bm25_texts = texts[: k // 2] + texts[k : k + (k - k // 2)]
+    vector_texts = texts[:k]
+
+    embedding_function = make_embedding_function(vectors, latency)
+    bm25_docs = [Document(page_content=text, metadata={}) for text in bm25_texts]
+    vector_docs = [Document(page_content=text, metadata={}) for text in vector_texts]
+    # Vector DBs like Chroma return the stored vectors as float32 arrays
+    vector_results = [(text, vectors[text].astype(np.float32)) for text in vector_texts]
+    top_n = min(k, 10)
+
+    previous = previous_path("query", bm25_docs, vector_docs, embedding_function, top_n)
+    new = new_path("query", bm25_texts, vector_results, embedding_function, top_n)
+    assert [doc.page_content for doc in previous] == new
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        previous_path("query", bm25_docs, vector_docs, embedding_function, top_n)
+    previous_time = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        new_path("query", bm25_texts, vector_results, embedding_function, top_n)
+    new_time = (time.perf_counter() - start) / iterations
+
+    return previous_time, new_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument(
+        "--embedding-latency",
+        type=float,
+        default=0.0,
+        help="simulated embedding backend latency per call, in ms",
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'k':>5} {'previous':>12} {'vectorized':>12} {'speedup':>8}")
+    for k in (10, 50, 200):
+        previous_time, new_time = run(
+            k, args.dim, args.embedding_latency / 1000, args.iterations
+        )
+        print(
+            f"{k:>5} {previous_time * 1e3:>10.3f}ms {new_time * 1e3:>10.3f}ms "
+            f"{previous_time / new_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
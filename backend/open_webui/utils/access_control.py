@@ -1,4 +1,4 @@
-from typing import Optional, Union, List, Dict, Any
+from typing import AbstractSet, Optional, Union, List, Dict, Any
 from open_webui.models.users import Users, UserModel
 from open_webui.models.groups import Groups
 
@@ -111,21 +111,31 @@ def has_access(
     user_id: str,
     type: str = "write",
     access_control: Optional[dict] = None,
+    user_group_ids: Optional[AbstractSet[str]] = None,
 ) -> bool:
+    """
+    Check `access_control` for `user_id`. Callers checking many resources pass
+    the user's `user_group_ids` (see `get_user_group_ids`) so they are only
+    resolved once.
+    """
     if access_control is None:
         return type == "read"
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
-    user_group_ids = [group.id for group in user_groups]
+    if user_group_ids is None:
+        user_group_ids = get_user_group_ids(user_id)
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
     permitted_user_ids = permission_access.get("user_ids", [])
 
-    return user_id in permitted_user_ids or any(
-        group_id in permitted_group_ids for group_id in user_group_ids
+    return user_id in permitted_user_ids or not user_group_ids.isdisjoint(
+        permitted_group_ids
     )
 
 
+def get_user_group_ids(user_id: str) -> AbstractSet[str]:
+    return Groups.get_group_ids_by_member_id(user_id)
+
+
 # Get all users with access to a resource
 def get_users_with_access(
     type: str = "write", access_control: Optional[dict] = None
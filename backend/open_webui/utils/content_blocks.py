@@ -0,0 +1,485 @@
+import html
+import json
+import re
+import time
+from typing import Optional
+
+
+REASONING_TAGS = [
+    ("think", "/think"),
+    ("thinking", "/thinking"),
+    ("reason", "/reason"),
+    ("reasoning", "/reasoning"),
+    ("thought", "/thought"),
+    ("Thought", "/Thought"),
+    ("|begin_of_thought|", "|end_of_thought|"),
+]
+
+CODE_INTERPRETER_TAGS = [("code_interpreter", "/code_interpreter")]
+
+SOLUTION_TAGS = [("|begin_of_solution|", "|end_of_solution|")]
+
+# How far back from the newly streamed text tags are looked for, so that tags
+# split across chunks (or with attributes) are still detected
+TAG_SCAN_LOOKBEHIND = 1024
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def render_reasoning_line(line: str) -> str:
+    return f"> {line}" if not line.startswith(">") else line
+
+
+def render_reasoning_content(reasoning_content: str) -> str:
+    return "\n".join(
+        render_reasoning_line(line) for line in reasoning_content.splitlines()
+    )
+
+
+def serialize_content_block(
+    content: str,
+    block: dict,
+    raw: bool = False,
+    reasoning_display_content: Optional[str] = None,
+) -> str:
+    """Render `block` after the already serialized `content`."""
+    if block["type"] == "text":
+        content = f"{content}{block['content'].strip()}\n"
+    elif block["type"] == "tool_calls":
+        attributes = block.get("attributes", {})
+
+        tool_calls = block.get("content", [])
+        results = block.get("results", [])
+
+        if results:
+
+            tool_calls_display_content = ""
+            for tool_call in tool_calls:
+
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_result = None
+                tool_result_files = None
+                for result in results:
+                    if tool_call_id == result.get("tool_call_id", ""):
+                        tool_result = result.get("content", None)
+                        tool_result_files = result.get("files", None)
+                        break
+
+                if tool_result:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                else:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                content = f"{content}\n{tool_calls_display_content}\n\n"
+        else:
+            tool_calls_display_content = ""
+
+            for tool_call in tool_calls:
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                content = f"{content}\n{tool_calls_display_content}\n\n"
+
+    elif block["type"] == "reasoning":
+        if reasoning_display_content is None:
+            reasoning_display_content = render_reasoning_content(block["content"])
+
+        reasoning_duration = block.get("duration", None)
+
+        if reasoning_duration is not None:
+            if raw:
+                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+    elif block["type"] == "code_interpreter":
+        attributes = block.get("attributes", {})
+        output = block.get("output", None)
+        lang = attributes.get("lang", "")
+
+        content_stripped, original_whitespace = split_content_and_whitespace(content)
+        if is_opening_code_block(content_stripped):
+            # Remove trailing backticks that would open a new block
+            content = content_stripped.rstrip("`").rstrip() + original_whitespace
+        else:
+            # Keep content as is - either closing backticks or no backticks
+            content = content_stripped + original_whitespace
+
+        if output:
+            output = html.escape(json.dumps(output))
+
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+    else:
+        block_content = str(block["content"]).strip()
+        content = f"{content}{block['type']}: {block_content}\n"
+
+    return content
+
+
+def serialize_content_blocks(content_blocks: list[dict], raw: bool = False) -> str:
+    content = ""
+
+    for block in content_blocks:
+        content = serialize_content_block(content, block, raw)
+
+    return content.strip()
+
+
+def tag_content_handler(content_type, tags, content, content_blocks, scan_from=0):
+    """
+    Split `content_blocks` on the start/end `tags` of `content_type` found in
+    the streamed `content`. Only `content[scan_from:]` is searched for tags, so
+    callers pass the position of the newly received text to avoid rescanning
+    the whole message on every chunk.
+    """
+    end_flag = False
+
+    def extract_attributes(tag_content):
+        """Extract attributes from a tag if they exist."""
+        attributes = {}
+        if not tag_content:  # Ensure tag_content is not None
+            return attributes
+        # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+        matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
+        for key, value in matches:
+            attributes[key] = value
+        return attributes
+
+    if content_blocks[-1]["type"] == "text":
+        for start_tag, end_tag in tags:
+            # Match start tag e.g., <tag> or <tag attr="value">
+            start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
+            match = re.compile(start_tag_pattern).search(content, scan_from)
+            if match:
+                attr_content = (
+                    match.group(1) if match.group(1) else ""
+                )  # Ensure it's not None
+                attributes = extract_attributes(
+                    attr_content
+                )  # Extract attributes safely
+
+                # Capture everything before and after the matched tag
+                before_tag = content[: match.start()]  # Content before opening tag
+                after_tag = content[match.end() :]  # Content after opening tag
+
+                # Remove the start tag and after from the currently handling text block
+                content_blocks[-1]["content"] = content_blocks[-1]["content"].replace(
+                    match.group(0) + after_tag, ""
+                )
+
+                if before_tag:
+                    content_blocks[-1]["content"] = before_tag
+
+                if not content_blocks[-1]["content"]:
+                    content_blocks.pop()
+
+                # Append the new block
+                content_blocks.append(
+                    {
+                        "type": content_type,
+                        "start_tag": start_tag,
+                        "end_tag": end_tag,
+                        "attributes": attributes,
+                        "content": "",
+                        "started_at": time.time(),
+                    }
+                )
+
+                if after_tag:
+                    content_blocks[-1]["content"] = after_tag
+                    tag_content_handler(content_type, tags, after_tag, content_blocks)
+
+                break
+    elif content_blocks[-1]["type"] == content_type:
+        start_tag = content_blocks[-1]["start_tag"]
+        end_tag = content_blocks[-1]["end_tag"]
+        # Match end tag e.g., </tag>
+        end_tag_pattern = rf"<{re.escape(end_tag)}>"
+
+        # Check if the content has the end tag
+        if re.compile(end_tag_pattern).search(content, scan_from):
+            end_flag = True
+
+            block_content = content_blocks[-1]["content"]
+            # Strip start and end tags from the content
+            start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
+            block_content = re.sub(start_tag_pattern, "", block_content).strip()
+
+            end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
+            split_content = end_tag_regex.split(block_content, maxsplit=1)
+
+            # Content inside the tag
+            block_content = split_content[0].strip() if split_content else ""
+
+            # Leftover content (everything after `</tag>`)
+            leftover_content = (
+                split_content[1].strip() if len(split_content) > 1 else ""
+            )
+
+            if block_content:
+                content_blocks[-1]["content"] = block_content
+                content_blocks[-1]["ended_at"] = time.time()
+                content_blocks[-1]["duration"] = int(
+                    content_blocks[-1]["ended_at"] - content_blocks[-1]["started_at"]
+                )
+
+                # Reset the content_blocks by appending a new text block
+                if content_type != "code_interpreter":
+                    if leftover_content:
+
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": leftover_content,
+                            }
+                        )
+                    else:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": "",
+                            }
+                        )
+
+            else:
+                # Remove the block if content is empty
+                content_blocks.pop()
+
+                if leftover_content:
+                    content_blocks.append(
+                        {
+                            "type": "text",
+                            "content": leftover_content,
+                        }
+                    )
+                else:
+                    content_blocks.append(
+                        {
+                            "type": "text",
+                            "content": "",
+                        }
+                    )
+
+            # Clean processed content
+            content = re.sub(
+                rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
+                "",
+                content,
+                flags=re.DOTALL,
+            )
+
+    return content, content_blocks, end_flag
+
+
+class ContentBlocksSerializer:
+    """
+    Incremental `serialize_content_blocks` for a message being streamed.
+
+    The serialized output of every block but the last is cached together with
+    the state it was rendered from, so each call only re-renders the last
+    (open) block, and a growing reasoning block only renders its new lines.
+    """
+
+    def __init__(self):
+        # [(block state, content serialized up to and including the block)]
+        self._prefix: list[tuple[tuple, str]] = []
+        # id(block) -> (block, rendered source prefix, rendered prefix)
+        self._reasoning: dict[int, tuple[dict, str, str]] = {}
+
+    @staticmethod
+    def _get_block_state(block: dict) -> tuple:
+        # Block values are replaced rather than mutated while streaming, so
+        # holding on to them and comparing identities detects any change.
+        return (block, *block.values())
+
+    @staticmethod
+    def _is_same_state(state: tuple, other: tuple) -> bool:
+        return len(state) == len(other) and all(
+            value is other_value for value, other_value in zip(state, other)
+        )
+
+    def _render_reasoning(self, block: dict) -> str:
+        reasoning_content = block["content"]
+
+        cached = self._reasoning.get(id(block))
+        if (
+            cached is not None
+            and cached[0] is block
+            and reasoning_content.startswith(cached[1])
+        ):
+            source, rendered = cached[1], cached[2]
+        else:
+            source, rendered = "", ""
+
+        # Render the complete lines received since the last call; the last,
+        # possibly incomplete line is rendered but not cached
+        line_end = reasoning_content.rfind("\n") + 1
+        if line_end > len(source):
+            lines = render_reasoning_content(reasoning_content[len(source) : line_end])
+            rendered = (
+                f"{rendered}\n{lines}" if rendered and lines else rendered or lines
+            )
+            source = reasoning_content[:line_end]
+            self._reasoning[id(block)] = (block, source, rendered)
+
+        tail = render_reasoning_content(reasoning_content[len(source) :])
+        return f"{rendered}\n{tail}" if rendered and tail else rendered or tail
+
+    def __call__(self, content_blocks: list[dict], raw: bool = False) -> str:
+        if raw:
+            return serialize_content_blocks(content_blocks, raw=True)
+
+        # Reuse the cached prefix as long as the blocks are unchanged
+        idx = 0
+        content = ""
+        while (
+            idx < len(self._prefix)
+            and idx < len(content_blocks) - 1
+            and self._is_same_state(
+                self._prefix[idx][0], self._get_block_state(content_blocks[idx])
+            )
+        ):
+            content = self._prefix[idx][1]
+            idx += 1
+        del self._prefix[idx:]
+
+        for block in content_blocks[idx:]:
+            content = serialize_content_block(
+                content,
+                block,
+                reasoning_display_content=(
+                    self._render_reasoning(block)
+                    if block["type"] == "reasoning"
+                    else None
+                ),
+            )
+            if block is not content_blocks[-1]:
+                self._prefix.append((self._get_block_state(block), content))
+
+        return content.strip()
+
+
+def get_tag_scan_start(content: str, value: str) -> int:
+    """Position in `content` from which newly appended `value` may form a tag."""
+    return max(0, len(content) - len(value) - TAG_SCAN_LOOKBEHIND)
+
+
+def append_reasoning_delta(content_blocks: list[dict], reasoning_content: str):
+    if not content_blocks or content_blocks[-1]["type"] != "reasoning":
+        reasoning_block = {
+            "type": "reasoning",
+            "start_tag": "think",
+            "end_tag": "/think",
+            "attributes": {"type": "reasoning_content"},
+            "content": "",
+            "started_at": time.time(),
+        }
+        content_blocks.append(reasoning_block)
+    else:
+        reasoning_block = content_blocks[-1]
+
+    reasoning_block["content"] += reasoning_content
+    return content_blocks
+
+
+def append_content_delta(
+    content: str,
+    content_blocks: list[dict],
+    value: str,
+    detect_reasoning: bool = True,
+    detect_code_interpreter: bool = False,
+    detect_solution: bool = True,
+    incremental: bool = True,
+):
+    """
+    Apply a streamed text delta to the message `content` and `content_blocks`.
+
+    Returns `(content, content_blocks, end)`, where `end` is set once a code
+    interpreter block has been closed. With `incremental=False` the whole
+    message is rescanned for tags, as it was before tag scanning was windowed.
+    """
+    if (
+        content_blocks
+        and content_blocks[-1]["type"] == "reasoning"
+        and content_blocks[-1].get("attributes", {}).get("type") == "reasoning_content"
+    ):
+        reasoning_block = content_blocks[-1]
+        reasoning_block["ended_at"] = time.time()
+        reasoning_block["duration"] = int(
+            reasoning_block["ended_at"] - reasoning_block["started_at"]
+        )
+
+        content_blocks.append(
+            {
+                "type": "text",
+                "content": "",
+            }
+        )
+
+    content = f"{content}{value}"
+    if not content_blocks:
+        content_blocks.append(
+            {
+                "type": "text",
+                "content": "",
+            }
+        )
+
+    content_blocks[-1]["content"] = content_blocks[-1]["content"] + value
+
+    end = False
+    for enabled, content_type, tags in (
+        (detect_reasoning, "reasoning", REASONING_TAGS),
+        (detect_code_interpreter, "code_interpreter", CODE_INTERPRETER_TAGS),
+        (detect_solution, "solution", SOLUTION_TAGS),
+    ):
+        if not enabled:
+            continue
+
+        content, content_blocks, end_flag = tag_content_handler(
+            content_type,
+            tags,
+            content,
+            content_blocks,
+            scan_from=get_tag_scan_start(content, value) if incremental else 0,
+        )
+
+        if content_type == "code_interpreter" and end_flag:
+            end = True
+            break
+
+    return content, content_blocks, end
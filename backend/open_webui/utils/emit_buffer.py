@@ -0,0 +1,168 @@
+import asyncio
+import time
+from typing import Optional
+
+from open_webui.env import (
+    CHAT_STREAM_EMIT_INTERVAL,
+    CHAT_STREAM_EMIT_MODE,
+    CHAT_STREAM_RESYNC_INTERVAL,
+)
+
+MESSAGE_EMIT_METRICS = {
+    "updates": 0,
+    "emits": 0,
+    "resyncs": 0,
+    # Characters sent, against those the full content of every update has
+    "emitted_chars": 0,
+    "content_chars": 0,
+}
+
+
+def get_message_emit_metrics() -> dict:
+    return {**MESSAGE_EMIT_METRICS, "mode": CHAT_STREAM_EMIT_MODE}
+
+
+def get_utf16_length(text: str) -> int:
+    # The length of the text as a JavaScript string
+    return len(text.encode("utf-16-le")) // 2
+
+
+def get_common_prefix_length(a: str, b: str) -> int:
+    if b.startswith(a):
+        return len(a)
+
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class MessageEmitBuffer:
+    """
+    Event emitter of a streamed message that coalesces its content updates.
+
+    In "delta" mode, `chat:completion` events carrying only the content are
+    collected for `interval` seconds, then sent as `{"offset", "content_delta"}`:
+    the client replaces its content from `offset` (a JavaScript string index)
+    with `content_delta`, usually the appended text. The full content is sent
+    again every `resync_interval` seconds. Other events are sent as is, after
+    the pending content. In "full" mode all events are sent as is.
+
+    In "delta" mode every event with the content or a delta of it is numbered
+    by `seq`, and deltas carry the `length` of the content they apply to, so
+    the client can drop the deltas following a missed or reordered event until
+    the next full content.
+    """
+
+    def __init__(
+        self,
+        event_emitter,
+        mode: str = CHAT_STREAM_EMIT_MODE,
+        interval: float = CHAT_STREAM_EMIT_INTERVAL,
+        resync_interval: float = CHAT_STREAM_RESYNC_INTERVAL,
+    ):
+        self.event_emitter = event_emitter
+        self.mode = mode
+        self.interval = interval
+        self.resync_interval = resync_interval
+
+        # Content the client has, and its length as a JavaScript string
+        self.content: Optional[str] = None
+        self.content_length = 0
+        # Number of the last event sent with the content or a delta of it
+        self.seq = 0
+
+        self.pending: Optional[str] = None
+        self.last_emit_at = 0.0
+        self.last_resync_at = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, event: dict):
+        data = event.get("data") if event.get("type") == "chat:completion" else None
+        content = data.get("content") if isinstance(data, dict) else None
+
+        if isinstance(content, str) and data.keys() == {"content"}:
+            MESSAGE_EMIT_METRICS["updates"] += 1
+            MESSAGE_EMIT_METRICS["content_chars"] += len(content)
+
+            if self.mode == "delta":
+                await self.update(content)
+                return
+
+            MESSAGE_EMIT_METRICS["emits"] += 1
+            MESSAGE_EMIT_METRICS["emitted_chars"] += len(content)
+
+        await self.flush()
+        async with self._lock:
+            if isinstance(content, str):
+                self.content = content
+                self.content_length = get_utf16_length(content)
+                if self.mode == "delta":
+                    self.seq += 1
+                    event = {**event, "data": {**data, "seq": self.seq}}
+            await self.event_emitter(event)
+
+    async def update(self, content: str):
+        self.pending = content
+
+        elapsed = time.monotonic() - self.last_emit_at
+        if elapsed >= self.interval:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.interval - elapsed, self._flush_later
+            )
+
+    def _flush_later(self):
+        self._timer = None
+        self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._lock:
+            if self.pending is None:
+                return
+            content, self.pending = self.pending, None
+
+            now = time.monotonic()
+            if (
+                self.content is None
+                or now - self.last_resync_at >= self.resync_interval
+            ):
+                MESSAGE_EMIT_METRICS["resyncs"] += 1
+                data = {"content": content}
+                sent = content
+                length = get_utf16_length(content)
+                self.last_resync_at = now
+            else:
+                prefix = get_common_prefix_length(self.content, content)
+                if prefix == len(self.content) == len(content):
+                    return
+
+                sent = content[prefix:]
+                offset = self.content_length - get_utf16_length(self.content[prefix:])
+                data = {
+                    "offset": offset,
+                    "content_delta": sent,
+                    "length": self.content_length,
+                }
+                length = offset + get_utf16_length(sent)
+
+            self.content = content
+            self.content_length = length
+            self.last_emit_at = now
+            self.seq += 1
+            data["seq"] = self.seq
+
+            MESSAGE_EMIT_METRICS["emits"] += 1
+            MESSAGE_EMIT_METRICS["emitted_chars"] += len(sent)
+            await self.event_emitter({"type": "chat:completion", "data": data})
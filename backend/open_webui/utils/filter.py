@@ -1,17 +1,26 @@
 import inspect
 import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
 
 from open_webui.utils.plugin import (
     load_function_module_by_id,
     get_function_module_from_cache,
 )
-from open_webui.models.functions import Functions
+from open_webui.models.functions import Functions, FunctionModel
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
+FILTER_TYPES = ("inlet", "stream", "outlet")
+
+# Cached filter chains (combinations of model filters and enabled toggles)
+MAX_FILTER_CHAINS = 1024
+
+
 def get_function_module(request, function_id, load_from_db=True):
     """
     Get the function module by its ID.
@@ -22,39 +31,149 @@ def get_function_module(request, function_id, load_from_db=True):
     return function_module
 
 
-def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None):
-    def get_priority(function_id):
-        function = Functions.get_function_by_id(function_id)
-        if function is not None:
-            valves = Functions.get_function_valves_by_id(function_id)
-            return valves.get("priority", 0) if valves else 0
-        return 0
-
-    filter_ids = [function.id for function in Functions.get_global_filter_functions()]
-    if "info" in model and "meta" in model["info"]:
-        filter_ids.extend(model["info"]["meta"].get("filterIds", []))
-        filter_ids = list(set(filter_ids))
-    active_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
-    ]
+@dataclass
+class CompiledFilter:
+    """
+    A filter function as run by `process_filter_functions`: its module, valves
+    and handler signatures, resolved once per function version.
+    """
+
+    id: str
+    module: Any
+    valves: Any = None
+    priority: int = 0
+    is_global: bool = False
+    toggle: bool = False
+    # filter type -> (handler, parameter names, is coroutine)
+    handlers: dict[str, tuple[Callable, frozenset[str], bool]] = field(
+        default_factory=dict
+    )
 
-    def get_active_status(filter_id):
-        function_module = get_function_module(request, filter_id)
 
-        if getattr(function_module, "toggle", None):
-            return filter_id in (enabled_filter_ids or [])
+def compile_filter(
+    request, function: FunctionModel, valves: Optional[dict] = None
+) -> CompiledFilter:
+    function_module = get_function_module(request, function.id)
+    if valves is None:
+        valves = Functions.get_function_valves_by_id(function.id) or {}
+
+    handlers = {}
+    for filter_type in FILTER_TYPES:
+        handler = getattr(function_module, filter_type, None)
+        if handler:
+            handlers[filter_type] = (
+                handler,
+                frozenset(inspect.signature(handler).parameters),
+                inspect.iscoroutinefunction(handler),
+            )
+
+    return CompiledFilter(
+        id=function.id,
+        module=function_module,
+        valves=(
+            function_module.Valves(**valves)
+            if hasattr(function_module, "valves") and hasattr(function_module, "Valves")
+            else None
+        ),
+        priority=valves.get("priority", 0),
+        is_global=bool(function.is_global),
+        toggle=bool(getattr(function_module, "toggle", None)),
+        handlers=handlers,
+    )
 
-        return True
 
-    active_filter_ids = [
-        filter_id for filter_id in active_filter_ids if get_active_status(filter_id)
+class FilterCache:
+    """
+    Active filter functions compiled once per functions version, and the
+    sorted filter chains built from them. The version changes with every
+    Function row change (see `ModelRegistry.functions_version`), so valves,
+    code and activation changes are picked up without reading the functions
+    on every inlet, stream or outlet pass.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.filters: dict[str, CompiledFilter] = {}
+        self.chains: dict[tuple, list[CompiledFilter]] = {}
+        self._lock = threading.Lock()
+
+    def get_filters(self, request) -> dict[str, CompiledFilter]:
+        # Imported here as the registry depends on the routers
+        from open_webui.utils.models import MODEL_REGISTRY
+
+        version = MODEL_REGISTRY.functions_version
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    functions = Functions.get_functions_by_type(
+                        "filter", active_only=True
+                    )
+                    valves = Functions.get_function_valves_by_ids(
+                        [function.id for function in functions]
+                    )
+                    self.filters = {
+                        function.id: compile_filter(
+                            request, function, valves.get(function.id)
+                        )
+                        for function in functions
+                    }
+                    self.chains = {}
+                    self.version = version
+        return self.filters
+
+    def get_chain(
+        self, request, model: dict, enabled_filter_ids: Optional[list] = None
+    ) -> list[CompiledFilter]:
+        filters = self.get_filters(request)
+
+        model_filter_ids = []
+        if "info" in model and "meta" in model["info"]:
+            model_filter_ids = model["info"]["meta"].get("filterIds", [])
+
+        key = (tuple(model_filter_ids), frozenset(enabled_filter_ids or []))
+        chain = self.chains.get(key)
+        if chain is None:
+            filter_ids = set(model_filter_ids)
+            chain = [
+                filter
+                for filter in filters.values()
+                if (filter.is_global or filter.id in filter_ids)
+                and (not filter.toggle or filter.id in key[1])
+            ]
+            chain.sort(key=lambda filter: filter.priority)
+
+            if len(self.chains) >= MAX_FILTER_CHAINS:
+                self.chains = {}
+            self.chains[key] = chain
+        return chain
+
+
+FILTER_CACHE = FilterCache()
+
+
+def get_sorted_filters(
+    request, model: dict, enabled_filter_ids: list = None
+) -> list[CompiledFilter]:
+    return FILTER_CACHE.get_chain(request, model, enabled_filter_ids)
+
+
+def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None):
+    return [
+        filter.id for filter in get_sorted_filters(request, model, enabled_filter_ids)
     ]
 
-    filter_ids = [fid for fid in filter_ids if fid in active_filter_ids]
-    filter_ids.sort(key=get_priority)
 
-    return filter_ids
+def get_user_valves(filter_id: str, user: dict) -> dict:
+    # The user's settings are part of `__user__`, which spares a lookup
+    if "settings" in user:
+        settings = user["settings"] or {}
+        if not isinstance(settings, dict):
+            settings = settings.model_dump()
+        return ((settings.get("functions") or {}).get("valves") or {}).get(
+            filter_id, {}
+        )
+
+    return Functions.get_user_valves_by_id_and_user_id(filter_id, user["id"]) or {}
 
 
 async def process_filter_functions(
@@ -63,34 +182,35 @@ async def process_filter_functions(
     skip_files = None
 
     for function in filter_functions:
-        filter = function
-        filter_id = function.id
-        if not filter:
+        if not function:
             continue
 
-        function_module = get_function_module(
-            request, filter_id, load_from_db=(filter_type != "stream")
-        )
+        # Functions given as rows (rather than from get_sorted_filters) are
+        # resolved from the cache as well
+        if isinstance(function, CompiledFilter):
+            filter = function
+        else:
+            filter = FILTER_CACHE.get_filters(request).get(function.id)
+            if filter is None:
+                filter = compile_filter(request, function)
+        filter_id = filter.id
+
+        function_module = filter.module
         # Prepare handler function
-        handler = getattr(function_module, filter_type, None)
-        if not handler:
+        if filter_type not in filter.handlers:
             continue
+        handler, parameters, is_coroutine = filter.handlers[filter_type]
 
         # Check if the function has a file_handler variable
         if filter_type == "inlet" and hasattr(function_module, "file_handler"):
             skip_files = function_module.file_handler
 
         # Apply valves to the function
-        if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
-            function_module.valves = function_module.Valves(
-                **(valves if valves else {})
-            )
+        if filter.valves is not None:
+            function_module.valves = filter.valves
 
         try:
             # Prepare parameters
-            sig = inspect.signature(handler)
-
             params = {"body": form_data}
             if filter_type == "stream":
                 params = {"event": form_data}
@@ -101,23 +221,21 @@ async def process_filter_functions(
                     **extra_params,
                     "__id__": filter_id,
                 }.items()
-                if k in sig.parameters
+                if k in parameters
             }
 
             # Handle user parameters
-            if "__user__" in sig.parameters:
+            if "__user__" in parameters:
                 if hasattr(function_module, "UserValves"):
                     try:
                         params["__user__"]["valves"] = function_module.UserValves(
-                            **Functions.get_user_valves_by_id_and_user_id(
-                                filter_id, params["__user__"]["id"]
-                            )
+                            **get_user_valves(filter_id, params["__user__"])
                         )
                     except Exception as e:
                         log.exception(f"Failed to get user values: {e}")
 
             # Execute handler
-            if inspect.iscoroutinefunction(handler):
+            if is_coroutine:
                 form_data = await handler(**params)
             else:
                 form_data = handler(**params)
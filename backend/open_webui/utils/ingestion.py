@@ -0,0 +1,422 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Optional
+
+from fastapi import FastAPI, Request
+
+from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    INGESTION_EMBED_CONCURRENCY,
+    INGESTION_EXTRACT_CONCURRENCY,
+    INGESTION_INDEX_CONCURRENCY,
+    INGESTION_JOB_MAX_ATTEMPTS,
+    INGESTION_JOB_TIMEOUT,
+    INGESTION_MAX_JOBS,
+    INGESTION_POLL_INTERVAL,
+    INGESTION_SPLIT_CONCURRENCY,
+)
+from open_webui.models.bm25 import BM25Indexes
+from open_webui.models.files import FileModel, Files
+from open_webui.models.ingestion_jobs import IngestionJobModel, IngestionJobs
+from open_webui.models.knowledge import Knowledges
+from open_webui.models.users import Users
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.routers.audio import transcribe
+from open_webui.routers.retrieval import (
+    ProcessFileForm,
+    check_duplicate_content,
+    aembed_texts,
+    get_docs_texts_and_metadatas,
+    insert_docs_to_vector_db,
+    load_file_docs,
+    prepare_collection,
+    split_docs,
+)
+from open_webui.socket.main import emit_to_user
+from open_webui.storage.provider import Storage
+from open_webui.utils.misc import calculate_sha256_string
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+STAGES = ["extract", "split", "embed", "index"]
+
+# Seconds between requeueing stale jobs and removing finished ones
+MAINTENANCE_INTERVAL = 60
+# Seconds between refreshing the jobs this worker runs, well below the
+# INGESTION_JOB_TIMEOUT after which they would be requeued
+HEARTBEAT_INTERVAL = 60
+# Seconds finished jobs are kept for status lookups
+FINISHED_JOB_RETENTION = 24 * 60 * 60
+
+
+def is_audio_content_type(content_type: Optional[str]) -> bool:
+    return bool(content_type) and (
+        content_type.startswith("audio/") or content_type in {"video/webm"}
+    )
+
+
+def is_processable_content_type(request: Request, content_type: Optional[str]):
+    # Files without a content type are processed anyway
+    return (
+        not content_type
+        or is_audio_content_type(content_type)
+        or not content_type.startswith(("image/", "video/"))
+        or request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
+    )
+
+
+def enqueue_file_processing(
+    request: Request,
+    user_id: str,
+    file_id: str,
+    collection_name: Optional[str] = None,
+) -> IngestionJobModel:
+    """
+    Queue the file to be processed into its own collection, or to be added to
+    the knowledge base `collection_name` once the file itself is processed.
+    """
+    if collection_name is None:
+        Files.update_file_data_by_id(file_id, {"status": "pending", "error": None})
+
+    job = IngestionJobs.insert_new_job(user_id, file_id, collection_name)
+    if job is None:
+        raise Exception(ERROR_MESSAGES.DEFAULT("Error enqueueing file processing"))
+
+    worker = getattr(request.app.state, "ingestion_worker", None)
+    if worker is not None:
+        worker.notify()
+
+    return job
+
+
+class IngestionWorker:
+    """
+    Processes the ingestion jobs of the queue in this process.
+
+    Each job runs through the extract, split, embed and index stages, with the
+    number of jobs in each stage limited separately: a slow OCR run does not
+    hold back embedding, and a bulk import keeps the embedding servers busy
+    with up to `INGESTION_EMBED_CONCURRENCY` requests. Failed jobs are retried
+    from the start with a backoff, every stage can be repeated safely.
+    Progress is emitted to the sessions of the job's user as `file-events`.
+    """
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self.id = str(uuid.uuid4())
+
+        self.semaphores = {
+            "extract": asyncio.Semaphore(INGESTION_EXTRACT_CONCURRENCY),
+            "split": asyncio.Semaphore(INGESTION_SPLIT_CONCURRENCY),
+            "embed": asyncio.Semaphore(INGESTION_EMBED_CONCURRENCY),
+            "index": asyncio.Semaphore(INGESTION_INDEX_CONCURRENCY),
+        }
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        # Running tasks and the ids of their jobs
+        self.jobs: dict[asyncio.Task, str] = {}
+
+    def notify(self):
+        # Called from the threads sync endpoints run in
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+        log.info(f"Ingestion worker {self.id} started")
+
+    async def stop(self):
+        if self.task is None:
+            return
+
+        self.task.cancel()
+        for task in self.jobs:
+            task.cancel()
+        await asyncio.gather(self.task, *self.jobs, return_exceptions=True)
+
+        # Jobs interrupted here are picked up again by the next worker
+        count = await asyncio.to_thread(
+            IngestionJobs.requeue_jobs_by_worker_id, self.id
+        )
+        if count:
+            log.info(f"Requeued {count} interrupted ingestion jobs")
+
+    async def run(self):
+        last_maintenance = 0.0
+        last_heartbeat = time.monotonic()
+
+        while True:
+            try:
+                if time.monotonic() - last_heartbeat > HEARTBEAT_INTERVAL:
+                    last_heartbeat = time.monotonic()
+                    await self.heartbeat()
+
+                if time.monotonic() - last_maintenance > MAINTENANCE_INTERVAL:
+                    last_maintenance = time.monotonic()
+                    await self.maintain()
+
+                available = INGESTION_MAX_JOBS - len(self.jobs)
+                if available > 0:
+                    for job in await asyncio.to_thread(
+                        IngestionJobs.claim_jobs, self.id, available
+                    ):
+                        task = asyncio.create_task(self.process_job(job))
+                        self.jobs[task] = job.id
+                        task.add_done_callback(self.on_job_done)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Error claiming ingestion jobs: {e}")
+
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), INGESTION_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def on_job_done(self, task: asyncio.Task):
+        self.jobs.pop(task, None)
+        # Claim the next job right away, e.g. the knowledge base job of a file
+        self.wakeup.set()
+
+    async def heartbeat(self):
+        # Jobs waiting for a stage are not updated otherwise
+        try:
+            await asyncio.to_thread(
+                IngestionJobs.touch_jobs_by_ids, list(self.jobs.values()), self.id
+            )
+        except Exception as e:
+            log.warning(f"Error refreshing ingestion jobs: {e}")
+
+    async def maintain(self):
+        count = await asyncio.to_thread(
+            IngestionJobs.requeue_stale_jobs, INGESTION_JOB_TIMEOUT, self.id
+        )
+        if count:
+            log.warning(f"Requeued {count} stale ingestion jobs")
+
+        await asyncio.to_thread(
+            IngestionJobs.delete_finished_jobs,
+            time.time_ns() - FINISHED_JOB_RETENTION * 1_000_000_000,
+        )
+
+    async def emit(self, job: IngestionJobModel):
+        try:
+            await emit_to_user(
+                job.user_id,
+                "file-events",
+                {
+                    "file_id": job.file_id,
+                    "job_id": job.id,
+                    "collection_name": job.collection_name,
+                    "status": job.status,
+                    "stage": job.stage,
+                    "progress": job.progress,
+                    "error": job.error,
+                },
+            )
+        except Exception as e:
+            log.debug(f"Error emitting ingestion job {job.id}: {e}")
+
+    async def process_job(self, job: IngestionJobModel):
+        request = Request({"type": "http", "app": self.app, "headers": []})
+        state = {}
+
+        try:
+            for idx, stage in enumerate(STAGES):
+                async with self.semaphores[stage]:
+                    job = await asyncio.to_thread(
+                        IngestionJobs.update_job_by_id,
+                        job.id,
+                        stage=stage,
+                        progress=idx * 100 // len(STAGES),
+                    )
+                    await self.emit(job)
+
+                    stage_function = getattr(self, stage)
+                    if asyncio.iscoroutinefunction(stage_function):
+                        done = await stage_function(request, job, state)
+                    else:
+                        done = await asyncio.to_thread(
+                            stage_function, request, job, state
+                        )
+                if done:
+                    break
+
+            if job.collection_name is None:
+                await asyncio.to_thread(
+                    Files.update_file_data_by_id, job.file_id, {"status": "completed"}
+                )
+
+            job = await asyncio.to_thread(IngestionJobs.complete_job_by_id, job.id)
+            await self.emit(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.exception(f"Error processing ingestion job {job.id}: {e}")
+            await self.fail(job, e)
+
+    async def fail(self, job: IngestionJobModel, e: Exception):
+        error = str(e.detail) if hasattr(e, "detail") else str(e)
+
+        # Missing files, invalid, duplicate or empty content and a missing
+        # pandoc fail the same way every time
+        retry = True
+        if isinstance(e, ValueError):
+            retry = False
+        elif "No pandoc was found" in error:
+            error = ERROR_MESSAGES.PANDOC_NOT_INSTALLED
+            retry = False
+
+        job = await asyncio.to_thread(
+            IngestionJobs.fail_job_by_id,
+            job.id,
+            error,
+            INGESTION_JOB_MAX_ATTEMPTS,
+            retry,
+        )
+        if job is None:
+            return
+
+        if job.status == "failed":
+            if job.collection_name is None:
+                await asyncio.to_thread(
+                    Files.update_file_data_by_id,
+                    job.file_id,
+                    {"status": "failed", "error": error},
+                )
+            else:
+                await asyncio.to_thread(
+                    remove_file_from_knowledge, job.collection_name, job.file_id
+                )
+
+        await self.emit(job)
+
+    ####################
+    # Stages, run with the state of the previous stages. The embed stage sends
+    # its requests from the event loop, the others run in a thread
+    ####################
+
+    def extract(self, request: Request, job: IngestionJobModel, state: dict) -> bool:
+        file = Files.get_file_by_id(job.file_id)
+        if file is None:
+            raise ValueError(ERROR_MESSAGES.NOT_FOUND)
+
+        if job.collection_name is not None:
+            # The content comes from the upload job of the file, queued before
+            data = file.data or {}
+            if data.get("status") == "failed":
+                raise ValueError(data.get("error") or ERROR_MESSAGES.FILE_NOT_PROCESSED)
+
+        content = job.content
+        if (
+            content is None
+            and job.collection_name is None
+            and is_audio_content_type(file.meta.get("content_type"))
+        ):
+            result = transcribe(
+                request, Storage.get_file(file.path), file.meta.get("data", {})
+            )
+            content = result.get("text", "")
+
+        docs, text_content = load_file_docs(
+            request,
+            file,
+            ProcessFileForm(
+                file_id=file.id, content=content, collection_name=job.collection_name
+            ),
+        )
+
+        log.debug(f"text_content: {text_content}")
+        Files.update_file_data_by_id(file.id, {"content": text_content})
+
+        hash = calculate_sha256_string(text_content)
+        Files.update_file_hash_by_id(file.id, hash)
+
+        state["file"] = file
+        state["docs"] = docs
+        state["hash"] = hash
+        state["collection_name"] = job.collection_name or f"file-{file.id}"
+
+        return request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
+
+    def split(self, request: Request, job: IngestionJobModel, state: dict) -> bool:
+        file: FileModel = state["file"]
+        collection_name = state["collection_name"]
+        metadata = {"file_id": file.id, "name": file.filename, "hash": state["hash"]}
+
+        # The file's own collection is replaced as a whole when indexing. In a
+        # knowledge base, chunks of the file left by an earlier attempt, also
+        # one requeued without counting as an attempt, are replaced as well.
+        if job.collection_name is not None:
+            delete_file_from_collection(collection_name, file.id)
+            check_duplicate_content(collection_name, metadata)
+
+        docs = split_docs(request, state["docs"])
+        if len(docs) == 0:
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+        state["texts"], state["metadatas"] = get_docs_texts_and_metadatas(
+            request, docs, metadata
+        )
+        return False
+
+    async def embed(
+        self, request: Request, job: IngestionJobModel, state: dict
+    ) -> bool:
+        user = await asyncio.to_thread(Users.get_user_by_id, job.user_id)
+        state["embeddings"] = await aembed_texts(request, state["texts"], user=user)
+        return False
+
+    def index(self, request: Request, job: IngestionJobModel, state: dict) -> bool:
+        collection_name = state["collection_name"]
+
+        new_collection = prepare_collection(
+            collection_name, overwrite=job.collection_name is None, add=True
+        )
+        insert_docs_to_vector_db(
+            collection_name,
+            state["texts"],
+            state["embeddings"],
+            state["metadatas"],
+            new_collection,
+        )
+
+        Files.update_file_metadata_by_id(
+            job.file_id, {"collection_name": collection_name}
+        )
+        return True
+
+
+def delete_file_from_collection(collection_name: str, file_id: str):
+    """
+    Remove the chunks of the file already in the collection, e.g. left behind
+    by an interrupted attempt, before it is indexed again.
+    """
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=collection_name, filter={"file_id": file_id}
+    )
+    if result is not None and result.ids[0]:
+        VECTOR_DB_CLIENT.delete(collection_name=collection_name, ids=result.ids[0])
+        BM25Indexes.delete_documents(collection_name, ids=result.ids[0])
+
+
+def remove_file_from_knowledge(knowledge_id: str, file_id: str):
+    knowledge = Knowledges.get_knowledge_by_id(id=knowledge_id)
+    if knowledge is None:
+        return
+
+    data = knowledge.data or {}
+    file_ids = data.get("file_ids", [])
+    if file_id in file_ids:
+        file_ids.remove(file_id)
+        data["file_ids"] = file_ids
+        Knowledges.update_knowledge_data_by_id(id=knowledge_id, data=data)
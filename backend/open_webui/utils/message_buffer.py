@@ -0,0 +1,247 @@
+import asyncio
+import atexit
+import logging
+import time
+from typing import Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REALTIME_CHAT_SAVE_INTERVAL,
+    REALTIME_CHAT_SAVE_MAX_BYTES,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+# Buffers of the messages currently being streamed, keyed by (chat_id, message_id)
+MESSAGE_SAVE_BUFFERS: dict[tuple[str, str], "MessageSaveBuffer"] = {}
+
+# Retries of the last save of a closed buffer, before the synchronous upsert
+MESSAGE_SAVE_CLOSE_RETRIES = 2
+MESSAGE_SAVE_CLOSE_RETRY_DELAY = 0.5
+
+MESSAGE_SAVE_METRICS = {
+    "updates": 0,
+    "flushes": 0,
+    "flushed_bytes": 0,
+    "flush_errors": 0,
+    "flush_latency_total": 0.0,
+    "flush_latency_max": 0.0,
+}
+
+
+def get_message_save_metrics() -> dict:
+    flushes = MESSAGE_SAVE_METRICS["flushes"]
+    return {
+        **MESSAGE_SAVE_METRICS,
+        "flush_latency_avg": (
+            MESSAGE_SAVE_METRICS["flush_latency_total"] / flushes if flushes else 0.0
+        ),
+        "active_buffers": len(MESSAGE_SAVE_BUFFERS),
+    }
+
+
+def get_message_size(message: dict) -> int:
+    return sum(len(value) for value in message.values() if isinstance(value, str))
+
+
+class MessageSaveBuffer:
+    """
+    Write-behind buffer for the realtime save of a streamed message.
+
+    Updates only replace the pending fields in memory. They are written to the
+    database in the background at most every `interval` seconds, as soon as
+    `max_bytes` of new content are pending, and when the buffer is closed.
+    Fields that fail to save stay pending and are retried on the next flush.
+    """
+
+    def __init__(
+        self,
+        chat_id: str,
+        message_id: str,
+        interval: float = REALTIME_CHAT_SAVE_INTERVAL,
+        max_bytes: int = REALTIME_CHAT_SAVE_MAX_BYTES,
+    ):
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.interval = interval
+        self.max_bytes = max_bytes
+
+        self.pending: dict = {}
+        self.flushed_size = 0
+        self.last_flush_at = time.monotonic()
+        self.closed = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+        # Take over what a previous buffer of the message has not saved yet
+        previous = MESSAGE_SAVE_BUFFERS.get((chat_id, message_id))
+        if previous is not None:
+            previous.closed = True
+            previous._cancel_timer()
+            self.pending = previous.pending
+        MESSAGE_SAVE_BUFFERS[(chat_id, message_id)] = self
+
+    def update(self, message: dict):
+        MESSAGE_SAVE_METRICS["updates"] += 1
+        self.pending.update(message)
+
+        pending_bytes = abs(get_message_size(self.pending) - self.flushed_size)
+        elapsed = time.monotonic() - self.last_flush_at
+
+        if pending_bytes >= self.max_bytes or elapsed >= self.interval:
+            self._flush_later()
+        else:
+            # Bound the time an update can stay unsaved if the stream stalls
+            self._schedule(self.interval - elapsed)
+
+    def _schedule(self, delay: float):
+        if self._timer is None and not self.closed:
+            self._timer = asyncio.get_running_loop().call_later(
+                delay, self._flush_later
+            )
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_later(self):
+        self._cancel_timer()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> bool:
+        self._cancel_timer()
+
+        async with self._lock:
+            if not self.pending:
+                return True
+
+            message = dict(self.pending)
+            size = get_message_size(message)
+
+            start = time.perf_counter()
+            try:
+                result = await Chats.aupsert_message_to_chat_by_id_and_message_id(
+                    self.chat_id, self.message_id, message
+                )
+            except Exception as e:
+                log.exception(f"Error saving message {self.message_id}: {e}")
+                result = None
+
+            if result is None:
+                MESSAGE_SAVE_METRICS["flush_errors"] += 1
+                log.warning(
+                    f"Message {self.message_id} of chat {self.chat_id} was not saved"
+                )
+                self._schedule(self.interval)
+                return False
+
+            latency = time.perf_counter() - start
+            MESSAGE_SAVE_METRICS["flushes"] += 1
+            MESSAGE_SAVE_METRICS["flushed_bytes"] += size
+            MESSAGE_SAVE_METRICS["flush_latency_total"] += latency
+            MESSAGE_SAVE_METRICS["flush_latency_max"] = max(
+                MESSAGE_SAVE_METRICS["flush_latency_max"], latency
+            )
+
+            # Fields updated while they were written stay pending
+            for key, value in message.items():
+                if self.pending.get(key) is value:
+                    del self.pending[key]
+            self.flushed_size = size
+            self.last_flush_at = time.monotonic()
+
+            if self.pending:
+                self._schedule(self.interval)
+            return True
+
+    def _unregister(self):
+        if MESSAGE_SAVE_BUFFERS.get((self.chat_id, self.message_id)) is self:
+            del MESSAGE_SAVE_BUFFERS[(self.chat_id, self.message_id)]
+
+    async def close(self) -> bool:
+        """
+        Write the pending fields, retrying a failed save a few times and then
+        with the synchronous upsert. The buffer stays registered until its
+        fields are saved, for `flush_message_save_buffers` and the exit hook.
+        """
+        self.closed = True
+        self._cancel_timer()
+
+        if self._flush_task is not None and not self._flush_task.done():
+            await asyncio.wait([self._flush_task])
+
+        for attempt in range(MESSAGE_SAVE_CLOSE_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(MESSAGE_SAVE_CLOSE_RETRY_DELAY)
+            if await self.flush():
+                self._unregister()
+                return True
+
+        async with self._lock:
+            message = dict(self.pending)
+            try:
+                result = await asyncio.to_thread(
+                    Chats.upsert_message_to_chat_by_id_and_message_id,
+                    self.chat_id,
+                    self.message_id,
+                    message,
+                )
+            except Exception as e:
+                log.exception(f"Error saving message {self.message_id}: {e}")
+                result = None
+
+            if result is None:
+                log.error(
+                    f"Message {self.message_id} of chat {self.chat_id} could not be "
+                    "saved, it is retried on shutdown"
+                )
+                return False
+
+            for key, value in message.items():
+                if self.pending.get(key) is value:
+                    del self.pending[key]
+
+        self._unregister()
+        return True
+
+
+async def add_message_status(chat_id: str, message_id: str, status: dict):
+    """
+    Add a status to the message once the save of it in progress is written,
+    so the two writes of its overlay row do not interleave.
+    """
+    buffer = MESSAGE_SAVE_BUFFERS.get((chat_id, message_id))
+    if buffer is None:
+        return await Chats.aadd_message_status_to_chat_by_id_and_message_id(
+            chat_id, message_id, status
+        )
+
+    async with buffer._lock:
+        return await Chats.aadd_message_status_to_chat_by_id_and_message_id(
+            chat_id, message_id, status
+        )
+
+
+async def flush_message_save_buffers():
+    """Write out every pending streamed message, e.g. on shutdown."""
+    for buffer in list(MESSAGE_SAVE_BUFFERS.values()):
+        await buffer.close()
+
+
+def save_message_save_buffers():
+    # Last resort at interpreter exit, when no event loop is left to flush on
+    for (chat_id, message_id), buffer in list(MESSAGE_SAVE_BUFFERS.items()):
+        if buffer.pending:
+            Chats.upsert_message_to_chat_by_id_and_message_id(
+                chat_id, message_id, buffer.pending
+            )
+    MESSAGE_SAVE_BUFFERS.clear()
+
+
+atexit.register(save_message_save_buffers)
@@ -0,0 +1,322 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from open_webui.internal.db import run_db
+from open_webui.models.functions import Function
+from open_webui.models.table_versions import TableVersions
+from open_webui.models.models import Model
+from open_webui.env import SRC_LOG_LEVELS, MODEL_LIST_CACHE_TTL
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+@dataclass
+class ModelSource:
+    """A backend providing base models, e.g. the OpenAI connections."""
+
+    # async fetch(request, user) -> list of models
+    fetch: Callable[[Any, Any], Awaitable[list[dict]]]
+    # Config the list depends on; when it changes the list is refetched at once
+    get_config_key: Callable[[Any], Any] = lambda config: None
+    # Whether the list depends on Function rows (pipes)
+    uses_functions: bool = False
+
+
+@dataclass
+class ModelSourceState:
+    models: list[dict] = field(default_factory=list)
+    version: int = 0
+    digest: Optional[str] = None
+    config_key: Optional[str] = None
+    loaded: bool = False
+    refreshed_at: float = 0.0
+    healthy: bool = True
+    error: Optional[str] = None
+    failures: int = 0
+    task: Optional[asyncio.Task] = None
+
+
+@dataclass
+class ModelsSnapshot:
+    version: int
+    key: tuple
+    models: list[dict]
+    by_id: dict[str, dict]
+    # base_model_id -> custom models built on top of it
+    by_base_id: dict[str, list[dict]]
+
+
+def get_digest(value) -> str:
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+# Version counters of the tracked tables, see `register_model_change_listeners`
+TRACKED_TABLES = {Model: "model", Function: "function"}
+
+
+def get_models_db_fingerprint() -> tuple:
+    """Versions of the model and function tables."""
+    return TableVersions.get_versions(list(TRACKED_TABLES.values()))
+
+
+class ModelRegistry:
+    """
+    Versioned snapshot of all models served by /api/models and used by chat
+    completions.
+
+    Each source's base model list is kept with its own refresh time and health:
+    lists older than `ttl` are served while they are refreshed in the
+    background, and a failing backend keeps its last list. The merged view
+    (custom models, arena models, actions and filters) is only rebuilt when a
+    source list, the arena config or a Model/Function row changed, so looking
+    models up by id is a dict access against the current snapshot.
+
+    Model/Function changes made by this instance invalidate the snapshot
+    immediately; changes made by other instances are picked up by comparing
+    the tables' version counters, checked every `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        sources: dict[str, ModelSource],
+        build: Callable[[Any, list[dict]], Awaitable[list[dict]]],
+        get_config_key: Callable[[Any], Any] = lambda config: None,
+        ttl: float = MODEL_LIST_CACHE_TTL,
+    ):
+        self.sources = sources
+        self.build = build
+        self.get_config_key = get_config_key
+        self.ttl = ttl
+
+        self.states = {name: ModelSourceState() for name in sources}
+        self.snapshot: Optional[ModelsSnapshot] = None
+
+        # Bumped on local Model/Function changes, and on Function changes only
+        self.generation = 0
+        self.function_generation = 0
+        self.db_fingerprint: Optional[tuple] = None
+        self.db_checked_at = 0.0
+        self.db_task: Optional[asyncio.Task] = None
+
+        self._lock: Optional[asyncio.Lock] = None
+        self.metrics = {"hits": 0, "rebuilds": 0, "refreshes": 0, "errors": 0}
+
+    def invalidate(self, functions: bool = True):
+        self.generation += 1
+        if functions:
+            self.function_generation += 1
+            for name, source in self.sources.items():
+                if source.uses_functions:
+                    self.states[name].loaded = False
+
+    @property
+    def functions_version(self) -> tuple:
+        """Changes whenever a Function row changes, locally or on another instance."""
+        return (
+            self.function_generation,
+            self.db_fingerprint[1] if self.db_fingerprint else None,
+        )
+
+    async def refresh_source(self, name: str, request, user=None):
+        source = self.sources[name]
+        state = self.states[name]
+        config_key = get_digest(source.get_config_key(request.app.state.config))
+
+        self.metrics["refreshes"] += 1
+        try:
+            models = await source.fetch(request, user)
+        except Exception as e:
+            log.warning(f"Error refreshing the {name} model list: {e}")
+            self.metrics["errors"] += 1
+            state.healthy = False
+            state.error = str(e)
+            state.failures += 1
+            # Keep the last list and retry after the TTL
+            state.refreshed_at = time.monotonic()
+            if not state.loaded or state.config_key != config_key:
+                state.models = []
+                state.version += 1
+                state.digest = None
+            state.config_key = config_key
+            state.loaded = True
+            return
+
+        digest = get_digest(models)
+        if digest != state.digest:
+            state.models = models
+            state.digest = digest
+            state.version += 1
+
+        state.config_key = config_key
+        state.loaded = True
+        state.refreshed_at = time.monotonic()
+        state.healthy = True
+        state.error = None
+        state.failures = 0
+
+    def schedule_refresh(self, name: str, request, user=None):
+        state = self.states[name]
+        if state.task is None or state.task.done():
+            state.task = asyncio.create_task(self.refresh_source(name, request, user))
+
+    async def check_db_fingerprint(self):
+        self.db_checked_at = time.monotonic()
+        try:
+            self.db_fingerprint = await run_db(get_models_db_fingerprint)
+        except Exception as e:
+            log.warning(f"Error checking the model tables for changes: {e}")
+
+    async def get_snapshot(self, request, user=None, refresh: bool = False):
+        config = request.app.state.config
+        now = time.monotonic()
+
+        pending = []
+        for name, source in self.sources.items():
+            state = self.states[name]
+            if (
+                refresh
+                or not state.loaded
+                or state.config_key != get_digest(source.get_config_key(config))
+            ):
+                pending.append(self.refresh_source(name, request, user))
+            elif now - state.refreshed_at > self.ttl:
+                self.schedule_refresh(name, request, user)
+
+        if refresh or self.db_fingerprint is None:
+            pending.append(self.check_db_fingerprint())
+        elif now - self.db_checked_at > self.ttl and (
+            self.db_task is None or self.db_task.done()
+        ):
+            self.db_task = asyncio.create_task(self.check_db_fingerprint())
+
+        if pending:
+            await asyncio.gather(*pending)
+
+        key = (
+            tuple(state.version for state in self.states.values()),
+            self.generation,
+            self.db_fingerprint,
+            get_digest(self.get_config_key(config)),
+        )
+
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.key == key:
+            self.metrics["hits"] += 1
+            return snapshot
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self.snapshot is not None and self.snapshot.key == key:
+                return self.snapshot
+
+            base_models = [
+                dict(model)
+                for model in chain.from_iterable(
+                    state.models for state in self.states.values()
+                )
+            ]
+            models = await self.build(request, base_models)
+
+            by_base_id = {}
+            for model in models:
+                base_model_id = (model.get("info") or {}).get("base_model_id")
+                if base_model_id:
+                    by_base_id.setdefault(base_model_id, []).append(model)
+
+            self.snapshot = ModelsSnapshot(
+                version=(snapshot.version + 1) if snapshot else 1,
+                key=key,
+                models=models,
+                by_id={model["id"]: model for model in models},
+                by_base_id=by_base_id,
+            )
+            self.metrics["rebuilds"] += 1
+            log.debug(
+                f"Rebuilt models snapshot v{self.snapshot.version} "
+                f"with {len(models)} models"
+            )
+
+            if models:
+                request.app.state.MODELS = self.snapshot.by_id
+            return self.snapshot
+
+    def get_metrics(self) -> dict:
+        now = time.monotonic()
+        return {
+            **self.metrics,
+            "version": self.snapshot.version if self.snapshot else 0,
+            "models": len(self.snapshot.models) if self.snapshot else 0,
+            "sources": {
+                name: {
+                    "models": len(state.models),
+                    "version": state.version,
+                    "healthy": state.healthy,
+                    "error": state.error,
+                    "failures": state.failures,
+                    "age": now - state.refreshed_at if state.loaded else None,
+                }
+                for name, state in self.states.items()
+            },
+        }
+
+
+def register_model_change_listeners(registry: ModelRegistry):
+    """
+    Invalidate `registry` when a session commits changes to Model or Function
+    rows, including bulk query updates and deletes, and bump the versions of
+    their tables in the same transaction for the other instances.
+    """
+    tracked = tuple(TRACKED_TABLES)
+
+    @event.listens_for(Session, "after_flush")
+    def track_flush(session, flush_context):
+        for obj in chain(session.new, session.dirty, session.deleted):
+            if isinstance(obj, tracked):
+                session.info.setdefault("models_changed", set()).add(type(obj))
+
+    @event.listens_for(Session, "do_orm_execute")
+    def track_bulk_changes(orm_execute_state):
+        if orm_execute_state.is_update or orm_execute_state.is_delete:
+            for mapper in orm_execute_state.all_mappers:
+                if mapper.class_ in tracked:
+                    orm_execute_state.session.info.setdefault(
+                        "models_changed", set()
+                    ).add(mapper.class_)
+
+    @event.listens_for(Session, "before_commit")
+    def bump_versions(session):
+        # Changes not flushed yet are flushed after this
+        changed = session.info.get("models_changed", set()) | {
+            type(obj)
+            for obj in chain(session.new, session.dirty, session.deleted)
+            if isinstance(obj, tracked)
+            and (obj not in session.dirty or session.is_modified(obj))
+        }
+        if changed:
+            TableVersions.bump_versions(
+                session, [TRACKED_TABLES[table] for table in changed]
+            )
+
+    @event.listens_for(Session, "after_commit")
+    def invalidate_on_commit(session):
+        changed = session.info.pop("models_changed", None)
+        if changed:
+            registry.invalidate(functions=Function in changed)
+
+    @event.listens_for(Session, "after_rollback")
+    def discard_on_rollback(session):
+        session.info.pop("models_changed", None)
@@ -19,6 +19,12 @@ from open_webui.utils.plugin import (
     get_function_module_from_cache,
 )
 from open_webui.utils.access_control import has_access
+from open_webui.utils.model_registry import (
+    ModelRegistry,
+    ModelSource,
+    ModelsSnapshot,
+    register_model_change_listeners,
+)
 
 
 from open_webui.config import (
@@ -76,114 +82,132 @@ async def get_all_base_models(request: Request, user: UserModel = None):
     return function_models + openai_models + ollama_models
 
 
-async def get_all_models(request, user: UserModel = None):
-    models = await get_all_base_models(request, user=user)
+def get_arena_models(request) -> list[dict]:
+    if len(request.app.state.config.EVALUATION_ARENA_MODELS) > 0:
+        return [
+            {
+                "id": model["id"],
+                "name": model["name"],
+                "info": {
+                    "meta": model["meta"],
+                },
+                "object": "model",
+                "created": int(time.time()),
+                "owned_by": "arena",
+                "arena": True,
+            }
+            for model in request.app.state.config.EVALUATION_ARENA_MODELS
+        ]
+    else:
+        # Add default arena model
+        return [
+            {
+                "id": DEFAULT_ARENA_MODEL["id"],
+                "name": DEFAULT_ARENA_MODEL["name"],
+                "info": {
+                    "meta": DEFAULT_ARENA_MODEL["meta"],
+                },
+                "object": "model",
+                "created": int(time.time()),
+                "owned_by": "arena",
+                "arena": True,
+            }
+        ]
+
 
+async def build_all_models(request, models: list[dict]) -> list[dict]:
+    """
+    Merge custom models, arena models, actions and filters into the base
+    `models` (which are modified in place).
+    """
     # If there are no models, return an empty list
     if len(models) == 0:
         return []
 
     # Add arena models
     if request.app.state.config.ENABLE_EVALUATION_ARENA_MODELS:
-        arena_models = []
-        if len(request.app.state.config.EVALUATION_ARENA_MODELS) > 0:
-            arena_models = [
-                {
-                    "id": model["id"],
-                    "name": model["name"],
-                    "info": {
-                        "meta": model["meta"],
-                    },
-                    "object": "model",
-                    "created": int(time.time()),
-                    "owned_by": "arena",
-                    "arena": True,
-                }
-                for model in request.app.state.config.EVALUATION_ARENA_MODELS
-            ]
-        else:
-            # Add default arena model
-            arena_models = [
-                {
-                    "id": DEFAULT_ARENA_MODEL["id"],
-                    "name": DEFAULT_ARENA_MODEL["name"],
-                    "info": {
-                        "meta": DEFAULT_ARENA_MODEL["meta"],
-                    },
-                    "object": "model",
-                    "created": int(time.time()),
-                    "owned_by": "arena",
-                    "arena": True,
-                }
-            ]
-        models = models + arena_models
-
+        models = models + get_arena_models(request)
+
+    action_functions = {
+        function.id: function
+        for function in await Functions.aget_functions_by_type(
+            "action", active_only=True
+        )
+    }
+    filter_functions = {
+        function.id: function
+        for function in await Functions.aget_functions_by_type(
+            "filter", active_only=True
+        )
+    }
     global_action_ids = [
-        function.id for function in Functions.get_global_action_functions()
-    ]
-    enabled_action_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("action", active_only=True)
+        function.id for function in action_functions.values() if function.is_global
     ]
-
     global_filter_ids = [
-        function.id for function in Functions.get_global_filter_functions()
-    ]
-    enabled_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
+        function.id for function in filter_functions.values() if function.is_global
     ]
 
-    custom_models = Models.get_all_models()
+    # Models by id, and by id or Ollama model name (without the tag) for
+    # looking up base models, in list order
+    models_by_id = {}
+    models_by_name: dict[str, list[dict]] = {}
+    removed = set()
+
+    def index_model(model):
+        models_by_id.setdefault(model["id"], model)
+        models_by_name.setdefault(model["id"], []).append(model)
+        name = model["id"].split(":")[0]
+        if name != model["id"]:
+            models_by_name.setdefault(name, []).append(model)
+
+    for model in models:
+        index_model(model)
+
+    custom_models = await Models.aget_all_models()
     for custom_model in custom_models:
         if custom_model.base_model_id is None:
-            for model in models:
-                if custom_model.id == model["id"] or (
-                    model.get("owned_by") == "ollama"
-                    and custom_model.id
-                    == model["id"].split(":")[
-                        0
-                    ]  # Ollama may return model ids in different formats (e.g., 'llama3' vs. 'llama3:7b')
-                ):
-                    if custom_model.is_active:
-                        model["name"] = custom_model.name
-                        model["info"] = custom_model.model_dump()
-
-                        # Set action_ids and filter_ids
-                        action_ids = []
-                        filter_ids = []
-
-                        if "info" in model and "meta" in model["info"]:
-                            action_ids.extend(
-                                model["info"]["meta"].get("actionIds", [])
-                            )
-                            filter_ids.extend(
-                                model["info"]["meta"].get("filterIds", [])
-                            )
-
-                        model["action_ids"] = action_ids
-                        model["filter_ids"] = filter_ids
-                    else:
-                        models.remove(model)
-
-        elif custom_model.is_active and (
-            custom_model.id not in [model["id"] for model in models]
-        ):
+            # Ollama may return model ids in different formats (e.g., 'llama3' vs. 'llama3:7b')
+            matches = [
+                model
+                for model in models_by_name.get(custom_model.id, [])
+                if id(model) not in removed
+                and (
+                    custom_model.id == model["id"] or model.get("owned_by") == "ollama"
+                )
+            ]
+            for model in matches:
+                if custom_model.is_active:
+                    model["name"] = custom_model.name
+                    model["info"] = custom_model.model_dump()
+
+                    # Set action_ids and filter_ids
+                    meta = model["info"].get("meta") or {}
+                    model["action_ids"] = list(meta.get("actionIds", []))
+                    model["filter_ids"] = list(meta.get("filterIds", []))
+                else:
+                    removed.add(id(model))
+                    if models_by_id.get(model["id"]) is model:
+                        del models_by_id[model["id"]]
+
+        elif custom_model.is_active and custom_model.id not in models_by_id:
             owned_by = "openai"
             pipe = None
 
             action_ids = []
             filter_ids = []
 
-            for model in models:
-                if (
-                    custom_model.base_model_id == model["id"]
-                    or custom_model.base_model_id == model["id"].split(":")[0]
-                ):
-                    owned_by = model.get("owned_by", "unknown owner")
-                    if "pipe" in model:
-                        pipe = model["pipe"]
-                    break
+            base_model = next(
+                (
+                    model
+                    for model in models_by_name.get(custom_model.base_model_id, [])
+                    if id(model) not in removed
+                ),
+                None,
+            )
+            if base_model is not None:
+                owned_by = base_model.get("owned_by", "unknown owner")
+                if "pipe" in base_model:
+                    pipe = base_model["pipe"]
 
             if custom_model.meta:
                 meta = custom_model.meta.model_dump()
@@ -194,20 +218,22 @@ async def get_all_models(request, user: UserModel = None):
                 if "filterIds" in meta:
                     filter_ids.extend(meta["filterIds"])
 
-            models.append(
-                {
-                    "id": f"{custom_model.id}",
-                    "name": custom_model.name,
-                    "object": "model",
-                    "created": custom_model.created_at,
-                    "owned_by": owned_by,
-                    "info": custom_model.model_dump(),
-                    "preset": True,
-                    **({"pipe": pipe} if pipe is not None else {}),
-                    "action_ids": action_ids,
-                    "filter_ids": filter_ids,
-                }
-            )
+            model = {
+                "id": f"{custom_model.id}",
+                "name": custom_model.name,
+                "object": "model",
+                "created": custom_model.created_at,
+                "owned_by": owned_by,
+                "info": custom_model.model_dump(),
+                "preset": True,
+                **({"pipe": pipe} if pipe is not None else {}),
+                "action_ids": action_ids,
+                "filter_ids": filter_ids,
+            }
+            models.append(model)
+            index_model(model)
+
+    models = [model for model in models if id(model) not in removed]
 
     # Process action_ids to get the actions
     def get_action_items_from_module(function, module):
@@ -253,6 +279,10 @@ async def get_all_models(request, user: UserModel = None):
             }
         ]
 
+    # The items of a function are the same for every model using it
+    action_items = {}
+    filter_items = {}
+
     def get_function_module_by_id(function_id):
         function_module, _, _ = get_function_module_from_cache(request, function_id)
         return function_module
@@ -261,42 +291,96 @@ async def get_all_models(request, user: UserModel = None):
         action_ids = [
             action_id
             for action_id in list(set(model.pop("action_ids", []) + global_action_ids))
-            if action_id in enabled_action_ids
+            if action_id in action_functions
         ]
         filter_ids = [
             filter_id
             for filter_id in list(set(model.pop("filter_ids", []) + global_filter_ids))
-            if filter_id in enabled_filter_ids
+            if filter_id in filter_functions
         ]
 
         model["actions"] = []
         for action_id in action_ids:
-            action_function = Functions.get_function_by_id(action_id)
-            if action_function is None:
-                raise Exception(f"Action not found: {action_id}")
-
-            function_module = get_function_module_by_id(action_id)
-            model["actions"].extend(
-                get_action_items_from_module(action_function, function_module)
-            )
+            if action_id not in action_items:
+                action_items[action_id] = get_action_items_from_module(
+                    action_functions[action_id], get_function_module_by_id(action_id)
+                )
+            model["actions"].extend(action_items[action_id])
 
         model["filters"] = []
         for filter_id in filter_ids:
-            filter_function = Functions.get_function_by_id(filter_id)
-            if filter_function is None:
-                raise Exception(f"Filter not found: {filter_id}")
+            if filter_id not in filter_items:
+                function_module = get_function_module_by_id(filter_id)
+                filter_items[filter_id] = (
+                    get_filter_items_from_module(
+                        filter_functions[filter_id], function_module
+                    )
+                    if getattr(function_module, "toggle", None)
+                    else []
+                )
+            model["filters"].extend(filter_items[filter_id])
 
-            function_module = get_function_module_by_id(filter_id)
+    log.debug(f"build_all_models() returned {len(models)} models")
+    return models
 
-            if getattr(function_module, "toggle", None):
-                model["filters"].extend(
-                    get_filter_items_from_module(filter_function, function_module)
-                )
 
-    log.debug(f"get_all_models() returned {len(models)} models")
+async def fetch_function_models(request: Request, user: UserModel = None):
+    return await get_function_models(request)
 
-    request.app.state.MODELS = {model["id"]: model for model in models}
-    return models
+
+async def fetch_enabled_openai_models(request: Request, user: UserModel = None):
+    if not request.app.state.config.ENABLE_OPENAI_API:
+        return []
+    return await fetch_openai_models(request, user)
+
+
+async def fetch_enabled_ollama_models(request: Request, user: UserModel = None):
+    if not request.app.state.config.ENABLE_OLLAMA_API:
+        return []
+    return await fetch_ollama_models(request, user)
+
+
+# Same order as get_all_base_models
+MODEL_REGISTRY = ModelRegistry(
+    sources={
+        "functions": ModelSource(fetch=fetch_function_models, uses_functions=True),
+        "openai": ModelSource(
+            fetch=fetch_enabled_openai_models,
+            get_config_key=lambda config: [
+                config.ENABLE_OPENAI_API,
+                config.OPENAI_API_BASE_URLS,
+                config.OPENAI_API_KEYS,
+                config.OPENAI_API_CONFIGS,
+            ],
+        ),
+        "ollama": ModelSource(
+            fetch=fetch_enabled_ollama_models,
+            get_config_key=lambda config: [
+                config.ENABLE_OLLAMA_API,
+                config.OLLAMA_BASE_URLS,
+                config.OLLAMA_API_CONFIGS,
+            ],
+        ),
+    },
+    build=build_all_models,
+    get_config_key=lambda config: [
+        config.ENABLE_EVALUATION_ARENA_MODELS,
+        config.EVALUATION_ARENA_MODELS,
+    ],
+)
+register_model_change_listeners(MODEL_REGISTRY)
+
+
+async def get_models_snapshot(
+    request, user: UserModel = None, refresh: bool = False
+) -> ModelsSnapshot:
+    return await MODEL_REGISTRY.get_snapshot(request, user=user, refresh=refresh)
+
+
+async def get_all_models(request, user: UserModel = None, refresh: bool = False):
+    snapshot = await get_models_snapshot(request, user=user, refresh=refresh)
+    # Copies, so callers can annotate them without changing the snapshot
+    return [dict(model) for model in snapshot.models]
 
 
 def check_model_access(user, model):
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    AIOHTTP_CLIENT_POOL_SIZE,
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_MAX_SESSIONS,
+    AIOHTTP_CLIENT_TIMEOUT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Requests time out after AIOHTTP_CLIENT_TIMEOUT (600s for model downloads),
+# without a timeout their responses are given an hour
+CLIENT_SESSION_CLOSE_DELAY = max(AIOHTTP_CLIENT_TIMEOUT or 3600, 600)
+
+
+def get_base_url(url: str) -> str:
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+class ClientSessionPool:
+    """
+    App-lifetime aiohttp sessions for the upstream model backends.
+
+    One session (and connection pool) is kept per base URL, so requests to the
+    same backend reuse its keep-alive connections and cached DNS lookups
+    instead of paying a new TCP/TLS handshake each time. Timeouts are passed
+    per request since the sessions are shared, and cookies are not kept, so
+    one user's requests never carry cookies set in response to another's.
+
+    At most `max_sessions` sessions are kept. Beyond that the least recently
+    used one is no longer handed out, and closed `close_delay` seconds later,
+    once the requests already sent with it have completed or timed out. The
+    same goes for a session replaced because it was requested from another
+    event loop than the one it was created on.
+    """
+
+    def __init__(
+        self,
+        limit: int = AIOHTTP_CLIENT_POOL_SIZE,
+        keepalive_timeout: float = AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache: Optional[int] = AIOHTTP_CLIENT_DNS_CACHE_TTL,
+        max_sessions: int = AIOHTTP_CLIENT_MAX_SESSIONS,
+        close_delay: float = CLIENT_SESSION_CLOSE_DELAY,
+    ):
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.max_sessions = max_sessions
+        self.close_delay = close_delay
+
+        self.sessions: OrderedDict[str, aiohttp.ClientSession] = OrderedDict()
+        # Event loop each session was created on
+        self.loops: dict[str, asyncio.AbstractEventLoop] = {}
+        self.requests: dict[str, int] = {}
+        # Evicted sessions -> their scheduled close
+        self.evicted: dict[aiohttp.ClientSession, asyncio.TimerHandle] = {}
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        base_url = get_base_url(url)
+        self.requests[base_url] = self.requests.get(base_url, 0) + 1
+
+        loop = asyncio.get_running_loop()
+        session = self.sessions.get(base_url)
+        if session is None or session.closed or self.loops.get(base_url) is not loop:
+            if session is not None:
+                # Created on another event loop, it can't be used on this one
+                self._schedule_close(session, self.loops.get(base_url))
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.ttl_dns_cache,
+                    use_dns_cache=self.ttl_dns_cache is not None,
+                ),
+                trust_env=True,
+                # Shared by all users
+                cookie_jar=aiohttp.DummyCookieJar(),
+                # Timeouts are set per request
+                timeout=aiohttp.ClientTimeout(total=None),
+            )
+            self.sessions[base_url] = session
+            self.loops[base_url] = loop
+            log.debug(f"Created client session for {base_url}")
+
+        self.sessions.move_to_end(base_url)
+        self._evict(loop)
+        return session
+
+    def _evict(self, loop: asyncio.AbstractEventLoop):
+        # The session just handed out is the most recently used one
+        while len(self.sessions) > max(self.max_sessions, 1):
+            base_url, session = self.sessions.popitem(last=False)
+            session_loop = self.loops.pop(base_url, None)
+            self.requests.pop(base_url, None)
+            self._schedule_close(session, session_loop)
+            log.debug(f"Evicted client session for {base_url}")
+
+    def _schedule_close(
+        self,
+        session: aiohttp.ClientSession,
+        loop: Optional[asyncio.AbstractEventLoop],
+    ):
+        """
+        Close a session no longer handed out `close_delay` seconds later, on the
+        event loop it was created on. Sessions of a closed loop went with it.
+        """
+        if session.closed or loop is None or loop.is_closed():
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if loop is running_loop:
+            self.evicted[session] = loop.call_later(
+                self.close_delay, self._close_evicted, session
+            )
+        elif loop.is_running():
+            loop.call_soon_threadsafe(self._schedule_close, session, loop)
+
+    def _close_evicted(self, session: aiohttp.ClientSession):
+        self.evicted.pop(session, None)
+        asyncio.get_running_loop().create_task(session.close())
+
+    def get_metrics(self) -> dict:
+        metrics = {}
+        for base_url, session in self.sessions.items():
+            connector = session.connector
+            if connector is None or connector.closed:
+                continue
+
+            # aiohttp does not expose these counters publicly
+            acquired = len(getattr(connector, "_acquired", ()))
+            idle = sum(
+                len(conns) for conns in getattr(connector, "_conns", {}).values()
+            )
+            metrics[base_url] = {
+                "limit": connector.limit,
+                "acquired": acquired,
+                "idle": idle,
+                "utilization": acquired / connector.limit if connector.limit else 0.0,
+                "requests": self.requests.get(base_url, 0),
+            }
+        return metrics
+
+    async def close(self):
+        sessions = list(self.sessions.values())
+        self.sessions = OrderedDict()
+        self.loops = {}
+
+        for session, handle in self.evicted.items():
+            handle.cancel()
+            sessions.append(session)
+        self.evicted = {}
+
+        for session in sessions:
+            try:
+                await session.close()
+            except Exception as e:
+                log.warning(f"Error closing client session: {e}")
+
+
+CLIENT_SESSION_POOL = ClientSessionPool()
+
+
+def get_client_session(url: str) -> aiohttp.ClientSession:
+    return CLIENT_SESSION_POOL.get_session(url)
+
+
+async def release_response(response: Optional[aiohttp.ClientResponse]):
+    """
+    Return the connection of a (streamed) response to its pool. It is only
+    reused if the body was read completely, otherwise it is closed.
+    """
+    if response:
+        response.release()
@@ -72,7 +72,13 @@ export const importChat = async (
 	return res;
 };
 
-export const getChatList = async (token: string = '', page: number | null = null) => {
+export const getChatListCursor = (chat) => `${chat.updated_at}:${chat.id}`;
+
+export const getChatList = async (
+	token: string = '',
+	page: number | null = null,
+	cursor: string | null = null
+) => {
 	let error = null;
 	const searchParams = new URLSearchParams();
 
@@ -80,6 +86,11 @@ export const getChatList = async (token: string = '', page: number | null = null
 		searchParams.append('page', `${page}`);
 	}
 
+	// Continues after the chat the cursor points to, see getChatListCursor
+	if (cursor !== null) {
+		searchParams.append('cursor', cursor);
+	}
+
 	const res = await fetch(`${WEBUI_API_BASE_URL}/chats/?${searchParams.toString()}`, {
 		method: 'GET',
 		headers: {
@@ -1,6 +1,18 @@
-import { WEBUI_API_BASE_URL } from '$lib/constants';
+import { get } from 'svelte/store';
 
-export const uploadFile = async (token: string, file: File, metadata?: object | null) => {
+import { WEBUI_API_BASE_URL } from '$lib/constants';
+import { socket } from '$lib/stores';
+
+// Longest wait for an uploaded file to be processed, in milliseconds
+export const FILE_PROCESSING_TIMEOUT = 10 * 60 * 1000;
+
+export const uploadFile = async (
+	token: string,
+	file: File,
+	metadata?: object | null,
+	wait: boolean = true,
+	signal?: AbortSignal
+) => {
 	const data = new FormData();
 	data.append('file', file);
 	if (metadata) {
@@ -15,7 +27,8 @@ export const uploadFile = async (token: string, file: File, metadata?: object |
 			Accept: 'application/json',
 			authorization: `Bearer ${token}`
 		},
-		body: data
+		body: data,
+		signal
 	})
 		.then(async (res) => {
 			if (!res.ok) throw await res.json();
@@ -31,9 +44,128 @@ export const uploadFile = async (token: string, file: File, metadata?: object |
 		throw error;
 	}
 
+	// Files are processed in the background, wait for their content unless told otherwise
+	if (res && wait && res?.data?.status === 'pending') {
+		const result = await waitForFileProcessing(token, res.id, null, { signal });
+		const processedFile = await getFileById(token, res.id).catch(() => null);
+
+		return {
+			...(processedFile ?? res),
+			...(result?.status === 'failed' ? { error: result?.error ?? 'Failed to process file' } : {})
+		};
+	}
+
+	return res;
+};
+
+export const getFileProcessStatusById = async (
+	token: string,
+	id: string,
+	collectionName: string | null = null
+) => {
+	let error = null;
+
+	const searchParams = new URLSearchParams();
+	if (collectionName) {
+		searchParams.append('collection_name', collectionName);
+	}
+
+	const res = await fetch(
+		`${WEBUI_API_BASE_URL}/files/${id}/process/status?${searchParams.toString()}`,
+		{
+			method: 'GET',
+			headers: {
+				Accept: 'application/json',
+				'Content-Type': 'application/json',
+				authorization: `Bearer ${token}`
+			}
+		}
+	)
+		.then(async (res) => {
+			if (!res.ok) throw await res.json();
+			return res.json();
+		})
+		.catch((err) => {
+			error = err.detail;
+			console.error(err);
+			return null;
+		});
+
+	if (error) {
+		throw error;
+	}
+
 	return res;
 };
 
+export const waitForFileProcessing = async (
+	token: string,
+	id: string,
+	collectionName: string | null = null,
+	{
+		pollInterval = 2000,
+		timeout = FILE_PROCESSING_TIMEOUT,
+		signal
+	}: { pollInterval?: number; timeout?: number; signal?: AbortSignal } = {}
+): Promise<{ status: string; error?: string | null }> => {
+	// Progress is pushed as file-events, the status is polled as well in case
+	// the socket is not connected. Rejects once `timeout` passes or `signal`
+	// aborts, e.g. when no ingestion worker is running.
+	const _socket = get(socket);
+
+	return new Promise((resolve, reject) => {
+		let interval = null;
+		let deadline = null;
+
+		const cleanup = () => {
+			clearInterval(interval);
+			clearTimeout(deadline);
+			_socket?.off('file-events', fileEventHandler);
+			signal?.removeEventListener('abort', abortHandler);
+		};
+
+		const finish = (result) => {
+			cleanup();
+			resolve(result);
+		};
+
+		const abortHandler = () => {
+			cleanup();
+			reject(signal?.reason ?? new Error('File processing was aborted'));
+		};
+
+		if (signal?.aborted) {
+			abortHandler();
+			return;
+		}
+		signal?.addEventListener('abort', abortHandler);
+
+		deadline = setTimeout(() => {
+			cleanup();
+			reject(new Error('Timed out waiting for the file to be processed'));
+		}, timeout);
+
+		const fileEventHandler = (event) => {
+			if (
+				event?.file_id === id &&
+				(event?.collection_name ?? null) === collectionName &&
+				['completed', 'failed'].includes(event?.status)
+			) {
+				finish(event);
+			}
+		};
+
+		_socket?.on('file-events', fileEventHandler);
+
+		interval = setInterval(async () => {
+			const res = await getFileProcessStatusById(token, id, collectionName).catch(() => null);
+			if (res && ['completed', 'failed'].includes(res.status)) {
+				finish(res);
+			}
+		}, pollInterval);
+	});
+};
+
 export const uploadDir = async (token: string) => {
 	let error = null;
 